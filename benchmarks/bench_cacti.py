@@ -0,0 +1,95 @@
+"""
+Benchmark of the CACTI cost extraction of a sweep of SRAM sizes and bandwidths: one `cacti_top.py` subprocess per
+memory (as done before batching), a batch with a single worker and a batch with a worker pool. Every variant starts
+from an empty temporary memory pool (in the cacti_master folder) and the pools are removed afterwards.
+
+Usage: python benchmarks/bench_cacti.py [--sizes 8 16 32 64] [--bandwidths 64 128] [--nb-workers 8]
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
+from zigzag.cacti.memory_pool import MemoryPool
+
+CACTI_MASTER_PATH = os.path.join(CactiParser.cacti_path, "cacti_master")
+
+
+def create_items_with_subprocesses(points: list[CactiPoint], mem_pool_path: str) -> dict[CactiPoint, float]:
+    """! Extract every memory with a cacti_top.py subprocess, one after the other"""
+    run_times: dict[CactiPoint, float] = {}
+    for point in points:
+        start = time.perf_counter()
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(CACTI_MASTER_PATH, "cacti_top.py"),
+                "--mem_type",
+                point.mem_type,
+                "--cache_size",
+                str(int(point.size / 8)),
+                "--IO_bus_width",
+                str(point.r_bw),
+                "--ex_rd_port",
+                str(point.r_port),
+                "--ex_wr_port",
+                str(point.w_port),
+                "--rd_wr_port",
+                str(point.rw_port),
+                "--bank_count",
+                str(point.bank),
+                "--mem_pool_path",
+                mem_pool_path,
+                "--technology",
+                str(point.technology),
+            ],
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        run_times[point] = time.perf_counter() - start
+    return run_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64], help="SRAM sizes in KiB")
+    parser.add_argument("--bandwidths", type=int, nargs="+", default=[64, 128], help="read bandwidths in bit")
+    parser.add_argument("--nb-workers", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    points = [
+        CactiPoint("sram", size * 1024 * 8, bandwidth, 1, 1, 0, 1)
+        for size in args.sizes
+        for bandwidth in args.bandwidths
+    ]
+    variants = {
+        "subprocess per memory": lambda pool_path: create_items_with_subprocesses(points, pool_path),
+        "batch, 1 worker": lambda pool_path: CactiParser().create_items(points, 1, pool_path),
+        "batch, worker pool": lambda pool_path: CactiParser().create_items(points, args.nb_workers, pool_path),
+    }
+
+    print(f"Extracting the costs of {len(points)} memories with CACTI")
+    for variant_idx, (name, create_items) in enumerate(variants.items()):
+        mem_pool_path = os.path.join(CACTI_MASTER_PATH, f"bench_mem_pool_{os.getpid()}_{variant_idx}.yaml")
+        open(mem_pool_path, "w", encoding="UTF-8").close()
+        try:
+            start = time.perf_counter()
+            run_times = create_items(mem_pool_path)
+            total_time = time.perf_counter() - start
+            assert all(MemoryPool.load(mem_pool_path).contains(point.key, point.mem_type) for point in points)
+        finally:
+            for path in (mem_pool_path, f"{mem_pool_path}.lock"):
+                if os.path.exists(path):
+                    os.remove(path)
+        print(f"{name}: {total_time:.2f} s in total")
+        for point, run_time in run_times.items():
+            print(f"    {point.size // 8:>9} B, {point.r_bw:>4} bit: {run_time:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Micro-benchmark of the time spent hashing (and constructing) operands, memory levels, spatial mappings and port
+activities per CostModelEvaluation. The current (interned and cached) hashes are compared with the legacy scheme that
+computed a SHA-512 over the pickled object on every call (or construction, for operands). The number of calls per
+CostModelEvaluation is counted with cProfile, the time per call is measured with timeit.
+
+Usage: python benchmarks/bench_hashing.py [--accelerator ...] [--workload ...] [--mapping ...] [--nb-cmes 200]
+"""
+
+import argparse
+import cProfile
+import logging
+import pstats
+import timeit
+from typing import Any
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.cost_model.port_activity import PortActivity
+from zigzag.datatypes import LayerDim, LayerOperand
+from zigzag.hardware.architecture.memory_port import DataDirection
+from zigzag.opt.loma.engine import LomaEngine
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import hash_sha512, open_yaml
+
+# (file name, function name) of the profiled functions -> reported name
+HASH_FUNCTIONS = {
+    ("datatypes.py", "__call__"): "operand construction",
+    ("memory_level.py", "__hash__"): "MemoryLevel.__hash__",
+    ("spatial_mapping.py", "__hash__"): "SpatialMapping.__hash__",
+    ("port_activity.py", "__hash__"): "PortActivity.__hash__",
+}
+
+
+class HashingBenchmarkStage(Stage):
+    """! Leaf stage that profiles the cost model evaluation of the first LOMA temporal mappings"""
+
+    nb_cmes: int = 200
+    stats: pstats.Stats | None = None
+    cme: CostModelEvaluation | None = None
+
+    def run(self):
+        engine = LomaEngine(mapping_type=self.kwargs["temporal_mapping_type"], **self.kwargs)
+        temporal_mappings = [tm for _, tm in zip(range(HashingBenchmarkStage.nb_cmes), engine.run())]
+
+        profile = cProfile.Profile()
+        profile.enable()
+        for temporal_mapping in temporal_mappings:
+            cme, _ = next(iter(CostModelStage([], temporal_mapping=temporal_mapping, **self.kwargs).run()))
+        profile.disable()
+
+        HashingBenchmarkStage.nb_cmes = len(temporal_mappings)
+        HashingBenchmarkStage.stats = pstats.Stats(profile)
+        HashingBenchmarkStage.cme = cme  # type: ignore
+        yield cme, None  # type: ignore
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def measure(func: Any, number: int = 2000) -> float:
+    """! Return the time per call of the given function, in seconds"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accelerator", default="zigzag/inputs/hardware/tpu_like.yaml")
+    parser.add_argument("--workload", default="zigzag/inputs/workload/resnet18.yaml")
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/tpu_like.yaml")
+    parser.add_argument("--nb-cmes", type=int, default=200)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    # Only evaluate the first layer of the workload
+    workload: list[dict[str, Any]] = open_yaml(args.workload)  # type: ignore
+    HashingBenchmarkStage.nb_cmes = args.nb_cmes
+    stages = [WorkloadParserStage, AcceleratorParserStage, WorkloadStage, SpatialMappingGeneratorStage]
+    MainStage(
+        stages + [HashingBenchmarkStage],  # type: ignore
+        accelerator=args.accelerator,
+        workload=workload[:1],
+        mapping=args.mapping,
+        loma_lpf_limit=6,
+        nb_mappings_generated=1,
+        temporal_mapping_type="uneven",
+    ).run()
+    stats, cme, nb_cmes = HashingBenchmarkStage.stats, HashingBenchmarkStage.cme, HashingBenchmarkStage.nb_cmes
+    assert stats is not None and cme is not None
+
+    # Time per call of the current and the legacy (SHA-512 over pickle) implementation
+    layer_dim = LayerDim("K")
+    mem_level = cme.accelerator.memory_hierarchy.mem_level_list[0]
+    spatial_mapping = cme.layer.spatial_mapping
+    port_activity = PortActivity(1, 1, 1, 1, LayerOperand("I"), 0, DataDirection.RD_OUT_TO_LOW)
+    time_per_call = {
+        "operand construction": (
+            measure(lambda: LayerDim("K")),
+            measure(lambda: hash_sha512(layer_dim.name) ^ hash_sha512(LayerDim)),
+        ),
+        "MemoryLevel.__hash__": (measure(lambda: hash(mem_level)), measure(lambda: hash_sha512(mem_level.id))),
+        "SpatialMapping.__hash__": (
+            measure(lambda: hash(spatial_mapping)),
+            measure(lambda: hash_sha512(frozenset((k, hash_sha512(v)) for k, v in spatial_mapping.items()))),
+        ),
+        "PortActivity.__hash__": (
+            measure(lambda: hash(port_activity)),
+            measure(lambda: hash_sha512(port_activity.served_op_lv_dir)),
+        ),
+    }
+
+    # Number of calls per cost model evaluation
+    calls: dict[str, int] = {name: 0 for name in HASH_FUNCTIONS.values()}
+    for (filename, _, function_name), (_, nb_calls, _, _, _) in stats.stats.items():  # type: ignore
+        name = HASH_FUNCTIONS.get((filename.split("/")[-1], function_name))
+        if name is not None:
+            calls[name] += nb_calls
+
+    print(f"Profiled {nb_cmes} cost model evaluations of {cme.layer}")
+    print(f"{'':<26}{'calls/CME':>12}{'current us/CME':>16}{'legacy us/CME':>16}")
+    current_total, legacy_total = 0.0, 0.0
+    for name, (current, legacy) in time_per_call.items():
+        nb_calls_per_cme = calls[name] / nb_cmes
+        current_total += nb_calls_per_cme * current * 1e6
+        legacy_total += nb_calls_per_cme * legacy * 1e6
+        print(
+            f"{name:<26}{nb_calls_per_cme:>12.1f}{nb_calls_per_cme * current * 1e6:>16.1f}"
+            f"{nb_calls_per_cme * legacy * 1e6:>16.1f}"
+        )
+    print(f"{'total':<26}{'':>12}{current_total:>16.1f}{legacy_total:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
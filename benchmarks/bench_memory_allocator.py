@@ -0,0 +1,101 @@
+"""
+Benchmark of the memory allocation of all LOMA orderings of a layer, with and without an AllocationCache shared by the
+MemoryAllocators of the orderings. Checks that both give the same temporal mappings.
+
+Usage: python benchmarks/bench_memory_allocator.py [--accelerator ...] [--workload ...] [--mapping ...]
+    [--lpf-limit 6] [--mapping-type uneven]
+"""
+
+import argparse
+import logging
+import time
+from typing import Any
+
+from zigzag.opt.loma.engine import LomaEngine
+from zigzag.opt.loma.memory_allocator import (
+    AllocationCache,
+    MemoryAllocator,
+    MemoryHierarchyTooSmallException,
+    MemoryTooSmallException,
+)
+from zigzag.opt.loma.multipermute import permutations
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import open_yaml
+
+
+class MemoryAllocatorBenchmarkStage(Stage):
+    """! Leaf stage that allocates all LOMA orderings of the layer, with and without allocation cache"""
+
+    def run(self):
+        engine = LomaEngine(mapping_type=self.kwargs["temporal_mapping_type"], **self.kwargs)
+        engine.compute_lpfs()
+        orderings = list(permutations(engine.lpfs))
+
+        def allocate_all(allocation_cache: AllocationCache | None) -> tuple[float, list[Any]]:
+            temporal_mapping_dicts: list[Any] = []
+            start = time.perf_counter()
+            for ordering in orderings:
+                allocator = MemoryAllocator(
+                    engine.accelerator,
+                    engine.layer,
+                    engine.spatial_mapping,
+                    ordering,
+                    engine.mapping_type,
+                    allocation_cache,
+                )
+                try:
+                    temporal_mapping_dicts.append(allocator.run().mapping_dic_origin)
+                except (MemoryHierarchyTooSmallException, MemoryTooSmallException):
+                    temporal_mapping_dicts.append(None)
+            return time.perf_counter() - start, temporal_mapping_dicts
+
+        time_uncached, result_uncached = allocate_all(None)
+        allocation_cache = AllocationCache()
+        time_cached, result_cached = allocate_all(allocation_cache)
+        assert result_cached == result_uncached, "The allocation cache changed the temporal mappings"
+
+        nb_lookups = allocation_cache.nb_hits + allocation_cache.nb_misses
+        print(f"Allocated {len(orderings)} orderings of {self.kwargs['layer']}")
+        print(f"without cache: {time_uncached / len(orderings) * 1e6:10.1f} us/ordering")
+        print(f"with cache:    {time_cached / len(orderings) * 1e6:10.1f} us/ordering")
+        print(f"reused {allocation_cache.nb_hits} of {nb_lookups} memory level allocations")
+
+        temporal_mapping = next(engine.run())
+        yield from CostModelStage([], temporal_mapping=temporal_mapping, **self.kwargs).run()
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accelerator", default="zigzag/inputs/hardware/tpu_like.yaml")
+    parser.add_argument("--workload", default="zigzag/inputs/workload/resnet18.yaml")
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/tpu_like.yaml")
+    parser.add_argument("--lpf-limit", type=int, default=6)
+    parser.add_argument("--mapping-type", default="uneven", choices=["even", "uneven"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    # Only evaluate the first layer of the workload
+    workload: list[dict[str, Any]] = open_yaml(args.workload)  # type: ignore
+    stages = [WorkloadParserStage, AcceleratorParserStage, WorkloadStage, SpatialMappingGeneratorStage]
+    MainStage(
+        stages + [MemoryAllocatorBenchmarkStage],  # type: ignore
+        accelerator=args.accelerator,
+        workload=workload[:1],
+        mapping=args.mapping,
+        loma_lpf_limit=args.lpf_limit,
+        nb_mappings_generated=1,
+        temporal_mapping_type=args.mapping_type,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of the interpolation of memory costs from the CACTI memory pool. A temporary pool (in the cacti_master folder)
+is filled with a sweep of SRAM sizes (powers of two) and bandwidths. The costs of memories in between these sizes and
+bandwidths are then both interpolated and extracted with CACTI, to compare the estimated and the actual error and the
+time per memory. The temporary pool is removed afterwards.
+
+Usage: python benchmarks/bench_memory_cost_surrogate.py [--min-size 4] [--max-size 1024] [--bandwidths 64 128 256]
+"""
+
+import argparse
+import logging
+import os
+import time
+import timeit
+
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
+from zigzag.cacti.memory_cost_surrogate import MemoryCostSurrogate
+from zigzag.cacti.memory_pool import MemoryPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-size", type=int, default=4, help="smallest SRAM size of the sweep, in KiB")
+    parser.add_argument("--max-size", type=int, default=1024, help="largest SRAM size of the sweep, in KiB")
+    parser.add_argument("--bandwidths", type=int, nargs="+", default=[64, 128, 256], help="in bit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    sizes = [args.min_size * 2**i for i in range((args.max_size // args.min_size).bit_length())]
+    sweep = [CactiPoint("sram", size * 1024 * 8, bw, 1, 1, 0, 1) for size in sizes for bw in args.bandwidths]
+    # Memories in between the sizes and bandwidths of the sweep
+    queries = [
+        CactiPoint("sram", size * 1024 * 8 * 3 // 2, bw, 1, 1, 0, 1)
+        for size in sizes[:-1]
+        for bw in args.bandwidths + [(low + high) // 2 for low, high in zip(args.bandwidths, args.bandwidths[1:])]
+    ]
+
+    mem_pool_path = os.path.join(CactiParser.cacti_path, "cacti_master", f"bench_mem_pool_{os.getpid()}.yaml")
+    open(mem_pool_path, "w", encoding="UTF-8").close()
+    try:
+        CactiParser().create_items(sweep, mem_pool_path=mem_pool_path)
+        memory_pool = MemoryPool.load(mem_pool_path)
+        start = time.perf_counter()
+        surrogate = MemoryCostSurrogate.load(memory_pool)
+        fit_time = time.perf_counter() - start
+        estimates = {point: surrogate.estimate(point.mem_type, point.key) for point in queries}
+        estimate_time = min(
+            timeit.repeat(lambda: [surrogate.estimate(point.mem_type, point.key) for point in queries], number=100)
+        ) / (100 * len(queries))
+
+        run_times = CactiParser().create_items(queries, mem_pool_path=mem_pool_path)
+        print(f"Fitted the surrogate on {len(sweep)} memories in {fit_time * 1e3:.1f} ms")
+        print(f"{'size (B)':>10}{'bw':>6}{'estimated error':>17}{'actual error':>14}")
+        for point, estimate in estimates.items():
+            entry = memory_pool.get_entry(point.key, point.mem_type)
+            assert entry is not None
+            if estimate is None:
+                print(f"{point.size // 8:>10}{point.r_bw:>6}{'outside':>17}")
+                continue
+            actual = (entry["cost"]["read_word"], entry["cost"]["write_word"], entry["area"])
+            estimated = (estimate.read_word, estimate.write_word, estimate.area)
+            actual_error = max(abs(e / a - 1) for e, a in zip(estimated, actual))
+            print(f"{point.size // 8:>10}{point.r_bw:>6}{estimate.error:>17.1%}{actual_error:>14.1%}")
+        print(f"time per memory: {estimate_time * 1e6:.1f} us interpolated,", end=" ")
+        print(f"{sum(run_times.values()) / len(run_times) * 1e3:.0f} ms with CACTI")
+    finally:
+        for path in (mem_pool_path, f"{mem_pool_path}.lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
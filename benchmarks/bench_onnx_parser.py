@@ -0,0 +1,82 @@
+"""
+Benchmark of the parsing of ONNX models into a workload, on synthetic transformer-like graphs of 1k to 100k nodes.
+Every block of the graph is a MatMul with constant weights followed by a Relu and a residual Add, and all tensors have
+inferred shapes in the value info of the graph, like shape-inferred exports of large models. The graphs are parsed with
+and without sharing the attributes of identical layers; the memory is the size of the parsed workload.
+
+Usage: python benchmarks/bench_onnx_parser.py [--nodes 1000 10000 100000] [--mapping ...]
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from onnx import ModelProto, TensorProto, helper
+
+from zigzag.parser.onnx.onnx_model_parser import ONNXModelParser
+
+SEQUENCE_LENGTH = 128
+HIDDEN_SIZE = 256
+
+
+def create_model(nb_nodes: int) -> ModelProto:
+    """! Return a chain of MatMul, Relu and Add blocks with (about) the given number of nodes"""
+    shape = [1, SEQUENCE_LENGTH, HIDDEN_SIZE]
+    nodes = []
+    value_infos = []
+    initializers = []
+    tensor = "input"
+    for block in range(max(nb_nodes // 3, 1)):
+        weight, matmul_out, relu_out, add_out = (f"{name}_{block}" for name in ("w", "matmul", "relu", "add"))
+        # Only the shape of the weights is parsed, so their data is left out
+        initializers.append(TensorProto(name=weight, data_type=TensorProto.INT8, dims=[HIDDEN_SIZE, HIDDEN_SIZE]))
+        nodes.append(helper.make_node("MatMul", [tensor, weight], [matmul_out], name=f"MatMul_{block}"))
+        nodes.append(helper.make_node("Relu", [matmul_out], [relu_out], name=f"Relu_{block}"))
+        nodes.append(helper.make_node("Add", [relu_out, tensor], [add_out], name=f"Add_{block}"))
+        value_infos += [helper.make_tensor_value_info(name, TensorProto.INT8, shape) for name in (matmul_out, relu_out)]
+        if block > 0:
+            value_infos.append(helper.make_tensor_value_info(tensor, TensorProto.INT8, shape))
+        tensor = add_out
+    graph = helper.make_graph(
+        nodes,
+        "synthetic",
+        [helper.make_tensor_value_info("input", TensorProto.INT8, shape)],
+        [helper.make_tensor_value_info(tensor, TensorProto.INT8, shape)],
+        initializer=initializers,
+        value_info=value_infos,
+    )
+    return helper.make_model(graph)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/default.yaml")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'nodes':>8}{'edges':>9}{'shared layers':>15}{'parse time':>12}{'nodes/s':>10}{'memory':>11}")
+    for nb_nodes in args.nodes:
+        model = create_model(nb_nodes)
+        for share_identical_layers in (False, True):
+            start = time.perf_counter()
+            workload = ONNXModelParser(model, args.mapping, share_identical_layers).run()
+            elapsed = time.perf_counter() - start
+            del workload
+
+            tracemalloc.start()
+            workload = ONNXModelParser(model, args.mapping, share_identical_layers).run()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            nb_parsed = workload.number_of_nodes()
+            print(
+                f"{nb_parsed:>8}{workload.number_of_edges():>9}{str(share_identical_layers):>15}{elapsed:>11.2f}s"
+                f"{nb_parsed / elapsed:>10,.0f}{memory / 2**20:>8.1f} MB"
+            )
+            del workload
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark of the generation of LOMA loop orderings (multiset permutations of the loop prime factors) with 8 to 12 LPFs,
+without and with static position constraints. The array-based generators of `multipermute` are compared with the
+previous linked-list implementation, which is included below as reference: it converts the linked list to a new list
+for every permutation and filters the constrained permutations afterwards. Checks that both generate the same set of
+orderings.
+
+Usage: python benchmarks/bench_permutations.py [--lpfs 8 10 12] [--max-orderings 500000]
+"""
+
+import argparse
+import itertools
+import time
+from typing import Any, Callable, Generator, Iterable
+
+from zigzag.datatypes import LayerDim
+from zigzag.opt.loma.multipermute import (
+    PermutationConstraint,
+    StaticPositionsAndSizesConstraint,
+    StaticPositionsConstraint,
+    constrainded_permutations,
+    permutations,
+)
+
+K, C, OX, OY, FX, FY = (LayerDim(name) for name in ("K", "C", "OX", "OY", "FX", "FY"))
+## The first n of these LPFs are permuted
+LPFS = [(K, 2), (C, 2), (OX, 7), (OY, 7), (FX, 3), (FY, 3), (K, 2), (C, 2), (K, 2), (C, 2), (OX, 2), (OY, 2)]
+## Innermost loop of dimension C, outermost loop K of size 2
+CONSTRAINTS: list[PermutationConstraint] = [
+    StaticPositionsConstraint({0: C}),
+    StaticPositionsAndSizesConstraint({-1: (K, 2)}),
+]
+
+
+class ListElement:
+    def __init__(self, value: Any, next_elem: Any):
+        self.value = value
+        self.next_elem = next_elem
+
+    def nth(self, n: int):
+        o = self
+        i = 0
+        while i < n and o.next_elem is not None:
+            o = o.next_elem
+            i += 1
+        return o
+
+
+def linked_list_init(multiset: list[Any]):
+    multiset = sorted(multiset)
+    h = ListElement(multiset[0], None)
+    for item in multiset[1:]:
+        h = ListElement(item, h)
+    return h, h.nth(len(multiset) - 2), h.nth(len(multiset) - 1)
+
+
+def visit(h: ListElement) -> list[Any]:
+    o = h
+    this_list: list[Any] = []
+    while o is not None:
+        this_list.append(o.value)
+        o = o.next_elem
+    return this_list
+
+
+def linked_list_constrained_permutations(multiset: list[Any], constraints: list[PermutationConstraint]):
+    """! Previous implementation of `constrainded_permutations`"""
+    h, i, j = linked_list_init(multiset)
+    if all(constr.is_valid(visit(h)) for constr in constraints):
+        yield visit(h)
+    while j.next_elem is not None or j.value < h.value:
+        if j.next_elem is not None and i.value >= j.next_elem.value:
+            s = j
+        else:
+            s = i
+        t = s.next_elem
+        s.next_elem = t.next_elem
+        t.next_elem = h
+        if t.value < h.value:
+            i = t
+        j = i.next_elem
+        h = t
+        if all(constr.is_valid(visit(h)) for constr in constraints):
+            yield visit(h)
+
+
+def measure(orderings: Iterable[list[Any]], max_orderings: int) -> tuple[int, float]:
+    """! Return the number of generated orderings (at most `max_orderings`) and the time this took"""
+    start = time.perf_counter()
+    nb_orderings = 0
+    for _ in itertools.islice(orderings, max_orderings):
+        nb_orderings += 1
+    return nb_orderings, time.perf_counter() - start
+
+
+def compare(
+    name: str,
+    generator: Callable[[list[Any]], Generator[list[Any], None, None]],
+    reference: Callable[[list[Any]], Generator[list[Any], None, None]],
+    lpfs: list[Any],
+    max_orderings: int,
+) -> None:
+    nb_new, time_new = measure(generator(lpfs), max_orderings)
+    nb_old, time_old = measure(reference(lpfs), max_orderings)
+    # The generators visit the orderings in a different order, so only the complete sets can be compared
+    if nb_new < max_orderings and nb_old < max_orderings:
+        assert {tuple(o) for o in generator(lpfs)} == {tuple(o) for o in reference(lpfs)}, "Different orderings"
+    print(
+        f"{len(lpfs):>5}{name:>13}{nb_new / time_new:>16,.0f}{nb_old / time_old:>16,.0f}"
+        f"{(nb_new / time_new) / (nb_old / time_old):>10.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lpfs", type=int, nargs="+", default=[8, 10, 12], help="numbers of LPFs")
+    parser.add_argument("--max-orderings", type=int, default=500000, help="per generator and LPF count")
+    args = parser.parse_args()
+
+    print(f"{'LPFs':>5}{'constraints':>13}{'orderings/s':>16}{'previous':>16}{'speedup':>11}")
+    for nb_lpfs in args.lpfs:
+        lpfs = LPFS[:nb_lpfs]
+        compare(
+            "none",
+            permutations,
+            lambda multiset: linked_list_constrained_permutations(multiset, []),
+            lpfs,
+            args.max_orderings,
+        )
+        compare(
+            "static",
+            lambda multiset: constrainded_permutations(multiset, CONSTRAINTS),
+            lambda multiset: linked_list_constrained_permutations(multiset, CONSTRAINTS),
+            lpfs,
+            args.max_orderings,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark of saving the results of a run, as in a design sweep with many layers: the CMEs of the layers of a workload
+are saved a given number of times: as indented json per CME plus one pickle of all CMEs (the previous `json` results
+format), as json per CME written by a `JsonStreamWriter` (indented, and without whitespace with shared accelerators),
+and as columnar results with and without pickling the CMEs. Reports the time to save, the size on disk and the time
+to load the energy of all results back.
+
+Usage: python benchmarks/bench_result_export.py [--workload ...] [--accelerator ...] [--mapping ...] [--repeats 20]
+"""
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model import CostModelEvaluationABC
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.memory_instance import MemoryInstance
+from zigzag.stages.results.columnar_save import ColumnarResultWriter, load_columnar_results
+from zigzag.utils import JsonStreamWriter, json_repr_handler, load_json_with_refs
+
+
+def get_folder_size(folder: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+
+def save_json(cmes: list[CostModelEvaluationABC], folder: str) -> None:
+    for idx, cme in enumerate(cmes):
+        with open(os.path.join(folder, f"{idx}_complete.json"), "w", encoding="UTF-8") as fp:
+            json.dump(cme, fp, default=json_repr_handler, indent=4)
+    with open(os.path.join(folder, "list_of_cmes.pickle"), "wb") as fp:
+        pickle.dump(cmes, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_json_energy(folder: str) -> float:
+    with open(os.path.join(folder, "list_of_cmes.pickle"), "rb") as fp:
+        return sum(cme.energy_total for cme in pickle.load(fp))
+
+
+def save_streamed_json(cmes: list[CostModelEvaluationABC], folder: str, json_writer: JsonStreamWriter) -> None:
+    for idx, cme in enumerate(cmes):
+        with open(os.path.join(folder, f"{idx}_complete.json"), "w", encoding="UTF-8") as fp:
+            json_writer.dump(cme, fp)
+
+
+def load_streamed_json_energy(folder: str) -> float:
+    paths = [os.path.join(folder, name) for name in os.listdir(folder)]
+    return sum(document["outputs"]["energy"]["energy_total"] for document in load_json_with_refs(paths))
+
+
+def save_columnar(cmes: list[CostModelEvaluationABC], folder: str, save_cmes: bool) -> None:
+    writer = ColumnarResultWriter(folder, save_cmes=save_cmes)
+    for idx, cme in enumerate(cmes):
+        writer.append(cme, design_point=str(idx))
+    writer.close()
+
+
+def load_columnar_energy(folder: str) -> float:
+    return float(load_columnar_results(folder)["energy_total"].sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default="zigzag/inputs/workload/resnet18.onnx")
+    parser.add_argument("--accelerator", default="zigzag/inputs/hardware/tpu_like.yaml")
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/tpu_like.yaml")
+    parser.add_argument("--repeats", type=int, default=20, help="number of times the CMEs of the workload are saved")
+    args = parser.parse_args()
+
+    dump_folder = tempfile.mkdtemp()
+    logging.disable(logging.INFO)
+    _, _, results = get_hardware_performance_zigzag(
+        args.workload,
+        args.accelerator,
+        args.mapping,
+        dump_folder=dump_folder,
+        lpf_limit=4,
+        loma_show_progress_bar=False,
+    )
+    layer_cmes = [cme for cme, _ in results[0][1]]
+    cmes = layer_cmes * args.repeats
+
+    print(f"Saving {len(cmes)} CMEs ({len(layer_cmes)} layers x {args.repeats})")
+    print(f"{'format':<32}{'save time':>11}{'size':>11}{'load energy':>13}")
+    formats = {
+        "json + pickle": (save_json, load_json_energy),
+        "streamed json": (
+            lambda cmes, folder: save_streamed_json(cmes, folder, JsonStreamWriter()),
+            load_streamed_json_energy,
+        ),
+        "streamed json, compact, shared": (
+            lambda cmes, folder: save_streamed_json(
+                cmes, folder, JsonStreamWriter(indent=None, shared_types=(Accelerator, MemoryInstance))
+            ),
+            load_streamed_json_energy,
+        ),
+        "columnar": (lambda cmes, folder: save_columnar(cmes, folder, False), load_columnar_energy),
+        "columnar + CME pickles": (lambda cmes, folder: save_columnar(cmes, folder, True), load_columnar_energy),
+    }
+    for name, (save, load_energy) in formats.items():
+        folder = tempfile.mkdtemp()
+        start = time.perf_counter()
+        save(cmes, folder)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        load_energy(folder)
+        load_time = time.perf_counter() - start
+        print(f"{name:<32}{save_time:>10.2f}s{get_folder_size(folder) / 2**20:>8.1f} MB{load_time:>12.3f}s")
+        shutil.rmtree(folder)
+    shutil.rmtree(dump_folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the SALSA temporal mapping search of a layer with independent chains over 1 to 16 processes, and with
+replica exchange. For every configuration, the wall-clock time, the best cost and the time-to-solution are reported:
+the earliest time at which a chain reached a cost within the tolerance of the best cost over all configurations.
+
+Usage: python benchmarks/bench_salsa.py [--accelerator ...] [--workload ...] [--mapping ...] [--layer 0]
+    [--cores 1 4 8 16] [--iterations 300] [--criterion energy] [--tolerance 0.01] [--seed 0]
+"""
+
+import argparse
+import logging
+import time
+from typing import Any
+
+from zigzag.opt.salsa.engine import SalsaChainResult, SalsaEngine
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import open_yaml
+
+## Stage kwargs of the layer, captured by `SalsaBenchmarkStage`
+LAYER_KWARGS: dict[str, Any] = {}
+
+
+class SalsaBenchmarkStage(Stage):
+    """! Leaf stage that captures the layer, accelerator and spatial mapping to run SALSA on"""
+
+    def run(self):
+        LAYER_KWARGS.update(self.kwargs)
+        yield from ()
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def run_salsa(number_of_core: int, **salsa_kwargs: Any) -> tuple[float, list[SalsaChainResult]]:
+    engine = SalsaEngine(mapping_type=LAYER_KWARGS["temporal_mapping_type"], **{**LAYER_KWARGS, **salsa_kwargs})
+    start = time.perf_counter()
+    results = engine.run(number_of_core)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accelerator", default="zigzag/inputs/hardware/tpu_like.yaml")
+    parser.add_argument("--workload", default="zigzag/inputs/workload/resnet18.yaml")
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/tpu_like.yaml")
+    parser.add_argument("--layer", type=int, default=0, help="index of the layer in the workload file")
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--criterion", default="energy", choices=["energy", "latency"])
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    workload: list[dict[str, Any]] = open_yaml(args.workload)  # type: ignore
+    stages = [WorkloadParserStage, AcceleratorParserStage, WorkloadStage, SpatialMappingGeneratorStage]
+    MainStage(
+        stages + [SalsaBenchmarkStage],  # type: ignore
+        accelerator=args.accelerator,
+        workload=workload[args.layer : args.layer + 1],
+        mapping=args.mapping,
+        loma_lpf_limit=6,
+        nb_mappings_generated=1,
+        temporal_mapping_type="uneven",
+    ).run()
+
+    salsa_kwargs = {"salsa_iteration_number": args.iterations, "salsa_opt_criterion": args.criterion}
+    runs: dict[str, tuple[float, list[SalsaChainResult]]] = {}
+    for number_of_core in args.cores:
+        runs[f"{number_of_core} chains, {number_of_core} processes"] = run_salsa(
+            number_of_core, salsa_number_of_chains=number_of_core, salsa_seed=args.seed, **salsa_kwargs
+        )
+    number_of_chains = max(args.cores)
+    runs[f"{number_of_chains} chains, replica exchange"] = run_salsa(
+        1, salsa_number_of_chains=number_of_chains, salsa_seed=args.seed, salsa_replica_exchange=True, **salsa_kwargs
+    )
+
+    best_cost = min(result.best_cost for _, results in runs.values() for result in results)
+    target = best_cost * (1 + args.tolerance)
+    print(f"SALSA ({args.criterion}, {args.iterations} iterations) on {LAYER_KWARGS['layer']}")
+    print(f"best cost {best_cost:.4e}, time-to-solution within {args.tolerance:.0%}")
+    print(f"{'configuration':<32}{'wall time':>10}{'best cost':>12}{'to solution':>13}{'evaluations':>13}")
+    for name, (wall_time, results) in runs.items():
+        times_to_target = [
+            next((elapsed for _, elapsed, cost in result.trace if cost <= target), None) for result in results
+        ]
+        reached = [time_to_target for time_to_target in times_to_target if time_to_target is not None]
+        time_to_solution = f"{min(reached):.2f} s" if reached else "not reached"
+        run_best_cost = min(result.best_cost for result in results)
+        nb_evaluations = sum(result.nb_evaluations for result in results)
+        print(f"{name:<32}{wall_time:>9.2f}s{run_best_cost:>12.4e}{time_to_solution:>13}{nb_evaluations:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of the construction of the TemporalMapping and Mapping (which decouples the pr loops of the combined
+spatial and temporal mappings) for every LOMA ordering. Reports the time and the peak of the allocated memory per
+ordering, measured with timeit and tracemalloc.
+
+Usage: python benchmarks/bench_temporal_mapping.py [--accelerator ...] [--workload ...] [--mapping ...]
+    [--nb-orderings 200]
+"""
+
+import argparse
+import logging
+import timeit
+import tracemalloc
+from typing import Any
+
+from zigzag.mapping.mapping import Mapping
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.opt.loma.engine import LomaEngine
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import open_yaml
+
+
+class TemporalMappingBenchmarkStage(Stage):
+    """! Leaf stage that measures the construction of the temporal mapping and mapping of the first LOMA orderings"""
+
+    nb_orderings: int = 200
+
+    def run(self):
+        engine = LomaEngine(mapping_type=self.kwargs["temporal_mapping_type"], **self.kwargs)
+        temporal_mappings = [tm for _, tm in zip(range(TemporalMappingBenchmarkStage.nb_orderings), engine.run())]
+        nb_orderings = len(temporal_mappings)
+        accelerator, layer = self.kwargs["accelerator"], self.kwargs["layer"]
+        spatial_mapping = self.kwargs["spatial_mapping"]
+
+        def construct(temporal_mapping: TemporalMapping):
+            temporal_mapping = TemporalMapping(temporal_mapping.mapping_dic_origin, layer, temporal_mapping.type)
+            return Mapping(accelerator, spatial_mapping, temporal_mapping, layer)
+
+        def construct_all():
+            for temporal_mapping in temporal_mappings:
+                construct(temporal_mapping)
+
+        time_per_ordering = min(timeit.repeat(construct_all, number=1, repeat=5)) / nb_orderings
+
+        # Peak of the memory allocated while constructing (the mapping and all temporary objects) for one ordering
+        peaks: list[int] = []
+        tracemalloc.start()
+        for temporal_mapping in temporal_mappings:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            mapping = construct(temporal_mapping)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+            del mapping
+        tracemalloc.stop()
+
+        print(f"Constructed the temporal mapping and mapping of {nb_orderings} orderings of {layer}")
+        print(f"time per ordering:             {time_per_ordering * 1e6:10.1f} us")
+        print(f"peak memory per ordering:      {sum(peaks) / nb_orderings / 2**10:10.1f} KiB")
+        yield from CostModelStage([], temporal_mapping=temporal_mappings[0], **self.kwargs).run()
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accelerator", default="zigzag/inputs/hardware/tpu_like.yaml")
+    parser.add_argument("--workload", default="zigzag/inputs/workload/resnet18.yaml")
+    parser.add_argument("--mapping", default="zigzag/inputs/mapping/tpu_like.yaml")
+    parser.add_argument("--nb-orderings", type=int, default=200)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    # Only evaluate the first layer of the workload
+    workload: list[dict[str, Any]] = open_yaml(args.workload)  # type: ignore
+    TemporalMappingBenchmarkStage.nb_orderings = args.nb_orderings
+    stages = [WorkloadParserStage, AcceleratorParserStage, WorkloadStage, SpatialMappingGeneratorStage]
+    MainStage(
+        stages + [TemporalMappingBenchmarkStage],  # type: ignore
+        accelerator=args.accelerator,
+        workload=workload[:1],
+        mapping=args.mapping,
+        loma_lpf_limit=6,
+        nb_mappings_generated=1,
+        temporal_mapping_type="uneven",
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
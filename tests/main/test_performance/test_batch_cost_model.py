@@ -0,0 +1,103 @@
+from typing import Any
+
+import numpy as np
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.batch_cost_model import BatchCostModelEvaluation, TemporalMappingBatch
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.mapping.temporal_mapping import TemporalMappingType
+from zigzag.opt.loma.engine import LomaEngine
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage, StageCallable
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import open_yaml
+
+## Maximal number of temporal mappings that are compared per layer and spatial mapping
+NB_TEMPORAL_MAPPINGS = 64
+
+
+class BatchComparisonStage(Stage):
+    """! Evaluates the LOMA temporal mappings of the layer and spatial mapping with the batched and the scalar cost
+    model, and yields the scalar evaluations with the batched ones as extra info"""
+
+    def __init__(self, list_of_callables: list[StageCallable], **kwargs: Any):
+        super().__init__(list_of_callables, **kwargs)
+
+    def run(self):
+        engine = LomaEngine(mapping_type=self.kwargs["temporal_mapping_type"], **self.kwargs)
+        temporal_mappings = []
+        for temporal_mapping in engine.run():
+            temporal_mappings.append(temporal_mapping)
+            if len(temporal_mappings) == NB_TEMPORAL_MAPPINGS:
+                break
+        batch_evaluation = BatchCostModelEvaluation(
+            accelerator=self.kwargs["accelerator"],
+            layer=self.kwargs["layer"],
+            spatial_mapping=self.kwargs["spatial_mapping"],
+            spatial_mapping_int=self.kwargs["spatial_mapping_int"],
+            batch=TemporalMappingBatch.from_temporal_mappings(temporal_mappings, self.kwargs["layer"]),
+        )
+        for idx, temporal_mapping in enumerate(temporal_mappings):
+            cme = CostModelEvaluation(
+                accelerator=self.kwargs["accelerator"],
+                layer=self.kwargs["layer"],
+                spatial_mapping=self.kwargs["spatial_mapping"],
+                spatial_mapping_int=self.kwargs["spatial_mapping_int"],
+                temporal_mapping=temporal_mapping,
+            )
+            yield cme, (batch_evaluation, idx)
+
+
+@pytest.mark.parametrize("hardware", ["tpu_like", "edge_tpu_like", "ascend_like", "tesla_npu_like"])
+def test_batch_cost_model_is_identical(hardware: str):
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            WorkloadStage,
+            SpatialMappingGeneratorStage,
+            BatchComparisonStage,
+            CostModelStage,
+        ],
+        accelerator=f"zigzag/inputs/hardware/{hardware}.yaml",
+        workload="zigzag/inputs/workload/resnet18.yaml",
+        mapping=f"zigzag/inputs/mapping/{hardware}.yaml",
+        loma_lpf_limit=4,
+        nb_mappings_generated=2,
+        temporal_mapping_type=TemporalMappingType.UNEVEN,
+        layer_ids={0, 1, 2},
+    )
+    results = mainstage.run()
+    assert results
+    for cme, (_, (_, (batch_evaluation, idx))) in results:
+        assert batch_evaluation.energy_total[idx] == cme.energy_total
+        assert batch_evaluation.mac_energy == cme.mac_energy
+        assert batch_evaluation.mem_energy[idx] == cme.mem_energy
+        assert batch_evaluation.ideal_cycle == cme.ideal_cycle
+        assert batch_evaluation.ideal_temporal_cycle[idx] == cme.ideal_temporal_cycle
+        assert batch_evaluation.mac_spatial_utilization[idx] == cme.mac_spatial_utilization
+        for layer_op, breakdown in batch_evaluation.mem_energy_breakdown.items():
+            assert np.array_equal(breakdown[idx], cme.mem_energy_breakdown[layer_op])
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_batched_search_finds_exhaustive_optimum(opt: str, tmp_path: Any):
+    results = {}
+    for loma_batch_size in (0, 16):
+        _, _, cmes = get_hardware_performance_zigzag(
+            open_yaml("zigzag/inputs/workload/resnet18.yaml")[:2],
+            "zigzag/inputs/hardware/tpu_like.yaml",
+            "zigzag/inputs/mapping/tpu_like.yaml",
+            opt=opt,
+            dump_folder=str(tmp_path / str(loma_batch_size)),
+            lpf_limit=4,
+            loma_show_progress_bar=False,
+            loma_batch_size=loma_batch_size,
+        )
+        results[loma_batch_size] = [(cme.energy_total, cme.latency_total2) for cme, _ in cmes[0][1]]
+    assert results[16] == results[0]
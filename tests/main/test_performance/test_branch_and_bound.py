@@ -0,0 +1,45 @@
+import pytest
+
+from zigzag.mapping.temporal_mapping import TemporalMappingType
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.results.reduce_stages import MinimalEDPStage, MinimalEnergyStage, MinimalLatencyStage
+from zigzag.stages.workload_iterator import WorkloadStage
+
+opt_stages = {"energy": MinimalEnergyStage, "latency": MinimalLatencyStage, "EDP": MinimalEDPStage}
+
+
+def get_layer_results(opt: str, search_criterion: str | None) -> list[tuple[float, float]]:
+    opt_stage = opt_stages[opt]
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            WorkloadStage,
+            opt_stage,
+            SpatialMappingGeneratorStage,
+            opt_stage,
+            TemporalMappingGeneratorStage,
+            CostModelStage,
+        ],
+        accelerator="zigzag/inputs/hardware/tpu_like.yaml",
+        workload="zigzag/inputs/workload/resnet18.yaml",
+        mapping="zigzag/inputs/mapping/tpu_like.yaml",
+        layer_ids={2},
+        loma_lpf_limit=4,
+        loma_show_progress_bar=False,
+        loma_search_criterion=search_criterion,
+        nb_mappings_generated=1,
+        temporal_mapping_type=TemporalMappingType.UNEVEN,
+        access_same_data_considered_as_no_access=True,
+    )
+    return [(cme.energy_total, cme.latency_total2) for cme, _ in mainstage.run()]
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_branch_and_bound_finds_exhaustive_optimum(opt: str):
+    assert get_layer_results(opt, opt) == get_layer_results(opt, None)
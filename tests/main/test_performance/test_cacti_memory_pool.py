@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pytest
+import yaml
+
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
+from zigzag.cacti.memory_pool import MemoryPool
+
+
+def get_entry(size_byte: int, io_bus_width: int, memory_type: str = "sram", read_word: float = 0.001) -> dict[str, Any]:
+    # The ports are strings, as in the pool files written by CACTI
+    return {
+        "IO_bus_width": io_bus_width,
+        "area": 0.01,
+        "bank_count": 1,
+        "cost": {"read_word": read_word, "write_word": 0.002},
+        "ex_rd_port": "1",
+        "ex_wr_port": "1",
+        "memory_type": memory_type,
+        "rd_wr_port": "0",
+        "size_bit": size_byte * 8,
+        "size_byte": size_byte,
+        "technology": 0.022,
+    }
+
+
+def write_pool(path: Any, entries: dict[str, dict[str, Any]]) -> None:
+    with open(path, "a", encoding="UTF-8") as fp:
+        for name, entry in entries.items():
+            yaml.dump({name: entry}, fp)
+            fp.write("\n")
+
+
+def test_memory_pool_index(tmp_path: Any):
+    path = tmp_path / "mem_pool.yaml"
+    write_pool(
+        path,
+        {
+            "first": get_entry(128, 8, read_word=0.001),
+            "duplicate": get_entry(128, 8, read_word=0.005),
+            "dram": get_entry(128, 8, memory_type="dram"),
+        },
+    )
+    memory_pool = MemoryPool.load(str(path))
+    assert MemoryPool.load(str(path)) is memory_pool
+    key = CactiPoint("sram", 128 * 8, 8, 1, 1, 0, 1).key
+    # Like a linear search through the file, the first matching entry is used
+    entry = memory_pool.get_entry(key, "sram")
+    assert entry is not None and entry["cost"]["read_word"] == 0.001
+    assert memory_pool.get_entry(key) == entry
+    assert memory_pool.contains(key, "dram")
+    assert not memory_pool.contains(key, "rf")
+    assert not memory_pool.contains(CactiPoint("sram", 256 * 8, 8, 1, 1, 0, 1).key)
+
+    # Entries that are added to the file by another process are found
+    write_pool(path, {"new": get_entry(256, 8)})
+    assert memory_pool.contains(CactiPoint("sram", 256 * 8, 8, 1, 1, 0, 1).key, "sram")
+
+
+def add_entries(path: str, sizes: list[int]) -> None:
+    MemoryPool.load(path).add_entries({f"{size}_Byte": get_entry(size, 8) for size in sizes})
+
+
+def test_concurrent_add_entries(tmp_path: Any):
+    path = str(tmp_path / "mem_pool.yaml")
+    open(path, "w", encoding="UTF-8").close()
+    sizes_per_process = [[2**i for i in range(start, start + 8)] for start in range(0, 16, 4)]
+    with ProcessPoolExecutor(4) as executor:
+        list(executor.map(add_entries, [path] * len(sizes_per_process), sizes_per_process))
+
+    with open(path, "r", encoding="UTF-8") as fp:
+        names = [name for line in fp if not line.startswith(" ") and (name := line.strip().rstrip(":"))]
+    # No appends are lost or interleaved, and entries that were added by another process are skipped
+    assert sorted(names) == sorted({f"{size}_Byte" for sizes in sizes_per_process for size in sizes})
+    memory_pool = MemoryPool.load(path)
+    assert all(memory_pool.contains(CactiPoint("sram", 2**i * 8, 8, 1, 1, 0, 1).key, "sram") for i in range(20))
+
+
+def test_create_items():
+    mem_pool_path = os.path.join(CactiParser.cacti_path, "cacti_master", f"test_mem_pool_{os.getpid()}.yaml")
+    points = [CactiPoint("sram", size * 1024 * 8, 64, 1, 1, 0, 1) for size in (8, 16)]
+    open(mem_pool_path, "w", encoding="UTF-8").close()
+    try:
+        run_times = CactiParser().create_items(points + points[:1], nb_workers=2, mem_pool_path=mem_pool_path)
+        assert run_times.keys() == set(points)
+        assert all(MemoryPool.load(mem_pool_path).contains(point.key, point.mem_type) for point in points)
+        # The memories are only simulated once
+        assert not CactiParser().create_items(points, mem_pool_path=mem_pool_path)
+        read_cost, _, _ = CactiParser().get_item(
+            mem_name="sram",
+            mem_type="sram",
+            size=points[0].size,
+            r_bw=64,
+            r_port=1,
+            w_port=1,
+            rw_port=0,
+            bank=1,
+            mem_pool_path=mem_pool_path,
+        )
+        assert read_cost > 0
+    finally:
+        for path in (mem_pool_path, f"{mem_pool_path}.lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_create_items_without_cacti(tmp_path: Any):
+    with pytest.raises(FileNotFoundError):
+        CactiParser().create_items(
+            [CactiPoint("sram", 8 * 1024 * 8, 64, 1, 1, 0, 1)], mem_pool_path=str(tmp_path / "mem_pool.yaml")
+        )
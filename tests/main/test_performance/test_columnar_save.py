@@ -0,0 +1,69 @@
+from typing import Any
+
+import numpy as np
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.stages.results.columnar_save import (
+    ColumnarResultWriter,
+    get_cme_row,
+    load_cme,
+    load_columnar_results,
+)
+from zigzag.utils import open_yaml
+
+
+@pytest.fixture(scope="module")
+def cmes(tmp_path_factory: Any) -> list[CostModelEvaluation]:
+    _, _, results = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        dump_folder=str(tmp_path_factory.mktemp("dump")),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+    )
+    return [cme for cme, _ in results[0][1]]
+
+
+@pytest.mark.parametrize("save_cmes", [False, True])
+def test_columnar_round_trip(cmes: list[CostModelEvaluation], save_cmes: bool, tmp_path: Any):  # pylint: disable=W0621
+    writer = ColumnarResultWriter(str(tmp_path), part_size=2, save_cmes=save_cmes)
+    # Append the layers in reverse order, as a worker process could, to check that the rows are sorted by layer
+    for layer_index, cme in reversed(list(enumerate(cmes))):
+        writer.append(cme, design_point="point", layer_index=layer_index)
+
+    # The parts can be loaded before they are merged
+    writer.flush()
+    unmerged_results = load_columnar_results(str(tmp_path))
+    writer.close()
+    results = load_columnar_results(str(tmp_path))
+    assert results.keys() == unmerged_results.keys()
+
+    for layer_index, cme in enumerate(cmes):
+        row = get_cme_row(cme, "point", layer_index=layer_index)
+        for name, value in row.items():
+            assert results[name][layer_index] == value
+            assert unmerged_results[name][layer_index] == value
+        if save_cmes:
+            loaded_cme = load_cme(str(tmp_path), str(results["cme_file"][layer_index]))
+            assert loaded_cme.energy_total == cme.energy_total
+        else:
+            assert "cme_file" not in results
+    assert np.array_equal(results["layer_index"], np.arange(len(cmes)))
+
+
+def test_columnar_api(tmp_path: Any):
+    energy, latency, _ = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        dump_folder=str(tmp_path),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        results_format="columnar",
+    )
+    results = load_columnar_results(str(tmp_path / "results"))
+    assert results["energy_total"].sum() == pytest.approx(energy)
+    assert results["latency_total"].sum() == pytest.approx(latency)
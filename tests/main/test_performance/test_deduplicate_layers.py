@@ -0,0 +1,53 @@
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.utils import open_yaml
+
+# The first four layers of resnet18, of which the last two (conv2_1 and conv2_2) are identical
+workload = open_yaml("zigzag/inputs/workload/resnet18.yaml")[:4]
+
+
+@pytest.fixture
+def mapping():
+    return "zigzag/inputs/mapping/tpu_like.yaml"
+
+
+@pytest.fixture
+def accelerator():
+    return "zigzag/inputs/hardware/tpu_like.yaml"
+
+
+def run(accelerator: str, mapping: str, dump_folder: Any, **kwargs: Any) -> tuple[list[tuple[Any, ...]], Any]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        dump_folder=str(dump_folder),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    results = [
+        (cme.layer.name, cme.energy_total, cme.latency_total2, str(cme.temporal_mapping)) for cme, _ in cmes[0][1]
+    ]
+    return results, cmes
+
+
+@pytest.mark.parametrize("nb_layer_workers", [1, 2])
+def test_deduplicate_layers(
+    accelerator: str, mapping: str, nb_layer_workers: int, tmp_path: Any  # pylint: disable=W0621
+):
+    reference, _ = run(accelerator, mapping, tmp_path / "reference", nb_layer_workers=nb_layer_workers)
+    deduplicated, cmes = run(
+        accelerator, mapping, tmp_path / "deduplicated", deduplicate_layers=True, nb_layer_workers=nb_layer_workers
+    )
+    assert deduplicated == reference
+    with open(tmp_path / "deduplicated" / "layer_cache_report.json", encoding="UTF-8") as fp:
+        assert json.load(fp)["hits"] == 1
+    # The complete results of every layer are saved, also of the deduplicated layer
+    assert len(list((tmp_path / "deduplicated").glob("*complete.json"))) == len(workload)
+    for cme, (layer, _) in cmes[0][1]:
+        assert cme.layer.name == layer.name
@@ -0,0 +1,69 @@
+import json
+from typing import Any
+
+from zigzag.api import get_design_space_exploration_zigzag
+from zigzag.opt.dse.design_space import DesignSpace
+from zigzag.parser.accelerator_factory import AcceleratorFactory
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.results.columnar_save import load_columnar_results
+from zigzag.utils import open_yaml
+
+design_space_spec = [
+    {"path": "memories.sram_2MB.r_cost", "values": [416.16, 208.08]},
+    {"path": "memories.rf_128B.size", "values": [1024, 2048]},
+]
+
+
+def test_design_space_exploration(tmp_path: Any):
+    best_cme, dse_result = get_design_space_exploration_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        design_space_spec,
+        opt="energy",
+        dump_folder=str(tmp_path),
+        lpf_limit=3,
+        nb_spatial_mappings_generated=1,
+    )
+    assert len(dse_result.results) == dse_result.nb_evaluations == 4
+    assert best_cme.energy_total == min(result.energy_total for result in dse_result.results)
+    for result in dse_result.results:
+        assert result.layer_ids is None
+        # The points with the more expensive reads of the global buffer take more energy
+        if result.values["memories.sram_2MB.r_cost"] == 416.16:
+            assert result.energy_total > best_cme.energy_total
+    assert dse_result.pareto_front
+
+    # Every layer of every design point is saved
+    results = load_columnar_results(str(tmp_path / "results"))
+    assert len(results["layer"]) == 4 * 3
+    assert {str(point) for point in results["design_point"]} == {
+        json.dumps(result.values) for result in dse_result.results
+    }
+
+
+def test_design_points_share_identical_parts():
+    design_space = DesignSpace.from_spec(design_space_spec)
+    base_accelerator_data = open_yaml("zigzag/inputs/hardware/tpu_like.yaml")
+    parts_cache: dict[str, Any] = {}
+    accelerators = [
+        AcceleratorFactory(
+            AcceleratorParserStage.validate_accelerator_data(
+                design_space.get_accelerator_data(base_accelerator_data, point)  # type: ignore
+            ),
+            parts_cache,
+        ).create()
+        for point in design_space.exhaustive()
+    ]
+    instances = [
+        {level.name: level.memory_instance for level in accelerator.memory_hierarchy.mem_level_list}
+        for accelerator in accelerators
+    ]
+    # Points 0 and 1 only differ in the size of rf_128B, points 0 and 2 only in the read cost of sram_2MB
+    assert instances[0]["dram"] is instances[3]["dram"]
+    assert instances[0]["sram_2MB"] is instances[1]["sram_2MB"]
+    assert instances[0]["sram_2MB"] is not instances[2]["sram_2MB"]
+    assert instances[0]["rf_128B"] is instances[2]["rf_128B"]
+    assert instances[0]["rf_128B"] is not instances[1]["rf_128B"]
+    assert instances[1]["rf_128B"].size == 2048
+    assert all(accelerator.operational_array is accelerators[0].operational_array for accelerator in accelerators)
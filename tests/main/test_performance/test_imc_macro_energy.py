@@ -0,0 +1,28 @@
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.hardware.architecture.imc_array import MACRO_ENERGY_CACHE, ImcArray
+from zigzag.utils import open_yaml
+
+
+@pytest.mark.parametrize("hardware", ["aimc", "dimc"])
+def test_cached_macro_energy_is_identical(hardware: str, tmp_path: Any):
+    *_, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        f"zigzag/inputs/hardware/{hardware}.yaml",
+        "zigzag/inputs/mapping/default_imc.yaml",
+        dump_folder=str(tmp_path),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        in_memory_compute=True,
+    )
+    for cme, _ in cmes[0][1]:
+        imc_array = cme.accelerator.operational_array
+        assert isinstance(imc_array, ImcArray)
+        # The cached energy is identical to the energy computed from scratch
+        MACRO_ENERGY_CACHE.clear()
+        assert imc_array.get_energy_for_a_layer(cme.layer, cme.mapping) == cme.mac_energy_breakdown
+        assert cme.layer in MACRO_ENERGY_CACHE
+        assert imc_array.get_energy_for_a_layer(cme.layer, cme.mapping) == cme.mac_energy_breakdown
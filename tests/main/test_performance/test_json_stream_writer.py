@@ -0,0 +1,48 @@
+import io
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.memory_instance import MemoryInstance
+from zigzag.utils import JsonStreamWriter, json_repr_handler, load_json_with_refs, open_yaml
+
+
+@pytest.fixture(scope="module")
+def cmes(tmp_path_factory: Any) -> list[CostModelEvaluation]:
+    _, _, results = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        dump_folder=str(tmp_path_factory.mktemp("dump")),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+    )
+    return [cme for cme, _ in results[0][1]]
+
+
+@pytest.mark.parametrize("indent", [4, None])
+def test_json_stream_writer_is_identical_to_json_dump(
+    cmes: list[CostModelEvaluation], indent: int | None  # pylint: disable=W0621
+):
+    json_writer = JsonStreamWriter(indent)
+    for cme in cmes:
+        streamed = io.StringIO()
+        json_writer.dump(cme, streamed)
+        # Without indentation, the files are written without any whitespace
+        separators = (",", ":") if indent is None else None
+        expected = json.dumps(cme, default=json_repr_handler, indent=indent, separators=separators)
+        assert streamed.getvalue() == expected
+
+
+def test_json_stream_writer_shared_objects(cmes: list[CostModelEvaluation], tmp_path: Any):  # pylint: disable=W0621
+    json_writer = JsonStreamWriter(indent=None, shared_types=(Accelerator, MemoryInstance))
+    paths = [str(tmp_path / f"{idx}.json") for idx in range(len(cmes))]
+    for cme, path in zip(cmes, paths):
+        with open(path, "w", encoding="UTF-8") as fp:
+            json_writer.dump(cme, fp)
+    expected = [json.loads(json.dumps(cme, default=json_repr_handler)) for cme in cmes]
+    assert load_json_with_refs(paths) == expected
@@ -0,0 +1,114 @@
+import copy
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.stages.layer_cache import LayerCache
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.utils import open_yaml
+
+# The first four layers of resnet18, of which the last two (conv2_1 and conv2_2) are identical
+workload = open_yaml("zigzag/inputs/workload/resnet18.yaml")[:4]
+
+
+@pytest.fixture
+def mapping():
+    return "zigzag/inputs/mapping/tpu_like.yaml"
+
+
+@pytest.fixture
+def accelerator():
+    return "zigzag/inputs/hardware/tpu_like.yaml"
+
+
+def run(accelerator: str, mapping: str, dump_folder: Any, **kwargs: Any) -> tuple[list[tuple[Any, ...]], Any]:
+    *_, cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        dump_folder=str(dump_folder),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    results = [
+        (cme.layer.name, cme.energy_total, cme.latency_total2, str(cme.temporal_mapping)) for cme, _ in cmes[0][1]
+    ]
+    return results, cmes
+
+
+def load_report(dump_folder: Any) -> dict[str, Any]:
+    with open(dump_folder / "layer_cache_report.json", encoding="UTF-8") as fp:
+        return json.load(fp)
+
+
+def test_layer_cache_hits(accelerator: str, mapping: str, tmp_path: Any):  # pylint: disable=W0621
+    reference, _ = run(accelerator, mapping, tmp_path / "reference")
+    first_run, _ = run(accelerator, mapping, tmp_path / "first", layer_cache_folder=str(tmp_path / "cache"))
+    second_run, _ = run(accelerator, mapping, tmp_path / "second", layer_cache_folder=str(tmp_path / "cache"))
+    assert first_run == reference
+    assert second_run == reference
+
+    # The second of the identical layers is a hit in the first run, all layers are hits in the second run
+    assert load_report(tmp_path / "first")["misses"] == 3
+    assert load_report(tmp_path / "first")["hits"] == 1
+    assert load_report(tmp_path / "second")["misses"] == 0
+    assert load_report(tmp_path / "second")["hits"] == 4
+
+    # Other search settings miss
+    run(accelerator, mapping, tmp_path / "energy", layer_cache_folder=str(tmp_path / "cache"), opt="energy")
+    assert load_report(tmp_path / "energy")["misses"] == 3
+
+
+def test_layer_cache_hits_imc(tmp_path: Any):
+    # The IMC arrays store results of the last evaluated layer, which must not change the key
+    kwargs = {"layer_cache_folder": str(tmp_path / "cache"), "in_memory_compute": True}
+    accelerator, mapping = "zigzag/inputs/hardware/dimc.yaml", "zigzag/inputs/mapping/default_imc.yaml"
+    first_run, _ = run(accelerator, mapping, tmp_path / "first", **kwargs)
+    second_run, _ = run(accelerator, mapping, tmp_path / "second", **kwargs)
+    assert second_run == first_run
+    first_report = load_report(tmp_path / "first")
+    assert first_report["hits"] == 1
+    assert load_report(tmp_path / "second")["hits"] == first_report["hits"] + first_report["misses"]
+
+
+def test_layer_cache_key(accelerator: str, mapping: str, tmp_path: Any, monkeypatch: Any):  # pylint: disable=W0621
+    _, cmes = run(accelerator, mapping, tmp_path)
+    layers = [cme.layer for cme, _ in cmes[0][1]]
+    cme_accelerator = cmes[0][1][0][0].accelerator
+    settings = {"loma_lpf_limit": 3}
+    key = LayerCache.get_key(layers[2], cme_accelerator, settings)
+
+    # The id and name of a layer don't matter
+    renamed_layer = copy.copy(layers[2])
+    renamed_layer.id, renamed_layer.name = 100, "renamed"
+    assert LayerCache.get_key(renamed_layer, cme_accelerator, settings) == key
+    assert LayerCache.get_key(layers[3], cme_accelerator, settings) == key
+
+    # The shape of the layer, the search settings, the accelerator and the cache version do
+    assert LayerCache.get_key(layers[0], cme_accelerator, settings) != key
+    assert LayerCache.get_key(layers[2], cme_accelerator, {"loma_lpf_limit": 4}) != key
+    other_accelerator = copy.deepcopy(cme_accelerator)
+    other_accelerator.operational_array.unit.energy_cost *= 2
+    assert LayerCache.get_key(layers[2], other_accelerator, settings) != key
+    monkeypatch.setattr("zigzag.stages.layer_cache.LAYER_CACHE_VERSION", -1)
+    assert LayerCache.get_key(layers[2], cme_accelerator, settings) != key
+
+
+def test_layer_cache_report_of_failed_run(
+    accelerator: str, mapping: str, tmp_path: Any, monkeypatch: Any  # pylint: disable=W0621
+):
+    original_run = TemporalMappingGeneratorStage.run
+
+    def run_until_third_layer(self: TemporalMappingGeneratorStage):
+        if self.layer.id == 2:
+            raise RuntimeError("Failing layer")
+        return original_run(self)
+
+    monkeypatch.setattr(TemporalMappingGeneratorStage, "run", run_until_third_layer)
+    with pytest.raises(RuntimeError, match="Failing layer"):
+        run(accelerator, mapping, tmp_path, layer_cache_folder=str(tmp_path / "cache"))
+    # The report is saved for the layers that were looked up before the run failed
+    assert load_report(tmp_path)["misses"] == 3
@@ -0,0 +1,43 @@
+import os
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.utils import open_yaml
+
+
+def run(dump_folder: Any, nb_layer_workers: int) -> list[tuple[str, float, float]]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        dump_folder=str(dump_folder),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        nb_layer_workers=nb_layer_workers,
+    )
+    return [(cme.layer.name, cme.energy_total, cme.latency_total2) for cme, _ in cmes[0][1]]
+
+
+def test_parallel_layers_are_identical(tmp_path: Any):
+    assert run(tmp_path / "parallel", nb_layer_workers=2) == run(tmp_path / "serial", nb_layer_workers=1)
+
+
+@pytest.mark.parametrize("exit_worker", [False, True])
+def test_failing_layer_worker(exit_worker: bool, tmp_path: Any, monkeypatch: pytest.MonkeyPatch):
+    original_run = TemporalMappingGeneratorStage.run
+
+    def failing_run(self: TemporalMappingGeneratorStage):
+        if self.layer.id == 2:
+            if exit_worker:
+                # E.g. killed by the operating system when out of memory
+                os._exit(1)  # pylint: disable=W0212
+            raise ValueError("Failing layer")
+        yield from original_run(self)
+
+    # The worker processes are forked after the run method is replaced
+    monkeypatch.setattr(TemporalMappingGeneratorStage, "run", failing_run)
+    with pytest.raises(RuntimeError if exit_worker else ValueError):
+        run(tmp_path, nb_layer_workers=2)
@@ -0,0 +1,56 @@
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.opt.loma.engine import LOMA_CRITERIA
+from zigzag.utils import open_yaml
+
+
+def get_layer_results(opt: str, tmp_path: Any, **kwargs: Any) -> list[tuple[float, float]]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        opt=opt,
+        dump_folder=str(tmp_path),
+        lpf_limit=4,
+        nb_spatial_mappings_generated=1,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    return [(cme.energy_total, cme.latency_total2) for cme, _ in cmes[0][1]]
+
+
+def load_reports(tmp_path: Any) -> list[dict[str, Any]]:
+    return [json.loads(path.read_text()) for path in tmp_path.glob("*_loma_search.json")]
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_anytime_search_finds_exhaustive_optimum(opt: str, tmp_path: Any):
+    exhaustive_results = get_layer_results(opt, tmp_path / "exhaustive")
+    anytime_results = get_layer_results(opt, tmp_path / "anytime", loma_evaluation_budget=10**6)
+    assert anytime_results == exhaustive_results
+    for report in load_reports(tmp_path / "anytime"):
+        assert report["stop_reason"] == "exhausted"
+        assert report["coverage"] == 1
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_anytime_search_within_budget(opt: str, tmp_path: Any):
+    key_func = LOMA_CRITERIA[opt]
+    exhaustive_results = get_layer_results(opt, tmp_path / "exhaustive")
+    budget_results = get_layer_results(opt, tmp_path / "budget", loma_evaluation_budget=5)
+    for exhaustive_result, budget_result in zip(exhaustive_results, budget_results):
+        assert key_func(*budget_result) >= key_func(*exhaustive_result)
+
+    reports = load_reports(tmp_path / "budget")
+    assert reports
+    for report in reports:
+        assert report["nb_evaluated"] <= 5
+        if report["lower_bound"] is not None:
+            assert report["lower_bound"] <= report["best_key"]
+
+    # A mapping is always found, even if the time budget is already used up before the first evaluation
+    assert len(get_layer_results(opt, tmp_path / "time", loma_time_budget=0.0)) == len(exhaustive_results)
@@ -0,0 +1,71 @@
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.opt.loma.multipermute import (
+    indexed_permutations,
+    nb_multiset_permutations,
+    permutation_rank,
+    permutation_unrank,
+    permutations,
+)
+from zigzag.utils import open_yaml
+
+multiset = [1, 1, 2, 3, 3, 3, 4]
+
+
+def test_rank_and_unrank():
+    sorted_permutations = sorted(permutations(multiset))
+    assert len(sorted_permutations) == nb_multiset_permutations(multiset)
+    for index, permutation in enumerate(sorted_permutations):
+        assert permutation_rank(permutation) == index
+        assert permutation_unrank(multiset, index) == permutation
+    with pytest.raises(IndexError):
+        permutation_unrank(multiset, len(sorted_permutations))
+
+
+@pytest.mark.parametrize("start, stop, stride", [(0, None, 1), (5, 100, 1), (3, None, 7), (1, 200, 100), (500, 10, 1)])
+def test_indexed_permutations(start: int, stop: int | None, stride: int):
+    sorted_permutations = sorted(permutations(multiset))
+    expected = sorted_permutations[start:stop:stride]
+    assert list(indexed_permutations(multiset, start, stop, stride)) == expected
+
+
+def get_layer_result(tmp_path: Any, **kwargs: Any) -> tuple[tuple[float, float], dict[str, Any]]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        opt="energy",
+        dump_folder=str(tmp_path),
+        lpf_limit=4,
+        nb_spatial_mappings_generated=1,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    # The last layer is a convolution of which the temporal ordering is not given in the mapping
+    cme = cmes[0][1][-1][0]
+    reports = list(tmp_path.glob(f"{cme.layer.name}_*_loma_search.json"))
+    report = json.loads(reports[0].read_text()) if reports else {}
+    return (cme.energy_total, cme.latency_total2), report
+
+
+def test_sharded_and_resumed_search(tmp_path: Any):
+    exhaustive_result, _ = get_layer_result(tmp_path / "exhaustive")
+
+    # Two shards with every other ordering
+    shard_results = [
+        get_layer_result(tmp_path / f"shard_{start}", loma_permutation_start=start, loma_permutation_stride=2)[0]
+        for start in (0, 1)
+    ]
+    assert min(shard_results) == exhaustive_result
+
+    # A search that stops early and is resumed from the index in its report
+    first_result, report = get_layer_result(tmp_path / "first", loma_permutation_stop=10)
+    assert report["next_permutation_index"] == 10
+    resumed_result, _ = get_layer_result(
+        tmp_path / "resumed", loma_permutation_start=report["next_permutation_index"]
+    )
+    assert min(first_result, resumed_result) == exhaustive_result
@@ -0,0 +1,115 @@
+from typing import Any
+
+import pytest
+import yaml
+
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
+from zigzag.cacti.memory_cost_surrogate import MemoryCostSurrogate
+from zigzag.cacti.memory_pool import MemoryPool
+
+sizes = [2**i * 1024 * 8 for i in range(2, 8)]
+bandwidths = [32, 64, 128]
+
+
+def get_costs(size: int, bandwidth: int) -> tuple[float, float, float]:
+    """! Costs that follow a power law in the size and bandwidth, which are exactly linear in log-log space"""
+    return 1e-6 * size**0.5 * bandwidth**0.8, 2e-6 * size**0.4 * bandwidth, 1e-7 * size * bandwidth**0.1
+
+
+def get_entry(size: int, bandwidth: int) -> dict[str, Any]:
+    read_word, write_word, area = get_costs(size, bandwidth)
+    return {
+        "IO_bus_width": bandwidth,
+        "area": area,
+        "bank_count": 1,
+        "cost": {"read_word": read_word, "write_word": write_word},
+        "ex_rd_port": "1",
+        "ex_wr_port": "1",
+        "memory_type": "sram",
+        "rd_wr_port": "0",
+        "size_bit": size,
+        "size_byte": size // 8,
+        "technology": 0.022,
+    }
+
+
+@pytest.fixture
+def mem_pool_path(tmp_path: Any) -> str:
+    path = tmp_path / "mem_pool.yaml"
+    with open(path, "w", encoding="UTF-8") as fp:
+        for size in sizes:
+            for bandwidth in bandwidths:
+                yaml.dump({f"{size}_{bandwidth}": get_entry(size, bandwidth)}, fp)
+    return str(path)
+
+
+def test_surrogate_estimates(mem_pool_path: str):  # pylint: disable=W0621
+    surrogate = MemoryCostSurrogate.load(MemoryPool.load(mem_pool_path))
+    # The surrogate is only fitted again when the pool changes
+    assert MemoryCostSurrogate.load(MemoryPool.load(mem_pool_path)) is surrogate
+
+    for size, bandwidth in [(sizes[1] * 3 // 2, 64), (sizes[2], 48), (sizes[3] * 5 // 4, 100)]:
+        estimate = surrogate.estimate("sram", CactiPoint("sram", size, bandwidth, 1, 1, 0, 1).key)
+        assert estimate is not None
+        estimated_costs = (estimate.read_word, estimate.write_word, estimate.area)
+        assert estimated_costs == pytest.approx(get_costs(size, bandwidth), rel=1e-9)
+        assert estimate.error == pytest.approx(0, abs=1e-9)
+
+    # A sample is returned as is
+    estimate = surrogate.estimate("sram", CactiPoint("sram", sizes[0], 32, 1, 1, 0, 1).key)
+    assert estimate is not None and estimate.error == 0
+    assert estimate.read_word == pytest.approx(get_costs(sizes[0], 32)[0])
+
+    # No estimates outside the range of the samples or for other memory types and port counts
+    assert surrogate.estimate("sram", CactiPoint("sram", sizes[-1] * 2, 64, 1, 1, 0, 1).key) is None
+    assert surrogate.estimate("sram", CactiPoint("sram", sizes[1], 256, 1, 1, 0, 1).key) is None
+    assert surrogate.estimate("dram", CactiPoint("dram", sizes[1], 64, 1, 1, 0, 1).key) is None
+    assert surrogate.estimate("sram", CactiPoint("sram", sizes[1], 64, 2, 2, 0, 1).key) is None
+
+
+def test_leave_one_out_error(mem_pool_path: str):  # pylint: disable=W0621
+    # A sample that doesn't follow the power law is predicted badly from its neighbours
+    size = sizes[2]
+    entry = get_entry(size, 64)
+    entry["cost"]["read_word"] *= 2
+    with open(mem_pool_path, "r", encoding="UTF-8") as fp:
+        pool = yaml.full_load(fp)
+    pool[f"{size}_64"] = entry
+    with open(mem_pool_path, "w", encoding="UTF-8") as fp:
+        yaml.dump(pool, fp)
+
+    surrogate = MemoryCostSurrogate.load(MemoryPool.load(mem_pool_path))
+    estimate = surrogate.estimate("sram", CactiPoint("sram", size * 3 // 2, 64, 1, 1, 0, 1).key)
+    assert estimate is not None and estimate.error > 0.5
+    # Estimates that are not interpolated from the outlier are still exact
+    estimate = surrogate.estimate("sram", CactiPoint("sram", sizes[4] * 3 // 2, 64, 1, 1, 0, 1).key)
+    assert estimate is not None and estimate.error == pytest.approx(0, abs=1e-9)
+
+
+def test_get_interpolated_item(mem_pool_path: str):  # pylint: disable=W0621
+    size = sizes[1] * 3 // 2
+    parameters: dict[str, Any] = {"mem_type": "sram", "size": size, "r_bw": 64, "r_port": 1, "w_port": 1}
+    read_cost, write_cost, area = CactiParser().get_item(
+        mem_name="sram",
+        rw_port=0,
+        bank=1,
+        mem_pool_path=mem_pool_path,
+        max_interpolation_error=0.01,
+        **parameters,
+    )
+    expected_read_word, expected_write_word, expected_area = get_costs(size, 64)
+    assert read_cost == pytest.approx(expected_read_word * 1000)
+    assert write_cost == pytest.approx(expected_write_word * 1000)
+    assert area == pytest.approx(expected_area)
+    assert CactiParser.get_estimate(CactiPoint("sram", size, 64, 1, 1, 0, 1), 0.01, mem_pool_path) is not None
+
+    # Memories that can't be interpolated are extracted with CACTI, which isn't available in this folder
+    with pytest.raises(FileNotFoundError):
+        CactiParser().get_item(
+            mem_name="sram",
+            rw_port=0,
+            bank=1,
+            mem_pool_path=mem_pool_path,
+            max_interpolation_error=0.01,
+            **(parameters | {"size": sizes[-1] * 2}),
+        )
@@ -0,0 +1,47 @@
+from collections import Counter
+from itertools import permutations as all_permutations
+from math import factorial
+from typing import Any
+
+import pytest
+
+from zigzag.datatypes import LayerDim
+from zigzag.opt.loma.multipermute import (
+    StaticPositionsAndSizesConstraint,
+    StaticPositionsConstraint,
+    constrainded_permutations,
+    permutations,
+)
+
+K, C, OX = LayerDim("K"), LayerDim("C"), LayerDim("OX")
+
+# Loop orderings as LOMA generates them: (layer dimension, loop size) pairs with repeated prime factors
+multiset = [(K, 2), (K, 2), (K, 3), (C, 2), (C, 5), (OX, 2)]
+
+
+@pytest.mark.parametrize("elements", [[1], [2, 1], [1, 1, 2, 2, 3], list(multiset)])
+def test_permutations(elements: list[Any]):
+    generated = [tuple(p) for p in permutations(elements)]
+    assert set(generated) == set(all_permutations(elements))
+    # Every distinct permutation is generated exactly once
+    nb_distinct = factorial(len(elements))
+    for multiplicity in Counter(elements).values():
+        nb_distinct //= factorial(multiplicity)
+    assert len(generated) == nb_distinct
+
+
+@pytest.mark.parametrize(
+    "constraints",
+    [
+        [StaticPositionsConstraint({0: C, 3: K})],
+        [StaticPositionsAndSizesConstraint({1: (K, 3)})],
+        [StaticPositionsConstraint({-1: OX})],
+        [StaticPositionsConstraint({0: C}), StaticPositionsAndSizesConstraint({2: (OX, 2)})],
+        [StaticPositionsConstraint({0: C}), StaticPositionsConstraint({0: K})],
+    ],
+)
+def test_constrained_permutations(constraints: list[Any]):
+    expected = [list(p) for p in permutations(multiset) if all(constr.is_valid(p) for constr in constraints)]
+    generated = [list(p) for p in constrainded_permutations(multiset, constraints)]
+    assert sorted(generated) == sorted(expected)
+    assert len(generated) == len({tuple(p) for p in generated})
@@ -0,0 +1,66 @@
+import pytest
+from onnx import ModelProto, TensorProto, helper
+
+from zigzag.parser.onnx.onnx_model_parser import ONNXModelParser
+from zigzag.parser.onnx.utils import OnnxModelIndex, get_onnx_tensor_type, parse_onnx_model_from_path
+from zigzag.workload.layer_node import LayerNode
+
+mapping = "zigzag/inputs/mapping/default.yaml"
+shape = [1, 16, 32]
+
+
+def create_model(nb_blocks: int) -> ModelProto:
+    """! Return a chain of MatMul (with constant weights), Relu and residual Add blocks"""
+    nodes = []
+    value_infos = []
+    initializers = []
+    tensor = "input"
+    for block in range(nb_blocks):
+        weight, matmul_out, relu_out, add_out = (f"{name}_{block}" for name in ("w", "matmul", "relu", "add"))
+        initializers.append(TensorProto(name=weight, data_type=TensorProto.INT8, dims=[shape[-1], shape[-1]]))
+        nodes.append(helper.make_node("MatMul", [tensor, weight], [matmul_out], name=f"MatMul_{block}"))
+        nodes.append(helper.make_node("Relu", [matmul_out], [relu_out], name=f"Relu_{block}"))
+        nodes.append(helper.make_node("Add", [relu_out, tensor], [add_out], name=f"Add_{block}"))
+        value_infos += [helper.make_tensor_value_info(name, TensorProto.INT8, shape) for name in (matmul_out, relu_out)]
+        if block > 0:
+            value_infos.append(helper.make_tensor_value_info(tensor, TensorProto.INT8, shape))
+        tensor = add_out
+    graph = helper.make_graph(
+        nodes,
+        "chain",
+        [helper.make_tensor_value_info("input", TensorProto.INT8, shape)],
+        [helper.make_tensor_value_info(tensor, TensorProto.INT8, shape)],
+        initializer=initializers,
+        value_info=value_infos,
+    )
+    return helper.make_model(graph)
+
+
+def test_model_index():
+    model = parse_onnx_model_from_path("zigzag/inputs/workload/resnet18.onnx")
+    model_index = OnnxModelIndex(model)
+    for node_id, node in enumerate(model.graph.node):
+        for name in list(node.input) + list(node.output):
+            if name:
+                assert model_index.get_tensor_type(name) == get_onnx_tensor_type(name, model)
+        for name in node.output:
+            assert model_index.producers[name] == node_id
+    with pytest.raises(KeyError):
+        model_index.get_tensor_type("non_existent_tensor")
+
+
+def test_parse_chain():
+    nb_blocks = 10
+    workload = ONNXModelParser(create_model(nb_blocks), mapping).run()
+    assert workload.number_of_nodes() == 3 * nb_blocks
+    # Every MatMul and Relu has one predecessor, every Add two (except for the first MatMul and Add)
+    assert workload.number_of_edges() == 4 * nb_blocks - 2
+
+    nodes = {node.id: node for node in workload.node_list}
+    for block in range(nb_blocks):
+        matmul, relu, add = nodes[3 * block], nodes[3 * block + 1], nodes[3 * block + 2]
+        assert isinstance(matmul, LayerNode)
+        previous_add = [3 * block - 1] if block > 0 else []
+        assert list(workload.predecessors(matmul)) == [nodes[node_id] for node_id in previous_add]
+        assert list(workload.predecessors(relu)) == [matmul]
+        assert set(workload.predecessors(add)) == {relu} | {nodes[node_id] for node_id in previous_add}
@@ -0,0 +1,48 @@
+import pytest
+
+from zigzag.parser.onnx.onnx_model_parser import ONNXModelParser
+from zigzag.workload.layer_node import LayerNode
+from zigzag.workload.onnx_workload import ONNXWorkload
+
+mapping = "zigzag/inputs/mapping/default.yaml"
+
+## Attributes that every layer has of its own
+OWN_ATTRIBUTES = ("id", "name", "input_operand_source", "spatial_mapping", "temporal_ordering")
+## Attributes that structurally identical layers share
+SHARED_ATTRIBUTES = ("equation", "layer_dim_sizes", "operand_precision", "loop_relevancy_info", "operand_size_bit")
+
+
+def get_layers(workload: ONNXWorkload) -> list[LayerNode]:
+    return sorted((node for node in workload.node_list if isinstance(node, LayerNode)), key=lambda node: node.id)
+
+
+def get_value(layer: LayerNode, attribute: str) -> str:
+    value = getattr(layer, attribute)
+    # The loop relevancy info has no string representation
+    return str(vars(value) if attribute == "loop_relevancy_info" else value)
+
+
+@pytest.mark.parametrize("model", ["resnet18", "mobilenetv2"])
+def test_structural_sharing(model: str):
+    shared_layers = get_layers(ONNXModelParser(f"zigzag/inputs/workload/{model}.onnx", mapping).run())
+    layers = get_layers(ONNXModelParser(f"zigzag/inputs/workload/{model}.onnx", mapping, False).run())
+    assert len(shared_layers) == len(layers)
+    for shared_layer, layer in zip(shared_layers, layers):
+        for attribute in OWN_ATTRIBUTES + SHARED_ATTRIBUTES + ("total_mac_count", "pr_layer_dim_sizes"):
+            assert get_value(shared_layer, attribute) == get_value(layer, attribute), attribute
+
+    # Identical layers (e.g. the convolutions of repeated blocks) share their attributes, but not their mapping
+    nb_shared = 0
+    for idx, layer in enumerate(shared_layers):
+        identical = [other for other in shared_layers[:idx] if other.layer_dim_sizes is layer.layer_dim_sizes]
+        if not identical:
+            continue
+        nb_shared += 1
+        for attribute in SHARED_ATTRIBUTES:
+            assert getattr(identical[0], attribute) is getattr(layer, attribute)
+        for attribute in OWN_ATTRIBUTES:
+            assert getattr(identical[0], attribute) is not getattr(layer, attribute)
+    assert nb_shared > 0
+
+    # Without sharing, every layer has its own attributes
+    assert len({id(layer.layer_dim_sizes) for layer in layers}) == len(layers)
@@ -0,0 +1,39 @@
+import copy
+import pickle
+
+from zigzag.datatypes import LayerDim, LayerOperand, MemoryOperand, OADimension
+from zigzag.mapping.spatial_mapping import MappingSingleOADim, SpatialMapping
+
+
+def test_operand_interning():
+    layer_dim = LayerDim("k")
+    # The names are normalized before interning
+    assert LayerDim("K") is layer_dim and layer_dim.name == "K"
+    assert LayerOperand("W") is LayerOperand("W")
+    assert OADimension("D1") is OADimension("D1")
+    # Operands of different classes are not interned together
+    assert LayerOperand("I") is not MemoryOperand("I")
+    assert LayerOperand("I") != MemoryOperand("I")
+
+    # Copies and unpickled operands are the interned instances
+    assert copy.copy(layer_dim) is layer_dim
+    assert copy.deepcopy({layer_dim: 1}) == {layer_dim: 1}
+    assert next(iter(copy.deepcopy({layer_dim: 1}))) is layer_dim
+    assert pickle.loads(pickle.dumps(layer_dim)) is layer_dim
+    assert layer_dim.create_r_version() is LayerDim("K_r")
+
+
+def test_spatial_mapping_hash():
+    mapping_single_oa_dim = MappingSingleOADim({LayerDim("K"): 16})
+    spatial_mapping = SpatialMapping({OADimension("D1"): mapping_single_oa_dim})
+    same_spatial_mapping = SpatialMapping({OADimension("D1"): MappingSingleOADim({LayerDim("K"): 16})})
+    assert hash(spatial_mapping) == hash(same_spatial_mapping)
+
+    # The cached hash is reset when the unrolling is modified
+    mapping_single_oa_dim[LayerDim("C")] = 4
+    assert hash(mapping_single_oa_dim) == hash(MappingSingleOADim({LayerDim("K"): 16, LayerDim("C"): 4}))
+    assert hash(spatial_mapping) != hash(same_spatial_mapping)
+    del mapping_single_oa_dim[LayerDim("C")]
+    assert hash(spatial_mapping) == hash(same_spatial_mapping)
+    mapping_single_oa_dim.update(MappingSingleOADim({LayerDim("K"): 8}))
+    assert hash(mapping_single_oa_dim) == hash(MappingSingleOADim({LayerDim("K"): 8}))
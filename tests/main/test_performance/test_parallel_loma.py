@@ -0,0 +1,27 @@
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.utils import open_yaml
+
+
+def get_layer_results(opt: str, tmp_path: Any, **kwargs: Any) -> list[tuple[float, float]]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        opt=opt,
+        dump_folder=str(tmp_path),
+        lpf_limit=4,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    return [(cme.energy_total, cme.latency_total2) for cme, _ in cmes[0][1]]
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_parallel_search_is_identical(opt: str, tmp_path: Any):
+    serial_results = get_layer_results(opt, tmp_path / "serial")
+    parallel_results = get_layer_results(opt, tmp_path / "parallel", loma_number_of_core=2)
+    assert parallel_results == serial_results
@@ -0,0 +1,58 @@
+import json
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.stages.profiling import StageProfiler
+from zigzag.stages.stage import Stage
+from zigzag.utils import open_yaml
+
+
+class ArgumentStage(Stage):
+    """! Leaf stage of which the run method takes an argument"""
+
+    def is_leaf(self) -> bool:
+        return True
+
+    def run(self, value: int = 0):  # type: ignore
+        yield value, None
+
+
+@pytest.mark.parametrize("profiler", [None, StageProfiler()])
+def test_run_arguments(profiler: StageProfiler | None):
+    stage = ArgumentStage([], profiler=profiler)
+    assert list(stage.run()) == [(0, None)]
+    assert list(stage.run(1)) == [(1, None)]
+    assert list(stage.run(value=2)) == [(2, None)]
+    if profiler is not None:
+        assert profiler.stage_statistics["ArgumentStage"].nb_runs == 3
+        assert profiler.stage_statistics["ArgumentStage"].nb_items == 3
+
+
+def test_profile_report(tmp_path: Any):
+    results = {}
+    for profile in (False, True):
+        energy, latency, cmes = get_hardware_performance_zigzag(
+            open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+            "zigzag/inputs/hardware/tpu_like.yaml",
+            "zigzag/inputs/mapping/tpu_like.yaml",
+            dump_folder=str(tmp_path / str(profile)),
+            lpf_limit=3,
+            loma_show_progress_bar=False,
+            profile=profile,
+            exploit_data_locality=True,
+        )
+        results[profile] = (energy, latency, [str(cme.temporal_mapping) for cme, _ in cmes[0][1]])
+    assert results[True] == results[False]
+    assert not (tmp_path / "False" / "profile_report.json").exists()
+
+    with open(tmp_path / "True" / "profile_report.json", encoding="UTF-8") as fp:
+        report = json.load(fp)
+    stages = report["stages"]
+    assert stages["WorkloadStage"]["nb_runs"] == 1
+    assert stages["CostModelStage"]["nb_items"] >= len(cmes[0][1])
+    # The time of a stage includes that of its substages
+    assert stages["WorkloadStage"]["inclusive_time"] >= stages["CostModelStage"]["inclusive_time"]
+    assert len(report["layers"]) == 3
+    assert report["counters"]["loma_allocation"]["orderings"] > 0
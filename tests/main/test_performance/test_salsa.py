@@ -0,0 +1,97 @@
+import math
+from typing import Any
+
+import pytest
+
+from zigzag.opt.salsa.engine import SalsaChainResult, SalsaEngine
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.salsa import SalsaStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.stage import Stage, StageCallable
+from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import open_yaml
+
+salsa_kwargs: dict[str, Any] = {"salsa_iteration_number": 50, "salsa_opt_criterion": "energy", "salsa_seed": 0}
+
+
+class CaptureKwargsStage(Stage):
+    """! Leaf stage that captures the kwargs of the temporal mapping search of the layer"""
+
+    captured_kwargs: dict[str, Any] = {}
+
+    def run(self):
+        CaptureKwargsStage.captured_kwargs = self.kwargs
+        yield from ()
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def run_mainstage(stages: list[StageCallable], **kwargs: Any) -> list[Any]:
+    return MainStage(
+        [WorkloadParserStage, AcceleratorParserStage, WorkloadStage, SpatialMappingGeneratorStage] + stages,
+        accelerator="zigzag/inputs/hardware/tpu_like.yaml",
+        workload=open_yaml("zigzag/inputs/workload/resnet18.yaml")[:1],
+        mapping="zigzag/inputs/mapping/tpu_like.yaml",
+        loma_lpf_limit=6,
+        nb_mappings_generated=1,
+        temporal_mapping_type="uneven",
+        access_same_data_considered_as_no_access=True,
+        **kwargs,
+    ).run()
+
+
+@pytest.fixture(scope="module")
+def layer_kwargs() -> dict[str, Any]:
+    run_mainstage([CaptureKwargsStage])
+    return CaptureKwargsStage.captured_kwargs
+
+
+def run_salsa(layer_kwargs: dict[str, Any], number_of_core: int = 1, **kwargs: Any) -> list[SalsaChainResult]:
+    engine = SalsaEngine(mapping_type=layer_kwargs["temporal_mapping_type"], **(layer_kwargs | salsa_kwargs | kwargs))
+    return engine.run(number_of_core)
+
+
+def get_outcome(results: list[SalsaChainResult]) -> list[tuple[Any, ...]]:
+    return [(result.seed, result.best_ordering, result.best_key, result.nb_evaluations) for result in results]
+
+
+def test_seeded_chains(layer_kwargs: dict[str, Any]):  # pylint: disable=W0621
+    results = run_salsa(layer_kwargs, salsa_number_of_chains=3)
+    assert get_outcome(run_salsa(layer_kwargs, salsa_number_of_chains=3)) == get_outcome(results)
+    # Every chain has its own seed, so the chains start from different orderings
+    assert len({result.seed for result in results}) == 3
+    assert len({result.trace[0][2] for result in results}) > 1
+    assert get_outcome(run_salsa(layer_kwargs, salsa_number_of_chains=3, salsa_seed=1)) != get_outcome(results)
+
+    for result in results:
+        # Revisited orderings are not evaluated again
+        assert result.nb_evaluations + result.nb_memo_hits == salsa_kwargs["salsa_iteration_number"] + 1
+        assert math.isfinite(result.best_cost)
+        # The trace holds every improvement of the best cost
+        trace_costs = [cost for _, _, cost in result.trace]
+        assert trace_costs == sorted(trace_costs, reverse=True)
+        assert trace_costs[-1] == result.best_cost
+
+    # The chains are identical when they are distributed over processes
+    assert get_outcome(run_salsa(layer_kwargs, 2, salsa_number_of_chains=3)) == get_outcome(results)
+
+
+def test_replica_exchange(layer_kwargs: dict[str, Any]):  # pylint: disable=W0621
+    kwargs = {"salsa_number_of_chains": 3, "salsa_replica_exchange": True}
+    results = run_salsa(layer_kwargs, **kwargs)
+    assert get_outcome(run_salsa(layer_kwargs, **kwargs)) == get_outcome(results)
+    assert [result.temperature_scale for result in results] == [1, 2, 4]
+    assert sum(result.nb_exchanges for result in results) > 0
+    assert all(math.isfinite(result.best_cost) for result in results)
+
+
+def test_salsa_stage_evaluates_best_chain(layer_kwargs: dict[str, Any]):  # pylint: disable=W0621
+    results = run_salsa(layer_kwargs, salsa_number_of_chains=3)
+    cmes = run_mainstage([SalsaStage, CostModelStage], salsa_number_of_chains=3, **salsa_kwargs)
+    assert len(cmes) == 1
+    best_result = min(results, key=lambda result: result.best_key)
+    assert (cmes[0][0].energy_total, cmes[0][0].latency_total2) == best_result.best_key
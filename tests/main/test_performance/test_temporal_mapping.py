@@ -0,0 +1,54 @@
+from copy import deepcopy
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingDict
+from zigzag.utils import open_yaml
+
+
+@pytest.fixture(scope="module")
+def cmes(tmp_path_factory: Any) -> list[CostModelEvaluation]:
+    _, _, results = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        dump_folder=str(tmp_path_factory.mktemp("dump")),
+        lpf_limit=4,
+        loma_show_progress_bar=False,
+    )
+    return [cme for cme, _ in results[0][1]]
+
+
+def merge_down_reference(temporal_mapping: TemporalMapping) -> TemporalMappingDict:
+    """! Merge the ir loops at the bottom of each level down, one level per iteration, with lists of lists"""
+    layer = temporal_mapping.layer_node
+    mapping_previous = deepcopy(temporal_mapping.mapping_dic_origin)
+    while True:
+        mapping_st: TemporalMappingDict = {op: [[] for _ in levels] for op, levels in mapping_previous.items()}
+        for operand, levels in mapping_previous.items():
+            ir_layer_dims = layer.loop_relevancy_info.get_ir_layer_dims(operand)
+            for level, level_loops in enumerate(levels):
+                nb_bottom_ir = 0
+                while nb_bottom_ir < len(level_loops) and level_loops[nb_bottom_ir][0] in ir_layer_dims:
+                    nb_bottom_ir += 1
+                target_level = max(level - 1, 0)
+                mapping_st[operand][target_level] += level_loops[:nb_bottom_ir]
+                mapping_st[operand][level] += level_loops[nb_bottom_ir:]
+        if mapping_st == mapping_previous:
+            return mapping_st
+        mapping_previous = mapping_st
+
+
+def test_stationary_mapping(cmes: list[CostModelEvaluation]):  # pylint: disable=W0621
+    for cme in cmes:
+        temporal_mapping = cme.temporal_mapping
+        reference = merge_down_reference(temporal_mapping)
+        assert {
+            op: [list(level) for level in levels] for op, levels in temporal_mapping.mapping_dic_stationary.items()
+        } == reference
+        # The levels are formatted as lists, as in the saved results of earlier versions
+        assert str(temporal_mapping) == str(reference)
+        assert "((" not in str(temporal_mapping)
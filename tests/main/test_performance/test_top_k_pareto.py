@@ -0,0 +1,57 @@
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.opt.loma.engine import LOMA_CRITERIA
+from zigzag.stages.results.reduce_stages import CMESummary, TopKParetoResult, get_area
+from zigzag.utils import open_yaml
+
+
+def get_top_k_result(tmp_path: Any, **kwargs: Any) -> tuple[Any, TopKParetoResult]:
+    _, _, cmes = get_hardware_performance_zigzag(
+        open_yaml("zigzag/inputs/workload/resnet18.yaml")[:3],
+        "zigzag/inputs/hardware/tpu_like.yaml",
+        "zigzag/inputs/mapping/tpu_like.yaml",
+        opt="energy",
+        dump_folder=str(tmp_path),
+        lpf_limit=3,
+        loma_show_progress_bar=False,
+        **kwargs,
+    )
+    # The last layer is a convolution of which the temporal ordering is not given in the mapping
+    cme, (_, top_k_result) = cmes[0][1][-1]
+    assert isinstance(top_k_result, TopKParetoResult)
+    return cme, top_k_result
+
+
+def get_keys(top_k_result: TopKParetoResult, criterion: str) -> list[tuple[float, ...]]:
+    key_func = LOMA_CRITERIA[criterion]
+    return [key_func(cme.energy_total, cme.latency_total2) for cme, _ in top_k_result.top_k[criterion]]
+
+
+def get_pareto_metrics(top_k_result: TopKParetoResult) -> set[tuple[float, float, float]]:
+    return {(cme.energy_total, cme.latency_total2, get_area(cme)) for cme, _ in top_k_result.pareto_front}
+
+
+@pytest.mark.parametrize("keep_summaries", [False, True])
+@pytest.mark.parametrize("nb_spatial_mappings", [1, 3])
+def test_top_k_pareto(nb_spatial_mappings: int, keep_summaries: bool, tmp_path: Any):
+    k = 3
+    kwargs = {"nb_spatial_mappings_generated": nb_spatial_mappings, "reduce_keep_summaries": keep_summaries}
+    best_cme, top_k_result = get_top_k_result(tmp_path / "top_k", reduce_top_k=k, **kwargs)
+    # Keeping (more than) all evaluations gives the reference
+    _, all_result = get_top_k_result(tmp_path / "all", reduce_top_k=10**6, **kwargs)
+
+    for criterion in LOMA_CRITERIA:
+        assert len(top_k_result.top_k[criterion]) == k
+        assert get_keys(top_k_result, criterion) == get_keys(all_result, criterion)[:k]
+    assert get_pareto_metrics(top_k_result) == get_pareto_metrics(all_result)
+    assert best_cme.energy_total == top_k_result.top_k["energy"][0][0].energy_total
+
+    for cme, extra_info in top_k_result.get_entries():
+        if keep_summaries:
+            assert isinstance(cme, CMESummary) and extra_info is None
+            assert cme.rehydrate().energy_total == cme.energy_total
+        else:
+            assert not isinstance(extra_info, TopKParetoResult)
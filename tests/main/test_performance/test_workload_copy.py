@@ -0,0 +1,57 @@
+import pytest
+
+from zigzag.parser.onnx.onnx_model_parser import ONNXModelParser
+from zigzag.parser.workload_factory import WorkloadFactory
+from zigzag.parser.workload_validator import WorkloadValidator
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.utils import open_yaml
+from zigzag.workload.dummy_node import DummyNode
+from zigzag.workload.layer_node import LayerNode
+from zigzag.workload.onnx_workload import ONNXWorkload
+
+mapping = "zigzag/inputs/mapping/default.yaml"
+
+
+def get_layer_predecessors(workload: ONNXWorkload, node: LayerNode | DummyNode) -> set[LayerNode]:
+    """! Return the nearest LayerNodes before the given node, following paths through DummyNodes only"""
+    layer_predecessors: set[LayerNode] = set()
+    for predecessor in workload.predecessors(node):
+        if isinstance(predecessor, DummyNode):
+            layer_predecessors |= get_layer_predecessors(workload, predecessor)
+        else:
+            layer_predecessors.add(predecessor)
+    return layer_predecessors
+
+
+@pytest.mark.parametrize("model", ["resnet18", "mobilenetv2"])
+def test_onnx_copy_no_dummy(model: str):
+    workload = ONNXModelParser(f"zigzag/inputs/workload/{model}.onnx", mapping).run()
+    nodes = list(workload.node_list)
+    nb_edges = workload.number_of_edges()
+    assert any(isinstance(node, DummyNode) for node in nodes)
+
+    workload_copy = workload.get_copy_no_dummy()
+    # The copy holds the same LayerNode objects, without the DummyNodes
+    layers = [node for node in nodes if isinstance(node, LayerNode)]
+    assert set(map(id, workload_copy.node_list)) == set(map(id, layers))
+    for layer in layers:
+        assert set(workload_copy.predecessors(layer)) == get_layer_predecessors(workload, layer)
+
+    # The original workload is left unchanged
+    assert list(workload.node_list) == nodes
+    assert workload.number_of_edges() == nb_edges
+    assert workload.node_id_to_obj.keys() == {node.id for node in nodes}
+
+
+def test_dnn_copy_no_dummy():
+    workload_data = WorkloadValidator(open_yaml("zigzag/inputs/workload/resnet18.yaml")).normalized_data
+    workload = WorkloadFactory(workload_data, WorkloadParserStage.parse_mapping_data(mapping)).create()
+    workload_copy = workload.get_copy_no_dummy()
+    assert workload_copy is not workload
+    assert list(workload_copy.node_list) == list(workload.node_list)
+    assert all(copy is node for copy, node in zip(workload_copy.node_list, workload.node_list))
+    assert set(workload_copy.edges()) == set(workload.edges())
+
+    # Changing the structure of the copy doesn't change the original
+    workload_copy.remove_node(workload_copy.node_list[0])
+    assert workload_copy.number_of_nodes() == workload.number_of_nodes() - 1
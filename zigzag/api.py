@@ -4,13 +4,18 @@ from typing import Any, Literal
 
 from onnx import ModelProto
 
-from zigzag.cost_model.cost_model import CostModelEvaluationABC
+from zigzag.cost_model.cost_model import CostModelEvaluationABC, CumulativeCME
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.memory_instance import MemoryInstance
 from zigzag.mapping.temporal_mapping import TemporalMappingType
+from zigzag.opt.dse.design_space import DesignSpace
 from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
 from zigzag.stages.exploit_data_locality_stages import (
     ExploitInterLayerDataLocalityStage,
     SearchInterLayerDataLocalityStage,
 )
+from zigzag.stages.hardware_opt_stages import DesignSpaceExplorationResult, DesignSpaceExplorationStage
+from zigzag.stages.layer_cache import LayerCache, LayerCacheStage
 from zigzag.stages.main import MainStage
 from zigzag.stages.mapping.salsa import SalsaStage
 from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
@@ -18,11 +23,20 @@ from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappi
 from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
 from zigzag.stages.parser.onnx_model_parser import ONNXModelParserStage
 from zigzag.stages.parser.workload_parser import WorkloadParserStage
-from zigzag.stages.results.reduce_stages import MinimalEDPStage, MinimalEnergyStage, MinimalLatencyStage, SumStage
+from zigzag.stages.profiling import StageProfiler
+from zigzag.stages.results.columnar_save import ColumnarResultWriter, ColumnarSaveStage
+from zigzag.stages.results.reduce_stages import (
+    MinimalEDPStage,
+    MinimalEnergyStage,
+    MinimalLatencyStage,
+    SumStage,
+    TopKParetoStage,
+)
 from zigzag.stages.results.save import CompleteSaveStage, PickleSaveStage, SimpleSaveStage
 from zigzag.stages.results.visualization import VisualizationStage
 from zigzag.stages.stage import StageCallable
 from zigzag.stages.workload_iterator import WorkloadStage
+from zigzag.utils import JsonStreamWriter
 
 
 def get_hardware_performance_zigzag(
@@ -35,12 +49,32 @@ def get_hardware_performance_zigzag(
     opt: str = "latency",
     dump_folder: str = f"outputs/{datetime.now()}",
     pickle_filename: str | None = None,
+    results_format: Literal["json"] | Literal["columnar"] = "json",
+    columnar_save_cmes: bool = False,
+    json_indent: int | None = 4,
+    json_share_objects: bool = False,
     lpf_limit: int = 6,
     nb_spatial_mappings_generated: int = 3,
     in_memory_compute: bool = False,
     exploit_data_locality: bool = False,
     enable_mix_spatial_mapping: bool = False,
     loma_show_progress_bar: bool = True,
+    loma_number_of_core: int = 1,
+    loma_batch_size: int = 0,
+    loma_time_budget: float | None = None,
+    loma_evaluation_budget: int | None = None,
+    loma_patience: int | None = None,
+    loma_permutation_start: int = 0,
+    loma_permutation_stop: int | None = None,
+    loma_permutation_stride: int = 1,
+    reduce_top_k: int | None = None,
+    reduce_keep_summaries: bool = False,
+    layer_cache_folder: str | None = None,
+    layer_cache_max_size: int = 100 * 2**20,
+    deduplicate_layers: bool = False,
+    nb_layer_workers: int = 1,
+    profile: bool = False,
+    profile_live_interval: float | None = None,
 ) -> (
     tuple[float, float, list[tuple[CostModelEvaluationABC, Any]]]
     | tuple[float, float, float, float, list[tuple[CostModelEvaluationABC, Any]]]
@@ -52,6 +86,15 @@ def get_hardware_performance_zigzag(
     @param opt Optimization criterion: either `energy`, `latency` or `EDP`.
     @param dump_folder Folder where outputs will be saved.
     @param pickle_filename Filename of pickle dump.
+    @param results_format How the results are saved. With `json`, the results of every layer are saved in a json file
+        and all CMEs are pickled at the end. With `columnar`, the results are appended to a table with one row per
+        searched layer while the layers are evaluated, stored as a memory-mappable `.npy` file per column in `results`
+        in the dump folder (see `load_columnar_results`).
+    @param columnar_save_cmes Iff true (and `results_format` is `columnar`), every CME is pickled to its own file as
+        well, which can be loaded when needed with `load_cme`.
+    @param json_indent Indentation of the json file of every layer. If None, the files are written without whitespace.
+    @param json_share_objects Iff true, the accelerators and memory instances are only written to the json file of
+        the first layer that uses them, and referenced in the others (see `load_json_with_refs`).
     @param lpf_limit Determines the number of temporal unrollings that are evaluated.
     @param nb_spatial_mappings_generated Max nb of spatial mappings automatically generated (if not provided in
         mapping).
@@ -59,6 +102,46 @@ def get_hardware_performance_zigzag(
     @param exploit_data_locality Iff true, an attempt will be made to keep data in lower-level memory in between layers
     @param enable_mix_spatial_mapping Wether `mixed` spatial mappings will be generated, i.e. unrolling multiple Layer
         Dimensions in a single Operational Array Dimension.
+    @param loma_number_of_core Number of worker processes over which the LOMA temporal mapping search of a single
+        spatial mapping is split.
+    @param loma_batch_size If larger than 0, LOMA only searches the best temporal mapping for `opt` and evaluates the
+        temporal mappings in batches of this size with a vectorized cost model. Only the mappings that can still be the
+        best are evaluated with the full cost model.
+    @param loma_time_budget If given, LOMA searches the best temporal mapping for `opt` of each spatial mapping within
+        this wall-clock time (in seconds), visiting the most promising orderings first. The coverage of the ordering
+        space and the gap to a lower bound of each search are saved in a `<layer>_<spatial mapping>_loma_search.json`
+        file in the dump folder. A budgeted search runs in a single process, irrespective of `loma_number_of_core`.
+    @param loma_evaluation_budget If given, LOMA stops the search for `opt` after evaluating this many temporal
+        mappings per spatial mapping.
+    @param loma_patience If given, LOMA stops the search for `opt` after evaluating this many temporal mappings
+        without improvement.
+    @param loma_permutation_start Index of the first LOMA ordering to evaluate. If this, `loma_permutation_stop` or
+        `loma_permutation_stride` is given, LOMA only evaluates the orderings in this index range, e.g. to split the
+        search of a layer over several runs. The index of the next ordering of each search is saved in a
+        `<layer>_<spatial mapping>_loma_search.json` file in the dump folder, also when the run is interrupted. Passing
+        it as `loma_permutation_start` resumes the search.
+    @param loma_permutation_stop Index of the LOMA ordering to stop at (exclusive).
+    @param loma_permutation_stride Step between the indices of the evaluated LOMA orderings.
+    @param reduce_top_k If given, only the `reduce_top_k` best mappings for each criterion (energy, latency and EDP)
+        and the energy/latency/area Pareto front are kept while searching the mappings of a layer, instead of all
+        mappings. The best mapping for `opt` comes with a `TopKParetoResult` of the kept mappings as extra info.
+    @param reduce_keep_summaries Iff true (and `reduce_top_k` is given), the kept mappings other than the best one
+        are stored as a `CMESummary`, which takes less memory and can be turned back into a CME with `rehydrate`.
+    @param layer_cache_folder If given, the best mapping of each layer is stored in this folder and reused for layers
+        with the same shape, accelerator and search settings, also in later runs. A hit/miss report is saved in the
+        dump folder.
+    @param layer_cache_max_size Maximal size of the layer cache folder in bytes. The least recently used entries are
+        removed first.
+    @param deduplicate_layers Iff true, the mapping search only runs once for identical layers in the workload. The
+        other layers are evaluated with the mapping of the first one, from an in-memory layer cache (or from the
+        layer cache folder, if given).
+    @param nb_layer_workers If larger than 1, the mapping searches of the layers run in parallel in this many worker
+        processes. The results are identical to those of a serial run. The LOMA and SALSA searches of a layer then
+        run in a single process, irrespective of `loma_number_of_core`.
+    @param profile Iff true, the time spent in every stage, the throughput of the cost model and LOMA, and the peak
+        memory use are reported in `profile_report.json` in the dump folder.
+    @param profile_live_interval If given (and `profile` is true), a summary of the profile is logged at most once
+        every this many seconds.
     """
     pickle_filename = f"{dump_folder}/list_of_cmes.pickle" if pickle_filename is None else pickle_filename
 
@@ -76,6 +159,8 @@ def get_hardware_performance_zigzag(
             opt_stage = MinimalEDPStage
         case _:
             raise NotImplementedError("Optimization criterion 'opt' should be either 'energy' or 'latency' or 'EDP'.")
+    if reduce_top_k is not None:
+        opt_stage = TopKParetoStage
 
     # Check workload format and based on it select the correct workload parser stage
     workload_parser_stage = (
@@ -91,6 +176,18 @@ def get_hardware_performance_zigzag(
     # Select temporal mapping engine based on the function input
     temporal_mapping_engine = SalsaStage if temporal_mapping_search_engine == "salsa" else TemporalMappingGeneratorStage
     tm_type = TemporalMappingType(temporal_mapping_type)
+    has_loma_budget = any(budget is not None for budget in (loma_time_budget, loma_evaluation_budget, loma_patience))
+    layer_cache = (
+        LayerCache(layer_cache_folder, layer_cache_max_size)
+        if layer_cache_folder is not None
+        else LayerCache(None) if deduplicate_layers else None
+    )
+    profiler = StageProfiler(profile_live_interval) if profile else None
+    save_columnar = results_format == "columnar"
+    json_writer = JsonStreamWriter(json_indent, (Accelerator, MemoryInstance) if json_share_objects else ())
+    results_writer = (
+        ColumnarResultWriter(f"{dump_folder}/results", save_cmes=columnar_save_cmes) if save_columnar else None
+    )
 
     stages = [
         # Parse the ONNX Model into the workload
@@ -100,7 +197,7 @@ def get_hardware_performance_zigzag(
         # Save the summed CME energy and latency to a json
         SimpleSaveStage,
         # Save all received CMEs in a list to a pickle file
-        PickleSaveStage,
+        PickleSaveStage if not save_columnar else None,
         # Sum up the received best CME across all layers of the workload
         SumStage,
         # Search the lowest allowed memory level per operand per layer
@@ -111,8 +208,10 @@ def get_hardware_performance_zigzag(
         VisualizationStage,
         # Remove unused memories
         ExploitInterLayerDataLocalityStage if do_exploint_inter_layer_locality else None,
-        # Save each processed layer to a json
-        CompleteSaveStage,
+        # Save each processed layer to a json, or append it to the columnar results
+        ColumnarSaveStage if save_columnar else CompleteSaveStage,
+        # Reuse the best mapping of previously optimized, identical layers
+        LayerCacheStage if layer_cache is not None else None,
         # Reduce all CMEs, returning minimal energy/latency one
         opt_stage,
         # Generate multiple spatial mappings (SM)
@@ -137,6 +236,15 @@ def get_hardware_performance_zigzag(
         pickle_filename=pickle_filename,
         loma_lpf_limit=lpf_limit,
         loma_show_progress_bar=loma_show_progress_bar,
+        loma_number_of_core=loma_number_of_core,
+        loma_search_criterion=opt if loma_batch_size > 0 or has_loma_budget else None,
+        loma_batch_size=loma_batch_size,
+        loma_time_budget=loma_time_budget,
+        loma_evaluation_budget=loma_evaluation_budget,
+        loma_patience=loma_patience,
+        loma_permutation_start=loma_permutation_start,
+        loma_permutation_stop=loma_permutation_stop,
+        loma_permutation_stride=loma_permutation_stride,
         nb_mappings_generated=nb_spatial_mappings_generated,
         enable_mix_spatial_mapping_generation=do_mix_spatial_mapping_generation,
         # If we need access the same input data multiple times from the innermost memory level and the data size is
@@ -144,10 +252,26 @@ def get_hardware_performance_zigzag(
         # the output pins of the memory as long as it is needed).
         access_same_data_considered_as_no_access=True,
         temporal_mapping_type=tm_type,
+        reduce_criterion=opt,
+        reduce_top_k=reduce_top_k or 1,
+        reduce_keep_summaries=reduce_keep_summaries,
+        layer_cache=layer_cache,
+        nb_layer_workers=nb_layer_workers,
+        profiler=profiler,
+        results_writer=results_writer,
+        json_writer=json_writer,
     )
 
-    # Launch the MainStage
-    cmes = mainstage.run()
+    # Launch the MainStage. The results and reports of the evaluated layers are also saved if the run fails
+    try:
+        cmes = mainstage.run()
+    finally:
+        if results_writer is not None:
+            results_writer.close()
+        if layer_cache is not None:
+            layer_cache.save_report(f"{dump_folder}/layer_cache_report.json")
+        if profiler is not None:
+            profiler.save_report(f"{dump_folder}/profile_report.json")
     energy_total: float = cmes[0][0].energy_total
     latency_total: float = cmes[0][0].latency_total2
 
@@ -164,3 +288,115 @@ def get_hardware_performance_zigzag_imc(
 ) -> tuple[float, float, float, float, list[tuple[CostModelEvaluationABC, Any]]]:
     """Overload with type hint"""
     return get_hardware_performance_zigzag(*args, in_memory_compute=True)  # type: ignore
+
+
+def get_design_space_exploration_zigzag(
+    workload: str | list[dict[str, Any]] | ModelProto,
+    accelerator: str,
+    mapping: str,
+    design_space: DesignSpace | str | list[dict[str, Any]],
+    *,
+    opt: str = "latency",
+    dump_folder: str | None = None,
+    lpf_limit: int = 6,
+    nb_spatial_mappings_generated: int = 3,
+    dse_search: Literal["exhaustive"] | Literal["random"] | Literal["latin_hypercube"] = "exhaustive",
+    dse_nb_samples: int = 16,
+    dse_seed: int | None = None,
+    dse_successive_halving: bool = False,
+    dse_halving_factor: int = 2,
+    dse_nb_workers: int = 1,
+) -> tuple[CumulativeCME, DesignSpaceExplorationResult]:
+    """! ZigZag design space exploration: evaluate the workload on the design points of the accelerator and return the
+    best one.
+    @param accelerator Path of the yaml file of the base accelerator, of which the design space sweeps the fields
+    @param design_space The design space, or its spec: a list of parameters (or the path of a yaml file with this list),
+        each with a `path` and `values` (see `DesignSpace`)
+    @param opt Criterion of the best mapping of each layer and of the best design point: `energy`, `latency` or `EDP`
+    @param dump_folder If given, the results of every layer of every evaluated design point are saved in the columnar
+        format (see `ColumnarResultWriter`) in `<dump_folder>/results`.
+    @param dse_search How the design points are selected: `exhaustive`, `random` or `latin_hypercube`
+    @param dse_nb_samples Number of sampled design points for the `random` and `latin_hypercube` search
+    @param dse_seed Seed of the sampling
+    @param dse_successive_halving Iff true, the design points are first evaluated on the largest layers only, and
+        only the best ones are evaluated on the complete workload.
+    @param dse_halving_factor The fraction of the design points that is kept in each round of successive halving
+    @param dse_nb_workers Number of processes that evaluate design points in parallel
+    @return The sum of the cost model evaluations of all layers on the best design point, and the
+        `DesignSpaceExplorationResult` with the results of all design points and their Pareto front
+    """
+    # Initialize the logger
+    logging_level = logging.INFO
+    logging_format = "%(asctime)s - %(funcName)s +%(lineno)s - %(levelname)s - %(message)s"
+    logging.basicConfig(level=logging_level, format=logging_format)
+
+    match opt:
+        case "energy":
+            opt_stage = MinimalEnergyStage
+        case "latency":
+            opt_stage = MinimalLatencyStage
+        case "EDP":
+            opt_stage = MinimalEDPStage
+        case _:
+            raise NotImplementedError("Optimization criterion 'opt' should be either 'energy' or 'latency' or 'EDP'.")
+
+    workload_parser_stage = (
+        ONNXModelParserStage
+        if isinstance(workload, ModelProto) or (isinstance(workload, str) and workload.split(".")[-1] == "onnx")
+        else WorkloadParserStage
+    )
+    results_writer = ColumnarResultWriter(f"{dump_folder}/results") if dump_folder is not None else None
+
+    stages = [
+        # Parse the ONNX Model into the workload
+        workload_parser_stage,
+        # Parse and evaluate every design point of the accelerator, returning the best one
+        DesignSpaceExplorationStage,
+        # Iterate through the different layers in the workload
+        WorkloadStage,
+        # Append each processed layer to the columnar results
+        ColumnarSaveStage if results_writer is not None else None,
+        # Reduce all CMEs, returning minimal energy/latency one
+        opt_stage,
+        # Generate multiple spatial mappings (SM)
+        SpatialMappingGeneratorStage,
+        # Reduce all CMEs, returning minimal energy/latency one
+        opt_stage,
+        # Generate multiple temporal mappings (TM)
+        TemporalMappingGeneratorStage,
+        # Evaluate generated SM and TM through cost model
+        CostModelStage,
+    ]
+    stage_callables: list[StageCallable] = [s for s in stages if s is not None]
+
+    # Initialize the MainStage as entry point
+    mainstage = MainStage(
+        list_of_callables=stage_callables,
+        accelerator=accelerator,
+        workload=workload,
+        mapping=mapping,
+        dse_design_space=design_space,
+        dse_search=dse_search,
+        dse_nb_samples=dse_nb_samples,
+        dse_seed=dse_seed,
+        dse_successive_halving=dse_successive_halving,
+        dse_halving_factor=dse_halving_factor,
+        dse_criterion=opt,
+        dse_nb_workers=dse_nb_workers,
+        loma_lpf_limit=lpf_limit,
+        loma_show_progress_bar=False,
+        nb_mappings_generated=nb_spatial_mappings_generated,
+        enable_mix_spatial_mapping_generation=False,
+        access_same_data_considered_as_no_access=True,
+        temporal_mapping_type=TemporalMappingType.UNEVEN,
+        reduce_criterion=opt,
+        results_writer=results_writer,
+    )
+
+    try:
+        cmes = mainstage.run()
+    finally:
+        if results_writer is not None:
+            results_writer.close()
+    best_cme, dse_result = cmes[0]
+    return best_cme, dse_result
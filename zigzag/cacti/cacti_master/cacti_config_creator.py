@@ -1,4 +1,5 @@
 import os
+import subprocess
 from typing import Any
 
 
@@ -384,40 +385,44 @@ class CactiConfig:
         f.write("".join(user_config))
         f.close()
 
-    def call_cacti(self, cacti_master_path: str, self_gen_cfg_path: str):
+    def call_cacti(self, cacti_master_path: str, self_gen_cfg_path: str, verbose: bool = True):
         # os.system('./cacti -infile ./self_gen/cache.cfg')
 
-        print("##########################################################################################")
-        original_cwd = os.getcwd()
-        # Change the directory to the cacti master directory as using absolute paths yields a "Segmentation fault"
-        os.chdir(cacti_master_path)
+        if verbose:
+            print("##########################################################################################")
         common_path = os.path.commonpath([cacti_master_path, self_gen_cfg_path])
         if common_path != cacti_master_path and common_path not in cacti_master_path:
             raise NotImplementedError("Config path for cacti should be inside cacti_master folder.")
         self_gen_cfg_path_relative = f"./{os.path.relpath(self_gen_cfg_path, start=cacti_master_path)}"
-        cacti_cmd = f"./cacti -infile {self_gen_cfg_path_relative}"
-        stream = os.popen(cacti_cmd)
-        output = stream.readlines()
-        for line in output:
-            print(line, end="")
-        # Change back to the original working directory
-        os.chdir(original_cwd)
+        # Run from the cacti master directory as using absolute paths yields a "Segmentation fault". The working
+        # directory of this process is left untouched, so that concurrent runs don't interfere.
+        output = subprocess.run(
+            ["./cacti", "-infile", self_gen_cfg_path_relative],
+            cwd=cacti_master_path,
+            stdout=subprocess.PIPE,
+            text=True,
+            check=False,
+        ).stdout.splitlines(keepends=True)
+        if verbose:
+            for line in output:
+                print(line, end="")
         return output
 
-    def cacti_auto(self, user_input: list[Any], cacti_master_path: str, self_gen_cfg_path: str):
+    def cacti_auto(self, user_input: list[Any], cacti_master_path: str, self_gen_cfg_path: str, verbose: bool = True):
         """
         user_input format can be 1 out of these 3:
         user_input = ['default']
         user_input = ['single', [['mem_type', 'technology', ...], ['"ram"', 0.028, ...]]
         user_input = ['sweep', ['IO_bus_width'/'']]
         """
-        print(f"{self_gen_cfg_path=}")
+        if verbose:
+            print(f"{self_gen_cfg_path=}")
         user_config: list[Any] = []
         if user_input[0] == "default":
             for value in self.config_options.values():
                 user_config.append(value["string"] + str(value["default"]) + "\n")
             self.write_config(user_config, self_gen_cfg_path)
-            self.call_cacti(cacti_master_path, self_gen_cfg_path)
+            self.call_cacti(cacti_master_path, self_gen_cfg_path, verbose)
 
         if user_input[0] == "single":
             for item, value in self.config_options.items():
@@ -427,7 +432,7 @@ class CactiConfig:
                 else:
                     user_config.append(value["string"] + str(value["default"]) + "\n")
             self.write_config(user_config, self_gen_cfg_path)
-            self.call_cacti(cacti_master_path, self_gen_cfg_path)
+            self.call_cacti(cacti_master_path, self_gen_cfg_path, verbose)
 
         if user_input[0] == "sweep":
             # produce non-sweeping term
@@ -445,4 +450,4 @@ class CactiConfig:
 
             for ii in range(len(user_config)):
                 self.write_config(user_config[ii], self_gen_cfg_path)
-                self.call_cacti(cacti_master_path, self_gen_cfg_path)
+                self.call_cacti(cacti_master_path, self_gen_cfg_path, verbose)
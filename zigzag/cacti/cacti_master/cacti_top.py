@@ -1,13 +1,15 @@
 import argparse
 import os
+import shutil
 import sys
+import tempfile
 from typing import Any
 
-import yaml
-
 # To make this file runnable
-sys.path.append(os.getcwd())
+if __name__ == "__main__":
+    sys.path.append(os.getcwd())
 from zigzag.cacti.cacti_master.cacti_config_creator import CactiConfig  # pylint: disable=C0413 # noqa: E402
+from zigzag.cacti.memory_pool import MemoryPool  # pylint: disable=C0413 # noqa: E402
 
 
 def run_cacti(
@@ -23,13 +25,69 @@ def run_cacti(
 ):
     cacti_master_path = os.path.dirname(mem_pool_path)
     print(f"{cacti_master_path=}")
+    new_entries = get_cacti_entries(
+        mem_type,
+        cache_size,
+        IO_bus_width,
+        ex_rd_port,
+        ex_wr_port,
+        rd_wr_port,
+        bank_count,
+        technology,
+        cacti_master_path,
+    )
+    MemoryPool.load(mem_pool_path).add_entries(new_entries)
 
-    self_gen_folder_name = "self_gen"
-    self_gen_path = os.path.join(cacti_master_path, self_gen_folder_name)
-    if not os.path.isdir(self_gen_path):
-        os.mkdir(self_gen_path)
 
-    os.system(f"rm -rf {self_gen_path}/*")
+def get_cacti_entries(
+    mem_type: str,
+    cache_size: str,
+    IO_bus_width: str,
+    ex_rd_port: str,
+    ex_wr_port: str,
+    rd_wr_port: str,
+    bank_count: str,
+    technology: str,
+    cacti_master_path: str,
+    verbose: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """! Run CACTI for the given memory and return the memory pool entries of the results, without adding them to the
+    memory pool. Every run gets its own folder, so concurrent runs (e.g. from multiple threads or processes) don't
+    overwrite each other's files.
+    """
+    self_gen_path = tempfile.mkdtemp(prefix="self_gen_", dir=cacti_master_path)
+    try:
+        return run_cacti_in_folder(
+            mem_type,
+            cache_size,
+            IO_bus_width,
+            ex_rd_port,
+            ex_wr_port,
+            rd_wr_port,
+            bank_count,
+            technology,
+            cacti_master_path,
+            self_gen_path,
+            verbose,
+        )
+    finally:
+        shutil.rmtree(self_gen_path, ignore_errors=True)
+
+
+def run_cacti_in_folder(
+    mem_type: str,
+    cache_size: str,
+    IO_bus_width: str,
+    ex_rd_port: str,
+    ex_wr_port: str,
+    rd_wr_port: str,
+    bank_count: str,
+    technology: str,
+    cacti_master_path: str,
+    self_gen_path: str,
+    verbose: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """! Run CACTI with the config file in the given folder and return the memory pool entries of the results"""
     config = CactiConfig()
 
     # Function 1: set default value
@@ -84,6 +142,7 @@ def run_cacti(
         ],
         cacti_master_path,
         f"{self_gen_path}/cache.cfg",
+        verbose,
     )
 
     if not os.path.isfile(f"{self_gen_path}/cache.cfg.out"):
@@ -92,6 +151,7 @@ def run_cacti(
         )
 
     result: dict[str, Any] = {}
+    new_entries: dict[str, dict[str, Any]] = {}
     with open(f"{self_gen_path}/cache.cfg.out", "r", encoding="UTF-8") as fp:
         raw_result = fp.readlines()
         for ii, each_line in enumerate(raw_result):
@@ -138,25 +198,20 @@ def run_cacti(
             + str(technology)
         )
 
-        new_result = {
-            "%s"  # pylint: disable=C0209
-            % mem_name: {
-                "size_byte": int(size_byte),
-                "size_bit": int(size_byte * 8),
-                "area": area,
-                "cost": {"read_word": read_word, "write_word": write_word},
-                "IO_bus_width": int(mem_bw),
-                "ex_rd_port": ex_rd_port,
-                "ex_wr_port": ex_wr_port,
-                "rd_wr_port": rd_wr_port,
-                "bank_count": bank_count,
-                "memory_type": mem_type,
-                "technology": technology,
-            }
+        new_entries[mem_name] = {
+            "size_byte": int(size_byte),
+            "size_bit": int(size_byte * 8),
+            "area": area,
+            "cost": {"read_word": read_word, "write_word": write_word},
+            "IO_bus_width": int(mem_bw),
+            "ex_rd_port": ex_rd_port,
+            "ex_wr_port": ex_wr_port,
+            "rd_wr_port": rd_wr_port,
+            "bank_count": bank_count,
+            "memory_type": mem_type,
+            "technology": technology,
         }
-        with open(mem_pool_path, "a+", encoding="UTF-8") as fp:
-            yaml.dump(new_result, fp)
-            fp.write("\n")
+    return new_entries
 
 
 if __name__ == "__main__":
@@ -1,13 +1,37 @@
 import logging
 import os
-import subprocess
-from typing import Any
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Iterable
 
-import yaml
+from zigzag.cacti.cacti_master.cacti_top import get_cacti_entries
+from zigzag.cacti.memory_cost_surrogate import MemoryCostEstimate, MemoryCostSurrogate
+from zigzag.cacti.memory_pool import MemoryPool, MemoryPoolKey
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class CactiPoint:
+    """! Memory configuration of which the costs are extracted with CACTI"""
+
+    mem_type: str
+    size: int  # unit: bit
+    r_bw: int
+    r_port: int
+    w_port: int
+    rw_port: int
+    bank: int
+    technology: float = 0.022
+
+    @property
+    def key(self) -> MemoryPoolKey:
+        return MemoryPool.get_key(
+            self.size, self.r_bw, self.r_port, self.w_port, self.rw_port, self.bank, self.technology
+        )
+
+
 class CactiParser:
     """!  Class that provides the interface between ZigZag and CACTI."""
 
@@ -15,13 +39,55 @@ class CactiParser:
     cacti_path = os.path.dirname(os.path.realpath(__file__))
     ## Path to cached cacti simulated memories
     MEM_POOL_PATH = f"{cacti_path}/cacti_master/example_mem_pool.yaml"
-    ## Path to cacti python script to extract costs
-    CACTI_TOP_PATH = f"{cacti_path}/cacti_master/cacti_top.py"
 
     def __init__(self):
         """"""
         pass
 
+    @staticmethod
+    def get_point(
+        mem_name: str,
+        mem_type: str,
+        size: int,
+        r_bw: int,
+        r_port: int,
+        w_port: int,
+        rw_port: int,
+        bank: int,
+        technology: float = 0.022,
+    ) -> CactiPoint:
+        """! Return the CACTI configuration of the given memory. Register files are modelled as larger SRAMs."""
+        if mem_type == "rf":
+            new_mem_type = "sram"
+            new_size = int(size * 128)
+            new_r_bw = int(r_bw)
+            logger.warning(
+                "%s: Type %s -> %s. Size %i -> %i. BW %i -> %i.",
+                mem_name,
+                mem_type,
+                new_mem_type,
+                size,
+                new_size,
+                r_bw,
+                new_r_bw,
+            )
+            mem_type = new_mem_type
+            size = new_size
+            r_bw = new_r_bw
+        return CactiPoint(mem_type, size, r_bw, r_port, w_port, rw_port, bank, technology)
+
+    @staticmethod
+    def get_estimate(
+        point: CactiPoint, max_interpolation_error: float, mem_pool_path: str = MEM_POOL_PATH
+    ) -> MemoryCostEstimate | None:
+        """! Return the costs of the given memory interpolated from the memory pool, or None if they can't be
+        interpolated with an estimated relative error of at most `max_interpolation_error`"""
+        surrogate = MemoryCostSurrogate.load(MemoryPool.load(mem_pool_path))
+        estimate = surrogate.estimate(point.mem_type, point.key)
+        if estimate is None or estimate.error > max_interpolation_error:
+            return None
+        return estimate
+
     def item_exists(
         self,
         size: int,
@@ -37,31 +103,8 @@ class CactiParser:
         @param mem_pool_path  Path to cached cacti simulated memories
         @return Return wether the requested memory item has been simulated before.
         """
-        with open(mem_pool_path, "r") as fp:  # pylint: disable=W1514
-            memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(fp)
-
-        if memory_pool is not None:
-            for instance in memory_pool:
-                io_bus_width = int(memory_pool[instance]["IO_bus_width"])
-                ex_rd_port = int(memory_pool[instance]["ex_rd_port"])
-                ex_wr_port = int(memory_pool[instance]["ex_wr_port"])
-                rd_wr_port = int(memory_pool[instance]["rd_wr_port"])
-                cache_size = int(memory_pool[instance]["size_bit"])
-                bank_count = int(memory_pool[instance].get("bank_count", -1))
-                tech = float(memory_pool[instance].get("technology", -1))
-
-                if (
-                    (size == cache_size)
-                    and (io_bus_width == r_bw)
-                    and (r_port == ex_rd_port)
-                    and (w_port == ex_wr_port)
-                    and (rw_port == rd_wr_port)
-                    and (bank_count == bank)
-                    and (tech == technology)
-                ):
-                    return True
-
-        return False
+        key = MemoryPool.get_key(size, r_bw, r_port, w_port, rw_port, bank, technology)
+        return MemoryPool.load(mem_pool_path).contains(key)
 
     def create_item(
         self,
@@ -74,40 +117,85 @@ class CactiParser:
         bank: int,
         technology: float = 0.022,
         mem_pool_path: str = MEM_POOL_PATH,
-        cacti_top_path: str = CACTI_TOP_PATH,
     ) -> None:
         """! This function simulates a new item by calling CACTI7 based on the provided parameters
         @param mem_pool_path  Path to cached cacti simulated memories
-        @param cacti_top_path Path to cacti python script to extract costs
         """
+        point = CactiPoint(mem_type, size, r_bw, r_port, w_port, rw_port, bank, technology)
+        self.create_items([point], nb_workers=1, mem_pool_path=mem_pool_path)
+
+    def create_items(
+        self,
+        points: Iterable[CactiPoint],
+        nb_workers: int | None = None,
+        mem_pool_path: str = MEM_POOL_PATH,
+    ) -> dict[CactiPoint, float]:
+        """! Simulate all given memory configurations that are not in the memory pool yet by running the CACTI7 binary,
+        with at most `nb_workers` runs (default: the number of CPUs) at the same time. The results are added to the
+        memory pool in one transaction. If a run fails, the results of the other runs are still added before raising.
+        @param mem_pool_path  Path to cached cacti simulated memories
+        @return The run time (in seconds) of every simulated configuration
+        """
+        memory_pool = MemoryPool.load(mem_pool_path)
+        missing_points = [
+            point for point in dict.fromkeys(points) if not memory_pool.contains(point.key, point.mem_type)
+        ]
+        if not missing_points:
+            return {}
+
+        cacti_master_path = os.path.dirname(mem_pool_path)
+        if not os.path.exists(os.path.join(cacti_master_path, "cacti")):
+            raise FileNotFoundError(f"Cacti binary doesn't exist in {cacti_master_path}.")
 
-        p = subprocess.call(
-            [
-                "python",
-                cacti_top_path,
-                "--mem_type",
-                str(mem_type),
-                "--cache_size",
-                str(int(size / 8)),
-                "--IO_bus_width",
-                str(r_bw),
-                "--ex_rd_port",
-                str(r_port),
-                "--ex_wr_port",
-                str(w_port),
-                "--rd_wr_port",
-                str(rw_port),
-                "--bank_count",
-                str(bank),
-                "--mem_pool_path",
-                str(mem_pool_path),
-                "--technology",
-                str(technology),
-            ],
+        nb_workers = min(nb_workers or os.cpu_count() or 1, len(missing_points))
+        logger.info("Extracting memory costs with CACTI for %i memories (%i workers).", len(missing_points), nb_workers)
+        new_entries: dict[str, dict[str, Any]] = {}
+        run_times: dict[CactiPoint, float] = {}
+        errors: list[Exception] = []
+        start = time.perf_counter()
+        # Every run only waits for the CACTI binary, which runs in its own process
+        with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+            futures = {executor.submit(self.run_cacti, point, cacti_master_path): point for point in missing_points}
+            for future in as_completed(futures):
+                point = futures[future]
+                try:
+                    entries, run_times[point] = future.result()
+                except Exception as exc:  # pylint: disable=W0718
+                    # The error is raised after the results of the other runs are added to the memory pool
+                    logger.error("CACTI failed for %s: %s", point, exc)
+                    errors.append(exc)
+                    continue
+                new_entries.update(entries)
+                logger.info("Extracted memory costs with CACTI for %s in %.2f s.", point, run_times[point])
+
+        memory_pool.add_entries(new_entries)
+        logger.info(
+            "Extracted memory costs with CACTI for %i memories in %.2f s.", len(run_times), time.perf_counter() - start
         )
+        if errors:
+            raise errors[0]
+        return run_times
 
-        if p != 0:
-            raise ChildProcessError(f"Cacti subprocess call failed with return value {p}.")
+    @staticmethod
+    def run_cacti(point: CactiPoint, cacti_master_path: str) -> tuple[dict[str, dict[str, Any]], float]:
+        """! Run CACTI for the given configuration
+        @return The memory pool entries of the results and the run time (in seconds)
+        """
+        start = time.perf_counter()
+        # The arguments are formatted like the command line arguments of cacti_top.py
+        entries = get_cacti_entries(
+            mem_type=point.mem_type,
+            cache_size=str(int(point.size / 8)),
+            IO_bus_width=str(point.r_bw),
+            ex_rd_port=str(point.r_port),
+            ex_wr_port=str(point.w_port),
+            rd_wr_port=str(point.rw_port),
+            bank_count=str(point.bank),
+            technology=str(point.technology),
+            cacti_master_path=cacti_master_path,
+            verbose=False,
+        )
+        return entries, time.perf_counter() - start
 
     def get_item(
         self,
@@ -122,16 +210,14 @@ class CactiParser:
         bank: int,
         technology: float = 0.022,
         mem_pool_path: str = MEM_POOL_PATH,
-        cacti_top_path: str = CACTI_TOP_PATH,
+        max_interpolation_error: float | None = None,
     ) -> tuple[float, float, float]:
         """! This functions checks first if the memory with the provided parameters was already simulated once.
         In case it hasn't been simulated, then it will create a new memory item based on the provided parameters.
         @param mem_pool_path  Path to cached cacti simulated memories
-        @param cacti_top_path Path to cacti python script to extract costs
+        @param max_interpolation_error If not None, a memory that hasn't been simulated is interpolated from the
+            memory pool instead, if the estimated relative error is at most this value.
         """
-        if not os.path.exists(cacti_top_path):
-            raise FileNotFoundError(f"Cacti top file doesn't exist: {cacti_top_path}.")
-
         logger.info(
             "Extracting memory costs with CACTI for %s with size = %i and r_bw = %i.",
             mem_name,
@@ -139,82 +225,36 @@ class CactiParser:
             r_bw,
         )
 
-        if mem_type == "rf":
-            new_mem_type = "sram"
-            new_size = int(size * 128)
-            new_r_bw = int(r_bw)
-            logger.warning(
-                "%s: Type %s -> %s. Size %i -> %i. BW %i -> %i.",
-                mem_name,
-                mem_type,
-                new_mem_type,
-                size,
-                new_size,
-                r_bw,
-                new_r_bw,
-            )
-            mem_type = new_mem_type
-            size = new_size
-            r_bw = new_r_bw
-
-        if not self.item_exists(
-            size,
-            r_bw,
-            r_port,
-            w_port,
-            rw_port,
-            bank,
-            technology,
-            mem_pool_path,
-        ):
-            self.create_item(
-                mem_type,
-                size,
-                r_bw,
-                r_port,
-                w_port,
-                rw_port,
-                bank,
-                technology,
-                mem_pool_path,
-                cacti_top_path,
-            )
-
-        with open(mem_pool_path, "r", encoding="UTF-8") as fp:
-            memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(fp)
-
-        if memory_pool is not None:
-            for instance in memory_pool:
-                io_bus_width = int(memory_pool[instance]["IO_bus_width"])
-                area = memory_pool[instance]["area"]
-                bank_count = int(memory_pool[instance]["bank_count"])
-                read_cost = memory_pool[instance]["cost"]["read_word"] * 1000
-                write_cost = memory_pool[instance]["cost"]["write_word"] * 1000
-                ex_rd_port = int(memory_pool[instance]["ex_rd_port"])
-                ex_wr_port = int(memory_pool[instance]["ex_wr_port"])
-                rd_wr_port = int(memory_pool[instance]["rd_wr_port"])
-                cache_size = int(memory_pool[instance]["size_bit"])
-                memory_type = memory_pool[instance]["memory_type"]
-                tech = float(memory_pool[instance].get("technology", -1))
-
-                if (
-                    (mem_type == memory_type)
-                    and (size == cache_size)
-                    and (io_bus_width == r_bw)
-                    and (r_port == ex_rd_port)
-                    and (w_port == ex_wr_port)
-                    and (rw_port == rd_wr_port)
-                    and (tech == technology)
-                    and (bank_count == bank)
-                ):
+        point = self.get_point(mem_name, mem_type, size, r_bw, r_port, w_port, rw_port, bank, technology)
+        memory_pool = MemoryPool.load(mem_pool_path)
+        if not memory_pool.contains(point.key, point.mem_type):
+            if max_interpolation_error is not None:
+                estimate = self.get_estimate(point, max_interpolation_error, mem_pool_path)
+                if estimate is not None:
                     logger.info(
-                        "Extracted memory costs with CACTI for %s: r_cost = %f, w_cost = %f, area = %f.",
+                        "Interpolated memory costs for %s: r_cost = %f, w_cost = %f, area = %f (error %.1f%%).",
                         mem_name,
-                        read_cost,
-                        write_cost,
-                        area,
+                        estimate.read_word * 1000,
+                        estimate.write_word * 1000,
+                        estimate.area,
+                        estimate.error * 100,
                     )
-                    return read_cost, write_cost, area
+                    return estimate.read_word * 1000, estimate.write_word * 1000, estimate.area
+            self.create_items([point], nb_workers=1, mem_pool_path=mem_pool_path)
+
+        entry = memory_pool.get_entry(point.key, point.mem_type)
+        if entry is not None:
+            read_cost = entry["cost"]["read_word"] * 1000
+            write_cost = entry["cost"]["write_word"] * 1000
+            area = entry["area"]
+            logger.info(
+                "Extracted memory costs with CACTI for %s: r_cost = %f, w_cost = %f, area = %f.",
+                mem_name,
+                read_cost,
+                write_cost,
+                area,
+            )
+            return read_cost, write_cost, area
 
         # should be never reached
         raise ModuleNotFoundError(
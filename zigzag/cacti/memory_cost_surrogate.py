@@ -0,0 +1,188 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, TypeAlias
+
+import numpy as np
+
+from zigzag.cacti.memory_pool import MemoryPool, MemoryPoolKey
+
+logger = logging.getLogger(__name__)
+
+# (mem_type, ex_rd_port, ex_wr_port, rd_wr_port, bank_count, technology)
+SurrogateGroupKey: TypeAlias = tuple[str, int, int, int, int, float]
+# (log2 of the size in bit, log2 of the IO bus width)
+SamplePoint: TypeAlias = tuple[float, float]
+
+
+@dataclass(frozen=True)
+class MemoryCostEstimate:
+    """! Interpolated CACTI costs of a memory, in the units of the memory pool (nJ and mm2)"""
+
+    read_word: float
+    write_word: float
+    area: float
+    ## Estimated relative error: the largest leave-one-out error of the samples the estimate is interpolated from
+    error: float
+
+
+class SurrogateRow:
+    """! Samples of one surrogate group with the same IO bus width, sorted by size"""
+
+    def __init__(self, log_sizes: list[float], log_costs: list[tuple[float, float, float]]):
+        order = np.argsort(log_sizes)
+        self.log_sizes = np.asarray(log_sizes, dtype=float)[order]
+        # One column per cost: log2 of read_word, write_word and area
+        self.log_costs = np.asarray(log_costs, dtype=float).reshape(-1, 3)[order]
+
+    def without(self, log_size: float) -> "SurrogateRow | None":
+        keep = self.log_sizes != log_size
+        if not keep.any():
+            return None
+        return SurrogateRow(list(self.log_sizes[keep]), [tuple(costs) for costs in self.log_costs[keep]])
+
+    def interpolate(self, log_size: float) -> tuple[np.ndarray, list[float]] | None:
+        """! Return the log costs at the given log size, interpolated linearly between the neighbouring samples, and
+        the log sizes of these samples. Return None if the size is outside the range of the samples."""
+        if not self.log_sizes[0] <= log_size <= self.log_sizes[-1]:
+            return None
+        idx = int(np.searchsorted(self.log_sizes, log_size))
+        if self.log_sizes[idx] == log_size:
+            return self.log_costs[idx], [log_size]
+        low, high = float(self.log_sizes[idx - 1]), float(self.log_sizes[idx])
+        weight = (log_size - low) / (high - low)
+        return (1 - weight) * self.log_costs[idx - 1] + weight * self.log_costs[idx], [low, high]
+
+
+class MemoryCostSurrogate:
+    """! Interpolation model of the CACTI costs (read_word, write_word, area) in a memory pool. These vary smoothly with
+    the size and IO bus width, for a fixed memory type, port count, bank count and technology. Within such a group, the
+    costs are interpolated piecewise linearly in log-log space: along the size between the samples with the same IO bus
+    width, and then along the IO bus width between the two neighbouring widths. Queries outside the range of the
+    samples are not estimated. The error of an estimate is the leave-one-out error of the samples it interpolates from:
+    the relative error when predicting that sample from the others in the group.
+    """
+
+    __surrogates: dict[str, tuple[tuple[int, int] | None, "MemoryCostSurrogate"]] = {}
+
+    def __init__(self, entries: list[dict[str, Any]]):
+        """
+        @param entries Memory pool entries to interpolate
+        """
+        samples: dict[SurrogateGroupKey, dict[float, dict[float, tuple[float, float, float]]]] = {}
+        for entry in entries:
+            costs = (entry["cost"]["read_word"], entry["cost"]["write_word"], entry["area"])
+            if any(cost <= 0 for cost in costs):
+                continue
+            size, bw, r_port, w_port, rw_port, bank, technology = MemoryPool.get_entry_key(entry)
+            group_key = (entry["memory_type"], r_port, w_port, rw_port, bank, technology)
+            row_samples = samples.setdefault(group_key, {}).setdefault(math.log2(bw), {})
+            row_samples.setdefault(math.log2(size), tuple(math.log2(cost) for cost in costs))  # type: ignore
+
+        self.groups: dict[SurrogateGroupKey, dict[float, SurrogateRow]] = {
+            group_key: {
+                log_bw: SurrogateRow(list(row_samples.keys()), list(row_samples.values()))
+                for log_bw, row_samples in sorted(group_samples.items())
+            }
+            for group_key, group_samples in samples.items()
+        }
+        self.leave_one_out_errors: dict[SurrogateGroupKey, dict[SamplePoint, float]] = {
+            group_key: self.compute_leave_one_out_errors(group_key, samples[group_key]) for group_key in self.groups
+        }
+
+    @classmethod
+    def load(cls, memory_pool: MemoryPool) -> "MemoryCostSurrogate":
+        """! Return the surrogate of the given memory pool, which is only fitted again when the pool file changed"""
+        memory_pool.refresh()
+        file_state, surrogate = cls.__surrogates.get(memory_pool.path, (None, None))
+        if surrogate is None or file_state != memory_pool.file_state:
+            entries = [entry for entries in memory_pool.index.values() for entry in entries.values()]
+            surrogate = MemoryCostSurrogate(entries)
+            cls.__surrogates[memory_pool.path] = (memory_pool.file_state, surrogate)
+        return surrogate
+
+    @staticmethod
+    def get_group_key(mem_type: str, key: MemoryPoolKey) -> SurrogateGroupKey:
+        _, _, r_port, w_port, rw_port, bank, technology = key
+        return mem_type, r_port, w_port, rw_port, bank, technology
+
+    def compute_leave_one_out_errors(
+        self,
+        group_key: SurrogateGroupKey,
+        group_samples: dict[float, dict[float, tuple[float, float, float]]],
+    ) -> dict[SamplePoint, float]:
+        """! Return the relative error of every sample that can be interpolated from the other samples of the group"""
+        errors: dict[SamplePoint, float] = {}
+        for log_bw, row_samples in group_samples.items():
+            for log_size, log_costs in row_samples.items():
+                prediction = self.interpolate(group_key, log_size, log_bw, excluded=(log_size, log_bw))
+                if prediction is not None:
+                    predicted_log_costs, _ = prediction
+                    errors[(log_size, log_bw)] = max(
+                        abs(2 ** float(predicted - actual) - 1)
+                        for predicted, actual in zip(predicted_log_costs, log_costs)
+                    )
+        return errors
+
+    def interpolate(
+        self, group_key: SurrogateGroupKey, log_size: float, log_bw: float, excluded: SamplePoint | None = None
+    ) -> tuple[np.ndarray, list[SamplePoint]] | None:
+        """! Return the interpolated log costs and the samples they are interpolated from, or None if the point is
+        outside the range of the samples of the group.
+        @param excluded Sample to leave out of the interpolation
+        """
+        rows = self.groups.get(group_key, {})
+        if excluded is not None and excluded[1] in rows:
+            rows = dict(rows)
+            row = rows[excluded[1]].without(excluded[0])
+            if row is None:
+                del rows[excluded[1]]
+            else:
+                rows[excluded[1]] = row
+        if not rows:
+            return None
+
+        if log_bw in rows:
+            prediction = rows[log_bw].interpolate(log_size)
+            if prediction is None:
+                return None
+            log_costs, log_sizes = prediction
+            return log_costs, [(sample_log_size, log_bw) for sample_log_size in log_sizes]
+
+        log_bws = list(rows.keys())
+        idx = int(np.searchsorted(log_bws, log_bw))
+        if idx == 0 or idx == len(log_bws):
+            return None
+        low_bw, high_bw = log_bws[idx - 1], log_bws[idx]
+        low_prediction = rows[low_bw].interpolate(log_size)
+        high_prediction = rows[high_bw].interpolate(log_size)
+        if low_prediction is None or high_prediction is None:
+            return None
+        weight = (log_bw - low_bw) / (high_bw - low_bw)
+        log_costs = (1 - weight) * low_prediction[0] + weight * high_prediction[0]
+        supports = [(sample_log_size, low_bw) for sample_log_size in low_prediction[1]] + [
+            (sample_log_size, high_bw) for sample_log_size in high_prediction[1]
+        ]
+        return log_costs, supports
+
+    def estimate(self, mem_type: str, key: MemoryPoolKey) -> MemoryCostEstimate | None:
+        """! Return the interpolated costs of the given memory, or None if it is outside the range of the samples. If
+        none of the samples it is interpolated from can be validated with the other samples, the error is infinite.
+        """
+        group_key = self.get_group_key(mem_type, key)
+        size, bw = key[0], key[1]
+        if size <= 0 or bw <= 0:
+            return None
+        prediction = self.interpolate(group_key, math.log2(size), math.log2(bw))
+        if prediction is None:
+            return None
+        log_costs, supports = prediction
+        if len(supports) == 1:
+            # The memory is a sample itself
+            error = 0.0
+        else:
+            leave_one_out_errors = self.leave_one_out_errors[group_key]
+            errors = [leave_one_out_errors[sample] for sample in supports if sample in leave_one_out_errors]
+            error = max(errors, default=math.inf)
+        read_word, write_word, area = (float(2**log_cost) for log_cost in log_costs)
+        return MemoryCostEstimate(read_word, write_word, area, error)
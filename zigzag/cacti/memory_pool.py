@@ -0,0 +1,144 @@
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Generator, TypeAlias
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # e.g. on Windows: appends from concurrent processes are not serialized
+    fcntl = None  # pylint: disable=C0103
+
+logger = logging.getLogger(__name__)
+
+# (size_bit, IO_bus_width, ex_rd_port, ex_wr_port, rd_wr_port, bank_count, technology)
+MemoryPoolKey: TypeAlias = tuple[int, int, int, int, int, int, float]
+
+
+class MemoryPool:
+    """! In-process index of a CACTI memory pool file (e.g. `example_mem_pool.yaml`), with the entries indexed by their
+    `MemoryPoolKey` and memory type. There is a single instance per file and process (see `MemoryPool.load`), which is
+    only parsed again when the file has been changed, e.g. by another process. Processes can concurrently add entries
+    to the same file: writes take an exclusive lock and reads a shared lock on a lock file next to the pool file.
+    """
+
+    __pools: dict[str, "MemoryPool"] = {}
+
+    def __init__(self, path: str):
+        """
+        @param path Path of the memory pool file
+        """
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.index: dict[MemoryPoolKey, dict[str, dict[str, Any]]] = {}
+        # Modification time and size of the pool file when it was last parsed
+        self.file_state: tuple[int, int] | None = None
+        self.refresh()
+
+    @classmethod
+    def load(cls, path: str) -> "MemoryPool":
+        """! Return the memory pool of the given file, which is shared by all users in this process"""
+        path = os.path.realpath(path)
+        if path not in cls.__pools:
+            cls.__pools[path] = MemoryPool(path)
+        return cls.__pools[path]
+
+    @staticmethod
+    def get_key(
+        size: int, r_bw: int, r_port: int, w_port: int, rw_port: int, bank: int, technology: float
+    ) -> MemoryPoolKey:
+        """! Return the key of the memory with the given parameters (of which the size is in bits)"""
+        return (int(size), int(r_bw), int(r_port), int(w_port), int(rw_port), int(bank), float(technology))
+
+    @staticmethod
+    def get_entry_key(entry: dict[str, Any]) -> MemoryPoolKey:
+        # The values in the pool file are not necessarily numbers, e.g. `ex_rd_port: '1'`
+        return (
+            int(entry["size_bit"]),
+            int(entry["IO_bus_width"]),
+            int(entry["ex_rd_port"]),
+            int(entry["ex_wr_port"]),
+            int(entry["rd_wr_port"]),
+            int(entry.get("bank_count", -1)),
+            float(entry.get("technology", -1)),
+        )
+
+    @contextmanager
+    def lock(self, exclusive: bool) -> Generator[None, None, None]:
+        """! Lock the pool file for all processes that use a MemoryPool for this file"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a", encoding="UTF-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_file_state(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> None:
+        """! Parse the pool file again if it has been changed since it was last parsed"""
+        if self.get_file_state() != self.file_state:
+            with self.lock(exclusive=False):
+                self.__parse()
+
+    def __parse(self) -> None:
+        """! Parse the pool file, which should be locked by the caller"""
+        self.index = {}
+        self.file_state = self.get_file_state()
+        if self.file_state is None:
+            return
+        with open(self.path, "r", encoding="UTF-8") as fp:
+            memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(fp)
+        for entry in (memory_pool or {}).values():
+            # Like a linear search through the file, the first matching entry is used
+            self.index.setdefault(self.get_entry_key(entry), {}).setdefault(entry["memory_type"], entry)
+        logger.debug("Loaded %i entries from memory pool %s.", len(memory_pool or {}), self.path)
+
+    def contains(self, key: MemoryPoolKey, mem_type: str | None = None) -> bool:
+        """! Return whether the pool contains an entry with the given key (and memory type, if given)"""
+        return self.get_entry(key, mem_type) is not None
+
+    def get_entry(self, key: MemoryPoolKey, mem_type: str | None = None) -> dict[str, Any] | None:
+        """! Return the entry with the given key and memory type (or any memory type if None), or None if the pool
+        doesn't contain such entry. The pool file is checked for entries added by other processes.
+        """
+        entry = self.__get_indexed_entry(key, mem_type)
+        if entry is None:
+            self.refresh()
+            entry = self.__get_indexed_entry(key, mem_type)
+        return entry
+
+    def __get_indexed_entry(self, key: MemoryPoolKey, mem_type: str | None) -> dict[str, Any] | None:
+        entries_per_mem_type = self.index.get(key, {})
+        if mem_type is None:
+            return next(iter(entries_per_mem_type.values()), None)
+        return entries_per_mem_type.get(mem_type)
+
+    def add_entries(self, entries: dict[str, dict[str, Any]]) -> None:
+        """! Append the given entries (name -> entry) to the pool file in one transaction. Entries that were added in
+        the meantime (e.g. by another process) are skipped.
+        """
+        with self.lock(exclusive=True):
+            if self.get_file_state() != self.file_state:
+                self.__parse()
+            new_entries = {
+                name: entry
+                for name, entry in entries.items()
+                if self.__get_indexed_entry(self.get_entry_key(entry), entry["memory_type"]) is None
+            }
+            if new_entries:
+                with open(self.path, "a+", encoding="UTF-8") as fp:
+                    for name, entry in new_entries.items():
+                        yaml.dump({name: entry}, fp)
+                        fp.write("\n")
+                self.__parse()
+        logger.debug("Added %i entries to memory pool %s.", len(new_entries), self.path)
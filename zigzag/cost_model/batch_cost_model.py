@@ -0,0 +1,390 @@
+import logging
+from math import ceil, gcd
+
+import numpy as np
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.datatypes import ArrayType, Constants, LayerDim, LayerOperand
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.operational_array import OperationalArray
+from zigzag.mapping.data_movement import DataDirection
+from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.workload.layer_node import LayerNode
+
+logger = logging.getLogger(__name__)
+
+# Fields of the array-of-structs result of `BatchCostModelEvaluation`
+BATCH_RESULT_DTYPE = np.dtype(
+    [
+        ("energy_total", np.float64),
+        ("mac_energy", np.float64),
+        ("mem_energy", np.float64),
+        ("ideal_cycle", np.float64),
+        ("ideal_temporal_cycle", np.float64),
+        ("mac_spatial_utilization", np.float64),
+    ]
+)
+
+
+class TemporalMappingBatch:
+    """! A batch of N temporal mappings of the same layer, stored as NumPy arrays of per-level loop products.
+
+    - loop_sizes[layer_op]: array of shape (N, nb memory levels, nb layer dims) with, for each mapping, memory level
+      and layer dimension, the product of the (stationary, i.e. after merging down the innermost irrelevant loops)
+      temporal loops of that dimension at that level.
+    - mac_level_data_stationary_cycle[layer_op]: array of shape (N,) with the MAC level data stationary cycle.
+    """
+
+    def __init__(
+        self,
+        layer: LayerNode,
+        loop_sizes: dict[LayerOperand, ArrayType],
+        mac_level_data_stationary_cycle: dict[LayerOperand, ArrayType],
+        temporal_mappings: list[TemporalMapping] | None = None,
+    ):
+        """
+        @param layer The layer the temporal mappings belong to. The last axis of the loop sizes follows the order of
+        `layer.layer_dim_sizes.layer_dims`
+        @param temporal_mappings (optional) The TemporalMapping objects, required to materialize full cost model
+        evaluations
+        """
+        self.layer = layer
+        self.loop_sizes = loop_sizes
+        self.mac_level_data_stationary_cycle = mac_level_data_stationary_cycle
+        self.temporal_mappings = temporal_mappings
+        self.size = len(next(iter(loop_sizes.values())))
+
+    @staticmethod
+    def from_temporal_mappings(temporal_mappings: list[TemporalMapping], layer: LayerNode) -> "TemporalMappingBatch":
+        layer_dims = layer.layer_dim_sizes.layer_dims
+        dim_index = {layer_dim: idx for idx, layer_dim in enumerate(layer_dims)}
+        loop_sizes: dict[LayerOperand, ArrayType] = {}
+        mac_level_data_stationary_cycle: dict[LayerOperand, ArrayType] = {}
+        for layer_op in layer.layer_operands:
+            nb_levels = temporal_mappings[0].mem_level[layer_op] if temporal_mappings else 0
+            sizes = np.ones((len(temporal_mappings), nb_levels, len(layer_dims)))
+            for idx, temporal_mapping in enumerate(temporal_mappings):
+                for level, loops in enumerate(temporal_mapping.mapping_dic_stationary[layer_op]):
+                    for layer_dim, size in loops:
+                        sizes[idx, level, dim_index[layer_dim]] *= size
+            loop_sizes[layer_op] = sizes
+            mac_level_data_stationary_cycle[layer_op] = np.array(
+                [temporal_mapping.mac_level_data_stationary_cycle[layer_op] for temporal_mapping in temporal_mappings],
+                dtype=np.float64,
+            )
+        return TemporalMappingBatch(layer, loop_sizes, mac_level_data_stationary_cycle, temporal_mappings)
+
+
+class BatchCostModelEvaluation:
+    """! Evaluates the cost model for a batch of temporal mappings of the same accelerator, layer and spatial mapping at
+    once. All parts that only depend on the accelerator, layer and spatial mapping are computed once, the per-mapping
+    parts are computed with NumPy over the whole batch.
+
+    The data sizes, memory word accesses and energies are identical to the ones of `CostModelEvaluation`. Of the
+    latency, only the terms that don't depend on the memory port activity (`ideal_cycle`, `ideal_temporal_cycle`) are
+    computed. As `latency_total2 >= ideal_temporal_cycle`, these can be used to select candidates, for which the full
+    `CostModelEvaluation` is then created with `create_cost_model_evaluation`.
+    """
+
+    def __init__(
+        self,
+        *,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+        batch: TemporalMappingBatch,
+        access_same_data_considered_as_no_access: bool = True,
+        cycles_per_op: float = 1.0,
+    ):
+        assert isinstance(
+            accelerator.operational_array, OperationalArray
+        ), "The batched cost model only supports digital operational arrays."
+        self.accelerator = accelerator
+        self.layer = layer
+        self.spatial_mapping = spatial_mapping
+        self.spatial_mapping_int = spatial_mapping_int
+        self.batch = batch
+        self.access_same_data_considered_as_no_access = access_same_data_considered_as_no_access
+        self.cycles_per_op = cycles_per_op
+        self.memory_operand_links = layer.memory_operand_links
+        self.layer_dims = layer.layer_dim_sizes.layer_dims
+
+        self.run()
+
+    def run(self) -> None:
+        """! Run the batched cost model evaluation."""
+        self.calc_loop_sizes()
+        self.calc_data_size()
+        self.calc_memory_word_access()
+        self.calc_energy()
+        self.calc_latency()
+
+    def get_spatial_loop_sizes(self, layer_op: LayerOperand) -> ArrayType:
+        """! Return the spatial loop products per architectural level and layer dimension for the given operand"""
+        mapping_dict = self.spatial_mapping.mapping_dict_origin[layer_op]
+        spatial_loop_sizes = np.ones((len(mapping_dict), len(self.layer_dims)))
+        for level, loops in enumerate(mapping_dict):
+            for layer_dim, size in loops:
+                spatial_loop_sizes[level, self.layer_dims.index(layer_dim)] *= size
+        return spatial_loop_sizes
+
+    def calc_loop_sizes(self) -> None:
+        """! Combine the spatial and temporal loops per architectural level (the equivalents of
+        `combined_mapping_dict_1s1t` and `combined_mapping_dict_1s2t` in `Mapping`) and compute the current and below
+        level (cabl) r and ir loop sizes, with the partially relevant loops decoupled into r and ir parts.
+        """
+        self.r_loop_size_cabl: dict[LayerOperand, ArrayType] = {}
+        self.r_loop_size_cabl2: dict[LayerOperand, ArrayType] = {}
+        self.ir_loop_size_cabl: dict[LayerOperand, ArrayType] = {}
+        self.ir_loop_size_cabl2: dict[LayerOperand, ArrayType] = {}
+        self.ir_loop_size_per_level: dict[LayerOperand, ArrayType] = {}
+        self.cycle_cabl_level: dict[LayerOperand, ArrayType] = {}
+
+        for layer_op in self.layer.layer_operands:
+            spatial_loop_sizes = self.get_spatial_loop_sizes(layer_op)
+            temporal_loop_sizes = self.batch.loop_sizes[layer_op]
+            nb_mappings, nb_mem_levels, _ = temporal_loop_sizes.shape
+            arch_level = self.spatial_mapping.arch_level[layer_op]
+            assert nb_mem_levels == arch_level - 1
+
+            # Spatial loops of level lv together with the temporal loops of memory level lv-1 (resp. lv)
+            combined = np.broadcast_to(spatial_loop_sizes, (nb_mappings, *spatial_loop_sizes.shape)).copy()
+            combined[:, 1:] *= temporal_loop_sizes[:, : arch_level - 1]
+            combined2 = np.ones_like(combined)
+            combined2[:, 1:] = spatial_loop_sizes[:-1] * temporal_loop_sizes[:, : arch_level - 1]
+
+            r_cabl, ir_cabl = self.calc_r_and_ir_cabl(layer_op, np.cumprod(combined, axis=1))
+            r_cabl2, ir_cabl2 = self.calc_r_and_ir_cabl(layer_op, np.cumprod(combined2, axis=1))
+            self.r_loop_size_cabl[layer_op] = np.round(r_cabl)
+            self.r_loop_size_cabl2[layer_op] = np.round(r_cabl2)
+            self.ir_loop_size_cabl[layer_op] = ir_cabl
+            self.ir_loop_size_cabl2[layer_op] = ir_cabl2
+
+            ir_dims = self.get_dim_indices(self.layer.loop_relevancy_info.get_ir_layer_dims(layer_op))
+            self.ir_loop_size_per_level[layer_op] = np.prod(combined[:, :, ir_dims], axis=2)
+            self.cycle_cabl_level[layer_op] = np.cumprod(np.prod(temporal_loop_sizes, axis=2), axis=1)
+
+        self.total_cycle: ArrayType = self.cycle_cabl_level[self.layer.output_operand][:, -1]
+
+    def get_dim_indices(self, layer_dims: list[LayerDim]) -> list[int]:
+        return [self.layer_dims.index(layer_dim) for layer_dim in layer_dims if layer_dim in self.layer_dims]
+
+    def calc_r_and_ir_cabl(self, layer_op: LayerOperand, cabl_loop_sizes: ArrayType) -> tuple[ArrayType, ArrayType]:
+        """! Given the cumulative loop products per level (shape (N, levels, dims)), compute the cumulative r and ir
+        loop sizes. The partially relevant loops contribute the size of the related data dimension (see
+        `LayerNode.calc_tensor_dim`) to the r part and the remainder to the ir part, as in `decouple_pr_loop`.
+        """
+        relevancy_info = self.layer.loop_relevancy_info
+        r_dims = self.get_dim_indices(relevancy_info.get_r_layer_dims(layer_op))
+        ir_dims = self.get_dim_indices(relevancy_info.get_ir_layer_dims(layer_op))
+        r_cabl = np.prod(cabl_loop_sizes[:, :, r_dims], axis=2)
+        ir_cabl = np.prod(cabl_loop_sizes[:, :, ir_dims], axis=2)
+
+        for pr_dim, related_dims in relevancy_info.get_pr_layer_dims(layer_op).items():
+            related_sizes = [cabl_loop_sizes[:, :, self.layer_dims.index(related_dim)] for related_dim in related_dims]
+            (_, sa), (_, sb) = self.layer.pr_scaling_factors[pr_dim]
+            gcd_value = gcd(sa, sb)
+            # Same int conversion as in `LayerNode.calc_tensor_dim`
+            a, b = np.trunc(related_sizes[0]), np.trunc(related_sizes[1])
+            pr_dim_size = a * b - np.maximum(0, b - (sa // gcd_value)) * (a - (sb // gcd_value))
+            pr_dim_size = np.minimum(self.layer.pr_layer_dim_sizes[pr_dim], pr_dim_size)
+            r_cabl = r_cabl * pr_dim_size
+            ir_cabl = ir_cabl * related_sizes[0] * related_sizes[1] / pr_dim_size
+        return r_cabl, ir_cabl
+
+    def calc_data_size(self) -> None:
+        """! Compute the psum flags, data precision and (unrolled) data size at each architectural level."""
+        output_operand = self.layer.output_operand
+        output_ir_flag = self.ir_loop_size_per_level[output_operand] > 1
+        # An output level holds partial sums if there is an ir loop in any of the levels above
+        above_ir_flag = np.flip(np.cumsum(np.flip(output_ir_flag, axis=1), axis=1), axis=1) > 0
+        self.psum_flag = np.zeros_like(output_ir_flag)
+        self.psum_flag[:, :-1] = above_ir_flag[:, 1:]
+
+        self.data_precision: dict[LayerOperand, ArrayType] = {}
+        for layer_op in self.layer.input_operands:
+            self.data_precision[layer_op] = np.full(
+                self.psum_flag.shape[:1] + (self.spatial_mapping.arch_level[layer_op],),
+                self.layer.operand_precision[layer_op],
+            )
+        self.data_precision[output_operand] = np.where(
+            self.psum_flag,
+            self.layer.operand_precision[output_operand],
+            self.layer.operand_precision[Constants.FINAL_OUTPUT_LAYER_OP],
+        )
+
+        self.data_elem_per_level_unrolled = self.r_loop_size_cabl2
+        self.data_bit_per_level_unrolled = {
+            layer_op: self.r_loop_size_cabl2[layer_op] * self.data_precision[layer_op]
+            for layer_op in self.layer.layer_operands
+        }
+        self.mem_utili_individual: dict[LayerOperand, ArrayType] = {}
+        for layer_op in self.layer.layer_operands:
+            mem_op = self.memory_operand_links.layer_to_mem_op(layer_op)
+            mem_sizes = np.array(self.accelerator.mem_size_dict[mem_op], dtype=np.float64)
+            self.mem_utili_individual[layer_op] = self.data_bit_per_level_unrolled[layer_op][:, 1:] / mem_sizes
+
+    def get_data_transfers(
+        self, layer_op: LayerOperand, mem_lv: int
+    ) -> dict[DataDirection, tuple[ArrayType, ...]]:
+        """! Return the per-period data transfer amount, data precision and period count for each data direction of
+        the given unit memory, as in `Mapping.calc_req_mem_bw_and_data_transfer_rate`.
+        """
+        total_cycle = self.total_cycle
+        zeros = np.zeros_like(total_cycle)
+        data_unrolled = self.data_elem_per_level_unrolled[layer_op]
+        mem_bw_boost = self.spatial_mapping.mem_bw_boost[layer_op] + [1]
+        cycle_cabl_level = self.cycle_cabl_level[layer_op]
+        bottom_cycle = (
+            self.batch.mac_level_data_stationary_cycle[layer_op]
+            if self.access_same_data_considered_as_no_access and layer_op in self.layer.input_operands
+            else np.ones_like(total_cycle)
+        )
+        cycle_low = bottom_cycle if mem_lv == 0 else cycle_cabl_level[:, mem_lv - 1]
+        cycle_high = cycle_cabl_level[:, mem_lv]
+        period_count_low = np.floor_divide(total_cycle, cycle_low)
+        period_count_high = np.floor_divide(total_cycle, cycle_high)
+
+        if layer_op in self.layer.input_operands:
+            precision = self.layer.operand_precision[layer_op]
+            rd_out_to_low_data = data_unrolled[:, mem_lv] * mem_bw_boost[mem_lv]
+            transfers = {
+                DataDirection.RD_OUT_TO_LOW: (rd_out_to_low_data, precision, period_count_low),
+                DataDirection.WR_IN_BY_HIGH: (data_unrolled[:, mem_lv + 1], precision, period_count_high),
+            }
+        else:
+            partial_precision = self.layer.operand_precision[layer_op]
+            final_precision = self.layer.operand_precision[Constants.FINAL_OUTPUT_LAYER_OP]
+            output_size = self.layer.operand_size_elem[layer_op]
+            ir_caal = np.flip(np.cumprod(np.flip(self.ir_loop_size_per_level[layer_op], axis=1), axis=1), axis=1)
+            ir_caal = np.concatenate([ir_caal, np.ones((len(ir_caal), 2))], axis=1)
+            has_rd_out_to_low = np.trunc(output_size * (ir_caal[:, mem_lv + 1] - 1)) != 0
+            has_wr_in_by_high = np.trunc(output_size * (ir_caal[:, mem_lv + 2] - 1)) != 0
+            amount_low = np.trunc(data_unrolled[:, mem_lv] * mem_bw_boost[mem_lv])
+            amount_high = data_unrolled[:, mem_lv + 1]
+            psum_low = self.psum_flag[:, mem_lv]
+            psum_high = self.psum_flag[:, mem_lv + 1]
+            transfers = {
+                DataDirection.WR_IN_BY_LOW: (
+                    amount_low,
+                    np.where(has_rd_out_to_low, partial_precision, final_precision),
+                    period_count_low,
+                ),
+                DataDirection.RD_OUT_TO_LOW: (
+                    np.where(psum_low, amount_low, 0),
+                    np.where(has_rd_out_to_low, partial_precision, 0),
+                    np.where(psum_low, period_count_low, 0),
+                ),
+                DataDirection.RD_OUT_TO_HIGH: (
+                    amount_high,
+                    np.where(has_wr_in_by_high, partial_precision, final_precision),
+                    period_count_high,
+                ),
+                DataDirection.WR_IN_BY_HIGH: (
+                    np.where(psum_high, amount_high, 0),
+                    np.where(has_wr_in_by_high, partial_precision, 0),
+                    np.where(psum_high, period_count_high, 0),
+                ),
+            }
+
+        # Ignore the data traffic between the top level memory and the external world
+        if mem_lv == self.spatial_mapping.arch_level[layer_op] - 2:
+            for data_dir in (DataDirection.RD_OUT_TO_HIGH, DataDirection.WR_IN_BY_HIGH):
+                transfers.pop(data_dir, None)
+        return {
+            data_dir: tuple(np.broadcast_to(value, total_cycle.shape) for value in transfers[data_dir])
+            if data_dir in transfers
+            else (zeros, zeros, zeros)
+            for data_dir in DataDirection
+        }
+
+    def calc_memory_word_access(self) -> None:
+        """! Compute the memory word accesses per operand, memory level and data direction, as in
+        `CostModelEvaluation.calc_memory_word_access`. The result has shape (N, memory levels) per direction.
+        """
+        self.memory_word_access: dict[LayerOperand, dict[DataDirection, ArrayType]] = {}
+        for layer_op in self.layer.layer_operands:
+            mem_op = self.memory_operand_links.layer_to_mem_op(layer_op)
+            nb_mem_levels = self.spatial_mapping.arch_level[layer_op] - 1
+            accesses = {data_dir: np.zeros((self.batch.size, nb_mem_levels)) for data_dir in DataDirection}
+            for mem_lv in range(nb_mem_levels):
+                mem_level = self.accelerator.get_memory_level(mem_op, mem_lv)
+                unit_count = self.spatial_mapping.unit_count[layer_op][mem_lv + 1]
+                for data_dir, (amount, precision, period_count) in self.get_data_transfers(layer_op, mem_lv).items():
+                    is_moved = (amount != 0) & (precision != 0)
+                    if not is_moved.any():
+                        continue
+                    max_bw = mem_level.get_max_bandwidth(mem_op, data_dir)
+                    min_bw = mem_level.get_min_bandwidth(mem_op, data_dir)
+                    if min_bw is None and max_bw is None:
+                        raise ValueError(f"Memory bandwidth not defined for {mem_level} {mem_op} {data_dir}")
+                    assert max_bw and min_bw, f"Memory bandwidth not defined for {mem_level} {mem_op} {data_dir}"
+                    accesses[data_dir][:, mem_lv] = np.where(
+                        is_moved,
+                        np.trunc(np.ceil(amount * precision / min_bw) * (min_bw / max_bw) * period_count * unit_count),
+                        0,
+                    )
+            self.memory_word_access[layer_op] = accesses
+
+    def calc_energy(self) -> None:
+        """! Compute the MAC energy and the memory energy breakdown (shape (N, memory levels) per operand)."""
+        operational_array = self.accelerator.operational_array
+        assert isinstance(operational_array, OperationalArray)
+        self.mac_energy: float = operational_array.unit.energy_cost * self.layer.total_mac_count
+
+        self.mem_energy_breakdown: dict[LayerOperand, ArrayType] = {}
+        # Sum in the same order as `CostModelEvaluation.calc_memory_energy_cost`, so the results are identical
+        mem_energy: ArrayType = np.zeros(self.batch.size)
+        for layer_op, accesses in self.memory_word_access.items():
+            mem_op = self.memory_operand_links.layer_to_mem_op(layer_op)
+            memory_levels = self.accelerator.memory_hierarchy.get_memory_levels(mem_op=mem_op)
+            breakdown = np.zeros(accesses[DataDirection.RD_OUT_TO_LOW].shape)
+            for mem_lv in range(breakdown.shape[1]):
+                read_energy = memory_levels[mem_lv].read_energy
+                write_energy = memory_levels[mem_lv].write_energy
+                breakdown[:, mem_lv] = (
+                    accesses[DataDirection.RD_OUT_TO_HIGH][:, mem_lv] * read_energy
+                    + accesses[DataDirection.RD_OUT_TO_LOW][:, mem_lv] * read_energy
+                ) + (
+                    accesses[DataDirection.WR_IN_BY_HIGH][:, mem_lv] * write_energy
+                    + accesses[DataDirection.WR_IN_BY_LOW][:, mem_lv] * write_energy
+                )
+                mem_energy = mem_energy + breakdown[:, mem_lv]
+            self.mem_energy_breakdown[layer_op] = breakdown
+        self.mem_energy = mem_energy
+        self.energy_total: ArrayType = self.mem_energy + self.mac_energy
+
+    def calc_latency(self) -> None:
+        """! Compute the latency terms that don't depend on the memory port activity."""
+        self.ideal_cycle = ceil(
+            ceil(self.layer.total_mac_count / self.accelerator.operational_array.total_unit_count) * self.cycles_per_op
+        )
+        self.ideal_temporal_cycle: ArrayType = self.total_cycle * self.cycles_per_op
+        self.mac_spatial_utilization: ArrayType = self.ideal_cycle / self.ideal_temporal_cycle
+
+    @property
+    def results(self) -> ArrayType:
+        """! The results as an array of structs (see `BATCH_RESULT_DTYPE`), one element per temporal mapping"""
+        results = np.zeros(self.batch.size, dtype=BATCH_RESULT_DTYPE)
+        results["energy_total"] = self.energy_total
+        results["mac_energy"] = self.mac_energy
+        results["mem_energy"] = self.mem_energy
+        results["ideal_cycle"] = self.ideal_cycle
+        results["ideal_temporal_cycle"] = self.ideal_temporal_cycle
+        results["mac_spatial_utilization"] = self.mac_spatial_utilization
+        return results
+
+    def create_cost_model_evaluation(self, index: int) -> CostModelEvaluation:
+        """! Create the full (scalar) cost model evaluation of the temporal mapping at the given index"""
+        assert self.batch.temporal_mappings is not None, "The batch does not contain the TemporalMapping objects"
+        return CostModelEvaluation(
+            accelerator=self.accelerator,
+            layer=self.layer,
+            spatial_mapping=self.spatial_mapping,
+            spatial_mapping_int=self.spatial_mapping_int,
+            temporal_mapping=self.batch.temporal_mappings[index],
+            access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+            cycles_per_op=self.cycles_per_op,
+        )
@@ -17,7 +17,7 @@ from zigzag.mapping.data_movement import AccessEnergy, DataDirection, DataMoveAt
 from zigzag.mapping.mapping import Mapping
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping
-from zigzag.utils import json_repr_handler, pickle_deepcopy
+from zigzag.utils import pickle_deepcopy
 from zigzag.workload.layer_node import LayerNode
 
 if TYPE_CHECKING:
@@ -207,46 +207,44 @@ class CostModelEvaluationABC(metaclass=ABCMeta):
 
     def __jsonrepr__(self):
         """! JSON representation used for saving this object to a json file."""
-        return json_repr_handler(
-            {
-                "outputs": {
-                    "memory": {
-                        "utilization": (self.mem_utili_shared if isinstance(self, CostModelEvaluation) else None),
-                        "word_accesses": self.memory_word_access,
-                    },
-                    "energy": {
-                        "energy_total": self.energy_total,
-                        "operational_energy": self.mac_energy,
-                        "memory_energy": self.mem_energy,
-                        "memory_energy_breakdown_per_level": self.mem_energy_breakdown,
-                        "memory_energy_breakdown_per_level_per_operand": self.mem_energy_breakdown_further,
-                    },
-                    "latency": {
-                        "data_onloading": self.latency_total1 - self.latency_total0,
-                        "computation": self.latency_total0,
-                        "data_offloading": self.latency_total2 - self.latency_total1,
-                    },
-                    "spatial": {
-                        "mac_utilization": {
-                            "ideal": self.mac_spatial_utilization,
-                            "stalls": self.mac_utilization0,
-                            "stalls_onloading": self.mac_utilization1,
-                            "stalls_onloading_offloading": self.mac_utilization2,
-                        }
-                    },
+        return {
+            "outputs": {
+                "memory": {
+                    "utilization": (self.mem_utili_shared if isinstance(self, CostModelEvaluation) else None),
+                    "word_accesses": self.memory_word_access,
                 },
-                "inputs": {
-                    "accelerator": self.accelerator,
-                    "layer": (
-                        self.layer
-                        if isinstance(self, CostModelEvaluation)
-                        else self.layer_ids if isinstance(self, CumulativeCME) else None
-                    ),
-                    "spatial_mapping": (self.spatial_mapping_int if isinstance(self, CostModelEvaluation) else None),
-                    "temporal_mapping": (self.temporal_mapping if isinstance(self, CostModelEvaluation) else None),
+                "energy": {
+                    "energy_total": self.energy_total,
+                    "operational_energy": self.mac_energy,
+                    "memory_energy": self.mem_energy,
+                    "memory_energy_breakdown_per_level": self.mem_energy_breakdown,
+                    "memory_energy_breakdown_per_level_per_operand": self.mem_energy_breakdown_further,
                 },
-            }
-        )
+                "latency": {
+                    "data_onloading": self.latency_total1 - self.latency_total0,
+                    "computation": self.latency_total0,
+                    "data_offloading": self.latency_total2 - self.latency_total1,
+                },
+                "spatial": {
+                    "mac_utilization": {
+                        "ideal": self.mac_spatial_utilization,
+                        "stalls": self.mac_utilization0,
+                        "stalls_onloading": self.mac_utilization1,
+                        "stalls_onloading_offloading": self.mac_utilization2,
+                    }
+                },
+            },
+            "inputs": {
+                "accelerator": self.accelerator,
+                "layer": (
+                    self.layer
+                    if isinstance(self, CostModelEvaluation)
+                    else self.layer_ids if isinstance(self, CumulativeCME) else None
+                ),
+                "spatial_mapping": (self.spatial_mapping_int if isinstance(self, CostModelEvaluation) else None),
+                "temporal_mapping": (self.temporal_mapping if isinstance(self, CostModelEvaluation) else None),
+            },
+        }
 
 
 class CumulativeCME(CostModelEvaluationABC):
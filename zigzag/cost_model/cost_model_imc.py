@@ -5,7 +5,6 @@ from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.imc_array import ImcArray
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping
-from zigzag.utils import json_repr_handler
 from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
@@ -109,59 +108,57 @@ class CostModelEvaluationForIMC(CostModelEvaluation):
             "memory_stalling": self.stall_slack_comb,
         }
 
-        return json_repr_handler(
-            {
-                "outputs": {
-                    "memory": {
-                        "utilization": (self.mem_utili_shared if hasattr(self, "mem_utili_shared") else None),
-                        "word_accesses": self.memory_word_access,
-                    },
-                    "energy": {
-                        "energy_total": self.energy_total,
-                        "operational_energy": self.mac_energy,
-                        "operational_energy_breakdown": self.mac_energy_breakdown,
-                        "memory_energy": self.mem_energy,
-                        "memory_energy_breakdown_per_level": self.mem_energy_breakdown,
-                        "memory_energy_breakdown_per_level_per_operand": self.mem_energy_breakdown_further,
-                    },
-                    "latency": {
-                        "data_onloading": self.latency_total1 - self.latency_total0,
-                        "computation": self.latency_total0,
-                        "data_offloading": self.latency_total2 - self.latency_total1,
-                        "computation_breakdown": computation_breakdown,
-                    },
-                    "clock": {
-                        "tclk (ns)": self.tclk,
-                        "tclk_breakdown (ns)": self.tclk_breakdown,
-                    },
-                    "area (mm^2)": {
-                        "total_area": self.area_total,
-                        "total_area_breakdown:": {
-                            "imc_area": self.imc_area,
-                            "mem_area": self.mem_area,
-                        },
-                        "total_area_breakdown_further": {
-                            "imc_area_breakdown": self.imc_area_breakdown,
-                            "mem_area_breakdown": self.mem_area_breakdown,
-                        },
+        return {
+            "outputs": {
+                "memory": {
+                    "utilization": (self.mem_utili_shared if hasattr(self, "mem_utili_shared") else None),
+                    "word_accesses": self.memory_word_access,
+                },
+                "energy": {
+                    "energy_total": self.energy_total,
+                    "operational_energy": self.mac_energy,
+                    "operational_energy_breakdown": self.mac_energy_breakdown,
+                    "memory_energy": self.mem_energy,
+                    "memory_energy_breakdown_per_level": self.mem_energy_breakdown,
+                    "memory_energy_breakdown_per_level_per_operand": self.mem_energy_breakdown_further,
+                },
+                "latency": {
+                    "data_onloading": self.latency_total1 - self.latency_total0,
+                    "computation": self.latency_total0,
+                    "data_offloading": self.latency_total2 - self.latency_total1,
+                    "computation_breakdown": computation_breakdown,
+                },
+                "clock": {
+                    "tclk (ns)": self.tclk,
+                    "tclk_breakdown (ns)": self.tclk_breakdown,
+                },
+                "area (mm^2)": {
+                    "total_area": self.area_total,
+                    "total_area_breakdown:": {
+                        "imc_area": self.imc_area,
+                        "mem_area": self.mem_area,
                     },
-                    "spatial": {
-                        "mac_utilization": {
-                            "ideal": self.mac_spatial_utilization,
-                            "stalls": self.mac_utilization0,
-                            "stalls_onloading": self.mac_utilization1,
-                            "stalls_onloading_offloading": self.mac_utilization2,
-                        }
+                    "total_area_breakdown_further": {
+                        "imc_area_breakdown": self.imc_area_breakdown,
+                        "mem_area_breakdown": self.mem_area_breakdown,
                     },
                 },
-                "inputs": {
-                    "accelerator": self.accelerator,
-                    "layer": self.layer,
-                    "spatial_mapping": (self.spatial_mapping_int if hasattr(self, "spatial_mapping_int") else None),
-                    "temporal_mapping": (self.temporal_mapping if hasattr(self, "temporal_mapping") else None),
+                "spatial": {
+                    "mac_utilization": {
+                        "ideal": self.mac_spatial_utilization,
+                        "stalls": self.mac_utilization0,
+                        "stalls_onloading": self.mac_utilization1,
+                        "stalls_onloading_offloading": self.mac_utilization2,
+                    }
                 },
-            }
-        )
+            },
+            "inputs": {
+                "accelerator": self.accelerator,
+                "layer": self.layer,
+                "spatial_mapping": (self.spatial_mapping_int if hasattr(self, "spatial_mapping_int") else None),
+                "temporal_mapping": (self.temporal_mapping if hasattr(self, "temporal_mapping") else None),
+            },
+        }
 
     def __simplejsonrepr__(self):
         """! Simple JSON representation used for saving this object to a simple json file."""
@@ -38,6 +38,7 @@ class PortActivity:
             mem_lv,
             mov_dir,
         )
+        self.__hash = hash_sha512(self.served_op_lv_dir)
         """ stalling (+) or slacking (-) cycle in one period """
         self.stall_or_slack_per_period = real_cycle - allowed_cycle
         """ stalling (+) or slacking (-) cycle in total computation """
@@ -52,7 +53,7 @@ class PortActivity:
         return str(self.served_op_lv_dir)
 
     def __hash__(self):
-        return hash_sha512(self.served_op_lv_dir)
+        return self.__hash
 
 
 class PortBeginOrEndActivity:
@@ -8,8 +8,26 @@ from zigzag.parser.accelerator_validator import AcceleratorValidator
 from zigzag.utils import hash_sha512
 
 
-class OperandABC(metaclass=ABCMeta):
-    """! Abstract Base Class for all dimension- and operand-like classes"""
+class InternedOperandMeta(ABCMeta):
+    """! Metaclass that interns dimension- and operand-like objects: instantiating the same class with the same name
+    always returns the same instance, so that the (expensive) hash is only computed once per name."""
+
+    __instances: dict[tuple[type, str], "OperandABC"] = {}
+
+    def __call__(cls, name: str):
+        key = (cls, name)
+        instance = InternedOperandMeta.__instances.get(key)
+        if instance is None:
+            new_instance: OperandABC = super().__call__(name)
+            # The name can be normalized at initialization (e.g. LayerDim), so also intern the normalized name
+            instance = InternedOperandMeta.__instances.setdefault((cls, new_instance.name), new_instance)
+            InternedOperandMeta.__instances[key] = instance
+        return instance
+
+
+class OperandABC(metaclass=InternedOperandMeta):
+    """! Abstract Base Class for all dimension- and operand-like classes. Instances are interned (see
+    `InternedOperandMeta`)."""
 
     def __init__(self, name: str):
         self.__name = name
@@ -21,7 +39,7 @@ class OperandABC(metaclass=ABCMeta):
         return self.__name
 
     def __eq__(self, other: "OperandABC"):  # type: ignore
-        return self.__hash == other.__hash  # pylint: disable=W0212
+        return self is other or self.__hash == other.__hash  # pylint: disable=W0212
 
     def __hash__(self):
         """Optimize performance by statically storing the hash"""
@@ -42,6 +60,16 @@ class OperandABC(metaclass=ABCMeta):
     def __jsonrepr__(self):
         return self.__name
 
+    def __reduce__(self):
+        """Unpickle through the constructor, so that unpickled instances are interned as well"""
+        return type(self), (self.__name,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, _memo: dict[int, Any]):
+        return self
+
 
 class LayerOperand(OperandABC):
     """! Operand from the layer definition, e.g. `I`, `W`, `O`."""
@@ -4,7 +4,6 @@ from zigzag.hardware.architecture.memory_instance import MemoryInstance
 from zigzag.hardware.architecture.memory_level import MemoryLevel
 from zigzag.hardware.architecture.operational_array import OperationalArrayABC
 from zigzag.mapping.spatial_mapping import SpatialMapping
-from zigzag.utils import json_repr_handler
 
 
 class Accelerator:
@@ -102,7 +101,7 @@ class Accelerator:
         return str(self)
 
     def __jsonrepr__(self):
-        return json_repr_handler(self.__dict__)
+        return self.__dict__
 
     def __hash__(self) -> int:
         return self.id
@@ -1,13 +1,26 @@
 import logging
 import math
+import weakref
 from typing import Any
 
-from zigzag.datatypes import OADimension
+from zigzag.datatypes import LayerDim, OADimension, UnrollFactor
 from zigzag.hardware.architecture.imc_unit import ImcUnit
 from zigzag.mapping.mapping import Mapping
-from zigzag.utils import json_repr_handler
 from zigzag.workload.layer_node import LayerNode
 
+# Spatial mapping of a layer, as a frozenset of (OA dimension, frozenset of (layer dimension, unrolling)) pairs
+MacroEnergyKey = frozenset[tuple[OADimension, frozenset[tuple[LayerDim, UnrollFactor]]]]
+# Array, energy breakdown of its macros and number of mapped rows per macro
+MacroEnergyEntry = tuple["ImcArray", dict[str, float], float]
+
+## Energy breakdown of the IMC macros (except for the local bitline precharging) and number of mapped rows, per layer
+## and then per (array id, spatial mapping). It is kept outside of the arrays, so that these hold no per-layer state
+## (the arrays are part of the hardware fingerprint of the layer cache), and the entries of a layer are dropped
+## together with the layer.
+MACRO_ENERGY_CACHE: "weakref.WeakKeyDictionary[LayerNode, dict[tuple[int, MacroEnergyKey], MacroEnergyEntry]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 class ImcArray(ImcUnit):
     """definition of an Analog/Digital In-SRAM-Computing (A/DIMC) core
@@ -455,6 +468,39 @@ class ImcArray(ImcUnit):
         return tops_peak, topsw_peak, topsmm2_peak
 
     def get_energy_for_a_layer(self, layer: LayerNode, mapping: Mapping) -> dict[str, float]:
+        """! Return the energy breakdown of the macro for the given layer and mapping. Only the energy of the local
+        bitline precharging depends on the temporal mapping. The other terms only depend on the layer and its spatial
+        mapping, so these are computed once (see `get_macro_energy_for_a_layer`) and cached in `MACRO_ENERGY_CACHE`."""
+        spatial_mapping_key: MacroEnergyKey = frozenset(
+            (oa_dim, frozenset((layer_dim, loop[layer_dim]) for layer_dim in loop.layer_dims))
+            for oa_dim, loop in layer.spatial_mapping.items()
+        )
+        layer_cache = MACRO_ENERGY_CACHE.setdefault(layer, {})
+        # The array is stored with the cached energy, so its id can not be reused by another array
+        key = (id(self), spatial_mapping_key)
+        cached = layer_cache.get(key)
+        if cached is None or cached[0] is not self:
+            macro_energy_breakdown = self.get_macro_energy_for_a_layer(layer)
+            cached = (self, macro_energy_breakdown, self.mapped_rows_total_per_macro)
+            layer_cache[key] = cached
+        _, macro_energy_breakdown, self.mapped_rows_total_per_macro = cached
+
+        # energy of local bitline precharging during weight stationary in cells
+        (
+            energy_local_bl_precharging,
+            self.mapped_group_depth,
+        ) = self.get_precharge_energy(self.tech_param, layer, mapping)
+
+        self.energy_breakdown = {  # unit: pJ (the unit borrowed from CACTI)
+            "local_bl_precharging": energy_local_bl_precharging,
+            **macro_energy_breakdown,
+        }
+        self.energy = sum([v for v in self.energy_breakdown.values()])
+        return self.energy_breakdown
+
+    def get_macro_energy_for_a_layer(self, layer: LayerNode) -> dict[str, float]:
+        """! Return the energy breakdown of the macro for the given layer and its spatial mapping, without the local
+        bitline precharging"""
         # parameter extraction
         (
             mapped_rows_total_per_macro,
@@ -464,12 +510,6 @@ class ImcArray(ImcUnit):
         ) = self.get_mapped_oa_dim(layer, self.wl_dim, self.bl_dim)
         self.mapped_rows_total_per_macro = mapped_rows_total_per_macro
 
-        # energy of local bitline precharging during weight stationary in cells
-        (
-            energy_local_bl_precharging,
-            self.mapped_group_depth,
-        ) = self.get_precharge_energy(self.tech_param, layer, mapping)
-
         # energy of DACs
         if self.is_aimc:
             energy_dacs = (
@@ -589,8 +629,7 @@ class ImcArray(ImcUnit):
                 * macro_activation_times
             )
 
-        self.energy_breakdown = {  # unit: pJ (the unit borrowed from CACTI)
-            "local_bl_precharging": energy_local_bl_precharging,
+        return {  # unit: pJ (the unit borrowed from CACTI)
             "dacs": energy_dacs,
             "adcs": energy_adcs,
             "mults": energy_mults,
@@ -599,8 +638,6 @@ class ImcArray(ImcUnit):
             "adders_pv": energy_adders_pv,
             "accumulators": energy_accumulators,
         }
-        self.energy = sum([v for v in self.energy_breakdown.values()])
-        return self.energy_breakdown
 
     def __jsonrepr__(self):
-        return json_repr_handler({"operational_unit: ImcArray, dimensions": self.dimension_sizes})
+        return {"operational_unit: ImcArray, dimensions": self.dimension_sizes}
@@ -1,4 +1,3 @@
-import copy
 import math
 
 from zigzag.datatypes import LayerDim, LayerOperand, OADimension, UnrollFactor
@@ -173,7 +172,7 @@ class ImcUnit(OperationalArrayABC):
         layer_const_operand = layer.get_weight_layer_op()
         assert layer_const_operand is not None
 
-        spatial_mapping = copy.deepcopy(layer.spatial_mapping)
+        spatial_mapping = layer.spatial_mapping
 
         # Figure out the spatial mapping in a single macro
         spatial_mapping_size_in_macro = 1
@@ -6,7 +6,7 @@ from zigzag.hardware.architecture.memory_instance import MemoryInstance
 from zigzag.hardware.architecture.memory_level import MemoryLevel, ServedMemDimensions
 from zigzag.hardware.architecture.memory_port import PortAllocation
 from zigzag.hardware.architecture.operational_array import OperationalArrayABC
-from zigzag.utils import DiGraphWrapper, json_repr_handler
+from zigzag.utils import DiGraphWrapper
 
 
 class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
@@ -157,7 +157,7 @@ class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
 
     def __jsonrepr__(self):
         """! JSON Representation of this object to save it to a json file."""
-        return json_repr_handler(list(self.topological_sort()))
+        return list(self.topological_sort())
 
     def __eq__(self, other: object) -> bool:
         return (
@@ -1,6 +1,5 @@
-from zigzag.cacti.cacti_parser import CactiParser
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
 from zigzag.hardware.architecture.memory_port import MemoryPort, MemoryPortType
-from zigzag.utils import json_repr_handler
 
 
 class MemoryInstance:
@@ -37,6 +36,7 @@ class MemoryInstance:
         ports: tuple[MemoryPort, ...] = tuple(),
         mem_type: str = "sram",
         auto_cost_extraction: bool = False,
+        auto_cost_max_interpolation_error: float | None = None,
         force_double_buffering: bool = False,
         shared_memory_group_id: int = -1,
     ):
@@ -51,28 +51,24 @@ class MemoryInstance:
         @param ports: tuple of MemoryPort instances.
         @param mem_type (str): The type of memory. Used for CACTI cost extraction.
         @param auto_cost_extraction (bool): Automatically extract the read cost, write cost and area using CACTI.
+        @param auto_cost_max_interpolation_error: if not None, automatically extracted costs are interpolated from the
+            memories in the CACTI memory pool instead, if the estimated relative error is at most this value.
         @param double_buffering_support (bool): Support for double buffering on this memory instance.
         @param shared_memory_group_id: used to indicate whether two MemoryInstance instances represent the same, shared
             memory between two cores (feature used in Stream).
         """
         if auto_cost_extraction:
-            try:
-                r_bw = next(port.bw_max for port in ports if port.type == MemoryPortType.READ)
-            except StopIteration:
-                try:
-                    r_bw = next(port.bw_max for port in ports if port.type == MemoryPortType.READ_WRITE)
-                except StopIteration:
-                    raise ValueError(f"MemoryInstance {name} does not have a read or read_write port.")
             cacti_parser = CactiParser()
             r_cost, w_cost, area = cacti_parser.get_item(
                 mem_name=name,
                 mem_type=mem_type,
                 size=size,
-                r_bw=r_bw,
+                r_bw=self.get_cacti_read_bw(name, ports),
                 r_port=r_port,
                 w_port=w_port,
                 rw_port=rw_port,
                 bank=1,
+                max_interpolation_error=auto_cost_max_interpolation_error,
             )
 
         self.name = name
@@ -85,13 +81,40 @@ class MemoryInstance:
         self.force_double_buffering = force_double_buffering
         self.shared_memory_group_id = shared_memory_group_id
 
+    @staticmethod
+    def get_cacti_read_bw(name: str, ports: tuple[MemoryPort, ...]) -> int:
+        """! Return the read bandwidth with which the costs of the memory are extracted with CACTI"""
+        try:
+            return next(port.bw_max for port in ports if port.type == MemoryPortType.READ)
+        except StopIteration:
+            try:
+                return next(port.bw_max for port in ports if port.type == MemoryPortType.READ_WRITE)
+            except StopIteration:
+                raise ValueError(f"MemoryInstance {name} does not have a read or read_write port.")
+
+    @staticmethod
+    def get_cacti_point(
+        name: str,
+        size: int,
+        ports: tuple[MemoryPort, ...],
+        mem_type: str = "sram",
+        r_port: int = 1,
+        w_port: int = 1,
+        rw_port: int = 0,
+    ) -> CactiPoint:
+        """! Return the CACTI configuration of which the costs are extracted for a MemoryInstance with
+        `auto_cost_extraction` and the given parameters"""
+        return CactiParser.get_point(
+            name, mem_type, size, MemoryInstance.get_cacti_read_bw(name, ports), r_port, w_port, rw_port, bank=1
+        )
+
     def update_size(self, new_size: int) -> None:
         """! Update the memory size of this instance."""
         self.size = new_size
 
     def __jsonrepr__(self):
         """! JSON Representation of this class to save it to a json file."""
-        return json_repr_handler(self.__dict__)
+        return self.__dict__
 
     def __eq__(self, other: object) -> bool:
         return isinstance(other, MemoryInstance) and self.__dict__ == other.__dict__
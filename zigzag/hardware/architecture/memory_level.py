@@ -82,6 +82,7 @@ class MemoryLevel:
         self.mem_level_of_operands = mem_level_of_operands
         self.oa_dim_sizes = operational_array.dimension_sizes
         self.id = identifier
+        self.__hash = hash_sha512(identifier)
         self.served_dimensions = served_dimensions
         self.name = self.memory_instance.name
 
@@ -172,4 +173,4 @@ class MemoryLevel:
         )
 
     def __hash__(self) -> int:
-        return hash_sha512(self.id)
+        return self.__hash
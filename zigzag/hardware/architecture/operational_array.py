@@ -7,7 +7,6 @@ from zigzag.hardware.architecture.operational_unit import (
     Multiplier,
     OperationalUnit,
 )
-from zigzag.utils import json_repr_handler
 
 
 class OperationalArrayABC(metaclass=ABCMeta):
@@ -34,7 +33,7 @@ class OperationalArray(OperationalArrayABC):
         self.total_area = operational_unit.area * self.total_unit_count
 
     def __jsonrepr__(self):
-        return json_repr_handler({"operational_unit": self.unit, "dimensions": self.dimension_sizes})
+        return {"operational_unit": self.unit, "dimensions": self.dimension_sizes}
 
     def __eq__(self, other: Any) -> bool:
         return (
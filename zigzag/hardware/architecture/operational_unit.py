@@ -1,6 +1,3 @@
-from zigzag.utils import json_repr_handler
-
-
 class OperationalUnit:
     """! General class for a unit that performs a certain operation. For example: a multiplier unit."""
 
@@ -18,7 +15,7 @@ class OperationalUnit:
 
     def __jsonrepr__(self):
         """! JSON Representation of this class to save it to a json file."""
-        return json_repr_handler(self.__dict__)
+        return self.__dict__
 
     def __eq__(self, other: object) -> bool:
         return isinstance(other, OperationalUnit) and self.energy_cost == other.energy_cost and self.area == other.area
@@ -7,7 +7,7 @@ from zigzag.hardware.architecture.memory_port import DataDirection
 from zigzag.mapping.data_movement import DataMoveAttr, DataMovePattern
 from zigzag.mapping.mapping_assist_funcs import SpatialMappingPerMemLvl
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.mapping.temporal_mapping import LoopsPerLevel, TemporalMapping
 from zigzag.workload.layer_node import LayerNode
 
 
@@ -103,8 +103,8 @@ class Mapping:
         }
         su_dict_seed = self.spatial_mapping.mapping_dict_origin
         # Add an empty innermost level and an empty outermost level
-        tm_dict_seed: dict[LayerOperand, list[list[tuple[LayerDim, UnrollFactor]]]] = {
-            op: [[]] + tm_list + [[]] for op, tm_list in self.temporal_mapping.mapping_dic_stationary.items()
+        tm_dict_seed: dict[LayerOperand, list[LoopsPerLevel]] = {
+            op: [(), *tm_levels, ()] for op, tm_levels in self.temporal_mapping.mapping_dic_stationary.items()
         }
 
         # Combining
@@ -112,8 +112,8 @@ class Mapping:
             for level, current_level_su_loops in enumerate(su_dict_seed[operand]):
                 current_level_tm_loops = tm_dict_seed[operand][level]
                 above_level_tm_loops = tm_dict_seed[operand][level + 1]
-                combined_mapping_dict_1s1t[operand][level] = current_level_tm_loops + current_level_su_loops
-                combined_mapping_dict_1s2t[operand][level + 1] = above_level_tm_loops + current_level_su_loops
+                combined_mapping_dict_1s1t[operand][level] = [*current_level_tm_loops, *current_level_su_loops]
+                combined_mapping_dict_1s2t[operand][level + 1] = [*above_level_tm_loops, *current_level_su_loops]
 
         self.combined_mapping_dict_1s1t = combined_mapping_dict_1s1t
         self.combined_mapping_dict_1s2t = combined_mapping_dict_1s2t
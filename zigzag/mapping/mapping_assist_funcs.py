@@ -2,7 +2,6 @@ from math import prod
 from typing import TypeAlias
 
 from zigzag.datatypes import LayerDim, LayerOperand, PrLoop, UnrollFactor
-from zigzag.utils import pickle_deepcopy
 from zigzag.workload.layer_attributes import LayerDimSizes
 from zigzag.workload.layer_node import LayerNode
 
@@ -27,7 +26,8 @@ def decouple_pr_loop(mapping_dict: SpatialMappingPerMemLvl, layer_node: "LayerNo
     }
 
     pr_operand_list = list(pr_operand_loop_lut.keys())
-    mapping_dict_reform: SpatialMappingPerMemLvl = pickle_deepcopy(mapping_dict)
+    # Only the mappings of the operands with pr loops are replaced, the others are shared with the given mapping
+    mapping_dict_reform: SpatialMappingPerMemLvl = dict(mapping_dict)
 
     # current and below level pr data size
     cabl_pr_data_size: dict[LayerOperand, dict[LayerDim, list[list[float]]]] = {}
@@ -122,10 +122,15 @@ def replace_pr_loop_in_mapping(
     pr_operand_loop_lut: PrLoop,
     r_ir_operand_loop_lut: list[LayerDim],
 ) -> list[list[tuple[LayerDim, UnrollFactor]]]:
-    """! This function replaces all pr loops in a mapping of a single operand with r and ir loops."""
-    mapping_new: list[list[tuple[LayerDim, UnrollFactor]]] = pickle_deepcopy(single_operand_mapping)
+    """! This function replaces all pr loops in a mapping of a single operand with r and ir loops.
+    The loops are immutable tuples, so only the levels that contain pr loops are copied (shallowly), the other levels
+    are shared with the given mapping."""
+    mapping_new: list[list[tuple[LayerDim, UnrollFactor]]] = list(single_operand_mapping)
 
     for level, loop_list in enumerate(single_operand_mapping):
+        if all(loop_type in r_ir_operand_loop_lut for loop_type, _ in loop_list):
+            continue
+        mapping_new[level] = list(loop_list)
         # Introduce the current level pr loop index to distinguish different pr loops at the same architectural level
         cl_pr_lp_idx_local = {pr_data_dim: 0 for pr_data_dim in pr_operand_loop_lut.keys()}
         cl_pr_lp_idx_global = 0
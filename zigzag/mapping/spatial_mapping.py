@@ -4,7 +4,7 @@ import math
 from typing import Any
 
 from zigzag.datatypes import LayerDim, OADimension, UnrollFactor, UnrollFactorInt
-from zigzag.utils import UniqueMessageFilter, hash_sha512, json_repr_handler
+from zigzag.utils import UniqueMessageFilter
 from zigzag.workload.layer_attribute import LayerAttribute
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,8 @@ class MappingSingleOADim:
     def __init__(self, data: dict[LayerDim, UnrollFactor]):
         # float type is used in `SpatialMappingConversionStage`
         self.__data: dict[LayerDim, UnrollFactor] = data
+        # Cached hash, reset when the unrolling is modified
+        self.__hash: int | None = None
 
     @property
     def utilization(self):
@@ -42,6 +44,7 @@ class MappingSingleOADim:
 
     def __delitem__(self, key: LayerDim):
         del self.__data[key]
+        self.__hash = None
 
     def __contains__(self, key: LayerDim):
         return self.__data.__contains__(key)
@@ -51,9 +54,11 @@ class MappingSingleOADim:
 
     def update(self, other: "MappingSingleOADim"):
         self.__data.update(other.get_data())
+        self.__hash = None
 
     def __setitem__(self, key: LayerDim, value: UnrollFactor | float):
         self.__data[key] = value  # type: ignore
+        self.__hash = None
 
     def __str__(self):
         return str({str(k): str(v) for k, v in self.items()}).replace("'", "")
@@ -62,7 +67,7 @@ class MappingSingleOADim:
         return str(self)
 
     def __jsonrepr__(self):
-        return json_repr_handler(self.__data)
+        return self.__data
 
     def __eq__(self, other: Any) -> bool:
         """! Return true iff the contained LayerDims are the same and all unrollings are the same"""
@@ -74,7 +79,9 @@ class MappingSingleOADim:
         )
 
     def __hash__(self):
-        return hash_sha512(frozenset(self.__data))
+        if self.__hash is None:
+            self.__hash = hash(frozenset(self.__data.items()))
+        return self.__hash
 
 
 class SpatialMapping(LayerAttribute):
@@ -306,7 +313,8 @@ class SpatialMapping(LayerAttribute):
         )
 
     def __hash__(self):
-        return hash_sha512(frozenset(map(lambda x: (x[0], hash_sha512(x[1])), self.items())))
+        # The MappingSingleOADims cache their own hash
+        return hash(frozenset(self.items()))
 
     @staticmethod
     def empty() -> "SpatialMapping":
@@ -3,10 +3,12 @@ from enum import StrEnum
 from typing import TypeAlias
 
 from zigzag.datatypes import LayerDim, LayerOperand, UnrollFactor
-from zigzag.utils import json_repr_handler, pickle_deepcopy
 from zigzag.workload.layer_node import LayerNode
 
 TemporalMappingDict: TypeAlias = dict[LayerOperand, list[list[tuple[LayerDim, UnrollFactor]]]]
+LoopsPerLevel: TypeAlias = tuple[tuple[LayerDim, UnrollFactor], ...]
+# Immutable version of `TemporalMappingDict`, of which the levels can be shared between mappings
+StationaryTemporalMappingDict: TypeAlias = dict[LayerOperand, tuple[LoopsPerLevel, ...]]
 
 
 class TemporalMappingType(StrEnum):
@@ -42,58 +44,65 @@ class TemporalMapping:
         self.calc_top_r_and_ir_loop()
 
     def __str__(self):
-        return str(self.mapping_dic_stationary)
+        # The levels are formatted as lists, like those of `mapping_dic_origin`
+        return str(
+            {
+                layer_op: [list(mem_level) for mem_level in mapping_layer_op]
+                for layer_op, mapping_layer_op in self.mapping_dic_stationary.items()
+            }
+        )
 
     def __repr__(self):
         return str(self)
 
     def __jsonrepr__(self):
         """! JSON representation of this object to save it to a json file."""
-        return json_repr_handler(
-            {
-                layer_op: [[str(loop_factor_pair) for loop_factor_pair in mem_level] for mem_level in mapping_layer_op]
-                for layer_op, mapping_layer_op in self.mapping_dic_stationary.items()
-            }
-        )
+        return {
+            layer_op: [[str(loop_factor_pair) for loop_factor_pair in mem_level] for mem_level in mapping_layer_op]
+            for layer_op, mapping_layer_op in self.mapping_dic_stationary.items()
+        }
 
     def innermost_stationary_loop_merge_down(self):
         """! Iteratively merging down the ir loops which located at the bottom position of each memory level.
         Also calculate the MAC level data stationary cycle, i,e., the innermost memory level's bottom ir loops.
+        The levels are immutable tuples: every iteration only creates new tuples for the levels that change and shares
+        all other levels with the previous iteration.
         """
-        # Initialization
-        mapping_current: TemporalMappingDict = pickle_deepcopy(self.mapping_dic_origin)
-        mapping_previous: TemporalMappingDict = pickle_deepcopy(self.mapping_dic_origin)
-        done = False
+        ir_layer_dims = {op: self.layer_node.loop_relevancy_info.get_ir_layer_dims(op) for op in self.operand_list}
+        mapping_previous: StationaryTemporalMappingDict = {
+            op: tuple(tuple(level_loops) for level_loops in mapping_op)
+            for op, mapping_op in self.mapping_dic_origin.items()
+        }
 
-        while not done:
-            mapping_st: TemporalMappingDict = {op: [[] for _ in range(self.mem_level[op])] for op in self.operand_list}
+        while True:
+            mapping_st: StationaryTemporalMappingDict = {}
             mac_level_st: dict[LayerOperand, UnrollFactor] = {op: 1 for op in self.operand_list}
-            for operand in self.mem_level.keys():
-                for level, current_level_loops in enumerate(mapping_previous[operand]):
-                    if not current_level_loops:
-                        mapping_st[operand][level] = pickle_deepcopy(current_level_loops)
+            for operand, mapping_op in mapping_previous.items():
+                levels_st: list[LoopsPerLevel] = []
+                for level, current_level_loops in enumerate(mapping_op):
+                    # Number of ir loops at the bottom of this level
+                    nb_bottom_ir = 0
+                    while (
+                        nb_bottom_ir < len(current_level_loops)
+                        and current_level_loops[nb_bottom_ir][0] in ir_layer_dims[operand]
+                    ):
+                        nb_bottom_ir += 1
+                    if nb_bottom_ir == 0:
+                        levels_st.append(current_level_loops)
+                    elif level == 0:
+                        for _, loop_dim in current_level_loops[:nb_bottom_ir]:
+                            mac_level_st[operand] *= loop_dim
+                        levels_st.append(current_level_loops)
                     else:
-                        for loop_type, loop_dim in current_level_loops:
-                            if loop_type in self.layer_node.loop_relevancy_info.get_ir_layer_dims(operand):
-                                if level == 0:
-                                    mac_level_st[operand] *= loop_dim
-                                    mapping_st[operand][level].append((loop_type, loop_dim))
-                                    mapping_current[operand][level].remove((loop_type, loop_dim))
-                                else:
-                                    mapping_st[operand][level - 1].append((loop_type, loop_dim))
-                                    mapping_current[operand][level].remove((loop_type, loop_dim))
-                            else:
-                                mapping_st[operand][level].extend(mapping_current[operand][level])
-                                break
-            if mapping_st != mapping_previous:
-                mapping_previous = pickle_deepcopy(mapping_st)
-                mapping_current = pickle_deepcopy(mapping_st)
-                continue
-            else:
-                done = True
-
-        self.mapping_dic_stationary = mapping_st  # type: ignore
-        self.mac_level_data_stationary_cycle = mac_level_st  # type: ignore
+                        levels_st[level - 1] += current_level_loops[:nb_bottom_ir]
+                        levels_st.append(current_level_loops[nb_bottom_ir:])
+                mapping_st[operand] = tuple(levels_st)
+            if mapping_st == mapping_previous:
+                break
+            mapping_previous = mapping_st
+
+        self.mapping_dic_stationary = mapping_st
+        self.mac_level_data_stationary_cycle = mac_level_st
 
     def calc_cycle_cabl_level(self):
         """! Calculate the iteration cycles that each memory level covers"""
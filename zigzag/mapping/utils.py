@@ -2,7 +2,6 @@ from typing import TypeAlias
 
 from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.datatypes import Constants, LayerDim, UnrollFactor
-from zigzag.utils import pickle_deepcopy
 
 TemporalLoopsType: TypeAlias = list[tuple[LayerDim, tuple[int, UnrollFactor], tuple[str, ...]]]
 
@@ -19,7 +18,7 @@ def get_spatial_loops(cme: CostModelEvaluation):
 
 def get_temporal_loops(cme: CostModelEvaluation):
     operand_links = cme.layer.memory_operand_links
-    tm = pickle_deepcopy(cme.temporal_mapping.mapping_dic_stationary)
+    tm = {op: [list(loops) for loops in levels] for op, levels in cme.temporal_mapping.mapping_dic_stationary.items()}
     tls = [loop for level in tm[Constants.OUTPUT_LAYER_OP] for loop in level]
     temporal_loops: TemporalLoopsType = []
     all_mem_names: set[str] = set()
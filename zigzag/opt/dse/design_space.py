@@ -0,0 +1,121 @@
+import math
+import random
+from copy import deepcopy
+from typing import Any, Generator, TypeAlias
+
+from zigzag.utils import open_yaml
+
+## Values of all parameters of a design space, as indices into the values of each parameter
+DesignPoint: TypeAlias = tuple[int, ...]
+
+
+class DesignParameter:
+    """! Parameter of a design space: one or more fields of the accelerator data (as parsed from its yaml file) that
+    are swept together. Every field is given by a path of dict keys and list indices separated by dots, e.g.
+    `memories.l1.size`, `operational_array.sizes` or `memories.l1.ports.0.bandwidth_max`.
+    """
+
+    def __init__(self, paths: str | list[str], values: list[Any]):
+        """
+        @param paths Path of the swept field, or paths of multiple fields that are swept together. In the latter case,
+        every value is a list with a value for each field.
+        @param values Values of the swept field(s)
+        """
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.values = [[value] for value in values] if isinstance(paths, str) else [list(value) for value in values]
+        assert len(self.values) > 0, f"No values given for design parameter {self.paths}"
+        assert all(
+            len(value) == len(self.paths) for value in self.values
+        ), f"Every value of design parameter {self.paths} should have a value for each of its paths"
+
+    def apply(self, accelerator_data: dict[str, Any], value_idx: int) -> None:
+        """! Set the fields of this parameter in the given accelerator data to the value with the given index"""
+        for path, value in zip(self.paths, self.values[value_idx]):
+            *parent_keys, last_key = [int(key) if key.isdigit() else key for key in path.split(".")]
+            parent = accelerator_data
+            for key in parent_keys:
+                parent = parent[key]
+            if isinstance(parent, dict) and last_key not in parent:
+                raise KeyError(f"Design parameter path {path} does not exist in the accelerator")
+            parent[last_key] = deepcopy(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __str__(self) -> str:
+        return ",".join(self.paths)
+
+
+class DesignSpace:
+    """! Declarative design space of an accelerator: the cartesian product of the values of its parameters.
+
+    The design space can be given as a list (or a yaml file with a list) of parameters, e.g.
+    ```
+    - path: memories.l1.size
+      values: [262144, 524288, 1048576]
+    - path: [operational_array.sizes, memories.l1.ports.0.bandwidth_max]
+      values: [[[8, 8, 8], 512], [[16, 16, 16], 2048]]
+    ```
+    """
+
+    def __init__(self, parameters: list[DesignParameter]):
+        self.parameters = parameters
+
+    @staticmethod
+    def from_spec(spec: str | list[dict[str, Any]]) -> "DesignSpace":
+        """! Create the design space from the path of a yaml file or from a list of parameters, each a dict with a
+        `path` and `values`"""
+        parameters_data: list[dict[str, Any]] = open_yaml(spec) if isinstance(spec, str) else spec  # type: ignore
+        return DesignSpace([DesignParameter(data["path"], data["values"]) for data in parameters_data])
+
+    @property
+    def size(self) -> int:
+        return math.prod(len(parameter) for parameter in self.parameters)
+
+    def get_accelerator_data(self, base_accelerator_data: dict[str, Any], point: DesignPoint) -> dict[str, Any]:
+        """! Return a copy of the given accelerator data with the parameters set to the given design point"""
+        accelerator_data = deepcopy(base_accelerator_data)
+        for parameter, value_idx in zip(self.parameters, point):
+            parameter.apply(accelerator_data, value_idx)
+        return accelerator_data
+
+    def get_values(self, point: DesignPoint) -> dict[str, Any]:
+        """! Return the value of every parameter in the given design point, by parameter name"""
+        values: dict[str, Any] = {}
+        for parameter, value_idx in zip(self.parameters, point):
+            value = parameter.values[value_idx]
+            values[str(parameter)] = value[0] if len(value) == 1 else value
+        return values
+
+    def get_point(self, idx: int) -> DesignPoint:
+        """! Return the design point with the given index in the cartesian product of the parameters (in the order of
+        `itertools.product`)"""
+        point: list[int] = []
+        for parameter in reversed(self.parameters):
+            idx, value_idx = divmod(idx, len(parameter))
+            point.append(value_idx)
+        return tuple(reversed(point))
+
+    def exhaustive(self) -> Generator[DesignPoint, None, None]:
+        """! Generate all design points"""
+        for idx in range(self.size):
+            yield self.get_point(idx)
+
+    def random(self, nb_samples: int, seed: int | None = None) -> list[DesignPoint]:
+        """! Return `nb_samples` different design points, sampled uniformly (or all points if there are fewer)"""
+        rng = random.Random(seed)
+        return [self.get_point(idx) for idx in rng.sample(range(self.size), min(nb_samples, self.size))]
+
+    def latin_hypercube(self, nb_samples: int, seed: int | None = None) -> list[DesignPoint]:
+        """! Return up to `nb_samples` different design points sampled with a Latin hypercube: the range of every
+        parameter is divided in `nb_samples` equal strata, of which each is sampled exactly once. Duplicate points
+        (if a parameter has fewer values than strata) are only returned once."""
+        rng = random.Random(seed)
+        values_per_parameter: list[list[int]] = []
+        for parameter in self.parameters:
+            strata = list(range(nb_samples))
+            rng.shuffle(strata)
+            values_per_parameter.append(
+                [int((stratum + rng.random()) / nb_samples * len(parameter)) for stratum in strata]
+            )
+        return list(dict.fromkeys(zip(*values_per_parameter)))
@@ -1,17 +1,24 @@
 import logging
 import operator
+import time
+from collections import Counter
 from math import factorial
-from typing import Any, Generator
+from typing import Any, Callable, Generator
 
 import numpy as np
 from sympy.ntheory import factorint  # type: ignore
 from tqdm import tqdm
 
-from zigzag.datatypes import LayerDim, UnrollFactor
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelEvaluationABC
+from zigzag.datatypes import LayerDim, LayerOperand, UnrollFactor
 from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.hardware.architecture.memory_port import DataDirection
+from zigzag.mapping.data_movement import DataMoveAttr
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingType
 from zigzag.opt.loma.memory_allocator import (
+    AllocationCache,
     MemoryAllocator,
     MemoryHierarchyTooSmallException,
     MemoryTooSmallException,
@@ -20,17 +27,84 @@ from zigzag.opt.loma.multipermute import (
     PermutationConstraint,
     StaticPositionsAndSizesConstraint,
     constrainded_permutations,
+    distinct_prefixes,
+    get_static_elements,
+    indexed_permutations,
     permutations,
+    prefixed_permutations,
+    ranked_permutations,
 )
 from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
 
+# Criteria to compare temporal mappings, as a function of (energy, latency). The keys are compared lexicographically
+# and match the tie-breaking of the Minimal{Energy, Latency, EDP}Stage reduce stages.
+LOMA_CRITERIA: dict[str, Callable[[float, float], tuple[float, ...]]] = {
+    "energy": lambda energy, latency: (energy, latency),
+    "latency": lambda energy, latency: (latency, energy),
+    "EDP": lambda energy, latency: (energy * latency,),
+}
+
 
 class NoValidLoopOrderingFoundException(Exception):
     """Indicates that not a single valid temporal loop was found"""
 
 
+class LomaSearchResult:
+    """! Outcome of a budgeted LOMA search (see `LomaEngine.run_anytime`): the best temporal mapping found so far, how
+    much of the ordering space was visited and how far the best mapping is at most from the optimum."""
+
+    def __init__(self, criterion: str, nb_orderings: int):
+        self.criterion = criterion
+        self.nb_orderings = nb_orderings
+        self.nb_visited = 0
+        self.nb_evaluated = 0
+        self.best_key: tuple[float, ...] | None = None
+        self.best_temporal_mapping: TemporalMapping | None = None
+        self.best_cme: CostModelEvaluationABC | None = None
+        ## Lower bound on the key of any ordering, if known
+        self.lower_bound: tuple[float, ...] | None = None
+        ## Why the search stopped: `exhausted`, `time budget`, `evaluation budget` or `patience`
+        self.stop_reason = "exhausted"
+        self.elapsed_time = 0.0
+
+    @property
+    def coverage(self) -> float:
+        """! Fraction of the orderings that has been visited"""
+        return self.nb_visited / self.nb_orderings if self.nb_orderings else 1.0
+
+    @property
+    def gap(self) -> float | None:
+        """! Relative gap between the first component of the best key and of the lower bound: the best mapping is at
+        most this fraction worse than the optimum"""
+        if self.best_key is None or self.lower_bound is None or self.lower_bound[0] <= 0:
+            return None
+        return max(0.0, self.best_key[0] / self.lower_bound[0] - 1)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "criterion": self.criterion,
+            "stop_reason": self.stop_reason,
+            "elapsed_time": self.elapsed_time,
+            "nb_orderings": self.nb_orderings,
+            "nb_visited": self.nb_visited,
+            "nb_evaluated": self.nb_evaluated,
+            "coverage": self.coverage,
+            "best_key": self.best_key,
+            "lower_bound": self.lower_bound,
+            "gap": self.gap,
+        }
+
+    def __str__(self):
+        gap = "unknown" if self.gap is None else f"{self.gap:.1%}"
+        return (
+            f"LOMA {self.criterion} search stopped ({self.stop_reason}) after {self.elapsed_time:.2f} s: evaluated "
+            f"{self.nb_evaluated} of {self.nb_visited} visited orderings ({self.coverage:.1%} of "
+            f"{self.nb_orderings:,}), gap to lower bound {gap}"
+        )
+
+
 class LomaEngine:
     """! Class that handles optimization of temporal mapping given a:
     - layer
@@ -52,6 +126,12 @@ class LomaEngine:
         spatial_mapping: SpatialMappingInternal,
         mapping_type: TemporalMappingType,
         loma_lpf_limit: int | None = None,
+        loma_permutation_start: int = 0,
+        loma_permutation_stop: int | None = None,
+        loma_permutation_stride: int = 1,
+        loma_time_budget: float | None = None,
+        loma_evaluation_budget: int | None = None,
+        loma_patience: int | None = None,
         **kwargs: Any,
     ):
         """
@@ -61,9 +141,28 @@ class LomaEngine:
         @param layer: layer to generate temporal mappings for
         @param spatial_mapping: SpatialMapping to use
         @param loma_lpf_limit:
+        @param loma_permutation_start: index of the first ordering to consider. If a start, stop or stride is given,
+        the orderings are generated in lexicographic order, where the index of an ordering is its position in this
+        order (see `multipermute.permutation_unrank`). This allows to split the ordering space of a layer in shards,
+        or to resume an interrupted search.
+        @param loma_permutation_stop: index of the ordering to stop at (exclusive). None means all orderings.
+        @param loma_permutation_stride: step between the indices of the considered orderings
+        @param loma_time_budget: wall-clock time (in seconds) after which `run_anytime` stops
+        @param loma_evaluation_budget: number of evaluated orderings after which `run_anytime` stops
+        @param loma_patience: number of evaluated orderings without improvement after which `run_anytime` stops
         @param kwargs: further unused, for ease of calling only
         """
         self.lpf_limit = loma_lpf_limit
+        self.permutation_start = loma_permutation_start
+        self.permutation_stop = loma_permutation_stop
+        self.permutation_stride = loma_permutation_stride
+        self.is_indexed = (loma_permutation_start, loma_permutation_stop, loma_permutation_stride) != (0, None, 1)
+        # Index of the next ordering that will be considered by `run`, which can be used as checkpoint. It is at least
+        # the stop index (or the number of orderings) once all orderings have been considered.
+        self.next_permutation_index = loma_permutation_start
+        self.time_budget = loma_time_budget
+        self.evaluation_budget = loma_evaluation_budget
+        self.patience = loma_patience
 
         self.accelerator = accelerator
         self.layer = layer
@@ -77,49 +176,88 @@ class LomaEngine:
         # TODO: thus adapt the memory hierarchy.
         # TODO: The fact that there is a global buffer above the cores requires attention.
         self.memory_hierarchy = accelerator.memory_hierarchy
+        # Shared by the memory allocators of all orderings, which have the same accelerator, layer and spatial mapping
+        self.allocation_cache = AllocationCache()
 
         self.show_progress_bar = kwargs.get("loma_show_progress_bar", False)
+        # Optional `StageProfiler` that counts the orderings and failed memory allocations
+        self.profiler = kwargs.get("profiler", None)
 
     def set_constraints(self, constraints: list[PermutationConstraint]) -> None:
         self.constraints = constraints
         self.has_constraints = True
 
-    def run(self) -> Generator[TemporalMapping, None, None]:
+    def compute_lpfs(self) -> None:
+        """! Get all the temporal loops to be scheduled and convert them to (limited) LPFs (loop prime factors)"""
+        self.temporal_loop_dim_size = self.get_temporal_loops()
+        self.update_min_lpf_factor(self.temporal_loop_dim_size)
+        self.get_prime_factors()
+
+    def run(self, prefixes: list[list[tuple[LayerDim, int]]] | None = None) -> Generator[TemporalMapping, None, None]:
         """! Runs the LomaEngine
+        @param prefixes If given, only the orderings that start with one of these prefixes are considered. Used to
+        split the ordering space over multiple workers (see `get_ordering_prefixes`).
         @return Generator that yields all temporal mappings
         """
         # TODO: add the criterion(s) as inputs to this function.
-        self.temporal_loop_dim_size = self.get_temporal_loops()  # get all the temporal loops to be scheduled
-        self.update_min_lpf_factor(self.temporal_loop_dim_size)
-        self.get_prime_factors()  # convert these to LPFs (loop prime factors)
+        self.compute_lpfs()
 
-        pbar = tqdm(total=self.nb_permutations) if self.show_progress_bar else None
+        pbar = tqdm(total=self.nb_permutations) if self.show_progress_bar and prefixes is None else None
+
+        if prefixes is None:
+            orderings = self.ordering_generator()
+        else:
+            orderings = (ordering for prefix in prefixes for ordering in self.ordering_generator(prefix))
 
         yielded = False
-        for ordering in self.ordering_generator():
+        nb_orderings = nb_hierarchy_too_small = nb_memory_too_small = 0
+        allocation_time = 0.0
+        for ordering in orderings:
+            nb_orderings += 1
+            start = time.perf_counter()
             allocator = MemoryAllocator(  # type: ignore
                 self.accelerator,
                 self.layer,
                 self.spatial_mapping,
                 ordering,  # type: ignore
                 self.mapping_type,
+                self.allocation_cache,
             )
             # using try catch here because in the depth-first mode the highest level might not be big enough
             try:
                 temporal_mapping = allocator.run()  # allocate this ordering to the memories
+                allocation_time += time.perf_counter() - start
                 yielded = True
                 yield temporal_mapping
             except MemoryHierarchyTooSmallException:
-                pass
+                allocation_time += time.perf_counter() - start
+                nb_hierarchy_too_small += 1
             except MemoryTooSmallException:
                 # Skip the ordering that crashed due to ordering (or spatial unrolling) not fitting in memory
-                pass
+                allocation_time += time.perf_counter() - start
+                nb_memory_too_small += 1
             if pbar is not None:
                 pbar.update(1)
 
+        if self.profiler is not None:
+            self.profiler.count(
+                "loma_allocation",
+                allocation_time,
+                orderings=nb_orderings,
+                memory_too_small=nb_memory_too_small,
+                memory_hierarchy_too_small=nb_hierarchy_too_small,
+            )
+
         if pbar is not None:
             pbar.close()
 
+        logger.debug(
+            "Reused %i of %i memory level allocations for layer %s.",
+            self.allocation_cache.nb_hits,
+            self.allocation_cache.nb_hits + self.allocation_cache.nb_misses,
+            self.layer,
+        )
+
         if not yielded:
             raise NoValidLoopOrderingFoundException(
                 f"No valid loop ordering was found for layer {self.layer}. Please make sure the data layout is "
@@ -223,6 +361,9 @@ class LomaEngine:
         for nb_duplicated_pfs in self.temporal_loop_pf_counts.values():
             for nb_duplicated_pf in nb_duplicated_pfs:
                 nb_permutations = int(nb_permutations / factorial(nb_duplicated_pf))
+        if self.is_indexed:
+            stop = nb_permutations if self.permutation_stop is None else min(self.permutation_stop, nb_permutations)
+            nb_permutations = len(range(self.permutation_start, stop, self.permutation_stride))
         self.nb_permutations = nb_permutations
         logger.debug(
             "Launching %s temporal loop order permutations.",
@@ -348,9 +489,398 @@ class LomaEngine:
         logger.debug("Limited layer %s to %i lpfs.", self.layer, len(self.lpfs))
         return
 
-    def ordering_generator(self) -> Generator[list[tuple[LayerDim, int]], None, None]:
-        """! Generator that yields all orderings of the temporal loops."""
+    def get_ordering_prefixes(self, nb_partitions: int) -> list[list[tuple[LayerDim, int]]]:
+        """! Split the ordering space in (at least) `nb_partitions` disjoint parts, by fixing the innermost loops.
+        The prefix length is increased until enough distinct prefixes exist, or until the prefixes cover the full
+        orderings.
+        @param nb_partitions Minimal number of parts requested
+        @return List of distinct ordering prefixes, each of which represents one part of the ordering space
+        """
+        self.compute_lpfs()
+        prefix_length = 0
+        prefixes: list[list[tuple[LayerDim, int]]] = [[]]
+        while len(prefixes) < nb_partitions and prefix_length < len(self.lpfs):
+            prefix_length += 1
+            prefixes = distinct_prefixes(self.lpfs, prefix_length)
+        return prefixes
+
+    def ordering_generator(
+        self, prefix: list[tuple[LayerDim, int]] | None = None
+    ) -> Generator[list[tuple[LayerDim, int]], None, None]:
+        """! Generator that yields all orderings of the temporal loops.
+        @param prefix If given, only the orderings that start with these loops are generated.
+        """
+        if prefix is not None:
+            orderings = prefixed_permutations(self.lpfs, prefix)
+            if self.has_constraints:
+                return (o for o in orderings if all(constr.is_valid(o) for constr in self.constraints))
+            return orderings
+        if self.is_indexed:
+            return self.indexed_ordering_generator()
         if self.has_constraints:
             return constrainded_permutations(self.lpfs, self.constraints)  # type:ignore
         else:
             return permutations(self.lpfs)
+
+    @property
+    def has_budget(self) -> bool:
+        return any(budget is not None for budget in (self.time_budget, self.evaluation_budget, self.patience))
+
+    def get_lpf_rank(self, lpf: tuple[LayerDim, int]) -> tuple[int, int, str]:
+        """! Rank of a loop prime factor in the heuristic order of `ranked_ordering_generator`: loops that are
+        relevant to fewer operands (so that the other operands are reused) and smaller loops go first (innermost)"""
+        layer_dim, size = lpf
+        nb_relevant_operands = sum(
+            layer_dim not in self.layer.loop_relevancy_info.get_ir_layer_dims(layer_op)
+            for layer_op in self.layer.layer_operands
+        )
+        return nb_relevant_operands, size, str(layer_dim)
+
+    def ranked_ordering_generator(
+        self, prefixes: list[list[tuple[LayerDim, int]]] | None = None
+    ) -> Generator[list[tuple[LayerDim, int]], None, None]:
+        """! Generator that yields all orderings of the temporal loops (that start with one of the given prefixes), in
+        the lexicographic order of the loop ranks (see `get_lpf_rank`). The first ordering has the loops sorted by rank
+        from the innermost level outwards, and the orderings that share the most inner loops with it follow."""
+        for prefix in [[]] if prefixes is None else prefixes:
+            remainder = list(self.lpfs)
+            for lpf in prefix:
+                remainder.remove(lpf)
+            orderings = (list(prefix) + ordering for ordering in ranked_permutations(remainder, self.get_lpf_rank))
+            if self.has_constraints:
+                orderings = (o for o in orderings if all(constr.is_valid(o) for constr in self.constraints))
+            yield from orderings
+
+    def run_anytime(
+        self,
+        evaluate: Callable[[TemporalMapping], CostModelEvaluationABC],
+        criterion: str,
+        prefixes: list[list[tuple[LayerDim, int]]] | None = None,
+    ) -> LomaSearchResult:
+        """! Search the best temporal mapping for the given criterion within the time and evaluation budgets of this
+        engine. The orderings are visited in a heuristic order (see `ranked_ordering_generator`), so that good mappings
+        are found early, and the search stops at the first exhausted budget or when the best mapping has not improved
+        for `loma_patience` evaluations. The energy floor of `calc_energy_floor` and the ideal latency give a lower
+        bound on the key of any ordering, to report how far the best mapping is at most from the optimum. The floor is
+        computed before the search, within the time budget. The first valid ordering is always evaluated, so that a
+        mapping is found even if the floor takes up the whole budget.
+        @param evaluate Function that returns the cost model evaluation of a given temporal mapping
+        @param criterion One of the criteria in `LOMA_CRITERIA`
+        @param prefixes If given, only the orderings that start with one of these prefixes are considered
+        """
+        key_func = LOMA_CRITERIA[criterion]
+        start = time.perf_counter()
+        self.compute_lpfs()
+        result = LomaSearchResult(criterion, self.nb_permutations)
+        nb_evaluated_without_improvement = 0
+        # The MAC energy of IMC arrays depends on the mapping, so no lower bound is known for these
+        energy_floor = (
+            None
+            if isinstance(self.accelerator.operational_array, ImcArray)
+            else sum(sum(floor_per_level) for floor_per_level in self.calc_energy_floor(evaluate).values())
+        )
+
+        for ordering in self.ranked_ordering_generator(prefixes):
+            if (
+                self.time_budget is not None
+                and result.best_cme is not None
+                and time.perf_counter() - start >= self.time_budget
+            ):
+                result.stop_reason = "time budget"
+                break
+            if self.evaluation_budget is not None and result.nb_evaluated >= self.evaluation_budget:
+                result.stop_reason = "evaluation budget"
+                break
+            if self.patience is not None and nb_evaluated_without_improvement >= self.patience:
+                result.stop_reason = "patience"
+                break
+
+            result.nb_visited += 1
+            allocator = MemoryAllocator(
+                self.accelerator, self.layer, self.spatial_mapping, ordering, self.mapping_type, self.allocation_cache
+            )
+            try:
+                temporal_mapping = allocator.run()
+            except (MemoryHierarchyTooSmallException, MemoryTooSmallException):
+                continue
+            cme = evaluate(temporal_mapping)
+            result.nb_evaluated += 1
+            key = key_func(cme.energy_total, cme.latency_total2)
+            if result.best_key is None or key < result.best_key:
+                result.best_key, result.best_temporal_mapping, result.best_cme = key, temporal_mapping, cme
+                nb_evaluated_without_improvement = 0
+            else:
+                nb_evaluated_without_improvement += 1
+
+        if result.best_cme is None:
+            raise NoValidLoopOrderingFoundException(f"No valid loop ordering was found for layer {self.layer}.")
+        if energy_floor is not None:
+            energy_bound = result.best_cme.mac_energy + energy_floor
+            result.lower_bound = key_func(energy_bound, result.best_cme.ideal_temporal_cycle)
+        result.elapsed_time = time.perf_counter() - start
+        logger.info("%s for layer %s.", result, self.layer)
+        if self.profiler is not None:
+            self.profiler.count(
+                "loma_anytime",
+                result.elapsed_time,
+                orderings=result.nb_visited,
+                allocation_failures=result.nb_visited - result.nb_evaluated,
+            )
+        return result
+
+    def indexed_ordering_generator(self) -> Generator[list[tuple[LayerDim, int]], None, None]:
+        """! Generator that yields the orderings with an index in the configured start/stop/stride range, and keeps
+        track of the index of the next ordering."""
+        self.next_permutation_index = self.permutation_start
+        for ordering in indexed_permutations(
+            self.lpfs, self.permutation_start, self.permutation_stop, self.permutation_stride
+        ):
+            if not self.has_constraints or all(constr.is_valid(ordering) for constr in self.constraints):
+                yield ordering
+            # Only advance when the consumer asks for the next ordering, i.e. after it has handled this one, so that an
+            # interrupted search resumes at the ordering that was being evaluated
+            self.next_permutation_index += self.permutation_stride
+
+    def calc_energy_floor(
+        self, evaluate: Callable[[TemporalMapping], CostModelEvaluationABC]
+    ) -> dict[LayerOperand, list[float]]:
+        """! Compute, for each operand and memory level, a lower bound on the memory energy of any ordering.
+        The number of elements moved in and out of a memory level only decreases when more irrelevant loops are
+        allocated below it, so it is smallest if all irrelevant loops are put in the innermost level. The energy of
+        such a (possibly invalid) mapping, without rounding up to full memory words, is a lower bound for every
+        ordering. The innermost reads of the first level are excluded, as these depend on whether the data can stay at
+        the memory output (see `access_same_data_considered_as_no_access`).
+        @param evaluate Function that returns the cost model evaluation of a given temporal mapping
+        """
+        temporal_mapping_dict: dict[LayerOperand, list[list[tuple[LayerDim, UnrollFactor]]]] = {}
+        for layer_op in self.layer.layer_operands:
+            mem_op = self.layer.memory_operand_links.layer_to_mem_op(layer_op)
+            nb_levels = len(self.accelerator.memory_hierarchy.get_memory_levels(mem_op))
+            ir_dims = self.layer.loop_relevancy_info.get_ir_layer_dims(layer_op)
+            inner = [lpf for lpf in self.lpfs if lpf[0] in ir_dims]
+            outer = [lpf for lpf in self.lpfs if lpf[0] not in ir_dims]
+            levels: list[list[tuple[LayerDim, UnrollFactor]]] = [[] for _ in range(nb_levels)]
+            levels[0] += inner
+            levels[-1] += outer
+            temporal_mapping_dict[layer_op] = levels
+        cme = evaluate(TemporalMapping(temporal_mapping_dict, self.layer, self.mapping_type))
+
+        # With fractional spatial unrolling or partially relevant loops, the number of moved elements is rounded per
+        # level and no longer decreases monotonically, so no lower bound is used for these
+        is_fractional = any(size != int(size) for _, size in self.spatial_mapping.spatial_loop_dim_size)
+        energy_floor: dict[LayerOperand, list[float]] = {}
+        for layer_op in self.layer.layer_operands:
+            mem_op = self.layer.memory_operand_links.layer_to_mem_op(layer_op)
+            energy_floor[layer_op] = []
+            for mem_lv in range(cme.mapping.mem_level[layer_op]):
+                if is_fractional or self.layer.loop_relevancy_info.get_pr_layer_dims(layer_op):
+                    energy_floor[layer_op].append(0.0)
+                    continue
+                mem_level = self.accelerator.get_memory_level(mem_op, mem_lv)
+                data_move = cme.mapping.unit_mem_data_movement[layer_op][mem_lv]
+                amounts = data_move.get_attribute(DataMoveAttr.DATA_TRANS_AMOUNT_PER_PERIOD)
+                period_counts = data_move.get_attribute(DataMoveAttr.DATA_TRANS_PERIOD_COUNT)
+                precisions = data_move.get_attribute(DataMoveAttr.DATA_PRECISION)
+                unit_count = cme.mapping.spatial_mapping.unit_count[layer_op][mem_lv + 1]
+                floor = 0.0
+                for data_dir in DataDirection:
+                    if amounts.get(data_dir) == 0 or (mem_lv == 0 and data_dir == DataDirection.RD_OUT_TO_LOW):
+                        continue
+                    # Partial sums have a higher precision than final outputs
+                    precision = min(precisions.get(data_dir), self.layer.operand_precision[layer_op])
+                    energy_per_access = (
+                        mem_level.read_energy
+                        if data_dir in (DataDirection.RD_OUT_TO_LOW, DataDirection.RD_OUT_TO_HIGH)
+                        else mem_level.write_energy
+                    )
+                    nb_accesses = (
+                        amounts.get(data_dir)
+                        * precision
+                        / mem_level.get_max_bandwidth(mem_op, data_dir)  # type: ignore
+                        * period_counts.get(data_dir)
+                        * unit_count
+                    )
+                    # The number of accesses is truncated to an integer in the cost model
+                    floor += max(0, nb_accesses - 1) * energy_per_access
+                energy_floor[layer_op].append(floor)
+        return energy_floor
+
+    def run_branch_and_bound(
+        self,
+        evaluate: Callable[[TemporalMapping], CostModelEvaluationABC],
+        criterion: str,
+        prefixes: list[list[tuple[LayerDim, int]]] | None = None,
+    ) -> tuple[tuple[float, ...], TemporalMapping]:
+        """! Find the best temporal mapping for the given criterion without evaluating all orderings.
+        The orderings are built loop by loop, from the innermost loop outwards. For each prefix, the memory levels that
+        are fully allocated by the prefix are determined (see `MemoryAllocator.run_fixed_loops`). The energy spent in
+        these levels is the same for all orderings that start with the prefix. Together with the MAC energy, a lower
+        bound on the energy of the other levels (see `calc_energy_floor`) and the ideal latency, this gives a lower
+        bound on the cost of all these orderings. Prefixes for which this lower bound
+        can not beat the best mapping found so far are discarded. The first ordering of a prefix is the first one
+        that is evaluated below it anyway, so the bound only costs a partial memory allocation per prefix, and only
+        the best mapping (and not every evaluated one) is kept in memory.
+        The result equals the optimum of the exhaustive search (up to the choice between mappings with equal cost).
+        The MAC energy of IMC arrays depends on the mapping, so for these no orderings are discarded.
+        The search only gets faster than the exhaustive one when it discards more orderings than the bound costs.
+        The energy floor is loose for operands with partially relevant loops (e.g. the inputs of convolutions), and
+        the latency is bounded by the ideal cycle count only. On the example accelerators the bound stays around half
+        of the best energy, so hardly any ordering is discarded and the search is not exposed in the api; it is only
+        run when a `loma_search_criterion` is passed to the `TemporalMappingGeneratorStage` directly.
+        @param evaluate Function that returns the cost model evaluation of a given temporal mapping
+        @param criterion One of the criteria in `LOMA_CRITERIA`
+        @param prefixes If given, only the orderings that start with one of these prefixes are considered
+        @return The key of the best temporal mapping (see `LOMA_CRITERIA`) and the best temporal mapping itself
+        """
+        key_func = LOMA_CRITERIA[criterion]
+        self.compute_lpfs()
+        nb_loops = len(self.lpfs)
+
+        # Loops that the static positions (and sizes) constraints require at a position, like in
+        # `constrainded_permutations`, so that orderings that violate these are never built
+        static_elements = get_static_elements(self.constraints, nb_loops) if self.has_constraints else {}
+        if static_elements is None:
+            raise NoValidLoopOrderingFoundException(f"No valid loop ordering was found for layer {self.layer}.")
+        # Number of loops required at or after every position, per loop dimension and per loop
+        required_per_dim: list[Counter[LayerDim]] = [Counter() for _ in range(nb_loops + 1)]
+        required_per_lpf: list[Counter[tuple[LayerDim, int]]] = [Counter() for _ in range(nb_loops + 1)]
+        for position, (layer_dim, size) in static_elements.items():
+            for start in range(position + 1):
+                required_per_dim[start][layer_dim] += 1
+                if size is not None:
+                    required_per_lpf[start][(layer_dim, size)] += 1
+
+        def is_allowed(lpf: tuple[LayerDim, int], position: int, remaining: Counter[tuple[LayerDim, int]]) -> bool:
+            """! Whether the loop can be at the given position, such that the remaining loops can still be put at the
+            static positions after it"""
+            layer_dim, size = lpf
+            if position in static_elements:
+                required_dim, required_size = static_elements[position]
+                if layer_dim != required_dim or required_size not in (None, size):
+                    return False
+            available_per_dim: Counter[LayerDim] = Counter()
+            for (other_dim, other_size), count in remaining.items():
+                available = count - ((other_dim, other_size) == lpf)
+                if available < required_per_lpf[position + 1][(other_dim, other_size)]:
+                    return False
+                available_per_dim[other_dim] += available
+            return all(available_per_dim[dim] >= count for dim, count in required_per_dim[position + 1].items())
+
+        def get_first_ordering(
+            prefix: list[tuple[LayerDim, int]], remaining: Counter[tuple[LayerDim, int]]
+        ) -> list[tuple[LayerDim, int]]:
+            """! The first ordering that starts with the given prefix in the search"""
+            ordering = list(prefix)
+            remaining = remaining.copy()
+            while len(ordering) < nb_loops:
+                lpf = next(
+                    lpf for lpf in sorted(remaining) if remaining[lpf] > 0 and is_allowed(lpf, len(ordering), remaining)
+                )
+                remaining[lpf] -= 1
+                ordering.append(lpf)
+            return ordering
+
+        energy_floor: dict[LayerOperand, list[float]] = {}
+        best: list[tuple[tuple[float, ...], TemporalMapping]] = []
+        # Only the last evaluated ordering is kept, with its CME (None if it is not valid): the ordering that is
+        # evaluated for the bound of a prefix is also the first ordering of all its descendants in the search tree
+        last_evaluated: list[tuple[tuple[tuple[LayerDim, int], ...], CostModelEvaluationABC | None]] = []
+        counts = {"orderings": 0, "allocation_failures": 0}
+
+        def evaluate_ordering(ordering: list[tuple[LayerDim, int]]) -> CostModelEvaluationABC | None:
+            if last_evaluated and last_evaluated[0][0] == tuple(ordering):
+                return last_evaluated[0][1]
+            counts["orderings"] += 1
+            allocator = MemoryAllocator(
+                self.accelerator, self.layer, self.spatial_mapping, ordering, self.mapping_type, self.allocation_cache
+            )
+            try:
+                temporal_mapping = allocator.run()
+            except (MemoryHierarchyTooSmallException, MemoryTooSmallException):
+                counts["allocation_failures"] += 1
+                last_evaluated[:] = [(tuple(ordering), None)]
+                return None
+            cme = evaluate(temporal_mapping)
+            last_evaluated[:] = [(tuple(ordering), cme)]
+            # Orderings that don't meet the constraints can still be used to compute lower bounds
+            if not self.has_constraints or all(constr.is_valid(ordering) for constr in self.constraints):
+                key = key_func(cme.energy_total, cme.latency_total2)
+                if not best or key < best[0][0]:
+                    best[:] = [(key, temporal_mapping)]
+            return cme
+
+        def can_be_discarded(prefix: list[tuple[LayerDim, int]], remaining: Counter[tuple[LayerDim, int]]) -> bool:
+            # The first ordering with this prefix is evaluated in any case, use it to compute the bound
+            completion = get_first_ordering(prefix, remaining)
+            cme = evaluate_ordering(completion)
+            if cme is not None and best and key_func(float("inf"), cme.ideal_temporal_cycle) < best[0][0]:
+                # No energy bound can discard the prefix, e.g. for latency when the best mapping has stalls
+                return False
+            allocator = MemoryAllocator(
+                self.accelerator, self.layer, self.spatial_mapping, completion, self.mapping_type, self.allocation_cache
+            )
+            try:
+                allocated_loop_counts = allocator.run_fixed_loops(len(prefix))
+            except MemoryTooSmallException:
+                # None of the orderings with this prefix fit in the memories
+                return True
+            if cme is None or not best or type(cme) is not CostModelEvaluation:  # pylint: disable=C0123
+                return False
+            if not energy_floor:
+                energy_floor.update(self.calc_energy_floor(evaluate))
+            energy_bound = cme.mac_energy
+            for layer_op, floor_per_level in energy_floor.items():
+                ir_dims = self.layer.loop_relevancy_info.get_ir_layer_dims(layer_op)
+                loop_counts = allocated_loop_counts.get(layer_op, [])
+                for mem_lv, floor in enumerate(floor_per_level):
+                    if mem_lv < len(loop_counts):
+                        loop_count = loop_counts[mem_lv]
+                        # The irrelevant loops right above this level are merged down into this level (see
+                        # `TemporalMapping.innermost_stationary_loop_merge_down`), so these must be fixed as well
+                        while loop_count < len(prefix) and prefix[loop_count][0] in ir_dims:
+                            loop_count += 1
+                        if loop_count < len(prefix) or len(prefix) == nb_loops:
+                            energy_bound += cme.mem_energy_breakdown[layer_op][mem_lv]
+                            continue
+                    energy_bound += floor
+            # The latency is at least the number of temporal iterations, which is equal for all orderings
+            return key_func(energy_bound, cme.ideal_temporal_cycle) >= best[0][0]
+
+        def search(prefix: list[tuple[LayerDim, int]], remaining: Counter[tuple[LayerDim, int]]) -> None:
+            if len(prefix) == nb_loops:
+                evaluate_ordering(prefix)
+                return
+            # Close to the leaves, computing the bound costs more than evaluating the few remaining orderings
+            if nb_loops - len(prefix) > 2 and can_be_discarded(prefix, remaining):
+                return
+            for lpf in sorted(remaining):
+                if remaining[lpf] == 0 or not is_allowed(lpf, len(prefix), remaining):
+                    continue
+                remaining[lpf] -= 1
+                prefix.append(lpf)
+                search(prefix, remaining)
+                prefix.pop()
+                remaining[lpf] += 1
+
+        start = time.perf_counter()
+        for prefix in [[]] if prefixes is None else prefixes:
+            remaining = Counter(self.lpfs)
+            # The prefixes of the workers of a parallel search are not restricted by the static positions
+            is_allowed_prefix = True
+            for position, lpf in enumerate(prefix):
+                is_allowed_prefix = is_allowed_prefix and is_allowed(lpf, position, remaining)
+                remaining[lpf] -= 1
+            if is_allowed_prefix:
+                search(list(prefix), remaining)
+        if self.profiler is not None:
+            self.profiler.count("loma_branch_and_bound", time.perf_counter() - start, **counts)
+
+        logger.debug(
+            "Branch-and-bound LOMA evaluated %i of %s orderings for layer %s.",
+            counts["orderings"],
+            f"{self.nb_permutations:,}",
+            self.layer,
+        )
+        if not best:
+            raise NoValidLoopOrderingFoundException(f"No valid loop ordering was found for layer {self.layer}.")
+        return best[0]
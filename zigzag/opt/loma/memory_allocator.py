@@ -1,5 +1,7 @@
-from collections import defaultdict
+import itertools
+from collections import Counter, defaultdict
 from math import prod
+from typing import Any, Hashable
 
 import numpy as np
 
@@ -28,6 +30,55 @@ class MemoryTooSmallException(Exception):
     """Indicates that some memory instance is too small to support this temporal ordering"""
 
 
+class AllocationCache:
+    """! Cache that is shared by the MemoryAllocators of different orderings of the same loops, for the same
+    accelerator, layer, spatial mapping and mapping type (e.g. all orderings of one LomaEngine). It memoizes:
+    - the tensor size per layer operand and loop dimension sizes.
+    - the number of loops that are allocated to a memory level, per allocation state. This allocation only depends on
+    the multiset of the loops that are already allocated and on the few unallocated loops that fit in the memory level
+    (see `MemoryAllocator.find_best_loop_idxs_cached`). Orderings that only differ in the order of their innermost
+    loops or in the order of their outer loops thus share the allocation of most memory levels, and only the levels
+    that hold the changed loops are allocated again.
+    """
+
+    def __init__(self, max_nb_allocations: int = 2**16):
+        """
+        @param max_nb_allocations Maximal number of cached memory level allocations. When this is exceeded, the cached
+        allocations are cleared.
+        """
+        self.max_nb_allocations = max_nb_allocations
+        self.tensor_sizes: dict[tuple[LayerOperand, frozenset[tuple[LayerDim, UnrollFactor]]], float] = {}
+        # (allocation state, loops that determine the allocation) -> number of loops to allocate per mem_op
+        self.allocations: dict[tuple[Hashable, tuple[Any, ...]], list[int] | MemoryTooSmallException] = {}
+        # Allocation state -> the numbers of loops that determined the cached allocations of this state
+        self.window_sizes: dict[Hashable, set[int]] = {}
+        self.nb_hits = 0
+        self.nb_misses = 0
+
+    def get_allocation(
+        self, state: Hashable, ordering: list[Any], start: int
+    ) -> list[int] | MemoryTooSmallException | None:
+        """! Return the cached allocation for the given state, if one of the cached allocations of this state was
+        determined by the same loops as those of the given ordering (from position `start` on), else None"""
+        for window_size in self.window_sizes.get(state, ()):
+            allocation = self.allocations.get((state, tuple(ordering[start : start + window_size])))
+            if allocation is not None:
+                self.nb_hits += 1
+                return allocation
+        self.nb_misses += 1
+        return None
+
+    def add_allocation(
+        self, state: Hashable, window: tuple[Any, ...], allocation: list[int] | MemoryTooSmallException
+    ) -> None:
+        """! Add the allocation for the given state that is determined by the loops in `window`"""
+        if len(self.allocations) >= self.max_nb_allocations:
+            self.allocations.clear()
+            self.window_sizes.clear()
+        self.window_sizes.setdefault(state, set()).add(len(window))
+        self.allocations[(state, window)] = allocation
+
+
 class MemoryAllocator:
     """! Class that handles allocation of a loop ordering to the memories in the hierarchy."""
 
@@ -38,11 +89,30 @@ class MemoryAllocator:
         spatial_mapping: SpatialMappingInternal,
         ordering: list[tuple[LayerDim, UnrollFactorInt]],
         mapping_type: TemporalMappingType,
+        allocation_cache: AllocationCache | None = None,
     ):
+        """
+        @param allocation_cache: If given, the tensor sizes and memory level allocations are looked up in (and added
+        to) this cache, which should only be shared by allocators with the same accelerator, layer, spatial mapping and
+        mapping type. The result is the same as without cache.
+        """
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
         self.ordering = ordering
+        self.allocation_cache = allocation_cache
+        # The allocation of a memory level only depends on the multiset of the allocated loops if the loop size products
+        # don't depend on the order of the loops: this is not guaranteed for non-integer (floating point) loop sizes
+        self.allocation_is_order_independent = allocation_cache is not None and all(
+            float(size).is_integer()
+            for size in [size for _, size in self.ordering]
+            + [
+                size
+                for mapping_layer_op in self.spatial_mapping.mapping_dict_origin.values()
+                for level_loops in mapping_layer_op
+                for _, size in level_loops
+            ]
+        )
 
         # Initialize operands (having local copies speeds up the code)
         self.layer_and_mem_ops = self.layer.memory_operand_links.layer_and_mem_ops()
@@ -96,6 +166,48 @@ class MemoryAllocator:
         temporal_mapping = TemporalMapping(self.temporal_mapping_dict, self.layer, self.mapping_type)
         return temporal_mapping
 
+    def run_fixed_loops(self, nb_fixed_loops: int) -> dict[LayerOperand, list[int]]:
+        """! Run the memory allocation process only as far as it is fully determined by the first `nb_fixed_loops`
+        loops of the ordering, i.e. the allocation of these memory levels is the same for any ordering that starts with
+        these loops. This is used to bound the cost of all orderings with a given prefix.
+        A MemoryTooSmallException raised here thus holds for all orderings with this prefix.
+        @param nb_fixed_loops: number of loops at the start of the ordering that are fixed
+        @return For each layer operand, the number of temporal loops allocated up to and including each of the
+        determined memory levels, starting from the lowest level.
+        """
+        memory_hierarchy = self.accelerator.memory_hierarchy
+        top_levels = {mem_op: memory_hierarchy.get_operand_top_level(mem_op) for mem_op in self.mem_ops}
+        nb_loops = len(self.ordering)
+        allocated_loop_counts: dict[LayerOperand, list[int]] = {layer_op: [] for layer_op in self.layer_ops}
+        # Memory operands for which a memory level could not be allocated, so neither can the levels above
+        blocked_mem_ops: set[MemoryOperand] = set()
+
+        for node in memory_hierarchy.topological_sort():
+            filtered_mem_ops = [op for op in node.operands if op in self.mem_ops]
+            if any(mem_op in blocked_mem_ops for mem_op in filtered_mem_ops):
+                blocked_mem_ops.update(filtered_mem_ops)
+                continue
+            is_determined = True
+            for mem_op in filtered_mem_ops:
+                if node == top_levels[mem_op]:
+                    # All remaining loops are allocated to the top level
+                    is_determined = is_determined and nb_fixed_loops == nb_loops
+                    continue
+                # The number of loops that are considered for allocation at this node
+                sizes = self.calc_size_slices(mem_op, node.memory_instance.size)
+                nb_considered_loops = min(len(sizes), len(self.unallocated[mem_op]))
+                nb_allocated_loops = nb_loops - len(self.unallocated[mem_op])
+                is_determined = is_determined and nb_allocated_loops + nb_considered_loops <= nb_fixed_loops
+            if not is_determined:
+                blocked_mem_ops.update(filtered_mem_ops)
+                continue
+
+            self.allocate_node(node, top_levels)
+            for mem_op in filtered_mem_ops:
+                allocated_loop_counts[self.mem_to_layer_op[mem_op]].append(nb_loops - len(self.unallocated[mem_op]))
+
+        return allocated_loop_counts
+
     def allocate_node(self, node: MemoryLevel, top_levels: dict[MemoryOperand, MemoryLevel]):
         """! Allocate a single memory node with the best loops that remain in the unallocated loop ordering.
         @param node: The MemoryLevel to which we will allocate loops.
@@ -107,15 +219,11 @@ class MemoryAllocator:
         # Select the mem operands that are required for this layer (e.g. pooling has no weights so one mem
         # op less)
         filtered_mem_ops = [op for op in node.operands if op in self.mem_ops]
-        # Get the capacity of this memory node (in bits)
-        mem_capacity = node.memory_instance.size
 
-        # For all the mem_ops, find the max amount of unallocated loops we could allocate
-        all_sizes = {mem_op: self.calc_size_slices(mem_op, mem_capacity) for mem_op in filtered_mem_ops}
-
-        # Now that we have this for all the mem_ops, call function that finds the best
-        # combination of loops to minimize the number of accesses to the level above
-        best_loop_idxs = self.find_best_loop_combination(filtered_mem_ops, all_sizes, node, top_levels)
+        if self.allocation_cache is not None and self.allocation_is_order_independent:
+            best_loop_idxs = self.find_best_loop_idxs_cached(node, filtered_mem_ops, top_levels)
+        else:
+            best_loop_idxs = self.find_best_loop_idxs(node, filtered_mem_ops, top_levels)
 
         for best_loop_idx, mem_op in zip(best_loop_idxs, filtered_mem_ops):
             # Now that we have the combination of loop_idx for each mem_op, add them
@@ -150,6 +258,66 @@ class MemoryAllocator:
             # Increment the mem_level we are currently at for this layer_op by 1
             self.mem_level[layer_op] += 1
 
+    def find_best_loop_idxs(
+        self, node: MemoryLevel, mem_ops: list[MemoryOperand], top_levels: dict[MemoryOperand, MemoryLevel]
+    ) -> list[int]:
+        """! Return the number of unallocated loops to allocate to the given memory node for each of the mem_ops"""
+        # Get the capacity of this memory node (in bits)
+        mem_capacity = node.memory_instance.size
+
+        # For all the mem_ops, find the max amount of unallocated loops we could allocate
+        all_sizes = {mem_op: self.calc_size_slices(mem_op, mem_capacity) for mem_op in mem_ops}
+
+        # Now that we have this for all the mem_ops, call function that finds the best
+        # combination of loops to minimize the number of accesses to the level above
+        return self.find_best_loop_combination(mem_ops, all_sizes, node, top_levels)
+
+    def find_best_loop_idxs_cached(
+        self, node: MemoryLevel, mem_ops: list[MemoryOperand], top_levels: dict[MemoryOperand, MemoryLevel]
+    ) -> list[int]:
+        """! Same as `find_best_loop_idxs`, but looked up in the allocation cache. The allocation of a memory node is
+        determined by:
+        - the number of allocated loops per mem_op (for the spatial loops and the EVEN mapping type checks),
+        - the multiset of the loops that are allocated for all mem_ops and the multiset of all loops (for the tensor
+        sizes, the output precision and the iterations of the unallocated loops),
+        - the loops after these, up to the last loop that is considered for allocation for any of the mem_ops, i.e. up
+        to the first loop that doesn't fit in the memory anymore. This is not needed for a mem_op of which this is the
+        top memory level and for which all remaining loops fit.
+        """
+        assert self.allocation_cache is not None
+        nb_loops = len(self.ordering)
+        nb_allocated = tuple(nb_loops - len(self.unallocated[mem_op]) for mem_op in mem_ops)
+        nb_allocated_all = min(nb_allocated, default=nb_loops)
+        state = (
+            node.id,
+            nb_allocated,
+            frozenset(Counter(self.ordering[:nb_allocated_all]).items()),
+            frozenset(Counter(self.ordering).items()),
+        )
+
+        allocation = self.allocation_cache.get_allocation(state, self.ordering, nb_allocated_all)
+        if allocation is None:
+            mem_capacity = node.memory_instance.size
+            try:
+                all_sizes = {mem_op: self.calc_size_slices(mem_op, mem_capacity) for mem_op in mem_ops}
+                window_end = nb_allocated_all
+                for mem_op, nb_allocated_mem_op in zip(mem_ops, nb_allocated):
+                    nb_unallocated = nb_loops - nb_allocated_mem_op
+                    if node == top_levels[mem_op] and len(all_sizes[mem_op]) == nb_unallocated + 1:
+                        window_end = max(window_end, nb_allocated_mem_op)
+                    else:
+                        window_end = max(window_end, nb_allocated_mem_op + min(len(all_sizes[mem_op]), nb_unallocated))
+                allocation = self.find_best_loop_combination(mem_ops, all_sizes, node, top_levels)
+            except MemoryTooSmallException as exc:
+                # Conservatively use all loops. Don't keep the traceback (and thus this allocator) alive in the cache
+                window_end = nb_loops
+                allocation = MemoryTooSmallException(*exc.args)
+            self.allocation_cache.add_allocation(state, tuple(self.ordering[nb_allocated_all:window_end]), allocation)
+
+        if isinstance(allocation, MemoryTooSmallException):
+            raise MemoryTooSmallException(*allocation.args)
+        return allocation
+
     def get_precision(self, mem_op: MemoryOperand, layer_op: LayerOperand, unallocated_loops: list[Loop]):
         """Get the precision at which this tensor will have to be stored in the MemoryLevel node.
         For output it can be either the partial sum precision, or the final sum precision.
@@ -230,7 +398,14 @@ class MemoryAllocator:
         for loop in loops:
             all_dim_sizes[loop.layer_dim] *= loop.size
 
-        tensor_size = self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes))
+        if self.allocation_cache is None:
+            tensor_size = self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes))
+        else:
+            key = (layer_op, frozenset(all_dim_sizes.items()))
+            tensor_size = self.allocation_cache.tensor_sizes.get(key)
+            if tensor_size is None:
+                tensor_size = self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes))
+                self.allocation_cache.tensor_sizes[key] = tensor_size
         tensor_size_bits = tensor_size * precision
         return tensor_size_bits
 
@@ -279,21 +454,20 @@ class MemoryAllocator:
                     accesses = unallocated_iterations * size
                 all_accesses[mem_op].append(accesses)
 
-        all_max_nb_loops = {mem_op: len(all_sizes[mem_op]) for mem_op in mem_ops}
-        all_max_nb_loops_list = list(all_max_nb_loops.values())
         best_loop_idxs = [0 for _ in mem_ops]
         best_accesses = np.inf
-        nb_combinations = prod(len(sizes) for sizes in all_sizes.values())
-        for i in range(nb_combinations):
+        sizes_per_mem_op = [all_sizes[mem_op] for mem_op in mem_ops]
+        accesses_per_mem_op = [all_accesses[mem_op] for mem_op in mem_ops]
+        offsets_per_mem_op = [loop_idx_offsets[mem_op] for mem_op in mem_ops]
+        # Go through all combinations, with the loop index of the last mem_op changing fastest
+        all_combinations = itertools.product(*(range(len(sizes)) for sizes in sizes_per_mem_op))
+        for i, loop_idx_comb in enumerate(all_combinations):
             size_comb = 0
             accesses_comb = 0
-            current_loop_idxs: list[int] = []
-            for mem_op_idx, mem_op in enumerate(mem_ops):
-                this_max_nb_loops = all_max_nb_loops_list[mem_op_idx]
-                current_loop_idx = (i // prod(all_max_nb_loops_list[mem_op_idx + 1 :])) % this_max_nb_loops
-                current_loop_idxs.append(current_loop_idx + loop_idx_offsets[mem_op])
-                size_comb += all_sizes[mem_op][current_loop_idx]
-                accesses_comb += all_accesses[mem_op][current_loop_idx]
+            for current_loop_idx, sizes, accesses in zip(loop_idx_comb, sizes_per_mem_op, accesses_per_mem_op):
+                size_comb += sizes[current_loop_idx]
+                accesses_comb += accesses[current_loop_idx]
+            current_loop_idxs = [idx + offset for idx, offset in zip(loop_idx_comb, offsets_per_mem_op)]
             if size_comb > mem_capacity:
                 if i == 0:
                     raise MemoryTooSmallException(
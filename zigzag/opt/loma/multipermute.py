@@ -32,28 +32,19 @@
 # end while
 # ... from "Loopless Generation of Multiset Permutations using a Constant Number
 # of Variables by Prefix Shifts."  Aaron Williams, 2009
+#
+# Here, the list is stored in a Python list instead, and the nodes are tracked by their positions: every step moves
+# one element to the front (a prefix shift), and j is always the position after i.
 
 
 from abc import ABC, abstractmethod
-from typing import Any
+from collections import Counter
+from math import factorial
+from typing import Any, Callable, Generator
 
 from zigzag.datatypes import LayerDim
 
 
-class ListElement:
-    def __init__(self, value: Any, next_elem: Any):
-        self.value = value
-        self.next_elem = next_elem
-
-    def nth(self, n: int):
-        o = self
-        i = 0
-        while i < n and o.next_elem is not None:
-            o = o.next_elem
-            i += 1
-        return o
-
-
 class PermutationConstraint(ABC):
     """! An abstract class to represent a constraint on a permutation."""
 
@@ -99,59 +90,252 @@ class StaticPositionsAndSizesConstraint(PermutationConstraint):
         return not self.static_positions_and_sizes or len(self.static_positions_and_sizes) == 0
 
 
-def init(multiset: list[Any]):
-    multiset.sort()  # ensures proper non-increasing order
-    h = ListElement(multiset[0], None)
-    for item in multiset[1:]:
-        h = ListElement(item, h)
-    return h, h.nth(len(multiset) - 2), h.nth(len(multiset) - 1)
-
-
-def visit(h: ListElement) -> list[Any]:
-    """! Converts our bespoke linked list to a python list."""
-    o = h
-    this_list: list[Any] = []
-    while o is not None:
-        this_list.append(o.value)
-        o = o.next_elem
-    return this_list
-
-
-def constrainded_permutations(multiset: list[Any], constraints: list[PermutationConstraint]):
-    """! Generator providing all multiset permutations of a multiset with constraints."""
-    h, i, j = init(multiset)
-    if all(constr.is_valid(visit(h)) for constr in constraints):
-        yield visit(h)
-    while j.next_elem is not None or j.value < h.value:
-        if j.next_elem is not None and i.value >= j.next_elem.value:
-            s = j
+def prefix_shift_permutations(multiset: list[Any]) -> Generator[list[Any], None, None]:
+    """! Generator providing all multiset permutations of a multiset, with Algorithm 1. Only one list is kept and
+    updated in place with a prefix shift per permutation; a copy of it is yielded."""
+    if not multiset:
+        return
+    permutation = sorted(multiset, reverse=True)
+    length = len(permutation)
+    i = max(length - 2, 0)
+    j = length - 1
+    yield permutation[:]
+    while j + 1 < length or permutation[j] < permutation[0]:
+        s = j if j + 1 < length and permutation[i] >= permutation[j + 1] else i
+        t = permutation.pop(s + 1)
+        if t < permutation[0]:
+            i = 0
         else:
-            s = i
-        t = s.next_elem
-        s.next_elem = t.next_elem
-        t.next_elem = h
-        if t.value < h.value:
-            i = t
-        j = i.next_elem
-        h = t
-        if all(constr.is_valid(visit(h)) for constr in constraints):
-            yield visit(h)
-
-
-def permutations(multiset: list[Any]):
+            # The node i moves one position back, as it comes before t
+            i += 1
+        permutation.insert(0, t)
+        j = i + 1
+        yield permutation[:]
+
+
+def get_static_elements(
+    constraints: list[PermutationConstraint], length: int
+) -> dict[int, tuple[LayerDim, int | None]] | None:
+    """! Return the (layer dimension, size) that every position of the permutations must have according to the static
+    positions (and sizes) constraints, with size None if any size is allowed, or None if the constraints can not be met
+    for permutations of the given length."""
+    static_elements: dict[int, tuple[LayerDim, int | None]] = {}
+    for constraint in constraints:
+        if isinstance(constraint, StaticPositionsConstraint):
+            requirements = {position: (item, None) for position, item in constraint.static_positions.items()}
+        elif isinstance(constraint, StaticPositionsAndSizesConstraint):
+            requirements = dict(constraint.static_positions_and_sizes)
+        else:
+            continue
+        for position, (item, size) in requirements.items():
+            if not -length <= position < length:
+                return None
+            position %= length
+            other_item, other_size = static_elements.get(position, (item, size))
+            if other_item != item or (size is not None and other_size is not None and size != other_size):
+                return None
+            static_elements[position] = (item, size if size is not None else other_size)
+    return static_elements
+
+
+def constrainded_permutations(
+    multiset: list[Any], constraints: list[PermutationConstraint]
+) -> Generator[list[Any], None, None]:
+    """! Generator providing all multiset permutations of a multiset with constraints. The elements at the positions
+    fixed by static positions (and sizes) constraints are chosen first, and only the other elements are permuted, so
+    that permutations that violate these constraints are never generated. Other constraints are checked for every
+    permutation."""
+    static_elements = get_static_elements(constraints, len(multiset))
+    if static_elements is None:
+        return
+    other_constraints = [
+        constr
+        for constr in constraints
+        if not isinstance(constr, (StaticPositionsConstraint, StaticPositionsAndSizesConstraint))
+    ]
+    positions = sorted(static_elements)
+    counts = Counter(multiset)
+    elements = sorted(counts)
+
+    def assign(idx: int, assignment: list[Any]) -> Generator[list[Any], None, None]:
+        """! Generate all distinct choices of elements for the static positions"""
+        if idx == len(positions):
+            yield list(assignment)
+            return
+        item, size = static_elements[positions[idx]]
+        for elem in elements:
+            if counts[elem] > 0 and elem[0] == item and (size is None or elem[1] == size):
+                counts[elem] -= 1
+                assignment.append(elem)
+                yield from assign(idx + 1, assignment)
+                assignment.pop()
+                counts[elem] += 1
+
+    for assignment in assign(0, []):
+        remainder = list((Counter(multiset) - Counter(assignment)).elements())
+        # The free positions between the static positions, as slices of the permutation of the other elements
+        slices: list[tuple[int, int, Any]] = []
+        nb_free = 0
+        for position, elem in zip(positions, assignment):
+            slices.append((nb_free, position - len(slices), elem))
+            nb_free = position - len(slices) + 1
+        for permutation in prefix_shift_permutations(remainder) if remainder else [[]]:
+            ordering: list[Any] = []
+            for free_start, free_stop, elem in slices:
+                ordering += permutation[free_start:free_stop]
+                ordering.append(elem)
+            ordering += permutation[nb_free:]
+            if all(constr.is_valid(ordering) for constr in other_constraints):
+                yield ordering
+
+
+def permutations(multiset: list[Any]) -> Generator[list[Any], None, None]:
     """! Generator providing all multiset permutations of a multiset."""
-    h, i, j = init(multiset)
-    yield visit(h)
-    while j.next_elem is not None or j.value < h.value:
-        if j.next_elem is not None and i.value >= j.next_elem.value:
-            s = j
+    return prefix_shift_permutations(multiset)
+
+
+def distinct_prefixes(multiset: list[Any], length: int) -> list[list[Any]]:
+    """! Return all distinct prefixes of the given length of the multiset permutations, in sorted order.
+    Every multiset permutation starts with exactly one of these prefixes, so they partition the permutation space.
+    """
+    counts = Counter(multiset)
+    elements = sorted(counts)
+
+    def extend(prefix: list[Any]) -> Generator[list[Any], None, None]:
+        if len(prefix) == length:
+            yield list(prefix)
+            return
+        for elem in elements:
+            if counts[elem] > 0:
+                counts[elem] -= 1
+                prefix.append(elem)
+                yield from extend(prefix)
+                prefix.pop()
+                counts[elem] += 1
+
+    return list(extend([]))
+
+
+def prefixed_permutations(multiset: list[Any], prefix: list[Any]) -> Generator[list[Any], None, None]:
+    """! Generator providing all multiset permutations of a multiset that start with the given prefix."""
+    remainder = list(multiset)
+    for elem in prefix:
+        remainder.remove(elem)
+    if not remainder:
+        yield list(prefix)
+        return
+    for permutation in permutations(remainder):
+        yield prefix + permutation
+
+
+def ranked_permutations(multiset: list[Any], rank: Callable[[Any], Any]) -> Generator[list[Any], None, None]:
+    """! Generator providing all multiset permutations of a multiset, in the lexicographic order of the ranks of the
+    elements instead of the elements themselves. The first permutation has its elements sorted by rank, and the
+    permutations are generated in place, so the memory use is independent of the number of permutations.
+    @param rank Function that returns the rank of an element. Different elements must have different ranks.
+    """
+    elements = sorted(set(multiset), key=rank)
+    element_indices = {elem: idx for idx, elem in enumerate(elements)}
+    permutation = sorted(element_indices[elem] for elem in multiset)
+    while True:
+        yield [elements[idx] for idx in permutation]
+        if not next_permutation(permutation):
+            return
+
+
+def nb_multiset_permutations(multiset: list[Any]) -> int:
+    """! Return the number of distinct permutations of the given multiset."""
+    nb_permutations = factorial(len(multiset))
+    for multiplicity in Counter(multiset).values():
+        nb_permutations //= factorial(multiplicity)
+    return nb_permutations
+
+
+def permutation_rank(permutation: list[Any]) -> int:
+    """! Return the index of the given permutation in the lexicographically sorted list of all distinct permutations
+    of its elements. This is the inverse of `permutation_unrank`.
+    """
+    counts = Counter(permutation)
+    elements = sorted(counts)
+    nb_permutations = nb_multiset_permutations(permutation)
+    remaining = len(permutation)
+    rank = 0
+    for elem in permutation:
+        # Skip all permutations (of the remaining elements) that start with a smaller element
+        for smaller_elem in elements:
+            if not smaller_elem < elem:
+                break
+            rank += nb_permutations * counts[smaller_elem] // remaining
+        nb_permutations = nb_permutations * counts[elem] // remaining
+        counts[elem] -= 1
+        remaining -= 1
+    return rank
+
+
+def permutation_unrank(multiset: list[Any], index: int) -> list[Any]:
+    """! Return the permutation of the multiset at the given index in the lexicographically sorted list of all
+    distinct permutations of the multiset.
+    """
+    counts = Counter(multiset)
+    elements = sorted(counts)
+    nb_permutations = nb_multiset_permutations(multiset)
+    if not 0 <= index < nb_permutations:
+        raise IndexError(f"Permutation index {index} out of range for multiset with {nb_permutations} permutations")
+    remaining = len(multiset)
+    permutation: list[Any] = []
+    while remaining > 0:
+        for elem in elements:
+            if counts[elem] == 0:
+                continue
+            nb_permutations_with_elem = nb_permutations * counts[elem] // remaining
+            if index < nb_permutations_with_elem:
+                permutation.append(elem)
+                nb_permutations = nb_permutations_with_elem
+                counts[elem] -= 1
+                remaining -= 1
+                break
+            index -= nb_permutations_with_elem
+    return permutation
+
+
+def next_permutation(permutation: list[Any]) -> bool:
+    """! Transform the permutation in place into its lexicographic successor.
+    @return False iff the given permutation was the last one (in which case it is not modified)
+    """
+    i = len(permutation) - 2
+    while i >= 0 and not permutation[i] < permutation[i + 1]:
+        i -= 1
+    if i < 0:
+        return False
+    j = len(permutation) - 1
+    while not permutation[i] < permutation[j]:
+        j -= 1
+    permutation[i], permutation[j] = permutation[j], permutation[i]
+    permutation[i + 1 :] = reversed(permutation[i + 1 :])
+    return True
+
+
+def indexed_permutations(
+    multiset: list[Any], start: int = 0, stop: int | None = None, stride: int = 1
+) -> Generator[list[Any], None, None]:
+    """! Generator providing the multiset permutations with an index in `range(start, stop, stride)`, where the index
+    is the position in the lexicographically sorted list of all distinct permutations (see `permutation_unrank`).
+    This allows to split the permutations deterministically in shards, or to resume from a given index.
+    """
+    assert start >= 0 and stride >= 1, "Invalid permutation index range"
+    nb_permutations = nb_multiset_permutations(multiset)
+    stop = nb_permutations if stop is None else min(stop, nb_permutations)
+    if start >= stop:
+        return
+
+    permutation = permutation_unrank(multiset, start)
+    for index in range(start, stop, stride):
+        yield list(permutation)
+        if index + stride >= stop:
+            return
+        # Stepping is cheaper than unranking for small strides
+        if stride <= len(multiset):
+            for _ in range(stride):
+                next_permutation(permutation)
         else:
-            s = i
-        t = s.next_elem
-        s.next_elem = t.next_elem
-        t.next_elem = h
-        if t.value < h.value:
-            i = t
-        j = i.next_elem
-        h = t
-        yield visit(h)
+            permutation = permutation_unrank(multiset, index + stride)
@@ -28,24 +28,119 @@
 """
 
 import logging
+import math
 import random
-from copy import deepcopy
+import time
 from typing import Any
 
+import multiprocessing_on_dill as multiprocessing  # type: ignore
 import numpy as np
-from multiprocessing_on_dill import Queue  # type: ignore
 from sympy.ntheory import factorint  # type: ignore
 
+from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.datatypes import LayerDim
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.mapping.temporal_mapping import TemporalMappingType
-from zigzag.opt.salsa.state import SalsaState
+from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingType
+from zigzag.opt.loma.memory_allocator import (
+    AllocationCache,
+    MemoryAllocator,
+    MemoryHierarchyTooSmallException,
+    MemoryTooSmallException,
+)
+from zigzag.opt.salsa.state import SalsaCost, SalsaOrdering, SalsaState
 from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
 
 
+class SalsaChainResult:
+    """! Outcome of one SALSA Markov chain: its best ordering and cost, and a convergence trace with an
+    (iteration, elapsed time in seconds, best cost) entry for every improvement of the best cost. Orderings with the
+    same cost are compared on the other criterion (`best_secondary_cost`)."""
+
+    def __init__(self, chain_id: int, seed: int, temperature_scale: float):
+        self.chain_id = chain_id
+        self.seed = seed
+        self.temperature_scale = temperature_scale
+        self.best_ordering: SalsaOrdering | None = None
+        self.best_key: SalsaCost = (math.inf, math.inf)
+        self.trace: list[tuple[int, float, float]] = []
+        self.nb_evaluations = 0
+        self.nb_memo_hits = 0
+        self.nb_accepted = 0
+        self.nb_exchanges = 0
+
+    @property
+    def best_cost(self) -> float:
+        return self.best_key[0]
+
+    @property
+    def best_secondary_cost(self) -> float:
+        return self.best_key[1]
+
+    def __str__(self):
+        return (
+            f"SalsaChainResult(chain {self.chain_id}, seed {self.seed}, best cost {self.best_cost:.4e}, "
+            f"{self.nb_evaluations} evaluations, {self.nb_memo_hits} memo hits)"
+        )
+
+
+class SalsaChain:
+    """! A SALSA Markov chain with its own random number generator and a memo of the costs of the orderings it
+    visited, so that revisited orderings are not evaluated again."""
+
+    def __init__(self, engine: "SalsaEngine", chain_id: int, seed: int, temperature_scale: float = 1.0):
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.temperature_scale = temperature_scale
+        self.memo: dict[SalsaOrdering, SalsaCost] = {}
+        self.result = SalsaChainResult(chain_id, seed, temperature_scale)
+        self.start_time = time.perf_counter()
+
+        # Initialize the chain with a random starting point
+        start_ordering = list(engine.temporal_mapping_lpf)
+        self.rng.shuffle(start_ordering)
+        self.current_state = SalsaState(tuple(start_ordering), self.evaluate(tuple(start_ordering)))
+        self.update_best(self.current_state, 0)
+
+    def evaluate(self, ordering: SalsaOrdering) -> SalsaCost:
+        if ordering in self.memo:
+            self.result.nb_memo_hits += 1
+        else:
+            self.memo[ordering] = self.engine.evaluate(ordering)
+            self.result.nb_evaluations += 1
+        return self.memo[ordering]
+
+    def update_best(self, state: SalsaState, iteration: int) -> None:
+        if state.cost < self.result.best_key or self.result.best_ordering is None:
+            self.result.best_ordering = state.ordering
+            self.result.best_key = state.cost
+            self.result.trace.append((iteration, time.perf_counter() - self.start_time, state.opt_criterion))
+
+    def step(self, iteration: int) -> None:
+        """! Propose to swap two random loops and accept the swap with the Metropolis criterion on the relative cost
+        difference, at the (cooled) temperature of this chain."""
+        temperature = self.engine.start_temperature * (0.995**iteration) * self.temperature_scale
+        i = self.rng.randrange(len(self.current_state.ordering))
+        j = self.rng.randrange(len(self.current_state.ordering))
+        next_ordering = self.current_state.swap(i, j)
+        next_key = self.evaluate(next_ordering)
+        next_cost = next_key[0]
+
+        current_cost = self.current_state.opt_criterion
+        if math.isinf(next_cost):
+            return
+        # probability of accepting the next state
+        if not math.isinf(current_cost) and self.rng.random() >= math.exp(
+            min(0.0, ((current_cost / next_cost) - 1) / temperature)
+        ):
+            return
+        self.current_state = SalsaState(next_ordering, next_key)
+        self.result.nb_accepted += 1
+        self.update_best(self.current_state, iteration)
+
+
 class SalsaEngine:
     """! Class that handles optimization of temporal mapping given a:
     - layer
@@ -54,8 +149,11 @@ class SalsaEngine:
     - number of iterations
     - start temperature
     This optimization is carried out through simulated annealing loop order based.
-    Each loop is broken down to the smallest possible part (prime factors), then a runtime estimation is performed to
-    choose the fastest engine to use (LOMA or SALSA).
+    Each loop is broken down to the smallest possible part (prime factors). Multiple independent Markov chains, each
+    with its own seed, search the loop orderings. Optionally, the chains run at increasing temperatures and
+    periodically exchange their states (replica exchange), so that the coldest chain can escape local optima.
+    The chains only keep the orderings and their costs: the temporal mapping of the best ordering is created at the
+    end (see `get_temporal_mapping`).
     # TODO cleanup
     """
 
@@ -75,84 +173,132 @@ class SalsaEngine:
         - Number of iterations
         - Start temperature
         The memory hierarchy from the correct core is extracted from the accelerator.
+        @param salsa_number_of_chains (optional kwarg): Number of Markov chains
+        @param salsa_seed (optional kwarg): Seed from which the seeds of the chains are derived. If None, the chains
+        are seeded randomly.
+        @param salsa_replica_exchange (optional kwarg): Whether the chains run at temperatures that increase with a
+        factor `salsa_temperature_ratio` and exchange their states every `salsa_exchange_interval` iterations. These
+        coupled chains run in lockstep in the calling process (see `run`).
         """
 
         # Hardware and mapping related inputs
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
+        self.spatial_mapping_int: SpatialMappingInternal = kwargs.get("spatial_mapping_int", spatial_mapping)
         self.mapping_type = mapping_type
+        self.access_same_data_considered_as_no_access = kwargs.get("access_same_data_considered_as_no_access", True)
 
         # Algorithm related inputs
         self.iteration_number = kwargs.get("salsa_iteration_number", 1000)
         self.start_temperature = kwargs.get("salsa_start_temperature", 0.05)
         self.opt_criterion_name = kwargs.get("salsa_opt_criterion", "energy")
         self.lpf_limit = kwargs.get("loma_lpf_limit", 4)
-
-    def run(self, cme_queue: Queue):
-        """! Call the necessary methods, start the processes and collect the best temporal mapping found during the
-        run."""
-        self.cme_queue = cme_queue
+        self.number_of_chains: int = kwargs.get("salsa_number_of_chains", kwargs.get("salsa_number_of_core", 1))
+        self.seed: int | None = kwargs.get("salsa_seed", None)
+        self.replica_exchange: bool = kwargs.get("salsa_replica_exchange", False)
+        self.exchange_interval: int = kwargs.get("salsa_exchange_interval", 10)
+        self.temperature_ratio: float = kwargs.get("salsa_temperature_ratio", 2.0)
+        assert self.opt_criterion_name in ("energy", "latency")  # TODO make this an enum?
+
+        # Shared by the memory allocators of all orderings evaluated in this process
+        self.allocation_cache = AllocationCache()
+
+    def run(self, number_of_core: int = 1) -> list[SalsaChainResult]:
+        """! Run all Markov chains, distributed over (at most) the given number of processes, and return their
+        results. Replica exchange chains are coupled, so these run in the calling process."""
         self.get_temporal_loops()
         self.get_prime_factors()
-        self.run_simulated_annealing_opt(self.cme_queue)
-
-    def run_simulated_annealing_opt(self, cme_queue):
+        seeds = self.get_chain_seeds()
+
+        if self.replica_exchange:
+            return self.run_replica_exchange(seeds)
+        number_of_core = min(number_of_core, len(seeds))
+        if number_of_core <= 1:
+            return [self.run_chain(chain_id, seed) for chain_id, seed in enumerate(seeds)]
+        with multiprocessing.Pool(number_of_core) as pool:  # type: ignore
+            return pool.starmap(self.run_chain, enumerate(seeds), chunksize=1)  # type: ignore
+
+    def get_chain_seeds(self) -> list[int]:
+        """! Return a different seed for every chain, derived from `salsa_seed`"""
+        seed_sequence = np.random.SeedSequence(self.seed)
+        return [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(self.number_of_chains)]
+
+    def run_chain(self, chain_id: int, seed: int) -> SalsaChainResult:
         """! Run a simulated annealing optimization on the loop ordering using a loma memory allocation strategy."""
-        temperature = self.start_temperature
-        start_ordering = self.temporal_mapping_lpf  # tmo stands for temporal mapping ordering
-
-        # Initialize the algorithm with a random starting point
-        random.shuffle(start_ordering)
-
-        # Initialize variables to store current, next and best state
-        best_state = SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
-            self.mapping_type,
+        chain = SalsaChain(self, chain_id, seed)
+        for it in range(self.iteration_number):
+            chain.step(it)
+        logger.debug("%s", chain.result)
+        return chain.result
+
+    def run_replica_exchange(self, seeds: list[int]) -> list[SalsaChainResult]:
+        """! Run the chains in lockstep at temperatures that increase with `salsa_temperature_ratio`. Every
+        `salsa_exchange_interval` iterations, neighbouring chains exchange their current states with the Metropolis
+        criterion of replica exchange, using the logarithm of the cost as energy."""
+        chains = [
+            SalsaChain(self, chain_id, seed, self.temperature_ratio**chain_id) for chain_id, seed in enumerate(seeds)
+        ]
+        exchange_rng = random.Random(seeds[0])
+        for it in range(self.iteration_number):
+            for chain in chains:
+                chain.step(it)
+            if (it + 1) % self.exchange_interval != 0:
+                continue
+            # Alternate between the even and odd pairs of neighbouring chains
+            for idx in range((it // self.exchange_interval) % 2, len(chains) - 1, 2):
+                cold, hot = chains[idx], chains[idx + 1]
+                if self.accept_exchange(cold, hot, it, exchange_rng):
+                    cold.current_state, hot.current_state = hot.current_state, cold.current_state
+                    cold.result.nb_exchanges += 1
+                    hot.result.nb_exchanges += 1
+                    cold.update_best(cold.current_state, it)
+        for chain in chains:
+            logger.debug("%s", chain.result)
+        return [chain.result for chain in chains]
+
+    def accept_exchange(self, cold: SalsaChain, hot: SalsaChain, iteration: int, rng: random.Random) -> bool:
+        cold_cost, hot_cost = cold.current_state.opt_criterion, hot.current_state.opt_criterion
+        if math.isinf(cold_cost) or math.isinf(hot_cost):
+            return math.isinf(cold_cost) and not math.isinf(hot_cost)
+        temperature = self.start_temperature * (0.995**iteration)
+        delta = (1 / (temperature * cold.temperature_scale) - 1 / (temperature * hot.temperature_scale)) * (
+            math.log(cold_cost) - math.log(hot_cost)
         )
-        current_state = SalsaState(
+        return delta >= 0 or rng.random() < math.exp(delta)
+
+    def get_temporal_mapping(self, ordering: SalsaOrdering) -> TemporalMapping:
+        """! Allocate the given ordering to the memories"""
+        allocator = MemoryAllocator(
             self.accelerator,
             self.layer,
             self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
+            list(ordering),
             self.mapping_type,
+            self.allocation_cache,
         )
-        next_state = SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
-            self.mapping_type,
+        return allocator.run()
+
+    def evaluate(self, ordering: SalsaOrdering) -> SalsaCost:
+        """! Return the optimization criterion of the given ordering and the other criterion, which breaks ties:
+        (energy, latency) or (latency, energy). Both are infinite if the ordering does not fit in the memories.
+        The latency includes the on- and offloading (`latency_total2`), as in the reduce stages."""
+        try:
+            temporal_mapping = self.get_temporal_mapping(ordering)
+        except (MemoryHierarchyTooSmallException, MemoryTooSmallException):
+            return (math.inf, math.inf)
+        cme = CostModelEvaluation(
+            accelerator=self.accelerator,
+            layer=self.layer,
+            spatial_mapping=self.spatial_mapping,
+            spatial_mapping_int=self.spatial_mapping_int,
+            temporal_mapping=temporal_mapping,
+            access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
         )
-
-        for it in range(self.iteration_number):
-            temperature = self.start_temperature * (0.995**it)
-
-            # Get the index of the loop to swap
-            i = int(np.random.randint(0, len(current_state.ordering)))
-            j = int(np.random.randint(0, len(current_state.ordering)))
-
-            # Swap the loops
-            next_state = current_state.swap(i, j)
-
-            x = np.random.rand()  # x belongs to [0, 1]
-            # probability of accepting the next state
-            p = np.exp(((current_state.opt_criterion / next_state.opt_criterion) - 1) / temperature)
-
-            if x < p:
-                # Replace the current state by the next state and compare the energy with the best state
-                current_state = deepcopy(next_state)
-
-                if current_state.opt_criterion < best_state.opt_criterion:
-                    best_state = deepcopy(current_state)
-
-        cme_queue.put(best_state.cme)
+        # The optimization criterion will be minimized
+        if self.opt_criterion_name == "energy":
+            return (cme.energy_total, cme.latency_total2)
+        return (cme.latency_total2, cme.energy_total)
 
     def get_temporal_loops(self):
         """! Get all loops that have to be temporally scheduled given layer and spatial mapping."""
@@ -26,69 +26,29 @@
 #   limitations under the License.
 #
 
-from copy import deepcopy
-
-from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.datatypes import LayerDim, UnrollFactorInt
-from zigzag.hardware.architecture.accelerator import Accelerator
-from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.mapping.temporal_mapping import TemporalMappingType
-from zigzag.opt.loma.memory_allocator import MemoryAllocator
-from zigzag.workload.layer_node import LayerNode
-
-
-class SalsaState:
-    """! State of SALSA, storing an ordering, his temporal mapping and his energy value."""
 
-    def __init__(
-        self,
-        accelerator: Accelerator,
-        layer: LayerNode,
-        spatial_mapping: SpatialMappingInternal,
-        ordering: list[tuple[LayerDim, UnrollFactorInt]],
-        opt_criterion_name: str,
-        mapping_type: TemporalMappingType,
-    ):
-        assert opt_criterion_name in ("energy", "latency")  # TODO make this an enum?
-        self.ordering = ordering
-        self.accelerator = accelerator
-        self.layer = layer
-        self.spatial_mapping = spatial_mapping
-        self.memory_hierarchy = self.accelerator.memory_hierarchy
-        self.opt_criterion_name = opt_criterion_name
-        self.mapping_type = mapping_type
-
-        allocator = MemoryAllocator(self.accelerator, self.layer, self.spatial_mapping, ordering, self.mapping_type)
+SalsaOrdering = tuple[tuple[LayerDim, UnrollFactorInt], ...]
+## Value of the optimization criterion and of the other criterion, which breaks ties (see `SalsaEngine.evaluate`)
+SalsaCost = tuple[float, float]
 
-        self.temporal_mapping = allocator.run()  # allocate this ordering to the memories
 
-        self.cme = CostModelEvaluation(
-            accelerator=self.accelerator,
-            layer=self.layer,
-            spatial_mapping=self.spatial_mapping,
-            spatial_mapping_int=self.spatial_mapping,  # TODO the int version is missing?
-            temporal_mapping=self.temporal_mapping,
-        )
+class SalsaState:
+    """! State of a SALSA Markov chain: a loop ordering and its cost. The temporal mapping and cost model evaluation
+    are only created for the best state found by the search."""
 
-        # The optimization criterion will be minimized
-        if self.opt_criterion_name == "energy":
-            self.opt_criterion = self.cme.energy_total
-        elif self.opt_criterion_name == "latency":
-            self.opt_criterion = self.cme.latency_total0
+    __slots__ = ("ordering", "cost")
 
-    def swap(self, i: int, j: int) -> "SalsaState":
-        """! Swap between the element at position i and j in the ordering and return the new resulting state."""
+    def __init__(self, ordering: SalsaOrdering, cost: SalsaCost):
+        self.ordering = ordering
+        self.cost = cost
 
-        swapped_ordering = deepcopy(self.ordering)
-        temp = swapped_ordering[i]
-        swapped_ordering[i] = swapped_ordering[j]
-        swapped_ordering[j] = temp
+    @property
+    def opt_criterion(self) -> float:
+        return self.cost[0]
 
-        return SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            swapped_ordering,
-            self.opt_criterion_name,
-            self.mapping_type,
-        )
+    def swap(self, i: int, j: int) -> SalsaOrdering:
+        """! Return the ordering with the elements at position i and j swapped."""
+        swapped_ordering = list(self.ordering)
+        swapped_ordering[i], swapped_ordering[j] = swapped_ordering[j], swapped_ordering[i]
+        return tuple(swapped_ordering)
@@ -1,5 +1,7 @@
+import json
 from typing import Any
 
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
 from zigzag.datatypes import (
     Constants,
     LayerDim,
@@ -39,9 +41,14 @@ from zigzag.mapping.spatial_mapping import MappingSingleOADim, SpatialMapping
 class AcceleratorFactory:
     """! Converts valid user-provided accelerator data into an `Accelerator` instance"""
 
-    def __init__(self, data: dict[str, Any]):
-        """! Generate an `Core` instance from the validated user-provided data."""
+    def __init__(self, data: dict[str, Any], parts_cache: dict[str, Any] | None = None):
+        """! Generate an `Core` instance from the validated user-provided data.
+        @param parts_cache If given, the operational array and memory instances are looked up in (and added to) this
+        dict, keyed by the data they are created from. Accelerators created with the same dict (e.g. the design points
+        of a design space) share the parts that are defined identically, instead of creating them again.
+        """
         self.data = data
+        self.parts_cache = parts_cache
 
     def create(self, core_id: int = 0, shared_mem_group_id: int | None = None) -> Accelerator:
         """! Create a Core instance from the user-provided data.
@@ -56,7 +63,10 @@ class AcceleratorFactory:
 
         for mem_name in self.data["memories"]:
             memory_factory = MemoryFactory(
-                mem_name, self.data["memories"][mem_name], shared_mem_group_id=shared_mem_group_id
+                mem_name,
+                self.data["memories"][mem_name],
+                shared_mem_group_id=shared_mem_group_id,
+                parts_cache=self.parts_cache,
             )
             memory_factory.add_memory_to_graph(mem_graph)
 
@@ -68,9 +78,25 @@ class AcceleratorFactory:
             dataflows=dataflows,
         )
 
+    def get_cacti_points(self) -> list[CactiPoint]:
+        """! Return the CACTI configurations of all memories of which the costs are automatically extracted"""
+        cacti_points: list[CactiPoint] = []
+        for mem_name in self.data["memories"]:
+            cacti_point = MemoryFactory(mem_name, self.data["memories"][mem_name]).get_cacti_point()
+            if cacti_point is not None:
+                cacti_points.append(cacti_point)
+        return cacti_points
+
     def create_operational_array(self) -> OperationalArrayABC:
         is_imc = self.data["operational_array"]["is_imc"]
-        return self.create_imc_array() if is_imc else self.create_non_imc_array()
+        if self.parts_cache is None:
+            return self.create_imc_array() if is_imc else self.create_non_imc_array()
+        # The IMC array also depends on the IMC cells
+        array_data = [self.data["operational_array"], self.data["memories"]["cells"] if is_imc else None]
+        key = json.dumps(["operational_array", array_data], sort_keys=True)
+        if key not in self.parts_cache:
+            self.parts_cache[key] = self.create_imc_array() if is_imc else self.create_non_imc_array()
+        return self.parts_cache[key]
 
     def create_non_imc_array(self) -> MultiplierArray:
         op_array_data: dict[str, Any] = self.data["operational_array"]
@@ -146,10 +172,21 @@ class AcceleratorFactory:
 class MemoryFactory:
     """! Create MemoryInstances and adds them to memory hierarchy."""
 
-    def __init__(self, name: str, mem_data: dict[str, Any], shared_mem_group_id: int = -1):
+    def __init__(
+        self,
+        name: str,
+        mem_data: dict[str, Any],
+        shared_mem_group_id: int = -1,
+        parts_cache: dict[str, Any] | None = None,
+    ):
+        """
+        @param parts_cache If given, the memory instance is looked up in (and added to) this dict (see
+        `AcceleratorFactory`)
+        """
         self.data = mem_data
         self.name = name
         self.shared_mem_group_id = shared_mem_group_id
+        self.parts_cache = parts_cache
         self.memory_ports = None
 
     def create_memory_ports(self) -> tuple[MemoryPort, ...]:
@@ -165,6 +202,14 @@ class MemoryFactory:
         return tuple(memory_ports)
 
     def create_memory_instance(self) -> MemoryInstance:
+        if self.parts_cache is None:
+            return self.create_new_memory_instance()
+        key = json.dumps(["memory", self.name, self.data, self.shared_mem_group_id], sort_keys=True)
+        if key not in self.parts_cache:
+            self.parts_cache[key] = self.create_new_memory_instance()
+        return self.parts_cache[key]
+
+    def create_new_memory_instance(self) -> MemoryInstance:
         memory_ports = self.create_memory_ports()
         return MemoryInstance(
             name=self.name,
@@ -176,10 +221,24 @@ class MemoryFactory:
             latency=self.data["latency"],
             ports=memory_ports,
             auto_cost_extraction=self.data["auto_cost_extraction"],
+            auto_cost_max_interpolation_error=self.data["auto_cost_max_interpolation_error"],
             shared_memory_group_id=self.shared_mem_group_id,
             force_double_buffering=self.data["force_double_buffering"],
         )
 
+    def get_cacti_point(self) -> CactiPoint | None:
+        """! Return the CACTI configuration of the memory instance, or None if its costs aren't extracted with CACTI"""
+        if not self.data["auto_cost_extraction"]:
+            return None
+        cacti_point = MemoryInstance.get_cacti_point(
+            self.name, self.data["size"], self.create_memory_ports(), mem_type=self.data["mem_type"]
+        )
+        max_interpolation_error = self.data["auto_cost_max_interpolation_error"]
+        if max_interpolation_error is not None and CactiParser.get_estimate(cacti_point, max_interpolation_error):
+            # The costs are interpolated instead of extracted with CACTI
+            return None
+        return cacti_point
+
     def add_memory_to_graph(self, mem_graph: MemoryHierarchy) -> None:
         """Create a new MemoryInstance and add it to the given MemoryHierarchy"""
         instance = self.create_memory_instance()
@@ -50,6 +50,12 @@ class AcceleratorValidator:
                         "default": "sram",
                     },
                     "auto_cost_extraction": {"type": "boolean", "default": False},
+                    "auto_cost_max_interpolation_error": {
+                        "type": "float",
+                        "required": False,
+                        "nullable": True,
+                        "default": None,
+                    },
                     "operands": {
                         "type": "list",
                         "required": True,
@@ -5,10 +5,10 @@ from onnx import ModelProto, NodeProto
 
 from zigzag.parser.onnx.onnx_operator_parser import ONNXOperatorParser
 from zigzag.parser.onnx.utils import (
+    OnnxModelIndex,
     get_attribute_ints_with_name,
     get_node_input_output_dimension_shapes,
 )
-from zigzag.parser.workload_factory import LayerNodeFactory
 from zigzag.workload.layer_node import LayerNode
 
 
@@ -22,8 +22,10 @@ class ConvParser(ONNXOperatorParser):
         nodes_outputs: dict[int, Any],
         mapping_data: list[dict[str, Any]],
         onnx_model: ModelProto,
+        model_index: OnnxModelIndex | None = None,
+        layer_nodes: dict[str, LayerNode] | None = None,
     ) -> None:
-        super().__init__(node_id, node, nodes_outputs, onnx_model)
+        super().__init__(node_id, node, nodes_outputs, onnx_model, model_index=model_index, layer_nodes=layer_nodes)
         self.mapping_data = mapping_data
         self.onnx_model = onnx_model
 
@@ -114,7 +116,7 @@ class ConvParser(ONNXOperatorParser):
         padding: list[int] = get_attribute_ints_with_name("pads", attrs, default=[0, 0, 0, 0])  # type: ignore
 
         # Get the input and output activation shapes
-        ia_dimension_shape, oa_dimension_shape = get_node_input_output_dimension_shapes(self.node, self.onnx_model)
+        ia_dimension_shape, oa_dimension_shape = get_node_input_output_dimension_shapes(self.node, self.model_index)
 
         # Create LayerNode
         layer_data = self.get_layer_node_user_format(
@@ -126,7 +128,4 @@ class ConvParser(ONNXOperatorParser):
             ia_dimension_shape,
             oa_dimension_shape,
         )
-        factory = LayerNodeFactory(layer_data, self.mapping_data)
-        layer_node = factory.create()
-
-        return layer_node
+        return self.create_layer_node(layer_data)
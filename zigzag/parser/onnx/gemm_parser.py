@@ -5,7 +5,6 @@ from zigzag.parser.onnx.utils import (
     get_attribute_ints_with_name,
     get_node_input_output_dimension_shapes,
 )
-from zigzag.parser.workload_factory import LayerNodeFactory
 from zigzag.workload.layer_node import LayerNode
 
 
@@ -84,7 +83,7 @@ class GemmParser(ONNXOperatorParser):
         return data
 
     def generate_layer_node(self):
-        input_shape, output_shape = get_node_input_output_dimension_shapes(self.node, self.onnx_model)
+        input_shape, output_shape = get_node_input_output_dimension_shapes(self.node, self.model_index)
         assert len(input_shape) == len(output_shape), "Input and output size expected to be the same"
 
         transpose_first_input = get_attribute_ints_with_name("transA", self.node.attribute, default=0)
@@ -101,10 +100,7 @@ class GemmParser(ONNXOperatorParser):
             input_shape,
             output_shape,
         )
-        factory = LayerNodeFactory(layer_data, self.mapping_data)
-        layer_node = factory.create()
-
-        return layer_node
+        return self.create_layer_node(layer_data)
 
     def infer_input_activation_shape(self, output_shape: list[int]) -> list[int]:
         """
@@ -114,10 +110,10 @@ class GemmParser(ONNXOperatorParser):
         # TODO having a shape operator in the ONNX graph should be dealt with at a higher level
         """
         weight_name = self.node.input[1]
-        initializer_names = [i.name for i in self.onnx_model.graph.initializer]
-        weight_name_index = initializer_names.index(weight_name)
+        if weight_name not in self.model_index.initializers:
+            raise ValueError(f"Weights {weight_name} of Gemm node {self.node.name} are not an initializer")
         # Get the weight dimensions
-        weights = self.onnx_model.graph.initializer[weight_name_index]
+        weights = self.model_index.initializers[weight_name]
         weight_dims = list(weights.dims)
         assert len(weight_dims) == 2, f"There are {len(weight_dims)} weight dimensions for Gemm node {self.node.name}"
         # Check if the weights are transposed
@@ -9,10 +9,12 @@ from zigzag.parser.onnx.gemm_parser import GemmParser
 from zigzag.parser.onnx.matmul_parser import MatMulParser
 from zigzag.parser.onnx.onnx_operator_parser import ONNXOperatorParser
 from zigzag.parser.onnx.utils import (
+    OnnxModelIndex,
     parse_dynamic_onnx_model,
     parse_onnx_model_from_path,
 )
 from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.workload.layer_node import LayerNode
 from zigzag.workload.onnx_workload import ONNXWorkload
 
 logger = logging.getLogger(__name__)
@@ -29,7 +31,13 @@ class ONNXModelParser:
         "Gemm": GemmParser,
     }
 
-    def __init__(self, onnx_model: str | ModelProto, mapping_yaml_path: str) -> None:
+    def __init__(
+        self, onnx_model: str | ModelProto, mapping_yaml_path: str, share_identical_layers: bool = True
+    ) -> None:
+        """
+        @param share_identical_layers Iff true, structurally identical layers (e.g. of repeated blocks) share their
+        LayerNode attributes, so that these are only created once
+        """
         assert isinstance(onnx_model, (str, ModelProto)), f"Given onnx_model is of type {type(onnx_model)}."
         assert isinstance(mapping_yaml_path, str) and mapping_yaml_path.split(".")[-1] == "yaml"
 
@@ -40,6 +48,7 @@ class ONNXModelParser:
 
         self.workload = None
         self.mapping_yaml_path = mapping_yaml_path
+        self.share_identical_layers = share_identical_layers
 
     def run(self) -> ONNXWorkload:
         """! Iterate through the onnx model and generate the workload consisting of LayerNodes and DummyNodes"""
@@ -82,6 +91,8 @@ class ONNXModelParser:
 
         # Workload Graph
         workload = ONNXWorkload()
+        model_index = OnnxModelIndex(self.onnx_model)
+        layer_nodes: dict[str, LayerNode] | None = {} if self.share_identical_layers else None
 
         for node_id, node in enumerate(self.onnx_model.graph.node):  # type: ignore
             nodes_inputs[node_id] = node.input
@@ -94,6 +105,8 @@ class ONNXModelParser:
                 nodes_outputs=nodes_outputs,
                 onnx_model=self.onnx_model,
                 mapping_data=self.mapping_data,
+                model_index=model_index,
+                layer_nodes=layer_nodes,
             )
 
             node_obj = parser.run()
@@ -4,7 +4,9 @@ from typing import Any
 from onnx import ModelProto, NodeProto
 
 from zigzag.hardware.architecture.accelerator import Accelerator
-from zigzag.parser.onnx.utils import get_attribute_ints_with_name, get_onnx_tensor_type
+from zigzag.parser.onnx.utils import OnnxModelIndex, get_attribute_ints_with_name
+from zigzag.parser.workload_factory import LayerNodeFactory
+from zigzag.workload.layer_node import LayerNode
 from zigzag.workload.layer_node_abc import LayerNodeABC
 
 
@@ -25,7 +27,16 @@ class ONNXOperatorParser(metaclass=ABCMeta):
         *,
         mapping_data: list[dict[str, Any]] | None = None,
         accelerator: Accelerator | None = None,
+        model_index: OnnxModelIndex | None = None,
+        layer_nodes: dict[str, LayerNode] | None = None,
     ) -> None:
+        """
+        @param nodes_outputs Output tensor names of the nodes that have been parsed so far, by node id
+        @param model_index Index of the tensors and nodes of the ONNX model. Pass the same index to the parsers of all
+        nodes of a model, as building it takes a pass over the whole graph.
+        @param layer_nodes If given, the layer nodes parsed so far by structure key (see
+        `LayerNodeFactory.get_structure_key`). A structurally identical node shares the attributes of the earlier one.
+        """
         self.node_id = node_id
         self.node = node
         if not node.name:
@@ -34,19 +45,35 @@ class ONNXOperatorParser(metaclass=ABCMeta):
         self.onnx_model = onnx_model
         self.mapping_data = mapping_data
         self.accelerator = accelerator
+        self.model_index = model_index if model_index is not None else OnnxModelIndex(onnx_model)
+        self.layer_nodes = layer_nodes
 
     @abstractmethod
     def run(self) -> LayerNodeABC: ...
 
+    def create_layer_node(self, layer_data: dict[str, Any]) -> LayerNode:
+        """! Create the LayerNode from the given layer data in user format, sharing the attributes of a structurally
+        identical node that was parsed before, if any."""
+        assert self.mapping_data is not None
+        factory = LayerNodeFactory(layer_data, self.mapping_data)
+        if self.layer_nodes is None:
+            return factory.create()
+        key = factory.get_structure_key()
+        if key in self.layer_nodes:
+            return factory.create_identical(self.layer_nodes[key])
+        layer_node = factory.create()
+        self.layer_nodes[key] = layer_node
+        return layer_node
+
     def get_input_output_weight_data_type(self):
         """! Return the data type of the input, output and weight tensors of this node."""
         input_name = self.node.input[0]
         output_name = self.node.output[0]
         weight_name = self.get_weight_name(self.node)
 
-        input_elem_type = get_onnx_tensor_type(input_name, self.onnx_model).elem_type
-        output_elem_type = get_onnx_tensor_type(output_name, self.onnx_model).elem_type
-        weight_elem_type = get_onnx_tensor_type(weight_name, self.onnx_model).elem_type
+        input_elem_type = self.model_index.get_tensor_type(input_name).elem_type
+        output_elem_type = self.model_index.get_tensor_type(output_name).elem_type
+        weight_elem_type = self.model_index.get_tensor_type(weight_name).elem_type
 
         return input_elem_type, output_elem_type, weight_elem_type
 
@@ -65,12 +92,12 @@ class ONNXOperatorParser(metaclass=ABCMeta):
                 )
 
     def get_node_predecessors(self) -> list[int]:
-        """Compute node input sources"""
+        """Compute node input sources: the nodes parsed so far that produce an input of this node"""
         predecessors: list[int] = []
         for node_input in self.node.input:
-            for n in self.nodes_outputs:
-                if node_input in self.nodes_outputs[n]:
-                    predecessors.append(n)
+            producer = self.model_index.producers.get(node_input)
+            if producer is not None and producer in self.nodes_outputs:
+                predecessors.append(producer)
         return predecessors
 
     def get_operand_source_user_format(self, predecessors: list[int]):
@@ -4,7 +4,18 @@ from enum import Enum, auto
 from typing import Any, List
 
 import onnx
-from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TypeProto, compose, helper, numpy_helper
+from onnx import (
+    AttributeProto,
+    GraphProto,
+    ModelProto,
+    NodeProto,
+    TensorProto,
+    TypeProto,
+    ValueInfoProto,
+    compose,
+    helper,
+    numpy_helper,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -175,12 +186,57 @@ def get_onnx_tensor_type(name: str, model: ModelProto):
     )
 
 
-def get_node_input_output_dimension_shapes(node: NodeProto, model: ModelProto):
+class OnnxModelIndex:
+    """! Index of the tensors and nodes of an ONNX model, built in one pass over the graph, so that the type of a tensor
+    and the node that produces it can be looked up in constant time. The tensor types are the same as those of
+    `get_onnx_tensor_type`.
+    """
+
+    def __init__(self, model: ModelProto):
+        ## Value info and category of every non-constant tensor, by name
+        self.value_infos: dict[str, tuple[ValueInfoProto, OnnxTensorCategory]] = {}
+        # If a tensor occurs in multiple fields, the first one takes precedence, as in `get_onnx_tensor_type`
+        for values, category in (
+            (model.graph.input, OnnxTensorCategory.INPUT),
+            (model.graph.output, OnnxTensorCategory.OUTPUT),
+            (model.graph.value_info, OnnxTensorCategory.HIDDEN),
+        ):
+            for value in values:
+                self.value_infos.setdefault(value.name, (value, category))
+        self.initializers: dict[str, TensorProto] = {}
+        for init in model.graph.initializer:
+            self.initializers.setdefault(init.name, init)
+        ## Id (index in the graph) of the first node that produces every tensor, by tensor name
+        self.producers: dict[str, int] = {}
+        for node_id, node in enumerate(model.graph.node):
+            for output_name in node.output:
+                self.producers.setdefault(output_name, node_id)
+
+    def get_tensor_type(self, name: str) -> OnnxTensorType:
+        """! Return the type of the tensor with the given name"""
+        if name not in self.value_infos and name not in self.initializers:
+            raise KeyError(
+                f""
+                f"Could not find type for value {name} in model. "
+                f"Make sure you are loading in an inferred model, "
+                f"see https://github.com/onnx/onnx/blob/main/docs/PythonAPIOverview.md"
+                f"#running-shape-inference-on-an-onnx-model"
+            )
+        if name in self.value_infos:
+            value, category = self.value_infos[name]
+            return OnnxTensorType.from_tensor_type(value.type.tensor_type, category)
+        # initializers are represented a bit differently from other tensors
+        init = self.initializers[name]
+        return OnnxTensorType(list(init.dims), init.data_type, OnnxTensorCategory.CONSTANT)
+
+
+def get_node_input_output_dimension_shapes(node: NodeProto, model: ModelProto | OnnxModelIndex):
+    model_index = model if isinstance(model, OnnxModelIndex) else OnnxModelIndex(model)
     # assumed it is the first input, don't see a way to otherwise know
     input_name = node.input[0]
-    input_shape = get_onnx_tensor_type(input_name, model).shape
+    input_shape = model_index.get_tensor_type(input_name).shape
 
     output_name = node.output[0]
-    output_shape = get_onnx_tensor_type(output_name, model).shape
+    output_shape = model_index.get_tensor_type(output_name).shape
 
     return input_shape, output_shape
@@ -1,3 +1,4 @@
+import json
 import logging
 import re
 from typing import Any
@@ -67,6 +68,21 @@ class LayerNodeFactory:
             mapping_attr=mapping_attr,
         )
 
+    def create_identical(self, reference: LayerNode) -> LayerNode:
+        """! Create the LayerNode for a layer with the same structure key as the given reference layer (see
+        `get_structure_key`). The new layer shares the node attributes of the reference layer, and only gets its own
+        id, name, operand sources and mapping."""
+        mapping_attr = self.create_mapping_attr(reference.layer_dim_sizes)
+        return reference.create_identical(self.layer_id, self.node_name, self.create_operand_source(), mapping_attr)
+
+    def get_structure_key(self) -> str:
+        """! Return a key of all node data that determines the LayerNode attributes, except for the id, name and
+        operand sources. Only which operands are constant is part of the key."""
+        operand_sources: dict[str, int] = self.node_data["operand_source"]
+        data = {key: value for key, value in self.node_data.items() if key not in ("id", "name", "operand_source")}
+        data["constant_operands"] = sorted(op for op, source in operand_sources.items() if source == self.layer_id)
+        return json.dumps(data, sort_keys=True, default=str)
+
     def create_node_attr(self) -> LayerNodeAttributes:
         # From node data
         layer_type: str = self.node_data["operator_type"]
@@ -1,13 +1,24 @@
+import json
 import logging
+import math
+from copy import deepcopy
 from itertools import product
 from typing import Any
 
 import matplotlib.pyplot as plt
+import multiprocessing_on_dill as multiprocessing  # type: ignore
 import yaml
 
-from zigzag.cost_model.cost_model import CostModelEvaluationABC
+from zigzag.cacti.cacti_parser import CactiParser
+from zigzag.cost_model.cost_model import CostModelEvaluationABC, CumulativeCME
 from zigzag.mapping.spatial_mapping import MappingSingleOADim, SpatialMapping
+from zigzag.opt.dse.design_space import DesignPoint, DesignSpace
+from zigzag.opt.loma.engine import LOMA_CRITERIA
+from zigzag.parser.accelerator_factory import AcceleratorFactory
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.results.reduce_stages import get_accelerator_area
 from zigzag.stages.stage import Stage, StageCallable
+from zigzag.utils import open_yaml
 from zigzag.workload.dnn_workload import DNNWorkload
 from zigzag.workload.layer_node import LayerNode
 
@@ -196,3 +207,247 @@ class HardwareOptimizerStage(Stage):
         plt.savefig(plot_path)
         plt.close()
         logger.info(f"CME distributions saved to {plot_path}")
+
+
+class DesignPointResult:
+    """! Cost of the (evaluated layers of the) workload on one design point of a `DesignSpaceExplorationStage`"""
+
+    def __init__(
+        self,
+        point: DesignPoint,
+        values: dict[str, Any],
+        cme: CumulativeCME,
+        area: float,
+        layer_ids: set[int] | None,
+    ):
+        """
+        @param values Value of every design parameter in this point
+        @param cme Sum of the cost model evaluations of all evaluated layers
+        @param layer_ids Ids of the evaluated layers, or None if all layers were evaluated
+        """
+        self.point = point
+        self.values = values
+        self.cme = cme
+        self.energy_total = cme.energy_total
+        self.latency_total2 = cme.latency_total2
+        self.area_total = area
+        self.layer_ids = layer_ids
+
+    def __str__(self):
+        return (
+            f"DesignPointResult({self.values}, energy={self.energy_total:.3e}, latency={self.latency_total2:.3e}, "
+            f"area={self.area_total:.3e})"
+        )
+
+    def __repr__(self):
+        return str(self)
+
+
+class DesignSpaceExplorationResult:
+    """! Result of a `DesignSpaceExplorationStage`:
+    - pareto_front: the evaluated design points that are not dominated in energy, latency and area
+    - results: all design points evaluated on the complete workload
+    - nb_evaluations: the number of evaluations, including those on a subset of the layers (successive halving)
+    """
+
+    def __init__(self, pareto_front: list[DesignPointResult], results: list[DesignPointResult], nb_evaluations: int):
+        self.pareto_front = pareto_front
+        self.results = results
+        self.nb_evaluations = nb_evaluations
+
+
+class DesignSpaceExplorationStage(Stage):
+    """! Explore the design space of an accelerator, given as a `DesignSpace` over the fields of its yaml file. It
+    replaces the `AcceleratorParserStage`: every design point is parsed into an `Accelerator`, which is passed to the
+    substages (e.g. starting with the `WorkloadStage`). The memories and operational arrays that are defined
+    identically in several design points are only created once. The cost model evaluations of a design point are
+    summed, as in the `SumStage`. The memory costs of all design points that are automatically extracted with CACTI
+    are extracted in one batch before the evaluation.
+
+    The design points are either all points of the design space, or sampled at random or with a Latin hypercube. With
+    successive halving, the design points are first evaluated on the largest layers of the workload only and the best
+    ones (for `dse_criterion`) are kept, with more layers in every round, until the remaining points are evaluated on
+    the complete workload. The design points can be evaluated in parallel processes.
+
+    Yields the best design point for `dse_criterion` (as a `CumulativeCME`) with a `DesignSpaceExplorationResult`.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        accelerator: str,
+        dse_design_space: DesignSpace | str | list[dict[str, Any]],
+        dse_search: str = "exhaustive",
+        dse_nb_samples: int = 16,
+        dse_seed: int | None = None,
+        dse_successive_halving: bool = False,
+        dse_halving_factor: int = 2,
+        dse_criterion: str = "latency",
+        dse_nb_workers: int = 1,
+        **kwargs: Any,
+    ):
+        """
+        @param accelerator Path of the yaml file of the base accelerator
+        @param dse_design_space The design space, or its spec (see `DesignSpace.from_spec`)
+        @param dse_search How the design points are selected: `exhaustive`, `random` or `latin_hypercube`
+        @param dse_nb_samples Number of sampled design points for the `random` and `latin_hypercube` search
+        @param dse_seed Seed of the sampling
+        @param dse_successive_halving Whether the design points are pruned with successive halving
+        @param dse_halving_factor The fraction of the design points that is kept in each round of successive halving
+        @param dse_criterion The criterion (in `LOMA_CRITERIA`) of the best design point
+        @param dse_nb_workers Number of processes that evaluate design points in parallel
+        """
+        super().__init__(list_of_callables, **kwargs)
+        self.accelerator_yaml_path = accelerator
+        self.design_space = (
+            dse_design_space if isinstance(dse_design_space, DesignSpace) else DesignSpace.from_spec(dse_design_space)
+        )
+        self.search = dse_search
+        self.nb_samples = dse_nb_samples
+        self.seed = dse_seed
+        self.successive_halving = dse_successive_halving
+        self.halving_factor = dse_halving_factor
+        self.criterion = dse_criterion
+        self.nb_workers = dse_nb_workers
+        ## Operational arrays and memory instances that are shared by the accelerators of the design points
+        self.accelerator_parts: dict[str, Any] = {}
+        assert self.search in ("exhaustive", "random", "latin_hypercube"), f"Invalid design space search {self.search}"
+        assert self.criterion in LOMA_CRITERIA, f"Invalid design space exploration criterion {self.criterion}"
+        assert self.halving_factor >= 2
+
+    def run(self):
+        base_accelerator_data = open_yaml(self.accelerator_yaml_path)
+        accelerator_data_per_point: dict[DesignPoint, dict[str, Any]] = {}
+        for point in self.get_design_points():
+            accelerator_data = self.design_space.get_accelerator_data(base_accelerator_data, point)  # type: ignore
+            try:
+                accelerator_data_per_point[point] = AcceleratorParserStage.validate_accelerator_data(accelerator_data)
+            except ValueError:
+                logger.warning("Skipping invalid design point %s", self.design_space.get_values(point))
+        assert accelerator_data_per_point, "No valid design points"
+
+        # The memory costs that are extracted with CACTI are shared by all design points
+        cacti_points = [
+            cacti_point
+            for accelerator_data in accelerator_data_per_point.values()
+            for cacti_point in AcceleratorFactory(accelerator_data).get_cacti_points()
+        ]
+        CactiParser().create_items(cacti_points, nb_workers=self.nb_workers)
+
+        points = list(accelerator_data_per_point.keys())
+        nb_evaluations = 0
+        for layer_ids in self.get_successive_halving_layer_ids(len(points)):
+            results = self.evaluate(points, accelerator_data_per_point, layer_ids, nb_evaluations)
+            nb_evaluations += len(results)
+            results.sort(key=self.get_key)
+            points = [result.point for result in results[: math.ceil(len(results) / self.halving_factor)]]
+            logger.info(
+                "Successive halving: kept %i design points after evaluating %i layers", len(points), len(layer_ids)
+            )
+
+        results = self.evaluate(points, accelerator_data_per_point, None, nb_evaluations)
+        nb_evaluations += len(results)
+        pareto_front = self.get_pareto_front(results)
+        best_result = min(results, key=self.get_key)
+        logger.info(
+            "Explored %i design points (%i evaluations), of which %i are Pareto optimal. Best for %s: %s",
+            len(accelerator_data_per_point),
+            nb_evaluations,
+            len(pareto_front),
+            self.criterion,
+            best_result,
+        )
+        yield best_result.cme, DesignSpaceExplorationResult(pareto_front, results, nb_evaluations)
+
+    def get_design_points(self) -> list[DesignPoint]:
+        match self.search:
+            case "random":
+                return self.design_space.random(self.nb_samples, self.seed)
+            case "latin_hypercube":
+                return self.design_space.latin_hypercube(self.nb_samples, self.seed)
+            case _:
+                return list(self.design_space.exhaustive())
+
+    def get_successive_halving_layer_ids(self, nb_points: int) -> list[set[int]]:
+        """! Return the ids of the layers that are evaluated in each round of successive halving, before the final
+        evaluation on all layers. The number of layers grows with the halving factor in every round, starting from the
+        layers with the most operations."""
+        if not self.successive_halving or nb_points <= 1:
+            return []
+        workload = self.kwargs["workload"]
+        layers = sorted(
+            (node for node in workload.topological_sort() if isinstance(node, LayerNode)),
+            key=lambda layer: layer.total_mac_count,
+            reverse=True,
+        )
+        nb_rounds = math.ceil(math.log(nb_points, self.halving_factor))
+        layer_ids_per_round: list[set[int]] = []
+        for round_idx in range(nb_rounds):
+            nb_layers = max(1, math.ceil(len(layers) * self.halving_factor ** (round_idx - nb_rounds)))
+            if nb_layers >= len(layers):
+                break
+            layer_ids_per_round.append({layer.id for layer in layers[:nb_layers]})
+        return layer_ids_per_round
+
+    def get_key(self, result: DesignPointResult) -> tuple[float, ...]:
+        return LOMA_CRITERIA[self.criterion](result.energy_total, result.latency_total2)
+
+    def evaluate(
+        self,
+        points: list[DesignPoint],
+        accelerator_data_per_point: dict[DesignPoint, dict[str, Any]],
+        layer_ids: set[int] | None,
+        first_evaluation_index: int = 0,
+    ) -> list[DesignPointResult]:
+        """! Evaluate the given design points, numbering the evaluations from `first_evaluation_index` on"""
+        tasks = [
+            (point, accelerator_data_per_point[point], layer_ids, first_evaluation_index + idx)
+            for idx, point in enumerate(points)
+        ]
+        if self.nb_workers <= 1 or len(tasks) <= 1:
+            return [self.evaluate_design_point(*task) for task in tasks]
+        with multiprocessing.Pool(min(self.nb_workers, len(tasks))) as pool:
+            return pool.starmap(self.evaluate_design_point, tasks, chunksize=1)
+
+    def evaluate_design_point(
+        self,
+        point: DesignPoint,
+        accelerator_data: dict[str, Any],
+        layer_ids: set[int] | None,
+        evaluation_index: int = 0,
+    ) -> DesignPointResult:
+        """! Evaluate the (given layers of the) workload on the given design point
+        @param evaluation_index Position of this evaluation in the run, to order the results of parallel evaluations
+        """
+        accelerator = AcceleratorFactory(accelerator_data, self.accelerator_parts).create()
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = accelerator
+        # The substages update the spatial mappings of the layers
+        kwargs["workload"] = deepcopy(self.kwargs["workload"])
+        if layer_ids is not None:
+            kwargs["layer_ids"] = layer_ids
+        # Identifies the design point in the results of a `ColumnarSaveStage`
+        kwargs["design_point"] = json.dumps(self.design_space.get_values(point))
+        kwargs["evaluation_index"] = evaluation_index
+        substage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
+
+        total_cme = CumulativeCME()
+        for cme, _ in substage.run():
+            assert isinstance(cme, CostModelEvaluationABC)
+            total_cme += cme
+        values = self.design_space.get_values(point)
+        logger.info("Evaluated design point %s", values)
+        return DesignPointResult(point, values, total_cme, get_accelerator_area(accelerator), layer_ids)
+
+    @staticmethod
+    def get_pareto_front(results: list[DesignPointResult]) -> list[DesignPointResult]:
+        """! Return the results that are not dominated in energy, latency and area by another result"""
+        metrics = [(result.energy_total, result.latency_total2, result.area_total) for result in results]
+        return [
+            result
+            for result, result_metrics in zip(results, metrics)
+            if not any(
+                other != result_metrics and all(o <= r for o, r in zip(other, result_metrics)) for other in metrics
+            )
+        ]
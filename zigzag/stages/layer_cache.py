@@ -0,0 +1,404 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+import numpy as np
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.datatypes import OperandABC
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.mapping.spatial_mapping import SpatialMapping
+from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingDict, TemporalMappingType
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.mapping.spatial_mapping_conversion import SpatialMappingConversionStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.results.reduce_stages import CMESummary, TopKParetoResult
+from zigzag.stages.stage import Stage, StageCallable
+from zigzag.utils import pickle_load, pickle_save
+from zigzag.workload.layer_node import LayerNode
+
+logger = logging.getLogger(__name__)
+
+# Hardware attributes that don't change the cost of a mapping (names, run-dependent identifiers) or that hold
+# per-layer results (the IMC array stores the energy and mapped rows and group depth of the last evaluated layer)
+IGNORED_HARDWARE_ATTRIBUTES = {
+    "name",
+    "formatted_string",
+    "id",
+    "port_id",
+    "energy",
+    "energy_breakdown",
+    "mapped_rows_total_per_macro",
+    "mapped_group_depth",
+}
+# Stage kwargs that only change how fast the search runs, not its result
+IGNORED_SEARCH_SETTINGS = {"loma_show_progress_bar", "loma_number_of_core", "loma_batch_size"}
+SEARCH_SETTINGS = (
+    "temporal_mapping_type",
+    "nb_mappings_generated",
+    "enable_mix_spatial_mapping_generation",
+    "enable_weight_diagonal_mapping",
+    "access_same_data_considered_as_no_access",
+)
+SEARCH_SETTINGS_PREFIXES = ("loma_", "salsa_", "reduce_")
+## Version of the cache entries and the cost model they were evaluated with. Increase it when either changes, so that
+## the entries of earlier versions are no longer used.
+LAYER_CACHE_VERSION = 1
+
+
+def to_canonical(obj: Any) -> Any:
+    """! Recursively converts the given object into nested lists of builtin types, independent of the (hash-dependent)
+    ordering of dicts and sets, so that it can be hashed consistently across runs."""
+    if obj is None or isinstance(obj, bool | int | float | str):
+        return obj
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Enum | OperandABC):
+        return f"{type(obj).__name__}:{obj}"
+    if isinstance(obj, dict):
+        return sorted(([to_canonical(k), to_canonical(v)] for k, v in obj.items()), key=str)  # type: ignore
+    if isinstance(obj, list | tuple):
+        return [to_canonical(x) for x in obj]  # type: ignore
+    if isinstance(obj, set | frozenset):
+        return sorted((to_canonical(x) for x in obj), key=str)  # type: ignore
+    if hasattr(obj, "__dict__"):
+        attributes = {k: v for k, v in vars(obj).items() if k not in IGNORED_HARDWARE_ATTRIBUTES}
+        return [type(obj).__name__, to_canonical(attributes)]
+    return str(obj)
+
+
+def get_layer_fingerprint(layer: LayerNode) -> Any:
+    """! All attributes of the layer that affect its cost model evaluation. The layer id, name and operand sources
+    are left out, so that identical layers at different places in the workload have the same fingerprint."""
+    return to_canonical(
+        {
+            "type": layer.type,
+            "equation": layer.equation,
+            "layer_dim_sizes": layer.layer_dim_sizes,
+            "operand_precision": layer.operand_precision,
+            "dimension_relations": layer.dimension_relations,
+            "padding": layer.padding,
+            "pr_layer_dim_sizes": layer.pr_layer_dim_sizes,
+            "constant_operands": layer.constant_operands,
+            "memory_operand_links": layer.memory_operand_links,
+            "spatial_mapping": layer.spatial_mapping,
+            "spatial_mapping_hint": layer.spatial_mapping_hint,
+            "temporal_ordering": layer.temporal_ordering,
+        }
+    )
+
+
+def get_accelerator_fingerprint(accelerator: Accelerator) -> Any:
+    """! All parameters of the operational array and memory levels that affect the cost model evaluation"""
+    return to_canonical(
+        {
+            "operational_array": accelerator.operational_array,
+            "memory_levels": accelerator.memory_hierarchy.mem_level_list,
+        }
+    )
+
+
+def get_search_settings(kwargs: dict[str, Any]) -> dict[str, Any]:
+    """! The stage kwargs that affect the result of the mapping search"""
+    return {
+        key: value
+        for key, value in kwargs.items()
+        if (key in SEARCH_SETTINGS or key.startswith(SEARCH_SETTINGS_PREFIXES)) and key not in IGNORED_SEARCH_SETTINGS
+    }
+
+
+def hash_fingerprint(fingerprint: Any) -> str:
+    """! Hash a fingerprint in canonical form (see `to_canonical`)"""
+    return hashlib.sha256(json.dumps(fingerprint).encode()).hexdigest()
+
+
+def recreate_cme(
+    layer: LayerNode,
+    accelerator: Accelerator,
+    spatial_mapping: SpatialMapping,
+    temporal_mapping_dict: TemporalMappingDict,
+    temporal_mapping_type: TemporalMappingType,
+    access_same_data_considered_as_no_access: bool = True,
+) -> CostModelEvaluation:
+    """! Run the cost model for the given layer with a known (e.g. cached) spatial and temporal mapping"""
+    layer = copy.copy(layer)
+    layer.spatial_mapping = spatial_mapping
+    conversion_stage = SpatialMappingConversionStage([CostModelStage], accelerator=accelerator, layer=layer)
+    spatial_mapping_internal, spatial_mapping_int = conversion_stage.convert_user_spatial_mapping(spatial_mapping)
+    cost_model_stage = CostModelStage(
+        [],
+        accelerator=accelerator,
+        layer=layer,
+        spatial_mapping=spatial_mapping_internal,
+        spatial_mapping_int=spatial_mapping_int,
+        temporal_mapping=TemporalMapping(temporal_mapping_dict, layer, temporal_mapping_type),
+        access_same_data_considered_as_no_access=access_same_data_considered_as_no_access,
+    )
+    cme, _ = next(iter(cost_model_stage.run()))
+    assert isinstance(cme, CostModelEvaluation)
+    return cme
+
+
+@dataclass(frozen=True)
+class CachedTemporalMapping:
+    """! Layer-independent form of a `TemporalMapping` in the extra info of a cached result"""
+
+    temporal_mapping_dict: TemporalMappingDict
+    temporal_mapping_type: TemporalMappingType
+
+
+@dataclass(frozen=True)
+class CachedEvaluation:
+    """! Layer-independent form of a `CostModelEvaluation` in a cached result: only its spatial and temporal mapping"""
+
+    spatial_mapping: SpatialMapping
+    temporal_mapping: CachedTemporalMapping
+    ## Whether the evaluation was kept as a `CMESummary`
+    is_summary: bool = False
+
+
+def to_cached_result(result: Any) -> Any:
+    """! Recursively replace the cost model evaluations and temporal mappings in the given result (e.g. a CME and its
+    extra info) by their layer-independent form, which can be recreated for another layer (see `from_cached_result`)"""
+    if isinstance(result, CostModelEvaluation):
+        return CachedEvaluation(result.layer.spatial_mapping, to_cached_result(result.temporal_mapping))
+    if isinstance(result, CMESummary):
+        temporal_mapping = CachedTemporalMapping(result.temporal_mapping_dict, result.temporal_mapping_type)
+        return CachedEvaluation(result.layer.spatial_mapping, temporal_mapping, is_summary=True)
+    if isinstance(result, TemporalMapping):
+        return CachedTemporalMapping(result.mapping_dic_origin, result.type)
+    if isinstance(result, TopKParetoResult):
+        return TopKParetoResult(
+            {criterion: to_cached_result(cmes) for criterion, cmes in result.top_k.items()},
+            to_cached_result(result.pareto_front),
+        )
+    if isinstance(result, list | tuple):
+        return type(result)(to_cached_result(x) for x in result)  # type: ignore
+    return result
+
+
+def from_cached_result(
+    cached_result: Any,
+    layer: LayerNode,
+    accelerator: Accelerator,
+    access_same_data_considered_as_no_access: bool,
+    enable_weight_diagonal_mapping: bool = False,
+) -> Any:
+    """! Recreate a result stored with `to_cached_result` for the given layer and accelerator
+    @param enable_weight_diagonal_mapping Whether the result was searched with weight diagonal mappings. As in
+    `SpatialMappingGeneratorStage`, the CMEs are then evaluated on the accelerator with the innermost input memory
+    scaled for their spatial mapping, and hold the given accelerator afterwards.
+    """
+    if isinstance(cached_result, CachedEvaluation):
+        accelerator_under_test = accelerator
+        if enable_weight_diagonal_mapping:
+            generator_stage = SpatialMappingGeneratorStage([CostModelStage], accelerator=accelerator, layer=layer)
+            accelerator_under_test = generator_stage.modify_innermost_input_mem_size(cached_result.spatial_mapping)
+        cme = recreate_cme(
+            layer,
+            accelerator_under_test,
+            cached_result.spatial_mapping,
+            cached_result.temporal_mapping.temporal_mapping_dict,
+            cached_result.temporal_mapping.temporal_mapping_type,
+            access_same_data_considered_as_no_access,
+        )
+        cme.accelerator = accelerator
+        return CMESummary(cme) if cached_result.is_summary else cme
+    if isinstance(cached_result, CachedTemporalMapping):
+        return TemporalMapping(cached_result.temporal_mapping_dict, layer, cached_result.temporal_mapping_type)
+
+    def recreate(x: Any) -> Any:
+        return from_cached_result(
+            x, layer, accelerator, access_same_data_considered_as_no_access, enable_weight_diagonal_mapping
+        )
+
+    if isinstance(cached_result, TopKParetoResult):
+        return TopKParetoResult(
+            {criterion: recreate(cmes) for criterion, cmes in cached_result.top_k.items()},
+            recreate(cached_result.pareto_front),
+        )
+    if isinstance(cached_result, list | tuple):
+        return type(cached_result)(recreate(x) for x in cached_result)  # type: ignore
+    return cached_result
+
+
+class LayerCache:
+    """! Persistent cache of the best mapping per layer, stored as one small pickle file per entry in `cache_folder`.
+    Entries are keyed by the `LAYER_CACHE_VERSION`, the layer fingerprint, the accelerator fingerprint and the search
+    settings, including the substages of the `LayerCacheStage` (which determine the optimization criterion). An entry
+    only holds the spatial and temporal mappings of the result and its extra info (see `to_cached_result`), so that the
+    result can be recreated for any layer with the same fingerprint. When the folder grows beyond `max_size` bytes,
+    the least recently used entries are removed.
+    Without `cache_folder`, the entries are only kept in memory, which deduplicates the identical layers of a run.
+    """
+
+    def __init__(self, cache_folder: str | None, max_size: int = 100 * 2**20):
+        """
+        @param cache_folder Folder where the cache entries are stored, or None to keep them in memory
+        @param max_size Maximal total size of the cache entries in the folder, in bytes
+        """
+        self.cache_folder = cache_folder
+        self.max_size = max_size
+        self.hits: list[str] = []
+        self.misses: list[str] = []
+        ## Entries of a cache without folder
+        self.entries: dict[str, dict[str, Any]] = {}
+        if cache_folder is not None:
+            os.makedirs(cache_folder, exist_ok=True)
+
+    @staticmethod
+    def get_key(layer: LayerNode, accelerator: Accelerator, search_settings: dict[str, Any]) -> str:
+        fingerprint = {
+            "version": LAYER_CACHE_VERSION,
+            "layer": get_layer_fingerprint(layer),
+            "accelerator": get_accelerator_fingerprint(accelerator),
+            "search_settings": to_canonical(search_settings),
+        }
+        return hash_fingerprint(fingerprint)
+
+    def get_path(self, key: str) -> str:
+        assert self.cache_folder is not None
+        return os.path.join(self.cache_folder, f"{key}.pickle")
+
+    def load(self, key: str, layer: LayerNode) -> dict[str, Any] | None:
+        """! Return the entry with the given key, or None if there is no (valid) entry"""
+        entry = None
+        if self.cache_folder is None:
+            entry = self.entries.get(key)
+        elif os.path.exists(self.get_path(key)):
+            path = self.get_path(key)
+            try:
+                entry = pickle_load(path)
+                # Mark the entry as recently used
+                os.utime(path)
+            except Exception as e:  # pylint: disable=W0718
+                logger.warning("Could not load layer cache entry %s: %s", path, e)
+            # Entries of earlier versions only hold the mapping of the CME, without its extra info
+            if entry is not None and "result" not in entry:
+                entry = None
+        if entry is None:
+            self.misses.append(layer.name)
+        else:
+            self.hits.append(layer.name)
+        return entry
+
+    def store(self, key: str, cme: CostModelEvaluation, extra_info: Any) -> None:
+        entry = {
+            "result": to_cached_result((cme, extra_info)),
+            "layer_name": cme.layer.name,
+            "energy_total": cme.energy_total,
+            "latency_total": cme.latency_total2,
+        }
+        if self.cache_folder is None:
+            self.entries[key] = entry
+            return
+        # Write to a temporary file first, so that concurrent runs never read a partially written entry
+        path = self.get_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pickle_save(entry, tmp_path)  # type: ignore
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """! Remove the least recently used entries until the cache folder is within its maximal size"""
+        assert self.cache_folder is not None
+        entries: list[tuple[float, int, str]] = []
+        for filename in os.listdir(self.cache_folder):
+            if not filename.endswith(".pickle"):
+                continue
+            path = os.path.join(self.cache_folder, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            logger.debug("Evicted layer cache entry %s", path)
+
+    def get_report(self) -> dict[str, Any]:
+        nb_lookups = len(self.hits) + len(self.misses)
+        return {
+            "cache_folder": self.cache_folder,
+            "hits": len(self.hits),
+            "misses": len(self.misses),
+            "hit_rate": len(self.hits) / nb_lookups if nb_lookups > 0 else 0.0,
+            "hit_layers": self.hits,
+            "missed_layers": self.misses,
+        }
+
+    def save_report(self, filename: str) -> None:
+        report = self.get_report()
+        logger.info(
+            "Layer cache: %i hit(s), %i miss(es). Saved report to %s", report["hits"], report["misses"], filename
+        )
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="UTF-8") as fp:
+            json.dump(report, fp, indent=4)
+
+
+class LayerCacheStage(Stage):
+    """! Stage that looks up the best mapping of the layer in the `LayerCache`. On a hit, the substages are skipped and
+    the cost model evaluation and its extra info are recreated from the cached mappings for this layer. On a miss, the
+    result of the substages (which should reduce to a single cost model evaluation) is stored in the cache.
+    As the stage runs below the stages that save and visualize the results of a layer, these also run for the layers
+    that are recreated from the cache.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        layer_cache: LayerCache,
+        **kwargs: Any,
+    ):
+        super().__init__(list_of_callables, **kwargs)
+        self.accelerator = accelerator
+        self.layer = layer
+        self.layer_cache = layer_cache
+
+    def run(self):
+        search_settings = get_search_settings(self.kwargs)
+        # The substages determine the optimization criterion (the reduce stages) and the mapping search engines
+        search_settings["substages"] = [getattr(stage, "__name__", str(stage)) for stage in self.list_of_callables]
+        key = LayerCache.get_key(self.layer, self.accelerator, search_settings)
+        entry = self.layer_cache.load(key, self.layer)
+        if entry is not None:
+            logger.info("%s: Reusing the cached mapping of layer %s.", self.layer.name, entry["layer_name"])
+            cme, extra_info = from_cached_result(
+                entry["result"],
+                self.layer,
+                self.accelerator,
+                self.kwargs.get("access_same_data_considered_as_no_access", True),
+                self.kwargs.get("enable_weight_diagonal_mapping", False),
+            )
+            yield cme, extra_info
+            return
+
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["layer"] = self.layer
+        sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
+        results = list(sub_stage.run())
+        if len(results) == 1 and isinstance(results[0][0], CostModelEvaluation):
+            self.layer_cache.store(key, *results[0])
+        else:
+            logger.warning("%s: Not caching the result, as the substages did not yield a single CME.", self.layer.name)
+        yield from results
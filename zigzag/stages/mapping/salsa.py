@@ -30,11 +30,10 @@ from typing import Any
 
 import multiprocessing_on_dill as multiprocessing  # type: ignore
 
-from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMappingType
-from zigzag.opt.salsa.engine import SalsaEngine
+from zigzag.opt.salsa.engine import SalsaChainResult, SalsaEngine
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.workload.layer_node import LayerNode
 
@@ -59,6 +58,10 @@ class SalsaStage(Stage):
         """
         Initialize the SalsaStage by setting the accelerator, layer, and spatial mapping.
         @param list_of_callables (List[Callable]): List of substages to call with each generated temporal mapping.
+        @param salsa_number_of_core (optional kwarg): Number of processes over which the SALSA chains are distributed.
+        The number of chains (`salsa_number_of_chains`) defaults to this number. With `salsa_replica_exchange`, the
+        chains exchange their states every few iterations and run in lockstep in a single process, so this only sets
+        the number of chains.
         """
         super().__init__(list_of_callables, **kwargs)
         self.accelerator, self.layer, self.spatial_mapping = (
@@ -68,25 +71,25 @@ class SalsaStage(Stage):
         )
         self.mapping_type = temporal_mapping_type
         self.engine = None
-        self.best_cme: CostModelEvaluation | None = None
+        ## Results of all chains of the last run, with their convergence traces
+        self.chain_results: list[SalsaChainResult] = []
 
         self.opt_criterion_name = kwargs.get("salsa_opt_criterion", "energy")
         self.number_of_core_allocated = kwargs.get("salsa_number_of_core", 1)
 
-        # Multiprocessing parameters
-        self.worker_list = []
-        self.cme_queue = multiprocessing.Queue()  # type: ignore
-
-        if self.opt_criterion_name == "energy":
-            self.compare_stage = self.compare_cme_energy
-        elif self.opt_criterion_name == "latency":
-            self.compare_stage = self.compare_cme_latency
-        else:
+        if self.opt_criterion_name not in ("energy", "latency"):
             raise ValueError("Invalid optimization criterion for SALSA. Must be either 'energy' or 'latency'.")
 
-    ## Set up and start salsa engine, then collect and return the best cost model evaluation
+    ## Set up and start salsa engine, then evaluate the best temporal mapping over all chains
     def run(self):
-        logger.info("Running SALSA Temporal Mapping Optimizer with %i core(s).", self.number_of_core_allocated)
+        # Get the number of core the user wants to allocate
+        number_of_core: int = min(self.number_of_core_allocated, multiprocessing.cpu_count())  # type: ignore
+        if self.kwargs.get("salsa_replica_exchange", False) and number_of_core > 1:
+            logger.warning(
+                "SALSA replica exchange chains run in a single process, irrespective of salsa_number_of_core."
+            )
+            number_of_core = 1
+        logger.info("Running SALSA Temporal Mapping Optimizer with %i core(s).", number_of_core)
 
         self.engine = SalsaEngine(
             accelerator=self.accelerator,
@@ -95,62 +98,27 @@ class SalsaStage(Stage):
             mapping_type=self.mapping_type,
             **self.kwargs,
         )
+        self.chain_results = self.engine.run(number_of_core)
+        # Chains with the same best cost are compared on the other criterion
+        best_result = min(self.chain_results, key=lambda result: result.best_key)
+        assert best_result.best_ordering is not None
+        logger.info(
+            "SALSA %s: best cost %.4e of %i chains (%i evaluations, %i memo hits).",
+            self.opt_criterion_name,
+            best_result.best_cost,
+            len(self.chain_results),
+            sum(result.nb_evaluations for result in self.chain_results),
+            sum(result.nb_memo_hits for result in self.chain_results),
+        )
 
-        # Get the number of core the user wants to allocate
-        if self.number_of_core_allocated <= multiprocessing.cpu_count():  # type: ignore
-            self.number_of_core: int = self.number_of_core_allocated
-        else:
-            self.number_of_core = multiprocessing.cpu_count()  # type: ignore
-
-        assert isinstance(self.number_of_core, int)  # type: ignore
-
-        # Create processes
-        for core_id in range(0, self.number_of_core):
-            p = multiprocessing.Process(target=self.engine.run, args=(self.cme_queue,))  # type: ignore
-            self.worker_list.append(p)  # type: ignore
-
-        # Start the processes
-        for core_id in range(0, self.number_of_core):
-            logger.debug("Starting SALSA Process #%i.", core_id)
-            self.worker_list[core_id].start()  # type: ignore
-
-        # For every core we gather the ouput
-        for core_id in range(0, self.number_of_core):
-            cme = self.cme_queue.get()  # type: ignore
-            self.compare_stage(cme)  # type: ignore
-
-        # Then join them to make sure they all end before continuing the execution
-        for core_id in range(0, self.number_of_core):
-            self.worker_list[core_id].join()  # type: ignore
-
-        assert self.best_cme is not None
+        # Only the best ordering is allocated again and evaluated by the substages
+        temporal_mapping = self.engine.get_temporal_mapping(best_result.best_ordering)
         kwargs = self.kwargs.copy()
         kwargs["accelerator"] = self.accelerator
         kwargs["layer"] = self.layer
         kwargs["spatial_mapping"] = self.spatial_mapping
-        kwargs["temporal_mapping"] = self.best_cme.mapping.temporal_mapping
+        kwargs["temporal_mapping"] = temporal_mapping
         sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
 
         for cme, extra_info in sub_stage.run():
-            yield cme, (self.best_cme.mapping.temporal_mapping, extra_info)
-
-    def compare_cme_latency(self, cme: CostModelEvaluation):
-        """! Compare the latency of the current cost model evaluation with the best latency found so far.
-        Then replace the current best cme if the current cme has a lower latency."""
-
-        if self.best_cme is None:
-            self.best_cme = cme
-        elif cme.latency_total2 == self.best_cme.latency_total2 and cme.energy_total < self.best_cme.energy_total:
-            self.best_cme = cme
-        elif cme.latency_total2 < self.best_cme.latency_total2:
-            self.best_cme = cme
-
-    def compare_cme_energy(self, cme: CostModelEvaluation):
-        """! Compare the energy of the current cost model evaluation with the best energy found so far.
-        # Then replace the best cme if the current cme has a lower energy."""
-        if self.best_cme is None:
-            self.best_cme = cme
-        elif cme.energy_total == self.best_cme.energy_total and cme.latency_total2 < self.best_cme.latency_total2:
-            self.best_cme = cme
-        elif cme.energy_total < self.best_cme.energy_total:
-            self.best_cme = cme
+            yield cme, (temporal_mapping, extra_info)
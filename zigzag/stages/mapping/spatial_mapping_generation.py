@@ -705,11 +705,13 @@ class SpatialMappingGeneratorStage(Stage):
         # Add memories to the new memory hierarchy with the correct attributes
         for memory_level in self.memory_hierarchy.mem_level_list:
             memory_instance = memory_level.memory_instance
+            # Scale a copy, so that the original accelerator is unchanged and repeated calls give the same result
+            new_memory_instance: MemoryInstance = pickle_deepcopy(memory_instance)
             if memory_level == act_innermost_mem_level:
                 # scale here. For others, keep them unchanged.
                 prev_size = memory_instance.size
                 new_size = memory_instance.size * mem_scaling_factor
-                memory_instance.update_size(new_size)
+                new_memory_instance.update_size(new_size)
                 logger.info(
                     "Updated %s size from %i to %i",
                     memory_instance,
@@ -717,7 +719,6 @@ class SpatialMappingGeneratorStage(Stage):
                     new_size,
                 )
 
-            new_memory_instance: MemoryInstance = pickle_deepcopy(memory_instance)
             new_operands = pickle_deepcopy(memory_level.operands)
             new_port_alloc = pickle_deepcopy(memory_level.port_alloc_raw)
             new_served_dimensions = pickle_deepcopy(memory_level.served_dimensions)
@@ -1,10 +1,25 @@
+import hashlib
+import json
 import logging
+import os
+import queue
 from typing import Any, Generator
 
+import multiprocessing_on_dill as multiprocessing  # type: ignore
+import numpy as np
+
+from zigzag.cost_model.batch_cost_model import BatchCostModelEvaluation, TemporalMappingBatch
+from zigzag.cost_model.cost_model import CostModelEvaluationABC
 from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.imc_array import ImcArray
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingType
-from zigzag.opt.loma.engine import LomaEngine
+from zigzag.opt.loma.engine import (
+    LOMA_CRITERIA,
+    LomaEngine,
+    LomaSearchResult,
+    NoValidLoopOrderingFoundException,
+)
 from zigzag.opt.loma.memory_allocator import MemoryAllocator
 from zigzag.opt.loma.multipermute import PermutationConstraint
 from zigzag.stages.stage import Stage, StageCallable
@@ -12,6 +27,9 @@ from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
 
+## Interval (in seconds) at which the main process checks if the LOMA worker processes are still alive
+PARTITION_POLL_INTERVAL = 5.0
+
 
 class TemporalMappingGeneratorStage(Stage):
     """! Class that iterates through the different temporal mappings generated through the loop order based memory
@@ -30,25 +48,132 @@ class TemporalMappingGeneratorStage(Stage):
     ):
         """
         @param list_of_callables (List[Callable]): List of substages to call with each generated temporal mapping.
+        @param loma_number_of_core (optional kwarg): If larger than 1, the LOMA ordering space is split over this many
+        worker processes. Each worker only hands back its best temporal mapping per criterion in `LOMA_CRITERIA`, so
+        only these (and not all generated mappings) are passed to the substages.
+        @param loma_search_criterion (optional kwarg): If given (one of the criteria in `LOMA_CRITERIA`), LOMA runs a
+        branch-and-bound search that only returns the best temporal mapping for this criterion, without evaluating all
+        orderings (see `LomaEngine.run_branch_and_bound`).
+        @param loma_batch_size (optional kwarg): If larger than 0 and a `loma_search_criterion` is given, the generated
+        temporal mappings are evaluated in batches of this size with the vectorized `BatchCostModelEvaluation`. Only
+        the mappings that can still be the best for the criterion are passed to the substages. Not used for IMC.
+        @param loma_time_budget (optional kwarg): Wall-clock time (in seconds) for the search of this layer. If this,
+        `loma_evaluation_budget` or `loma_patience` is given, LOMA runs an anytime search for `loma_search_criterion`
+        that visits the orderings in a heuristic order and passes the best mapping found within the budget to the
+        substages (see `LomaEngine.run_anytime`).
+        @param loma_evaluation_budget (optional kwarg): Number of evaluated temporal mappings for this layer
+        @param loma_patience (optional kwarg): Number of evaluated temporal mappings without improvement after which the
+        search stops. The outcome of a budgeted search (coverage of the ordering space, gap to the lower bound) is kept
+        in `search_result` and saved to `<layer>_<spatial mapping>_loma_search.json` in the `dump_folder` (if given).
+        A budgeted search runs in a single process, irrespective of `loma_number_of_core`.
+        @param loma_permutation_start (optional kwarg): Index of the first LOMA ordering to consider. If this,
+        `loma_permutation_stop` or `loma_permutation_stride` is given, only the orderings in this index range are
+        generated (see `LomaEngine`), and the index of the next ordering is stored in `next_permutation_index` and
+        saved to `<layer>_<spatial mapping>_loma_search.json` in the `dump_folder` (if given), also when the run is
+        interrupted. Passing it as `loma_permutation_start` resumes the search.
+        @param loma_permutation_stop (optional kwarg): Index of the ordering to stop at (exclusive)
+        @param loma_permutation_stride (optional kwarg): Step between the indices of the considered orderings
         """
         super().__init__(list_of_callables, **kwargs)
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
         self.mapping_type = temporal_mapping_type
+        self.number_of_core_allocated: int = kwargs.get("loma_number_of_core", 1)
+        self.search_criterion: str | None = kwargs.get("loma_search_criterion", None)
+        assert self.search_criterion is None or self.search_criterion in LOMA_CRITERIA, "Invalid LOMA criterion"
+        self.batch_size: int = kwargs.get("loma_batch_size", 0)
+        ## Result of the budgeted search, with the coverage of the ordering space and the gap to the optimum
+        self.search_result: LomaSearchResult | None = None
+        ## Index of the next LOMA ordering of a search restricted to an index range, to resume the search from
+        self.next_permutation_index: int | None = None
 
     def run(self):
-        for temporal_mapping in self.generate_temporal_mappings():
-            kwargs = self.kwargs.copy()
-            kwargs["accelerator"] = self.accelerator
-            kwargs["layer"] = self.layer
-            kwargs["spatial_mapping"] = self.spatial_mapping
-            kwargs["temporal_mapping"] = temporal_mapping
-            sub_stage: Stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
-            for cme, extra_info in sub_stage.run():
+        engine = self.create_engine()
+        is_provided = self.layer.temporal_ordering.is_complete(engine.get_temporal_loops())
+        # Orderings restricted to an index range (a shard of the ordering space) are generated exhaustively
+        if engine.is_indexed and not is_provided:
+            yield from self.run_indexed(engine)
+            return
+        if is_provided:
+            temporal_mappings = self.generate_temporal_mappings(engine)
+        elif engine.has_budget:
+            assert self.search_criterion is not None, "A LOMA budget requires a loma_search_criterion"
+            if self.number_of_core_allocated > 1:
+                logger.warning(
+                    "The budgeted LOMA search of layer %s runs in a single process, irrespective of "
+                    "loma_number_of_core.",
+                    self.layer,
+                )
+            self.search_result = engine.run_anytime(self.evaluate, self.search_criterion)
+            self.save_search_report(self.search_result.to_dict())
+            temporal_mappings = [self.search_result.best_temporal_mapping]
+        elif self.number_of_core_allocated > 1:
+            temporal_mappings = self.generate_best_temporal_mappings_parallel()
+        elif self.search_criterion is not None and self.batch_size > 0 and not isinstance(
+            self.accelerator.operational_array, ImcArray
+        ):
+            temporal_mappings = [self.generate_best_temporal_mapping_batched(engine)]
+        elif self.search_criterion is not None:
+            _, best_temporal_mapping = engine.run_branch_and_bound(self.evaluate, self.search_criterion)
+            temporal_mappings = [best_temporal_mapping]
+        else:
+            temporal_mappings = self.generate_temporal_mappings(engine)
+
+        for temporal_mapping in temporal_mappings:
+            for cme, extra_info in self.run_sub_stage(temporal_mapping):
                 yield cme, (temporal_mapping, extra_info)
 
-    def generate_temporal_mappings(self) -> Generator[TemporalMapping, None, None]:
+    def run_indexed(self, engine: LomaEngine):
+        """! Run the substages for the orderings in the index range of the engine, and save the index of the next
+        ordering when the search ends or is interrupted"""
+        try:
+            for temporal_mapping in self.generate_temporal_mappings(engine):
+                for cme, extra_info in self.run_sub_stage(temporal_mapping):
+                    yield cme, (temporal_mapping, extra_info)
+        finally:
+            self.next_permutation_index = engine.next_permutation_index
+            self.save_search_report(
+                {
+                    "loma_permutation_start": engine.permutation_start,
+                    "loma_permutation_stop": engine.permutation_stop,
+                    "loma_permutation_stride": engine.permutation_stride,
+                    "next_permutation_index": engine.next_permutation_index,
+                }
+            )
+
+    def save_search_report(self, search_report: dict[str, Any]) -> None:
+        """! Save the given outcome of the LOMA search of this layer and spatial mapping to a json file in the dump
+        folder, if any"""
+        dump_folder: str | None = self.kwargs.get("dump_folder", None)
+        if dump_folder is None:
+            return
+        # Slashes are interpreted by subfolders and must be replaced in the file name
+        layer_name = self.layer.name.replace("/", "_")
+        spatial_mapping_digest = hashlib.sha256(str(self.spatial_mapping).encode()).hexdigest()[:8]
+        filename = os.path.join(dump_folder, f"{layer_name}_{spatial_mapping_digest}_loma_search.json")
+        report = {"layer": self.layer.name, "spatial_mapping": str(self.spatial_mapping)} | search_report
+        os.makedirs(dump_folder, exist_ok=True)
+        with open(filename, "w", encoding="UTF-8") as fp:
+            json.dump(report, fp, indent=4)
+        logger.info("Saved the LOMA search report of layer %s to %s", self.layer.name, filename)
+
+    def run_sub_stage(self, temporal_mapping: TemporalMapping):
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["layer"] = self.layer
+        kwargs["spatial_mapping"] = self.spatial_mapping
+        kwargs["temporal_mapping"] = temporal_mapping
+        sub_stage: Stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
+        return sub_stage.run()
+
+    def evaluate(self, temporal_mapping: TemporalMapping) -> CostModelEvaluationABC:
+        """! Return the (first) cost model evaluation of the substages for the given temporal mapping"""
+        cme, _ = next(iter(self.run_sub_stage(temporal_mapping)))
+        assert isinstance(cme, CostModelEvaluationABC)
+        return cme
+
+    def create_engine(self) -> LomaEngine:
         engine = LomaEngine(
             accelerator=self.accelerator,
             layer=self.layer,
@@ -56,7 +181,12 @@ class TemporalMappingGeneratorStage(Stage):
             mapping_type=self.mapping_type,
             **self.kwargs,
         )
+        constraints: list[PermutationConstraint] = self.layer.temporal_ordering.get_constraints()
+        if any(not constr.is_empty() for constr in constraints):
+            engine.set_constraints(constraints)
+        return engine
 
+    def generate_temporal_mappings(self, engine: LomaEngine) -> Generator[TemporalMapping, None, None]:
         # Return the full, user-provided temporal mapping
         provided_ordering = self.layer.temporal_ordering
         all_temporal_loops = engine.get_temporal_loops()
@@ -73,10 +203,165 @@ class TemporalMappingGeneratorStage(Stage):
             yield temporal_mapping
             return
         else:
-            constraints: list[PermutationConstraint] = provided_ordering.get_constraints()
-            if any(not constr.is_empty() for constr in constraints):
-                engine.set_constraints(constraints)
-
             # Generate from scratch
             for mapping in engine.run():
                 yield mapping
+
+    def generate_best_temporal_mapping_batched(self, engine: LomaEngine) -> TemporalMapping:
+        """! Evaluate the LOMA temporal mappings in batches with the vectorized cost model and only run the substages
+        for the mappings that can still beat the best one found so far for `loma_search_criterion`. As the latency is
+        at least the ideal temporal cycle count, the batched energy and ideal latency give a lower bound on the
+        criterion.
+        """
+        key_func = LOMA_CRITERIA[self.search_criterion]  # type: ignore
+        best: list[tuple[tuple[float, ...], TemporalMapping]] = []
+        nb_evaluated = 0
+
+        def evaluate_batch(temporal_mappings: list[TemporalMapping]) -> int:
+            batch_evaluation = BatchCostModelEvaluation(
+                accelerator=self.accelerator,
+                layer=self.layer,
+                spatial_mapping=self.spatial_mapping,
+                spatial_mapping_int=self.kwargs["spatial_mapping_int"],
+                batch=TemporalMappingBatch.from_temporal_mappings(temporal_mappings, self.layer),
+                access_same_data_considered_as_no_access=self.kwargs.get(
+                    "access_same_data_considered_as_no_access", True
+                ),
+            )
+            lower_bounds = key_func(batch_evaluation.energy_total, batch_evaluation.ideal_temporal_cycle)
+            nb_evaluated_batch = 0
+            # Evaluate the candidates from the lowest to the highest bound, until the bound can't beat the best mapping
+            for idx in np.lexsort(lower_bounds[::-1]):
+                lower_bound = tuple(float(bound[idx]) for bound in lower_bounds)
+                if best and lower_bound >= best[0][0]:
+                    break
+                cme = self.evaluate(temporal_mappings[idx])
+                nb_evaluated_batch += 1
+                key = key_func(cme.energy_total, cme.latency_total2)
+                if not best or key < best[0][0]:
+                    best[:] = [(key, temporal_mappings[idx])]
+            return nb_evaluated_batch
+
+        batch: list[TemporalMapping] = []
+        for temporal_mapping in engine.run():
+            batch.append(temporal_mapping)
+            if len(batch) == self.batch_size:
+                nb_evaluated += evaluate_batch(batch)
+                batch = []
+        if batch:
+            nb_evaluated += evaluate_batch(batch)
+
+        if not best:
+            raise NoValidLoopOrderingFoundException(f"No valid loop ordering was found for layer {self.layer}.")
+        logger.debug("Fully evaluated %i temporal mappings for layer %s.", nb_evaluated, self.layer)
+        return best[0][1]
+
+    def generate_best_temporal_mappings_parallel(self) -> list[TemporalMapping]:
+        """! Split the LOMA ordering space over multiple worker processes and return the best temporal mapping for
+        each criterion in `LOMA_CRITERIA` (or only for `loma_search_criterion`, if given), over all workers.
+        """
+        if self.number_of_core_allocated <= multiprocessing.cpu_count():  # type: ignore
+            number_of_core: int = self.number_of_core_allocated
+        else:
+            number_of_core = multiprocessing.cpu_count()  # type: ignore
+
+        # Use more parts than workers to balance the load, as the number of valid orderings per prefix differs
+        prefixes = self.create_engine().get_ordering_prefixes(4 * number_of_core)
+        number_of_core = min(number_of_core, len(prefixes))
+        logger.info(
+            "Running LOMA for layer %s with %i core(s) over %i ordering prefixes.",
+            self.layer,
+            number_of_core,
+            len(prefixes),
+        )
+
+        result_queue = multiprocessing.Queue()  # type: ignore
+        workers = [
+            multiprocessing.Process(  # type: ignore
+                target=self.run_partition, args=(core_id, prefixes[core_id::number_of_core], result_queue)
+            )
+            for core_id in range(number_of_core)
+        ]
+        for worker in workers:
+            worker.start()  # type: ignore
+
+        # For every core we gather the output, which is a dict with the local best result per criterion
+        best: dict[str, tuple[tuple[float, ...], TemporalMapping]] = {}
+        try:
+            for local_best in self.get_partition_results(result_queue, workers):
+                for criterion, (key, temporal_mapping) in local_best.items():
+                    if criterion not in best or key < best[criterion][0]:
+                        best[criterion] = (key, temporal_mapping)
+        finally:
+            for worker in workers:
+                if worker.is_alive():  # type: ignore
+                    worker.terminate()  # type: ignore
+                worker.join()  # type: ignore
+
+        if not best:
+            raise NoValidLoopOrderingFoundException(f"No valid loop ordering was found for layer {self.layer}.")
+
+        # Different criteria can share the same best temporal mapping
+        best_temporal_mappings: list[TemporalMapping] = []
+        for _, temporal_mapping in best.values():
+            if all(temporal_mapping is not other for other in best_temporal_mappings):
+                best_temporal_mappings.append(temporal_mapping)
+        return best_temporal_mappings
+
+    @staticmethod
+    def get_partition_results(
+        result_queue: Any, workers: list[Any]
+    ) -> Generator[dict[str, tuple[tuple[float, ...], TemporalMapping]], None, None]:
+        """! Generate the result of every worker of `generate_best_temporal_mappings_parallel` as soon as it is on the
+        result queue. The exception of a failed worker is raised here. A worker that exits without a result (e.g.
+        killed when out of memory) is detected by polling the liveness of the workers, instead of waiting forever.
+        """
+        received: set[int] = set()
+        # Workers that had exited without a result at the previous poll
+        exited: set[int] = set()
+        while len(received) < len(workers):
+            try:
+                core_id, result = result_queue.get(timeout=PARTITION_POLL_INTERVAL)
+            except queue.Empty:
+                # The result of a worker can still be in transit right after it exits, so only fail at the next poll
+                missing = {core_id for core_id, worker in enumerate(workers) if core_id not in received}
+                lost = {core_id for core_id in missing if not workers[core_id].is_alive()}
+                if lost & exited:
+                    core_id = min(lost & exited)
+                    raise RuntimeError(
+                        f"LOMA worker {core_id} exited with code {workers[core_id].exitcode} without a result."
+                    )
+                exited = lost
+                continue
+            if isinstance(result, Exception):
+                raise result
+            received.add(core_id)
+            yield result
+
+    def run_partition(self, core_id: int, prefixes: list[list[tuple[Any, int]]], result_queue: Any) -> None:
+        """! Worker process: evaluate all orderings starting with one of the given prefixes and put the best temporal
+        mapping per criterion on the result queue, together with the `core_id`. If the search fails, the exception
+        is put on the queue instead, to be raised in the main process.
+        """
+        local_best: dict[str, tuple[tuple[float, ...], TemporalMapping]] = {}
+        result: dict[str, tuple[tuple[float, ...], TemporalMapping]] | Exception = local_best
+        try:
+            if self.search_criterion is not None:
+                engine = self.create_engine()
+                local_best[self.search_criterion] = engine.run_branch_and_bound(
+                    self.evaluate, self.search_criterion, prefixes
+                )
+            else:
+                for temporal_mapping in self.create_engine().run(prefixes):
+                    cme = self.evaluate(temporal_mapping)
+                    for criterion, key_func in LOMA_CRITERIA.items():
+                        key = key_func(cme.energy_total, cme.latency_total2)
+                        if criterion not in local_best or key < local_best[criterion][0]:
+                            local_best[criterion] = (key, temporal_mapping)
+        except NoValidLoopOrderingFoundException:
+            # No valid ordering in this part of the ordering space
+            pass
+        except Exception as exc:  # pylint: disable=W0718
+            result = exc
+        finally:
+            result_queue.put((core_id, result))  # type: ignore
@@ -1,6 +1,7 @@
 import logging
 from typing import Any
 
+from zigzag.cacti.cacti_parser import CactiParser, CactiPoint
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.parser.accelerator_factory import AcceleratorFactory
 from zigzag.parser.accelerator_validator import AcceleratorValidator
@@ -26,13 +27,40 @@ class AcceleratorParserStage(Stage):
 
     @staticmethod
     def parse_accelerator(accelerator_yaml_path: str) -> Accelerator:
-        accelerator_data = open_yaml(accelerator_yaml_path)
+        factory = AcceleratorFactory(AcceleratorParserStage.load_accelerator_data(accelerator_yaml_path))
+        # Extract the costs of all memories with CACTI at once, instead of one by one while creating the memories
+        CactiParser().create_items(factory.get_cacti_points())
+        return factory.create()
+
+    @staticmethod
+    def load_accelerator_data(accelerator_yaml_path: str) -> dict[str, Any]:
+        """! Return the validated and normalized user-defined accelerator data"""
+        return AcceleratorParserStage.validate_accelerator_data(open_yaml(accelerator_yaml_path))  # type: ignore
 
+    @staticmethod
+    def validate_accelerator_data(accelerator_data: dict[str, Any]) -> dict[str, Any]:
+        """! Return the validated and normalized accelerator data, e.g. as loaded from a yaml file"""
         validator = AcceleratorValidator(accelerator_data)
         accelerator_data = validator.normalized_data
         validate_success = validator.validate()
         if not validate_success:
             raise ValueError("Failed to validate user provided accelerator.")
+        return accelerator_data
 
-        factory = AcceleratorFactory(accelerator_data)
-        return factory.create()
+    @staticmethod
+    def extract_memory_costs(
+        accelerator_yaml_paths: list[str], nb_workers: int | None = None
+    ) -> dict[CactiPoint, float]:
+        """! Extract the costs of the memories of all given accelerators that aren't in the CACTI memory pool yet, in
+        one batch. E.g. to prepare a sweep over accelerators, after which parsing them only uses the memory pool.
+        @param nb_workers Maximal number of concurrent CACTI runs (default: the number of CPUs)
+        @return The CACTI run time (in seconds) of every extracted memory configuration
+        """
+        cacti_points = [
+            cacti_point
+            for accelerator_yaml_path in accelerator_yaml_paths
+            for cacti_point in AcceleratorFactory(
+                AcceleratorParserStage.load_accelerator_data(accelerator_yaml_path)
+            ).get_cacti_points()
+        ]
+        return CactiParser().create_items(cacti_points, nb_workers)
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Generator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+if TYPE_CHECKING:
+    from zigzag.stages.stage import Stage
+
+logger = logging.getLogger(__name__)
+
+
+class StageStatistics:
+    """! Time spent in and number of items yielded by all runs of one stage type"""
+
+    def __init__(self):
+        self.nb_runs = 0
+        self.nb_items = 0
+        ## Time spent in the stage and its substages
+        self.inclusive_time = 0.0
+        ## Time spent in the stage itself, without its substages
+        self.exclusive_time = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "nb_runs": self.nb_runs,
+            "nb_items": self.nb_items,
+            "inclusive_time": self.inclusive_time,
+            "exclusive_time": self.exclusive_time,
+            "items_per_second": self.nb_items / self.inclusive_time if self.inclusive_time > 0 else None,
+        }
+
+
+class StageProfiler:
+    """! Instrumentation of a stage pipeline. If a profiler is given as `profiler` kwarg to the `MainStage`, the run of
+    every stage is timed (see `Stage.__init_subclass__`): the wall time spent in the stage with and without its
+    substages, and the number of items (CMEs) it yields, also per layer. Other components add counters, e.g. the
+    number of LOMA orderings and failed memory allocations, with the time they took. The report also contains the
+    peak resident set size of the process.
+
+    Without profiler, a stage run only costs one extra dict lookup. Stages that run in worker processes are not
+    included in the report.
+    """
+
+    def __init__(self, live_interval: float | None = None):
+        """
+        @param live_interval If given, a summary of the profile is logged at most once every this many seconds
+        """
+        self.live_interval = live_interval
+        self.stage_statistics: dict[str, StageStatistics] = {}
+        self.layer_statistics: dict[str, dict[str, StageStatistics]] = {}
+        ## Peak resident set size at the end of the last stage run of every layer
+        self.layer_peak_rss: dict[str, int | None] = {}
+        self.counters: dict[str, dict[str, float]] = {}
+        # Stack of the [stage name, time spent in substages] of the stages that are currently advancing
+        self.stack: list[list[Any]] = []
+        self.start_time = time.perf_counter()
+        self.last_live_time = self.start_time
+
+    def profile_run(self, stage: "Stage", items: Generator[Any, None, None]) -> Generator[Any, None, None]:
+        """! Wrap the run generator of the given stage to time every step of it"""
+        stage_name = type(stage).__name__
+        # Most stages below the `WorkloadStage` take the layer as keyword argument instead of in their kwargs
+        layer = stage.kwargs.get("layer", getattr(stage, "layer", None))
+        statistics = [self.stage_statistics.setdefault(stage_name, StageStatistics())]
+        if layer is not None:
+            layer_statistics = self.layer_statistics.setdefault(str(layer), {})
+            statistics.append(layer_statistics.setdefault(stage_name, StageStatistics()))
+        for stage_statistics in statistics:
+            stage_statistics.nb_runs += 1
+
+        while True:
+            frame = [stage_name, 0.0]
+            self.stack.append(frame)
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                self.record_step(frame, start, statistics)
+                if layer is not None:
+                    self.layer_peak_rss[str(layer)] = self.get_peak_rss()
+                return
+            except BaseException:
+                self.record_step(frame, start, statistics)
+                raise
+            self.record_step(frame, start, statistics)
+            for stage_statistics in statistics:
+                stage_statistics.nb_items += 1
+            yield item
+
+    def record_step(self, frame: list[Any], start: float, statistics: list[StageStatistics]) -> None:
+        end = time.perf_counter()
+        elapsed = end - start
+        self.stack.pop()
+        # The inclusive time of a stage nested in a stage of the same type is already counted by the outer one
+        is_nested = any(outer_frame[0] == frame[0] for outer_frame in self.stack)
+        for stage_statistics in statistics:
+            if not is_nested:
+                stage_statistics.inclusive_time += elapsed
+            stage_statistics.exclusive_time += elapsed - frame[1]
+        if self.stack:
+            self.stack[-1][1] += elapsed
+        if self.live_interval is not None and end - self.last_live_time >= self.live_interval:
+            self.last_live_time = end
+            logger.info("%s", self.get_summary())
+
+    def count(self, name: str, seconds: float = 0.0, **counts: int) -> None:
+        """! Add the given counts (and the time they took) to the counter with the given name"""
+        counter = self.counters.setdefault(name, {"seconds": 0.0})
+        counter["seconds"] += seconds
+        for key, value in counts.items():
+            counter[key] = counter.get(key, 0) + value
+
+    @staticmethod
+    def get_peak_rss() -> int | None:
+        """! Return the peak resident set size of this process in bytes, if known"""
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def get_report(self) -> dict[str, Any]:
+        counters: dict[str, dict[str, float | None]] = {}
+        for name, counter in self.counters.items():
+            seconds = counter["seconds"]
+            counters[name] = dict(counter)
+            for key, value in counter.items():
+                if key != "seconds":
+                    counters[name][f"{key}_per_second"] = value / seconds if seconds > 0 else None
+        return {
+            "wall_time": time.perf_counter() - self.start_time,
+            "peak_rss": self.get_peak_rss(),
+            "stages": {name: statistics.to_dict() for name, statistics in self.stage_statistics.items()},
+            "counters": counters,
+            "layers": {
+                layer: {
+                    "exclusive_time": sum(statistics.exclusive_time for statistics in stage_statistics.values()),
+                    "peak_rss": self.layer_peak_rss.get(layer),
+                    "stages": {name: statistics.to_dict() for name, statistics in stage_statistics.items()},
+                }
+                for layer, stage_statistics in self.layer_statistics.items()
+            },
+        }
+
+    def get_summary(self) -> str:
+        """! One line with the stages that took the most time so far"""
+        stages = sorted(self.stage_statistics.items(), key=lambda item: item[1].exclusive_time, reverse=True)
+        stage_summary = ", ".join(
+            f"{name} {statistics.exclusive_time:.1f} s/{statistics.nb_items} items" for name, statistics in stages[:4]
+        )
+        return f"Profile after {time.perf_counter() - self.start_time:.1f} s: {stage_summary}"
+
+    def save_report(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(self.get_report(), f, indent=4)
@@ -0,0 +1,238 @@
+import glob
+import logging
+import os
+import pickle
+import uuid
+from typing import Any, Generator
+
+import numpy as np
+
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelEvaluationABC, CumulativeCME
+from zigzag.stages.stage import Stage, StageCallable
+
+logger = logging.getLogger(__name__)
+
+STRING_COLUMNS = {"layer", "design_point", "spatial_mapping", "temporal_mapping", "cme_file"}
+INTEGER_COLUMNS = {"layer_id", "evaluation_index", "layer_index"}
+## Columns on which the rows are sorted when the parts are merged, so that the order of the rows does not depend on
+## which worker process wrote them
+ORDER_COLUMNS = ("evaluation_index", "layer_index")
+## Values of the columns that a row doesn't have, by the type of the column
+MISSING_VALUES: dict[type, Any] = {float: np.nan, int: -1, str: ""}
+
+
+def get_column_type(name: str) -> type:
+    return str if name in STRING_COLUMNS else int if name in INTEGER_COLUMNS else float
+
+
+def get_cme_row(
+    cme: CostModelEvaluationABC, design_point: str = "", evaluation_index: int = -1, layer_index: int = -1
+) -> dict[str, float | int | str]:
+    """! Return the columns of the given CME: its layer, design point and mapping, the energy and latency breakdown
+    and the utilizations. The energy breakdown and memory utilization have one column per operand and memory level,
+    e.g. `mem_energy_W_L1`.
+    @param evaluation_index Position of the design point evaluation in the run (see `DesignSpaceExplorationStage`)
+    @param layer_index Position of the layer in the workload (see `WorkloadStage`)
+    """
+    if isinstance(cme, CostModelEvaluation):
+        layer, layer_id = cme.layer.name, cme.layer.id
+        spatial_mapping, temporal_mapping = str(cme.spatial_mapping_int), str(cme.temporal_mapping)
+    else:
+        assert isinstance(cme, CumulativeCME)
+        layer, layer_id, spatial_mapping, temporal_mapping = "overall", -1, "", ""
+    row: dict[str, float | int | str] = {
+        "layer": layer,
+        "layer_id": layer_id,
+        "design_point": design_point,
+        "evaluation_index": evaluation_index,
+        "layer_index": layer_index,
+        "spatial_mapping": spatial_mapping,
+        "temporal_mapping": temporal_mapping,
+        "energy_total": cme.energy_total,
+        "mac_energy": cme.mac_energy,
+        "mem_energy": cme.mem_energy,
+        "latency_total": cme.latency_total2,
+        "latency_computation": cme.latency_total0,
+        "latency_onloading": cme.latency_total1 - cme.latency_total0,
+        "latency_offloading": cme.latency_total2 - cme.latency_total1,
+        "ideal_cycle": cme.ideal_cycle,
+        "ideal_temporal_cycle": cme.ideal_temporal_cycle,
+        "mac_spatial_utilization": cme.mac_spatial_utilization,
+        "mac_utilization0": cme.mac_utilization0,
+        "mac_utilization1": cme.mac_utilization1,
+        "mac_utilization2": cme.mac_utilization2,
+    }
+    for layer_op, energies in cme.mem_energy_breakdown.items():
+        for mem_lv, energy in enumerate(energies):
+            row[f"mem_energy_{layer_op}_L{mem_lv}"] = float(energy)
+    if isinstance(cme, CostModelEvaluation):
+        for layer_op, utilizations in cme.mem_utili_shared.items():
+            for mem_lv, utilization in enumerate(utilizations):
+                row[f"mem_utilization_{layer_op}_L{mem_lv}"] = float(utilization)
+    return row
+
+
+def to_columns(rows: list[dict[str, Any]]) -> dict[str, np.ndarray]:
+    """! Convert the given rows into one array per column. Rows without a column get the missing value of its type."""
+    # Union of the columns, in order of appearance
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns: dict[str, np.ndarray] = {}
+    for name in names:
+        column_type = get_column_type(name)
+        columns[name] = np.array([row.get(name, MISSING_VALUES[column_type]) for row in rows], dtype=column_type)
+    return columns
+
+
+class ColumnarResultWriter:
+    """! Writer of cost model evaluations as a table with one row per CME (see `get_cme_row`), stored as one NumPy
+    array per column. The rows are appended while the substages run and written to disk in parts of `part_size` rows,
+    so the complete results are never held in memory. `close` merges the parts into one `.npy` file per column,
+    which `load_columnar_results` memory-maps. The merged rows are in the order of a serial run: by design point
+    evaluation, by layer and in the order they were appended.
+
+    Optionally, every CME is pickled to its own file as well, named in the `cme_file` column, and can be loaded
+    when needed with `load_cme`.
+
+    The writer can be passed to substages in worker processes: the rows of a worker are written to their own parts
+    (see `ColumnarSaveStage`).
+    """
+
+    def __init__(self, folder: str, part_size: int = 1024, save_cmes: bool = False):
+        """
+        @param folder Folder of the results. Results of earlier runs in this folder are removed.
+        @param part_size Number of rows that is kept in memory before they are written to disk
+        @param save_cmes Whether the complete CMEs are pickled as well
+        """
+        self.folder = folder
+        self.part_size = part_size
+        self.save_cmes = save_cmes
+        self.rows: list[dict[str, Any]] = []
+        ## Process that created the writer and merges the parts
+        self.pid = os.getpid()
+        self.nb_parts = 0
+        os.makedirs(os.path.join(folder, "parts"), exist_ok=True)
+        for pattern in ("*.npy", "parts/*.npz", "cmes/*.pickle"):
+            for path in glob.glob(os.path.join(folder, pattern)):
+                os.remove(path)
+        if save_cmes:
+            os.makedirs(os.path.join(folder, "cmes"), exist_ok=True)
+
+    def append(
+        self, cme: CostModelEvaluationABC, design_point: str = "", evaluation_index: int = -1, layer_index: int = -1
+    ) -> None:
+        row: dict[str, Any] = get_cme_row(cme, design_point, evaluation_index, layer_index)
+        if self.save_cmes:
+            cme_file = f"{uuid.uuid4().hex}.pickle"
+            with open(os.path.join(self.folder, "cmes", cme_file), "wb") as fp:
+                pickle.dump(cme, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            row["cme_file"] = cme_file
+        self.rows.append(row)
+        if len(self.rows) >= self.part_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """! Write the rows in memory to a new part"""
+        if not self.rows:
+            return
+        # Copies of the writer in other processes (or in tasks of the same worker process) write to different parts
+        part_name = f"{self.pid}-{self.nb_parts:05d}-{uuid.uuid4().hex}.npz"
+        part_path = os.path.join(self.folder, "parts", part_name)
+        np.savez(part_path, **to_columns(self.rows))
+        self.nb_parts += 1
+        self.rows = []
+
+    def is_worker_copy(self) -> bool:
+        """! Whether this is a copy of the writer in another process than the one that created it"""
+        return os.getpid() != self.pid
+
+    def close(self) -> None:
+        """! Write the remaining rows and merge all parts into one `.npy` file per column"""
+        self.flush()
+        part_paths = sorted(glob.glob(os.path.join(self.folder, "parts", "*.npz")))
+        nb_columns = 0
+        for name, column in merge_parts(part_paths):
+            np.save(os.path.join(self.folder, f"{name}.npy"), column)
+            nb_columns += 1
+        for part_path in part_paths:
+            os.remove(part_path)
+        logger.info("Saved %i columns of results from %i parts to %s", nb_columns, len(part_paths), self.folder)
+
+
+def merge_parts(part_paths: list[str]) -> Generator[tuple[str, np.ndarray], None, None]:
+    """! Generate the name and concatenated values of every column of the given parts, one column at a time. The rows
+    are sorted on the `ORDER_COLUMNS`. The sort is stable and the parts of a process are given in the order they were
+    written, so rows with the same order columns (which come from the same process) keep their order."""
+    if not part_paths:
+        return
+    parts = [np.load(part_path) for part_path in part_paths]
+    nb_rows_per_part = [len(part["layer_id"]) for part in parts]
+    names = list(dict.fromkeys(name for part in parts for name in part.files))
+
+    def concatenate(name: str) -> np.ndarray:
+        column_type = get_column_type(name)
+        return np.concatenate(
+            [
+                part[name] if name in part.files else np.full(nb_rows, MISSING_VALUES[column_type], dtype=column_type)
+                for part, nb_rows in zip(parts, nb_rows_per_part)
+            ]
+        )
+
+    # The last key of lexsort is the primary one
+    order = np.lexsort([concatenate(name) for name in reversed(ORDER_COLUMNS)])
+    for name in names:
+        yield name, concatenate(name)[order]
+    for part in parts:
+        part.close()
+
+
+def load_columnar_results(folder: str, mmap_mode: str | None = "r") -> dict[str, np.ndarray]:
+    """! Load the results of a `ColumnarResultWriter` as a dict of column arrays. The columns are memory-mapped
+    (with the given `mmap_mode`), so only the data that is used is read from disk. Parts that have not been merged,
+    e.g. of an interrupted run, are loaded into memory instead."""
+    part_paths = sorted(glob.glob(os.path.join(folder, "parts", "*.npz")))
+    if part_paths:
+        return dict(merge_parts(part_paths))
+    return {
+        os.path.splitext(os.path.basename(path))[0]: np.load(path, mmap_mode=mmap_mode)  # type: ignore
+        for path in sorted(glob.glob(os.path.join(folder, "*.npy")))
+    }
+
+
+def load_cme(folder: str, cme_file: str) -> CostModelEvaluationABC:
+    """! Load the complete CME of a row, given its `cme_file` column"""
+    with open(os.path.join(folder, "cmes", cme_file), "rb") as fp:
+        return pickle.load(fp)
+
+
+class ColumnarSaveStage(Stage):
+    """! Class that passes through all results yielded by substages and appends them as rows to a
+    `ColumnarResultWriter`. The design point of the row and its evaluation index are taken from the `design_point`
+    and `evaluation_index` kwargs, if any (see `DesignSpaceExplorationStage`), and the position of the layer from the
+    `layer_index` kwarg (see `WorkloadStage`).
+    """
+
+    def __init__(self, list_of_callables: list[StageCallable], *, results_writer: ColumnarResultWriter, **kwargs: Any):
+        """
+        @param list_of_callables: see Stage
+        @param results_writer: Writer of the results, which is closed by the caller at the end of the run
+        @param kwargs: any kwargs, passed on to substages
+        """
+        super().__init__(list_of_callables, **kwargs)
+        self.results_writer = results_writer
+
+    def run(self):
+        self.kwargs["results_writer"] = self.results_writer
+        substage = self.list_of_callables[0](self.list_of_callables[1:], **self.kwargs)
+        design_point: str = self.kwargs.get("design_point", "")
+        evaluation_index: int = self.kwargs.get("evaluation_index", -1)
+        layer_index: int = self.kwargs.get("layer_index", -1)
+
+        for cme, extra_info in substage.run():
+            if not isinstance(cme, CostModelEvaluationABC):
+                raise NotImplementedError
+            self.results_writer.append(cme, design_point, evaluation_index, layer_index)
+            yield cme, extra_info
+
+        # The rows of a worker process are not seen by the writer of the main process
+        if self.results_writer.is_worker_copy():
+            self.results_writer.flush()
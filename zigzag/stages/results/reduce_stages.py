@@ -1,7 +1,14 @@
 import logging
+from bisect import insort
 from typing import Any
 
 from zigzag.cost_model.cost_model import CostModelEvaluation, CumulativeCME
+from zigzag.cost_model.cost_model_imc import CostModelEvaluationForIMC
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.hardware.architecture.operational_array import OperationalArray
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.opt.loma.engine import LOMA_CRITERIA
 from zigzag.stages.stage import Stage, StageCallable
 
 logger = logging.getLogger(__name__)
@@ -129,6 +136,190 @@ class MinimalEDPStage(Stage):
         yield best_cme, other_cmes
 
 
+def get_area(cme: "CostModelEvaluation | CMESummary") -> float:
+    """! Return the area of the accelerator of the given cost model evaluation: the operational array and all memory
+    instances (as in `CostModelEvaluationForIMC.collect_area_data`)."""
+    if hasattr(cme, "area_total"):
+        return cme.area_total  # type: ignore
+    return get_accelerator_area(cme.accelerator)
+
+
+def get_accelerator_area(accelerator: Accelerator) -> float:
+    """! Return the area of the operational array and all memory instances of the given accelerator"""
+    operational_array = accelerator.operational_array
+    mem_area = sum(mem_level.memory_instance.area for mem_level in accelerator.memory_hierarchy.mem_level_list)
+    if isinstance(operational_array, ImcArray):
+        return operational_array.area + mem_area
+    assert isinstance(operational_array, OperationalArray)
+    return operational_array.total_area + mem_area
+
+
+class CMESummary:
+    """! Compact form of a cost model evaluation: the scalar metrics, plus the temporal mapping and references to the
+    (shared) accelerator, layer and spatial mappings needed to recreate the full cost model evaluation.
+    """
+
+    def __init__(self, cme: CostModelEvaluation):
+        self.energy_total = cme.energy_total
+        self.latency_total2 = cme.latency_total2
+        self.area_total = get_area(cme)
+        self.accelerator = cme.accelerator
+        self.layer = cme.layer
+        self.spatial_mapping = cme.spatial_mapping
+        self.spatial_mapping_int = cme.spatial_mapping_int
+        self.temporal_mapping_dict = cme.temporal_mapping.mapping_dic_origin
+        self.temporal_mapping_type = cme.temporal_mapping.type
+        self.access_same_data_considered_as_no_access = cme.access_same_data_considered_as_no_access
+        self.cycles_per_op = cme.cycles_per_op
+
+    def rehydrate(self) -> CostModelEvaluation:
+        """! Recreate the full cost model evaluation"""
+        temporal_mapping = TemporalMapping(self.temporal_mapping_dict, self.layer, self.temporal_mapping_type)
+        if isinstance(self.accelerator.operational_array, ImcArray):
+            # The cycles per operation follow from the IMC array
+            return CostModelEvaluationForIMC(
+                accelerator=self.accelerator,
+                layer=self.layer,
+                spatial_mapping=self.spatial_mapping,
+                spatial_mapping_int=self.spatial_mapping_int,
+                temporal_mapping=temporal_mapping,
+                access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+            )
+        return CostModelEvaluation(
+            accelerator=self.accelerator,
+            layer=self.layer,
+            spatial_mapping=self.spatial_mapping,
+            spatial_mapping_int=self.spatial_mapping_int,
+            temporal_mapping=temporal_mapping,
+            access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+            cycles_per_op=self.cycles_per_op,
+        )
+
+    def __str__(self):
+        return f"CMESummary(layer={self.layer}, energy={self.energy_total}, latency={self.latency_total2})"
+
+
+ReducedCME = tuple[CostModelEvaluation | CMESummary, Any]
+
+
+class TopKParetoResult:
+    """! The cost model evaluations kept by the `TopKParetoStage`, as (cme or summary, extra_info) pairs:
+    - top_k: for each criterion in `LOMA_CRITERIA`, the best evaluations, best first
+    - pareto_front: the evaluations that are not dominated in energy, latency and area
+    """
+
+    def __init__(self, top_k: dict[str, list[ReducedCME]], pareto_front: list[ReducedCME]):
+        self.top_k = top_k
+        self.pareto_front = pareto_front
+
+    def get_entries(self) -> list[ReducedCME]:
+        """! Return all kept evaluations, each only once"""
+        entries = {id(entry): entry for kept in self.top_k.values() for entry in kept}
+        entries |= {id(entry): entry for entry in self.pareto_front}
+        return list(entries.values())
+
+
+def get_nested_entries(extra_info: Any) -> list[ReducedCME] | None:
+    """! Return the evaluations kept by a nested `TopKParetoStage`, of which the `TopKParetoResult` is the given extra
+    info or is nested in it as the last element of (extra info of a stage in between, extra info) pairs, e.g. with the
+    spatial mapping of the `SpatialMappingGeneratorStage`. The extra info of the stages in between is put around the
+    extra info of each kept evaluation in the same way. Return None if there is no nested `TopKParetoResult`."""
+    if isinstance(extra_info, TopKParetoResult):
+        return extra_info.get_entries()
+    if isinstance(extra_info, tuple) and len(extra_info) == 2:  # type: ignore
+        entries = get_nested_entries(extra_info[1])
+        if entries is not None:
+            return [(cme, (extra_info[0], nested_extra_info)) for cme, nested_extra_info in entries]
+    return None
+
+
+class TopKParetoStage(Stage):
+    """! Reduce stage with bounded memory. Instead of keeping all cost model evaluations generated by its substages, it
+    keeps the `reduce_top_k` best ones for each criterion in `LOMA_CRITERIA`, and the energy/latency/area Pareto front.
+    Dominated evaluations are dropped as soon as they are generated. It yields the best cost model evaluation for
+    `reduce_criterion`, with a `TopKParetoResult` as extra info. If the substages contain a `TopKParetoStage` as well
+    (e.g. per spatial mapping), the evaluations kept by it are merged, instead of only the one it yields.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        **kwargs: Any,
+    ):
+        """
+        @param reduce_criterion (optional kwarg): The criterion (in `LOMA_CRITERIA`) of the yielded cost model
+        evaluation. Defaults to latency.
+        @param reduce_top_k (optional kwarg): The number of cost model evaluations to keep for each criterion
+        @param reduce_keep_summaries (optional kwarg): If true, the kept evaluations (except the yielded one) are stored
+        as `CMESummary` and their extra info is dropped
+        """
+        # The settings stay in the kwargs, so that nested TopKParetoStages (e.g. per spatial mapping) use them as well
+        super().__init__(list_of_callables, **kwargs)
+        self.criterion: str = kwargs.get("reduce_criterion", "latency")
+        self.top_k: int = kwargs.get("reduce_top_k", 1)
+        self.keep_summaries: bool = kwargs.get("reduce_keep_summaries", False)
+        assert self.criterion in LOMA_CRITERIA, f"Invalid reduce criterion {self.criterion}"
+        assert self.top_k >= 1
+
+    def run(self):
+        substage: Stage = self.list_of_callables[0](self.list_of_callables[1:], **self.kwargs)
+
+        # Sorted lists of (key, index, (cme, extra_info)). The index keeps the first of equal evaluations first
+        top_k: dict[str, list[tuple[tuple[float, ...], int, ReducedCME]]] = {
+            criterion: [] for criterion in LOMA_CRITERIA
+        }
+        pareto_front: list[tuple[tuple[float, float, float], ReducedCME]] = []
+        best: tuple[tuple[float, ...], CostModelEvaluation] | None = None
+        idx = 0
+
+        for cme, extra_info in substage.run():
+            assert isinstance(cme, CostModelEvaluation)
+            key = LOMA_CRITERIA[self.criterion](cme.energy_total, cme.latency_total2)
+            if best is None or key < best[0]:
+                best = (key, cme)
+
+            # The yielded evaluation of a nested TopKParetoStage is one of the evaluations it kept
+            candidates = get_nested_entries(extra_info) or [(cme, extra_info)]
+            for candidate, candidate_extra_info in candidates:
+                keys = {
+                    criterion: key_func(candidate.energy_total, candidate.latency_total2)
+                    for criterion, key_func in LOMA_CRITERIA.items()
+                }
+                metrics = (candidate.energy_total, candidate.latency_total2, get_area(candidate))
+                is_kept_top_k = any(
+                    len(top_k[criterion]) < self.top_k or key < top_k[criterion][-1][0]
+                    for criterion, key in keys.items()
+                )
+                is_dominated = any(
+                    all(kept <= new for kept, new in zip(kept_metrics, metrics)) for kept_metrics, _ in pareto_front
+                )
+                if not is_kept_top_k and is_dominated:
+                    continue
+
+                if not self.keep_summaries:
+                    entry: ReducedCME = (candidate, candidate_extra_info)
+                else:
+                    entry = (candidate if isinstance(candidate, CMESummary) else CMESummary(candidate), None)
+                for criterion, key in keys.items():
+                    insort(top_k[criterion], (key, idx, entry))
+                    del top_k[criterion][self.top_k :]
+                if not is_dominated:
+                    pareto_front = [
+                        (kept_metrics, kept_entry)
+                        for kept_metrics, kept_entry in pareto_front
+                        if not all(new <= kept for new, kept in zip(metrics, kept_metrics))
+                    ]
+                    pareto_front.append((metrics, entry))
+                idx += 1
+
+        assert best is not None
+        result = TopKParetoResult(
+            top_k={criterion: [entry for _, _, entry in kept] for criterion, kept in top_k.items()},
+            pareto_front=[entry for _, entry in pareto_front],
+        )
+        yield best[1], result
+
+
 class SumStage(Stage):
     """! Class that keeps yields only the sum of all cost model evaluations generated by its substages created by
     list_of_callables.
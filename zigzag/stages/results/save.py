@@ -10,7 +10,7 @@ from zigzag.cost_model.cost_model import (
     CumulativeCME,
 )
 from zigzag.stages.stage import Stage, StageCallable
-from zigzag.utils import json_repr_handler
+from zigzag.utils import JsonStreamWriter, json_repr_handler
 
 logger = logging.getLogger(__name__)
 
@@ -20,18 +20,29 @@ class CompleteSaveStage(Stage):
     at the end of the iteration.
     """
 
-    def __init__(self, list_of_callables: list[StageCallable], *, dump_folder: str, **kwargs: Any):
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        dump_folder: str,
+        json_writer: JsonStreamWriter | None = None,
+        **kwargs: Any,
+    ):
         """
         @param dump_folder: Output folder for dumps
+        @param json_writer: Writer of the json files. The same writer should be given to the stages of all layers, so
+        that the objects it shares are only written once.
         @param kwargs: any kwargs, passed on to substages
         """
         super().__init__(list_of_callables, **kwargs)
         self.dump_folder = dump_folder
+        self.json_writer = json_writer if json_writer is not None else JsonStreamWriter()
 
     def run(self):
         """! Run the complete save stage by running the substage and saving the CostModelEvaluation json
         representation."""
         self.kwargs["dump_folder"] = self.dump_folder
+        self.kwargs["json_writer"] = self.json_writer
         substage = self.list_of_callables[0](self.list_of_callables[1:], **self.kwargs)
 
         for cme, extra_info in substage.run():
@@ -57,7 +68,7 @@ class CompleteSaveStage(Stage):
     def save_to_json(self, obj: object, filename: str):
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         with open(filename, "w", encoding="UTF-8") as fp:
-            json.dump(obj, fp, default=json_repr_handler, indent=4)
+            self.json_writer.dump(obj, fp)
 
 
 class SimpleSaveStage(Stage):
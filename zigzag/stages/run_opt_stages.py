@@ -172,10 +172,11 @@ class MultiProcessingGatherStage(Stage):
             count_to_get += 1
         logger.info("Multiprocessing results to get: %i", count_to_get)
         count = 0
+        log_interval = max(count_to_get // 10, 1)
         while count < count_to_get:
             for ans in self.queue.get(block=True):
                 yield ans
             count += 1
-            if count % (count_to_get // 10) == 0:
+            if count % log_interval == 0:
                 logger.info("Multiprocessing results received: %i of %i", count, count_to_get)
         close_threadpool()
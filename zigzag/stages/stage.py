@@ -1,5 +1,6 @@
+import functools
 from abc import ABCMeta, abstractmethod
-from typing import Any, Generator, Protocol, runtime_checkable
+from typing import Any, Callable, Generator, Protocol, runtime_checkable
 
 from zigzag.cost_model.cost_model import CostModelEvaluationABC
 
@@ -30,6 +31,11 @@ class Stage(metaclass=ABCMeta):
                 "Final callable in list_of_callables must return Stage instances that have is_leaf() == True"
             )
 
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        if "run" in cls.__dict__ and not getattr(cls.run, "__isabstractmethod__", False):
+            cls.run = profiled(cls.run)  # type: ignore
+
     @abstractmethod
     def run(self) -> Generator[tuple[CostModelEvaluationABC, Any], None, None]: ...
 
@@ -44,6 +50,24 @@ class Stage(metaclass=ABCMeta):
         return False
 
 
+def profiled(
+    run: Callable[..., Generator[tuple[CostModelEvaluationABC, Any], None, None]],
+) -> Callable[..., Generator[tuple[CostModelEvaluationABC, Any], None, None]]:
+    """! Wrap the run method of a stage, so that it is timed if a `StageProfiler` is given as `profiler` kwarg. The
+    arguments of the run method (if any) are passed on."""
+
+    @functools.wraps(run)
+    def profiled_run(
+        self: Stage, *args: Any, **kwargs: Any
+    ) -> Generator[tuple[CostModelEvaluationABC, Any], None, None]:
+        profiler = self.kwargs.get("profiler")
+        if profiler is None:
+            return run(self, *args, **kwargs)
+        return profiler.profile_run(self, run(self, *args, **kwargs))
+
+    return profiled_run
+
+
 @runtime_checkable
 class StageCallable(Protocol):
     def __call__(self, list_of_callables: list["StageCallable"], **kwagrs: Any) -> Stage: ...
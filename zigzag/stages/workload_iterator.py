@@ -1,8 +1,12 @@
 import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Any
 
+from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.stages.layer_cache import LayerCache, get_layer_fingerprint, hash_fingerprint, to_canonical
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.workload.layer_node import LayerNode
 from zigzag.workload.workload_abc import WorkloadABC, WorkloadNoDummyABC
@@ -19,20 +23,37 @@ class WorkloadStage(Stage):
         *,
         workload: WorkloadABC | WorkloadNoDummyABC,
         accelerator: Accelerator,
+        layer_ids: set[int] | None = None,
+        nb_layer_workers: int = 1,
         **kwargs: Any,
     ):
         """
         Initialization of self.workload.
+        @param layer_ids If given, only the layers with these ids are evaluated
+        @param nb_layer_workers If larger than 1, the mapping searches of the layers run in this many worker processes
         """
         super().__init__(list_of_callables, **kwargs)
         self.workload = workload
         self.accelerator = accelerator
+        self.layer_ids = layer_ids
+        self.nb_layer_workers = nb_layer_workers
 
     def run(self):
+        layers = self.get_layers()
+        if self.nb_layer_workers > 1 and len(layers) > 1:
+            yield from self.run_parallel(layers)
+        else:
+            yield from self.run_serial(layers)
+
+    def get_layers(self) -> list[LayerNode]:
+        """! Return the layers to evaluate, in topological order"""
+        layers: list[LayerNode] = []
         for layer in self.workload.topological_sort():
             # skip the DummyNodes
             if not isinstance(layer, LayerNode):
                 continue
+            if self.layer_ids is not None and layer.id not in self.layer_ids:
+                continue
             # Skip Pooling, Add layers for imc. This happens only when the workload is manually defined.
             # No skipping if the workload is from onnx.
             operational_array = self.accelerator.operational_array
@@ -41,12 +62,123 @@ class WorkloadStage(Stage):
                 "Add",
             ]:
                 continue
+            layers.append(layer)
+        return layers
 
+    def run_serial(self, layers: list[LayerNode]):
+        for layer_index, layer in enumerate(layers):
             kwargs = self.kwargs.copy()
             kwargs["layer"] = layer
+            # Position of the layer, to order the results of parallel runs (see `ColumnarSaveStage`)
+            kwargs["layer_index"] = layer_index
             kwargs["accelerator"] = self.accelerator
 
             logger.info("Processing  %s...", layer.name)
             sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
             for cme, extra_info in sub_stage.run():
                 yield cme, (layer, extra_info)
+
+    def run_parallel(self, layers: list[LayerNode]):
+        """! Run the mapping searches of the layers in a pool of worker processes. The substages and their keyword
+        arguments, including the parsed accelerator, are sent once to every worker; a task only sends its layers. The
+        largest layers are searched first to balance the load, and the results are yielded in topological order as soon
+        as they are available, so that they are identical to those of `run_serial`.
+        With a `layer_cache`, identical layers (see `get_fingerprint`) run after each other in the same task, so that
+        only the first one is searched and the others are recreated from the cache of the worker."""
+        layer_cache: LayerCache | None = self.kwargs.get("layer_cache")
+        groups: dict[str | int, list[tuple[int, LayerNode]]] = {}
+        for layer_index, layer in enumerate(layers):
+            group_key = self.get_fingerprint(layer) if layer_cache is not None else layer.id
+            groups.setdefault(group_key, []).append((layer_index, layer))
+        # The number of MAC operations of the searched layer is used as estimate of the run time of a task
+        schedule = sorted(groups.values(), key=lambda group: group[0][1].total_mac_count, reverse=True)
+
+        nb_workers = min(self.nb_layer_workers, len(schedule))
+        logger.info(
+            "Processing %i layers in %i tasks in %i worker processes...", len(layers), len(schedule), nb_workers
+        )
+        with ProcessPoolExecutor(
+            nb_workers, initializer=init_layer_worker, initargs=(self.list_of_callables, self.get_worker_kwargs())
+        ) as pool:
+            tasks = [pool.submit(run_layers_in_worker, group) for group in schedule]
+            task_per_layer = {layer.id: task for task, group in zip(tasks, schedule) for _, layer in group}
+            results_per_layer: dict[int, list[tuple[CostModelEvaluation, Any]]] = {}
+            for layer in layers:
+                if layer.id not in results_per_layer:
+                    task_results, cache_lookups = self.get_task_result(task_per_layer[layer.id])
+                    results_per_layer.update(task_results)
+                    if layer_cache is not None:
+                        layer_cache.hits += cache_lookups[0]
+                        layer_cache.misses += cache_lookups[1]
+
+                logger.info("Processed  %s.", layer.name)
+                for cme, extra_info in results_per_layer.pop(layer.id):
+                    yield cme, (layer, extra_info)
+
+    @staticmethod
+    def get_task_result(task: Future[Any]) -> Any:
+        """! Wait for the result of a task of `run_parallel`. The exception of a failed task is raised here, also when
+        a worker process exits during a task (e.g. killed when out of memory), which breaks the pool."""
+        try:
+            return task.result()
+        except BrokenProcessPool as exc:
+            raise RuntimeError(
+                "A layer worker process exited unexpectedly, e.g. because it ran out of memory."
+            ) from exc
+
+    def get_worker_kwargs(self) -> dict[str, Any]:
+        """! Keyword arguments of the substages in the worker processes. Worker processes can't start processes
+        themselves, so the temporal mapping search of a layer runs in a single process."""
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["loma_number_of_core"] = 1
+        kwargs["salsa_number_of_core"] = 1
+        kwargs["loma_show_progress_bar"] = False
+        # The stages that run in the workers are not profiled
+        kwargs["profiler"] = None
+        return kwargs
+
+    def get_fingerprint(self, layer: LayerNode) -> str:
+        """! Fingerprint of everything that determines the mapping search of the layer. Next to the layer itself, this
+        includes the memory levels the layer can use when inter-layer data locality is exploited."""
+        mem_update_list: dict[int, Any] = self.kwargs.get("mem_update_list", {})
+        fingerprint = {
+            "layer": get_layer_fingerprint(layer),
+            "mem_update": to_canonical(mem_update_list.get(layer.id)),
+            "mem_update_weight": self.kwargs.get("mem_update_weight"),
+        }
+        return hash_fingerprint(fingerprint)
+
+
+## Substages and their keyword arguments in a worker process of `WorkloadStage.run_parallel`
+worker_substages: tuple[list[StageCallable], dict[str, Any]] | None = None
+
+
+def init_layer_worker(list_of_callables: list[StageCallable], kwargs: dict[str, Any]) -> None:
+    global worker_substages  # pylint: disable=W0603
+    worker_substages = (list_of_callables, kwargs)
+
+
+def run_layers_in_worker(
+    layers: list[tuple[int, LayerNode]],
+) -> tuple[dict[int, list[tuple[CostModelEvaluation, Any]]], tuple[list[str], list[str]]]:
+    """! Run the substages for each of the given layers in a worker process
+    @param layers The layers, with their position in the workload
+    @return The results of the substages per layer id and the layer cache hits and misses
+    """
+    assert worker_substages is not None
+    list_of_callables, kwargs = worker_substages
+    layer_cache = kwargs.get("layer_cache")
+    if layer_cache is not None:
+        layer_cache.hits, layer_cache.misses = [], []
+
+    results: dict[int, list[tuple[CostModelEvaluation, Any]]] = {}
+    for layer_index, layer in layers:
+        layer_kwargs = kwargs.copy()
+        layer_kwargs["layer"] = layer
+        layer_kwargs["layer_index"] = layer_index
+        logger.info("Processing  %s...", layer.name)
+        sub_stage = list_of_callables[0](list_of_callables[1:], **layer_kwargs)
+        results[layer.id] = list(sub_stage.run())
+    cache_lookups = (layer_cache.hits, layer_cache.misses) if layer_cache is not None else ([], [])
+    return results, cache_lookups
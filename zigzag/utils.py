@@ -1,8 +1,12 @@
+import itertools
+import json
 import logging
+import os
 import pickle
 from copy import deepcopy
 from hashlib import sha512  # type: ignore
-from typing import Any, Generic, Iterator, Literal, Sequence, TypeVar, no_type_check, overload
+from json.encoder import encode_basestring_ascii  # type: ignore
+from typing import IO, Any, Callable, Generic, Iterable, Iterator, Literal, TypeVar, no_type_check, overload
 
 import networkx as nx
 import numpy as np
@@ -54,7 +58,8 @@ def json_repr_handler(obj: Any, simple: bool = False) -> Any:
     if isinstance(obj, np.int32):  # type: ignore
         return int(obj)  # type: ignore
     if hasattr(obj, attr):
-        return obj.__simplejsonrepr__() if simple else obj.__jsonrepr__()
+        # The representation can contain other objects, which are converted as well
+        return json_repr_handler(obj.__simplejsonrepr__() if simple else obj.__jsonrepr__(), simple)
 
     # Recursive calls
     if isinstance(obj, dict):
@@ -69,6 +74,205 @@ def json_repr_handler(obj: Any, simple: bool = False) -> Any:
     raise TypeError(f"Object of type {type(obj)} is not serializable. Create a {attr} method.")
 
 
+class JsonStreamWriter:
+    """! Writes objects to json files with the same representation as `json_repr_handler`, but incrementally: the
+    json representation of an object is only converted when it is written, so the complete tree of the converted
+    object is never built in memory. With the default indentation, the files are identical to those of `json.dump`.
+
+    Objects of the `shared_types` (e.g. the accelerator of the cost model evaluations) are only written once: the first
+    time as `{"$id": <key>, "value": <representation>}`, and after that (also in later files written by this writer)
+    as `{"$ref": <key>}`. Equal objects have the same key. `load_json_with_refs` replaces the references again.
+    """
+
+    ## Number of written chunks after which they are flushed to the file
+    FLUSH_SIZE = 8192
+
+    def __init__(self, indent: int | None = 4, shared_types: tuple[type, ...] = ()):
+        """
+        @param indent Indentation of the json files, as in `json.dump`. If None, the files are written without any
+        whitespace.
+        @param shared_types Types of the objects that are written once and referenced afterwards
+        """
+        self.indent = indent
+        self.shared_types = shared_types
+        self.key_separator = ":" if indent is None else ": "
+        ## Key of every written shared object, by object (or by id, if the object is not hashable)
+        self.shared_keys: dict[Any, str] = {}
+        # Keeps the unhashable shared objects alive, so that their id is not reused
+        self.unhashable_shared_objects: list[Any] = []
+        self.encoded_keys: dict[tuple[type, Any], str] = {}
+        ## Process that created the writer. Copies in other processes give their shared objects different keys.
+        self.pid = os.getpid()
+
+    def dump(self, obj: Any, fp: IO[str]) -> None:
+        chunks: list[str] = []
+        self.write(obj, chunks, fp, 0)
+        fp.write("".join(chunks))
+
+    def write(self, obj: Any, chunks: list[str], fp: IO[str], depth: int) -> None:
+        if len(chunks) >= JsonStreamWriter.FLUSH_SIZE:
+            fp.write("".join(chunks))
+            chunks.clear()
+
+        if isinstance(obj, str):
+            chunks.append(encode_basestring_ascii(obj))
+        elif obj is None or isinstance(obj, bool | int | float | np.int32):
+            chunks.append(self.encode_constant(obj))
+        elif isinstance(obj, self.shared_types):
+            self.write_shared(obj, chunks, fp, depth)
+        elif hasattr(obj, "__jsonrepr__"):
+            self.write(obj.__jsonrepr__(), chunks, fp, depth)
+        elif isinstance(obj, dict):
+            self.write_container(obj, True, chunks, fp, depth)  # type: ignore
+        elif isinstance(obj, list | tuple | set):
+            self.write_container(obj, False, chunks, fp, depth)  # type: ignore
+        else:
+            raise TypeError(f"Object of type {type(obj)} is not serializable. Create a __jsonrepr__ method.")
+
+    def write_container(
+        self,
+        obj: dict[Any, Any] | list[Any] | tuple[Any, ...] | set[Any],
+        is_dict: bool,
+        chunks: list[str],
+        fp: IO[str],
+        depth: int,
+    ) -> None:
+        """! Write a dict as json object, or a list, tuple or set as json array"""
+        opening, closing = ("{", "}") if is_dict else ("[", "]")
+        if not obj:
+            chunks.append(opening + closing)
+            return
+        if self.indent is None:
+            separator, closing_newline = ",", ""
+            chunks.append(opening)
+        else:
+            separator = ",\n" + " " * (self.indent * (depth + 1))
+            closing_newline = "\n" + " " * (self.indent * depth)
+            chunks.append(opening + separator[1:])
+        items = obj.items() if is_dict else zip(itertools.repeat(None), obj)  # type: ignore
+        is_first = True
+        for key, value in items:
+            if not is_first:
+                chunks.append(separator)
+            is_first = False
+            if is_dict:
+                chunks.append(self.encode_key(key))
+                chunks.append(self.key_separator)
+            # Most values are strings and numbers, which are encoded here instead of in a recursive call
+            leaf_encoder = LEAF_ENCODERS.get(value.__class__)
+            if leaf_encoder is not None:
+                chunks.append(leaf_encoder(value))
+            else:
+                self.write(value, chunks, fp, depth + 1)
+        chunks.append(closing_newline + closing)
+
+    def write_shared(self, obj: Any, chunks: list[str], fp: IO[str], depth: int) -> None:
+        try:
+            lookup_key = obj
+            shared_key = self.shared_keys.get(lookup_key)
+        except TypeError:
+            lookup_key = id(obj)
+            shared_key = self.shared_keys.get(lookup_key)
+        if shared_key is not None:
+            self.write({"$ref": shared_key}, chunks, fp, depth)
+            return
+
+        process_suffix = "" if os.getpid() == self.pid else f"_{os.getpid()}"
+        shared_key = f"{type(obj).__name__}_{len(self.shared_keys)}{process_suffix}"
+        self.shared_keys[lookup_key] = shared_key
+        if lookup_key is not obj:
+            self.unhashable_shared_objects.append(obj)
+        self.write({"$id": shared_key, "value": obj.__jsonrepr__()}, chunks, fp, depth)
+
+    @staticmethod
+    def encode_constant(obj: None | bool | int | float) -> str:
+        if obj is None:
+            return "null"
+        if obj is True:
+            return "true"
+        if obj is False:
+            return "false"
+        if isinstance(obj, float):
+            if obj != obj:
+                return "NaN"
+            if obj in (float("inf"), float("-inf")):
+                return "Infinity" if obj > 0 else "-Infinity"
+            return float.__repr__(obj)
+        return int.__repr__(int(obj))
+
+    def encode_key(self, key: Any) -> str:
+        """! Encode a dict key as `json.dump` does after the conversion of `json_repr_handler`"""
+        if key.__class__ is str:
+            return encode_basestring_ascii(key)
+        # Keys are mostly operands and dimensions, of which the encoding is cached
+        cache_key = (key.__class__, key)
+        encoded_key = self.encoded_keys.get(cache_key)
+        if encoded_key is None:
+            encoded_key = self.encoded_keys[cache_key] = self.encode_new_key(key)
+        return encoded_key
+
+    def encode_new_key(self, key: Any) -> str:
+        if hasattr(key, "__jsonrepr__"):
+            key = json_repr_handler(key)
+        if isinstance(key, str):
+            return encode_basestring_ascii(key)
+        if key is None or isinstance(key, bool | int | float):
+            return encode_basestring_ascii(self.encode_constant(key))
+        raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def encode_float(obj: float) -> str:
+    if obj != obj or obj in (float("inf"), float("-inf")):
+        return JsonStreamWriter.encode_constant(obj)
+    return float.__repr__(obj)
+
+
+## Encoders of the values of exactly these types, as in `json.dump`
+LEAF_ENCODERS: dict[type, Callable[[Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: encode_float,
+    bool: lambda obj: "true" if obj else "false",
+    type(None): lambda _: "null",
+}
+
+
+def load_json_with_refs(paths: list[str]) -> list[Any]:
+    """! Load the given json files, written by a `JsonStreamWriter`, and replace the references to shared objects by
+    the objects. The shared objects can be defined in any of the files."""
+    documents: list[Any] = []
+    for path in paths:
+        with open(path, encoding="UTF-8") as fp:
+            documents.append(json.load(fp))
+
+    definitions: dict[str, Any] = {}
+
+    def collect_definitions(data: Any) -> None:
+        if isinstance(data, dict):
+            if "$id" in data and len(data) == 2 and "value" in data:  # type: ignore
+                definitions[data["$id"]] = data["value"]
+            for value in data.values():  # type: ignore
+                collect_definitions(value)
+        elif isinstance(data, list):
+            for value in data:  # type: ignore
+                collect_definitions(value)
+
+    def resolve(data: Any) -> Any:
+        if isinstance(data, dict):
+            if len(data) == 1 and "$ref" in data:  # type: ignore
+                return resolve(definitions[data["$ref"]])
+            if len(data) == 2 and "$id" in data and "value" in data:  # type: ignore
+                return resolve(data["value"])
+            return {key: resolve(value) for key, value in data.items()}  # type: ignore
+        if isinstance(data, list):
+            return [resolve(value) for value in data]  # type: ignore
+        return data
+
+    for document in documents:
+        collect_definitions(document)
+    return [resolve(document) for document in documents]
+
+
 class UniqueMessageFilter(logging.Filter):
     """! Prevents the logger from filtering duplicate messages"""
 
@@ -155,7 +359,7 @@ class DiGraphWrapper(Generic[T], DiGraph):
     def add_node(self, node: T) -> None:  # type: ignore # pylint: disable=W0246
         super().add_node(node)  # type: ignore
 
-    def add_nodes_from(self, node: Sequence[T]) -> None:  # pylint: disable=W0246
+    def add_nodes_from(self, node: Iterable[T]) -> None:  # pylint: disable=W0246
         super().add_nodes_from(node)  # type: ignore
 
     def remove_nodes_from(self, nodes: Iterator[T]) -> None:  # pylint: disable=W0246
@@ -166,7 +370,7 @@ class DiGraphWrapper(Generic[T], DiGraph):
 
     def add_edges_from(  # type: ignore # pylint: disable=W0246
         self,
-        edges: Sequence[tuple[T, T] | tuple[T, T, Any]],
+        edges: Iterable[tuple[T, T] | tuple[T, T, Any]],
     ) -> None:
         super().add_edges_from(edges)  # type: ignore
 
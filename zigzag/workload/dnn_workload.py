@@ -1,4 +1,3 @@
-from copy import deepcopy
 from typing import Any
 
 from zigzag.workload.layer_node import LayerNode
@@ -33,5 +32,10 @@ class DNNWorkload(WorkloadNoDummyABC):
             self.add_edges_from(edges)
 
     def get_copy_no_dummy(self) -> "DNNWorkload":
-        """Return a copy. DNNWorkloads don't contain DummyNodes in the first place."""
-        return deepcopy(self)
+        """Return a copy of the graph structure, with the same LayerNode objects. DNNWorkloads don't contain DummyNodes
+        in the first place."""
+        workload_copy = DNNWorkload([], **self.graph)
+        workload_copy.add_nodes_from(self.node_list)
+        workload_copy.add_edges_from(list(self.edges()))
+        workload_copy.layer_node_list = list(self.layer_node_list)
+        return workload_copy
@@ -1,8 +1,6 @@
 from abc import ABCMeta, abstractmethod
 from typing import Any, Iterator
 
-from zigzag.utils import json_repr_handler
-
 
 class LayerAttribute(metaclass=ABCMeta):
     """! Abstract Base Class to represent any layer attribute"""
@@ -30,7 +28,7 @@ class LayerAttribute(metaclass=ABCMeta):
         return str(self.data)
 
     def __jsonrepr__(self) -> Any:
-        return json_repr_handler(self.data)
+        return self.data
 
     def __eq__(self, other: object):
         return isinstance(other, LayerAttribute) and self.data == other.data
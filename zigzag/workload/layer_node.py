@@ -1,5 +1,5 @@
 import logging
-from copy import deepcopy
+from copy import copy, deepcopy
 from dataclasses import dataclass
 from math import gcd, prod
 
@@ -12,7 +12,6 @@ from zigzag.datatypes import (
     UnrollFactor,
 )
 from zigzag.mapping.spatial_mapping import SpatialMapping, SpatialMappingHint
-from zigzag.utils import json_repr_handler
 from zigzag.workload.layer_attributes import (
     InputOperandSource,
     LayerDimRelation,
@@ -237,6 +236,25 @@ class LayerNode(LayerNodeABC):
             weight_layer_op = [x for x in self.constant_operands if x != act_layer_op].pop()
         return weight_layer_op
 
+    def create_identical(
+        self,
+        layer_id: int,
+        node_name: str,
+        input_operand_source: InputOperandSource,
+        mapping_attr: MappingAttributes,
+    ) -> "LayerNode":
+        """! Create a layer that is structurally identical to this one, with another id, name, operand sources and
+        mapping. All other (derived) attributes, e.g. the layer dim sizes and loop relevancy info, are shared with this
+        layer instead of being recomputed, so they must not be modified in place."""
+        layer = copy(self)
+        LayerNodeABC.__init__(layer, node_id=layer_id, node_name=node_name)
+        layer.input_operand_source = input_operand_source
+        layer.spatial_mapping = mapping_attr.spatial_mapping
+        layer.spatial_mapping_hint = mapping_attr.spatial_mapping_hint
+        layer.memory_operand_links = mapping_attr.memory_operand_links
+        layer.temporal_ordering = mapping_attr.temporal_ordering
+        return layer
+
     def build_pr_funcs(self) -> tuple[PrLoop, LoopList, PrScalingFactors]:
         """!
         # TODO requires documentation
@@ -251,18 +269,16 @@ class LayerNode(LayerNodeABC):
 
     def __jsonrepr__(self):
         """! JSON representation used for saving this object to a json file."""
-        return json_repr_handler(
-            {
-                "name": self.name,
-                "type": self.type,
-                "equation": self.equation,
-                "equation_relations": self.dimension_relations,
-                "loop_dimensions": self.layer_dim_sizes,
-                "operand_precision": self.operand_precision,
-                "user_spatial_mapping": self.spatial_mapping,
-                "memory_operand_links": self.memory_operand_links,
-            }
-        )
+        return {
+            "name": self.name,
+            "type": self.type,
+            "equation": self.equation,
+            "equation_relations": self.dimension_relations,
+            "loop_dimensions": self.layer_dim_sizes,
+            "operand_precision": self.operand_precision,
+            "user_spatial_mapping": self.spatial_mapping,
+            "memory_operand_links": self.memory_operand_links,
+        }
 
     def calc_tensor_size(self, layer_op: LayerOperand, layer_dim_sizes: LayerDimSizes) -> float:
         """! Calculates the tensor size (nb of elements) for the given operand layer_op with the given loop dimension
@@ -1,4 +1,3 @@
-from copy import deepcopy
 from typing import Any
 
 from typeguard import typeguard_ignore
@@ -29,15 +28,17 @@ class ONNXWorkload(WorkloadABC):
         for parent_id in node_obj.input_operand_source.values():
             parent_node_obj = self.node_id_to_obj[parent_id]
             edges.append((parent_node_obj, node_obj))
-            self.add_edges_from(edges)
+        self.add_edges_from(edges)
 
     @typeguard_ignore
     def get_copy_no_dummy(self) -> WorkloadNoDummyABC:
         """! Remove dummy nodes (layers) in the graph
         Redirect the outgoing edges of dummy nodes to non-dummy nodes Method: for each dummy node, add edges between its
         predecessor nodes and successor nodes; then remove the dummy node.
+        Only the graph structure is copied, in O(V+E): the copy holds the same LayerNode objects as this workload.
         """
-        workload_copy = deepcopy(self)
+        workload_copy: ONNXWorkload = self.copy()  # type: ignore
+        workload_copy.node_id_to_obj = self.node_id_to_obj.copy()
 
         dummy_nodes = [node for node in workload_copy.node_list if isinstance(node, DummyNode)]
         for dummy_node in dummy_nodes: